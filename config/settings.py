@@ -6,6 +6,7 @@ class Config:
     
     # HubSpot API
     HUBSPOT_API_KEY = os.environ.get('HUBSPOT_API_KEY', '')
+    HUBSPOT_API_BASE = os.environ.get('HUBSPOT_API_BASE', 'https://api.hubapi.com')  # Lokal simülatör için override
     
     # Email Configuration - Google Cloud'dan
     EMAIL_CONFIG = {
@@ -13,20 +14,122 @@ class Config:
         'smtp_port': int(os.environ.get('SMTP_PORT', '587')),
         'user': os.environ.get('EMAIL_USER', ''),  # info@britishglobal.com.tr
         'password': os.environ.get('EMAIL_PASSWORD', ''),  # Google Cloud'dan
-        'from_name': 'British Global'
+        'from_name': 'British Global',
+        'timeout': float(os.environ.get('SMTP_TIMEOUT', '20')),  # seconds - connect + soket işlemleri
+        'tls_verify': os.environ.get('SMTP_TLS_VERIFY', 'true').lower() != 'false',  # async_smtp sertifika doğrulaması
+        # smtp | async_smtp | smtp_fallback | sendmail | http | file - virgüllü liste failover zinciri kurar
+        'transport': os.environ.get('EMAIL_TRANSPORT', 'smtp'),
+        'failover_strategy': os.environ.get('EMAIL_FAILOVER_STRATEGY', 'ordered'),  # ordered | weighted (sağlık ağırlıklı)
+        'failover_cooldown': float(os.environ.get('EMAIL_FAILOVER_COOLDOWN', '30')),  # seconds - 3 ardışık hatadan sonra
+        'fallback_smtp': {  # smtp_fallback - boş alanlar birincil hesaptan
+            'smtp_server': os.environ.get('SMTP_FALLBACK_SERVER', ''),
+            'smtp_port': int(os.environ.get('SMTP_FALLBACK_PORT', '0')),
+            'user': os.environ.get('SMTP_FALLBACK_USER', ''),
+            'password': os.environ.get('SMTP_FALLBACK_PASSWORD', '')
+        },
+        'sendmail_path': os.environ.get('SENDMAIL_PATH', '/usr/sbin/sendmail'),
+        'http_api_url': os.environ.get('EMAIL_API_URL', ''),  # raw MIME kabul eden email API'si
+        'http_api_key': os.environ.get('EMAIL_API_KEY', ''),
+        'file_path': os.environ.get('EMAIL_FILE_PATH', '/tmp/britishglobal-mail'),  # staging sink
+        'file_format': os.environ.get('EMAIL_FILE_FORMAT', 'eml'),  # eml | maildir
+        # Gönderici hesap rotasyonu - 'user:app-password' virgüllü liste, EMAIL_USER her zaman dahil
+        'accounts': [a for a in os.environ.get('EMAIL_ACCOUNTS', '').split(',') if a.strip()],
+        # Kota defteri - aynı instance'taki worker'lar arası paylaşılan SQLite ('' kapatır)
+        'quota_db': os.environ.get('EMAIL_QUOTA_DB', '/tmp/britishglobal-email-quota.sqlite3'),
+        # Defter instance'a özel: hesap limitleri bu sayıya bölünür - deploy --max-instances ile aynı değeri verir
+        'quota_instances': int(os.environ.get('EMAIL_QUOTA_INSTANCES', '1')),
+        'quota_limits': {  # hesap başına, Google Workspace varsayılanları
+            'minute_messages': int(os.environ.get('EMAIL_MINUTE_MESSAGE_LIMIT', '60')),
+            'day_messages': int(os.environ.get('EMAIL_DAILY_MESSAGE_LIMIT', '2000')),
+            'day_recipients': int(os.environ.get('EMAIL_DAILY_RECIPIENT_LIMIT', '10000'))
+        },
+        'quota_low_priority_ratio': float(os.environ.get('EMAIL_LOW_PRIORITY_RATIO', '0.8')),  # digest/hatırlatma bu orandan sonra ertelenir
+        # Bildirim digest'i - kategoriler virgüllü (boş = kapalı), alıcı listesi boşsa kategorinin tüm alıcıları
+        'digest_categories': [c.strip() for c in os.environ.get('EMAIL_DIGEST_CATEGORIES', '').split(',') if c.strip()],
+        'digest_recipients': [r.strip() for r in os.environ.get('EMAIL_DIGEST_RECIPIENTS', '').split(',') if r.strip()],
+        'digest_window': float(os.environ.get('EMAIL_DIGEST_WINDOW', '300')),  # seconds - ilk bildirimden özete
+        'digest_max_items': int(os.environ.get('EMAIL_DIGEST_MAX_ITEMS', '50')),
+        'digest_db': os.environ.get('EMAIL_DIGEST_DB', '/tmp/britishglobal-digest.sqlite3')
+    }
+    
+    # Onay maili ekleri - kategori başına virgüllü dosya yolları (broşür, belge kontrol listesi)
+    CONFIRMATION_ATTACHMENTS = {
+        category: [p.strip() for p in os.environ.get(f'{category.upper()}_ATTACHMENTS', '').split(',') if p.strip()]
+        for category in ('education', 'legal', 'business')
     }
     
     # Email Recipients - Google Cloud'dan
     ADMIN_EMAIL = os.environ.get('ADMIN_EMAIL', '')
     EDUCATION_PARTNER_EMAIL = os.environ.get('EDUCATION_PARTNER_EMAIL', '')
     LEGAL_PARTNER_EMAIL = os.environ.get('LEGAL_PARTNER_EMAIL', '')
+    FALLBACK_EMAIL = os.environ.get('FALLBACK_EMAIL', 'info@britishglobal.com.tr')  # hiç alıcı tanımlı değilse
+    # Ek routing kuralları - 'kategori/öncelik/hizmet=adres,adres;...' ('*' joker), örn. 'legal/*/vize_red=vize@partner.com'
+    EMAIL_ROUTES = os.environ.get('EMAIL_ROUTES', '')
     
     # Business specific settings
     BUSINESS_MEETING_LINK = os.environ.get('BUSINESS_MEETING_LINK', 'https://calendly.com/britishglobal/business-consultation')
     
     # System settings
     DUPLICATE_PREVENTION = True
-    WEBHOOK_TIMEOUT = 30  # seconds
+    WEBHOOK_TIMEOUT = int(os.environ.get('WEBHOOK_TIMEOUT', '30'))  # seconds - gönderim başına toplam bütçe
+    BACKGROUND_TASK_TIMEOUT = int(os.environ.get('BACKGROUND_TASK_TIMEOUT', '120'))  # seconds - ertelenen adım başına
+    BACKGROUND_QUEUE_SIZE = int(os.environ.get('BACKGROUND_QUEUE_SIZE', '100'))
+    PENDING_RESUME_INTERVAL = float(os.environ.get('PENDING_RESUME_INTERVAL', '30'))  # seconds - ertelenmiş gönderim taraması
+    PENDING_MAX_ATTEMPTS = int(os.environ.get('PENDING_MAX_ATTEMPTS', '8'))  # sonra CHECKPOINT_DB'de dead olarak kalır
+    READINESS_CHECK_INTERVAL = int(os.environ.get('READINESS_CHECK_INTERVAL', '30'))  # seconds
+    
+    # Admission control - worker başına eşzamanlı pipeline limiti
+    ADMISSION_MAX_INFLIGHT = int(os.environ.get('ADMISSION_MAX_INFLIGHT', '3'))  # threads=4, 1 thread probe'lara kalır
+    ADMISSION_MAX_WAITING = int(os.environ.get('ADMISSION_MAX_WAITING', '4'))
+    ADMISSION_WAIT_TIMEOUT = float(os.environ.get('ADMISSION_WAIT_TIMEOUT', '0.5'))  # seconds
+    ADMISSION_OVERFLOW = os.environ.get('ADMISSION_OVERFLOW', 'reject')  # reject | spool
+    SPOOL_DIR = os.environ.get('SPOOL_DIR', '/tmp/britishglobal-spool')
+    SPOOL_MAX_DEPTH = int(os.environ.get('SPOOL_MAX_DEPTH', '1000'))
+    SPOOL_RETRY_DELAY = float(os.environ.get('SPOOL_RETRY_DELAY', '5'))  # seconds - her başarısızlıkta iki katına çıkar
+    SPOOL_MAX_RETRY_DELAY = float(os.environ.get('SPOOL_MAX_RETRY_DELAY', '300'))  # seconds
+    SPOOL_MAX_ATTEMPTS = int(os.environ.get('SPOOL_MAX_ATTEMPTS', '8'))  # sonra SPOOL_DIR/dead altına taşınır
+    
+    # Tally webhook imzası - virgüllü secret listesi, rotasyonda yeni secret başa ('' doğrulamayı kapatır)
+    TALLY_SIGNING_SECRETS = [s.strip() for s in os.environ.get('TALLY_SIGNING_SECRETS', '').split(',') if s.strip()]
+    
+    # Validation gate - dış çağrılardan önce ucuz kontrol (reject: 400, quarantine: yöneticiye inceleme maili)
+    VALIDATION_GATE = os.environ.get('VALIDATION_GATE', 'true').lower() == 'true'
+    VALIDATION_MAX_BODY_BYTES = int(os.environ.get('VALIDATION_MAX_BODY_BYTES', '65536'))
+    VALIDATION_MAX_FIELDS = int(os.environ.get('VALIDATION_MAX_FIELDS', '200'))
+    VALIDATION_MAX_VALUE_LENGTH = int(os.environ.get('VALIDATION_MAX_VALUE_LENGTH', '10000'))
+    VALIDATION_QUARANTINE = [r.strip() for r in os.environ.get('VALIDATION_QUARANTINE', 'missing_contact').split(',') if r.strip()]
+    
+    # Spam/bot filtresi - HubSpot ve email adımlarından önce
+    SPAM_FILTER = os.environ.get('SPAM_FILTER', 'true').lower() == 'true'
+    SPAM_HONEYPOT_FIELDS = [f.strip() for f in os.environ.get('SPAM_HONEYPOT_FIELDS', '').split(',') if f.strip()]  # Tally gizli alan label/key
+    SPAM_DISPOSABLE_DOMAINS_FILE = os.environ.get('SPAM_DISPOSABLE_DOMAINS_FILE', '')  # yerleşik listeye eklenir
+    SPAM_EMAIL_LIMIT = int(os.environ.get('SPAM_EMAIL_LIMIT', '5'))  # email başına, pencere içinde (0 kapatır)
+    SPAM_EMAIL_WINDOW = int(os.environ.get('SPAM_EMAIL_WINDOW', '3600'))  # seconds
+    SPAM_IP_LIMIT = int(os.environ.get('SPAM_IP_LIMIT', '120'))  # webhook'u çağıran IP - imzası doğrulanan (Tally) isteklere uygulanmaz
+    SPAM_IP_WINDOW = int(os.environ.get('SPAM_IP_WINDOW', '60'))  # seconds
+    SPAM_DUPLICATE_THRESHOLD = float(os.environ.get('SPAM_DUPLICATE_THRESHOLD', '0.8'))  # notes benzerliği (Jaccard)
+    SPAM_DUPLICATE_SENDERS = int(os.environ.get('SPAM_DUPLICATE_SENDERS', '5'))  # aynı metin bu kadar farklı adresten (0 kapatır)
+    SPAM_MIN_NOTES_WORDS = int(os.environ.get('SPAM_MIN_NOTES_WORDS', '20'))  # kısa kalıp cümleler gerçek başvurularda da tekrarlanır
+    
+    # Adım checkpoint'leri - retry'da sadece eksik yan etkiler tekrarlanır
+    CHECKPOINT_DB = os.environ.get('CHECKPOINT_DB', '/tmp/britishglobal-checkpoints.sqlite3')
+    CHECKPOINT_RETENTION_DAYS = float(os.environ.get('CHECKPOINT_RETENTION_DAYS', '7'))
+    
+    # Yerel contact mirror - dönen lead'lerde search yerine doğrudan ID ('' kapatır)
+    CONTACT_MIRROR_DB = os.environ.get('CONTACT_MIRROR_DB', '/tmp/britishglobal-contacts.sqlite3')
+    CONTACT_MIRROR_SYNC_INTERVAL = int(os.environ.get('CONTACT_MIRROR_SYNC_INTERVAL', '300'))  # seconds, 0 = sync yok
+    CONTACT_MIRROR_LRU_SIZE = int(os.environ.get('CONTACT_MIRROR_LRU_SIZE', '2048'))
+    
+    # HubSpot contact property tanımları - disk cache ('' sadece bellekte tutar)
+    HUBSPOT_SCHEMA_CACHE = os.environ.get('HUBSPOT_SCHEMA_CACHE', '/tmp/britishglobal-hubspot-schema.json')
+    HUBSPOT_SCHEMA_TTL = int(os.environ.get('HUBSPOT_SCHEMA_TTL', '86400'))  # seconds
+    
+    # Ham webhook günlüğü - backfill/replay için ('' kapatır)
+    JOURNAL_DIR = os.environ.get('JOURNAL_DIR', '/tmp/britishglobal-journal')
+    JOURNAL_SEGMENT_MAX_MB = int(os.environ.get('JOURNAL_SEGMENT_MAX_MB', '64'))
+    JOURNAL_SEGMENT_MAX_AGE = int(os.environ.get('JOURNAL_SEGMENT_MAX_AGE', '3600'))  # seconds
+    JOURNAL_RETENTION_DAYS = float(os.environ.get('JOURNAL_RETENTION_DAYS', '7'))
+    JOURNAL_MAX_TOTAL_MB = int(os.environ.get('JOURNAL_MAX_TOTAL_MB', '256'))  # /tmp bellekte - en eski segment'ler silinir (0 = sınırsız)
     
     @classmethod
     def validate_config(cls) -> List[str]:
@@ -50,21 +153,9 @@ class Config:
     
     @classmethod 
     def get_email_recipients(cls, category: str) -> List[str]:
-        """Kategori bazlı email alıcıları"""
-        recipients = []
-        
-        # Admin her zaman alır
-        if cls.ADMIN_EMAIL:
-            recipients.append(cls.ADMIN_EMAIL)
-        
-        # Kategori bazlı partnerler
-        if category == 'education' and cls.EDUCATION_PARTNER_EMAIL:
-            recipients.append(cls.EDUCATION_PARTNER_EMAIL)
-        elif category == 'legal' and cls.LEGAL_PARTNER_EMAIL:
-            recipients.append(cls.LEGAL_PARTNER_EMAIL)
-        # Business sadece admin'e gider
-        
-        return recipients
+        """Kategori bazlı email alıcıları - email servislerinin kullandığı routing tablosundan"""
+        from email_services.routing import get_routing_table
+        return get_routing_table().recipients(category)
     
     @classmethod
     def get_category_config(cls, category: str) -> Dict:
@@ -119,6 +210,7 @@ class Config:
             "email_password_length": len(cls.EMAIL_CONFIG['password']) if cls.EMAIL_CONFIG['password'] else 0,
             "smtp_server": cls.EMAIL_CONFIG['smtp_server'],
             "smtp_port": cls.EMAIL_CONFIG['smtp_port'],
+            "email_transport": cls.EMAIL_CONFIG['transport'],
             "admin_email": cls.ADMIN_EMAIL or "Not configured",
             "education_partner": cls.EDUCATION_PARTNER_EMAIL or "Not configured",
             "legal_partner": cls.LEGAL_PARTNER_EMAIL or "Not configured",
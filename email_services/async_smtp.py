@@ -0,0 +1,423 @@
+import os
+import re
+import ssl
+import time
+import base64
+import socket
+import asyncio
+import logging
+import smtplib
+import threading
+from contextlib import asynccontextmanager
+from typing import Dict, List, Optional, Tuple
+
+from utils.event_loop import WorkerEventLoop, get_worker_loop
+from utils.logging_setup import HOT, mask_email
+from .transports import EmailTransport
+
+logger = logging.getLogger(__name__)
+
+# Satır başındaki nokta DATA sonu sanılmasın (RFC 5321 4.5.2)
+_DOT_STUFF = re.compile(rb'^\.', re.MULTILINE)
+
+_local_hostname = None
+
+
+def _get_local_hostname() -> str:
+    # getfqdn DNS sorgusu yapabilir - süreç başına bir kez
+    global _local_hostname
+    if _local_hostname is None:
+        _local_hostname = socket.getfqdn() or 'localhost'
+    return _local_hostname
+
+
+def _ssl_context(config: Dict) -> ssl.SSLContext:
+    context = ssl.create_default_context()
+    if not config.get('tls_verify', True):
+        # Lokal simülatör (self-signed sertifika)
+        context.check_hostname = False
+        context.verify_mode = ssl.CERT_NONE
+    return context
+
+
+class AsyncSMTPConnection:
+    """Tek asyncio SMTP oturumu - EHLO/STARTTLS/AUTH ve PIPELINING'li gönderim
+
+    Sunucu PIPELINING ilan ederse MAIL FROM, tüm RCPT TO'lar ve DATA tek
+    yazımda gönderilir, yanıtlar birlikte okunur (RFC 2920); mesaj başına
+    round trip sayısı 2'ye iner. Hatalar smtplib istisnalarıyla bildirilir.
+    """
+
+    def __init__(self, host: str, port: int, timeout: float = 30.0, ssl_context: Optional[ssl.SSLContext] = None):
+        self.host = host
+        self.port = port
+        self.timeout = timeout
+        self.ssl_context = ssl_context or ssl.create_default_context()
+        self.reader = None
+        self.writer = None
+        self.extensions = {}
+        self.last_used = time.monotonic()
+        self.broken = False
+
+    @property
+    def pipelining(self) -> bool:
+        return 'pipelining' in self.extensions
+
+    async def _read_reply(self, timeout: Optional[float] = None) -> Tuple[int, str]:
+        """Çok satırlı yanıtı oku - (kod, metin)"""
+
+        lines = []
+        while True:
+            line = await asyncio.wait_for(self.reader.readline(), timeout or self.timeout)
+            if not line:
+                self.broken = True
+                raise smtplib.SMTPServerDisconnected("Connection unexpectedly closed")
+            text = line.decode('utf-8', 'replace').rstrip('\r\n')
+            lines.append(text[4:])
+            if len(text) < 4 or text[3] != '-':
+                try:
+                    code = int(text[:3])
+                except ValueError:
+                    self.broken = True
+                    raise smtplib.SMTPResponseException(-1, f"Malformed reply: {text!r}")
+                if code == 421:
+                    self.broken = True  # Sunucu bağlantıyı kapatıyor
+                return code, '\n'.join(lines)
+
+    async def _write(self, data: bytes):
+        self.writer.write(data)
+        await asyncio.wait_for(self.writer.drain(), self.timeout)
+
+    async def command(self, line: str, timeout: Optional[float] = None) -> Tuple[int, str]:
+        await self._write(line.encode('utf-8') + b'\r\n')
+        return await self._read_reply(timeout)
+
+    async def _ehlo(self):
+        code, text = await self.command(f"EHLO {_get_local_hostname()}")
+        if code != 250:
+            raise smtplib.SMTPHeloError(code, text)
+        self.extensions = {}
+        for line in text.split('\n')[1:]:
+            keyword, _, params = line.partition(' ')
+            self.extensions[keyword.lower()] = params
+
+    async def _starttls(self):
+        code, text = await self.command("STARTTLS")
+        if code != 220:
+            raise smtplib.SMTPResponseException(code, text)
+
+        if hasattr(self.writer, 'start_tls'):
+            await asyncio.wait_for(self.writer.start_tls(self.ssl_context, server_hostname=self.host), self.timeout)
+        else:
+            # Python 3.10: StreamWriter.start_tls yok - transport'u elle yükselt
+            loop = asyncio.get_running_loop()
+            protocol = self.writer.transport.get_protocol()
+            transport = await asyncio.wait_for(
+                loop.start_tls(self.writer.transport, protocol, self.ssl_context, server_hostname=self.host),
+                self.timeout
+            )
+            self.writer._transport = transport
+            self.reader._transport = transport
+            protocol._transport = transport
+
+    async def connect(self, user: str = '', password: str = '', starttls: bool = True):
+        self.reader, self.writer = await asyncio.wait_for(
+            asyncio.open_connection(self.host, self.port), self.timeout
+        )
+        code, text = await self._read_reply()
+        if code != 220:
+            raise smtplib.SMTPConnectError(code, text)
+
+        await self._ehlo()
+        if starttls and 'starttls' in self.extensions:
+            await self._starttls()
+            await self._ehlo()
+
+        if user:
+            if 'auth' not in self.extensions:
+                raise smtplib.SMTPNotSupportedError("SMTP AUTH extension not supported by server.")
+            token = base64.b64encode(f"\0{user}\0{password}".encode('utf-8')).decode('ascii')
+            code, text = await self.command(f"AUTH PLAIN {token}")
+            if code != 235:
+                raise smtplib.SMTPAuthenticationError(code, text)
+
+    async def send_message(self, mail_from: str, recipients: List[str], data: bytes,
+                           timeout: Optional[float] = None) -> Dict[str, Tuple[int, str]]:
+        """Tek mesajı gönder - kabul edilmeyen alıcılar {alıcı: (kod, metin)} olarak döner
+
+        Hiçbir alıcı kabul edilmezse smtplib.SMTPRecipientsRefused yükselir.
+        """
+
+        commands = [f"MAIL FROM:<{mail_from}>"] + [f"RCPT TO:<{r}>" for r in recipients] + ["DATA"]
+
+        if self.pipelining:
+            await self._write(''.join(c + '\r\n' for c in commands).encode('utf-8'))
+            replies = [await self._read_reply(timeout) for _ in commands]
+        else:
+            replies = []
+            for command in commands:
+                replies.append(await self.command(command, timeout))
+                if len(replies) == 1 and replies[0][0] != 250:
+                    break
+                if command == commands[-2] and not any(code in (250, 251) for code, _ in replies[1:]):
+                    break  # Hiçbir alıcı kabul edilmedi - DATA'ya geçme
+
+        mail_reply = replies[0]
+        rcpt_replies = replies[1:1 + len(recipients)]
+        data_reply = replies[1 + len(recipients)] if len(replies) > len(recipients) + 1 else None
+        refused = {r: reply for r, reply in zip(recipients, rcpt_replies) if reply[0] not in (250, 251)}
+
+        if data_reply is not None and data_reply[0] == 354:
+            if mail_reply[0] != 250 or len(refused) == len(recipients):
+                # Pipelining'de DATA kabul edildi ama gönderilecek alıcı yok - boş gövdeyle kapat
+                await self._write(b'.\r\n')
+                await self._read_reply(timeout)
+            else:
+                body = _DOT_STUFF.sub(b'..', data)
+                if not body.endswith(b'\r\n'):
+                    body += b'\r\n'
+                await self._write(body + b'.\r\n')
+                code, text = await self._read_reply(timeout)
+                self.last_used = time.monotonic()
+                if code != 250:
+                    await self._reset()
+                    raise smtplib.SMTPDataError(code, text)
+                return refused
+
+        await self._reset()
+        if mail_reply[0] != 250:
+            raise smtplib.SMTPSenderRefused(mail_reply[0], mail_reply[1], mail_from)
+        if len(refused) == len(recipients):
+            raise smtplib.SMTPRecipientsRefused(refused)
+        raise smtplib.SMTPDataError(*data_reply) if data_reply else smtplib.SMTPDataError(-1, "DATA not sent")
+
+    async def _reset(self):
+        if not self.broken:
+            try:
+                await self.command("RSET")
+            except Exception:
+                self.broken = True
+
+    async def noop(self) -> int:
+        code, _ = await self.command("NOOP")
+        return code
+
+    async def quit(self):
+        try:
+            if not self.broken:
+                await self.command("QUIT", timeout=5)
+        except Exception:
+            pass
+        self.close()
+
+    def close(self):
+        self.broken = True
+        if self.writer is not None:
+            try:
+                self.writer.close()
+            except Exception:
+                pass
+
+
+class AsyncSMTPPool:
+    """Login olmuş asyncio SMTP bağlantıları - SMTPConnectionPool'un async karşılığı
+
+    Tek event loop'a bağlıdır; fork sonrası parent'ın bağlantıları bırakılır.
+    """
+
+    def __init__(self, config: Dict, max_size: int = 4, idle_timeout: float = 60.0,
+                 validate_after: float = 10.0, timeout: float = 30.0):
+        self.config = config
+        self.max_size = max_size
+        self.idle_timeout = idle_timeout
+        self.validate_after = validate_after
+        self.timeout = timeout
+        self.ssl_context = _ssl_context(config)
+
+        self._idle = []
+        self._slots = None
+        self._pid = None
+        self.stats = {"created": 0, "reused": 0, "discarded": 0, "messages": 0, "pipelined": 0}
+
+    def _ensure_state(self):
+        if self._slots is None or self._pid != os.getpid():
+            self._idle = []
+            self._slots = asyncio.Semaphore(self.max_size)
+            self._pid = os.getpid()
+
+    async def _connect(self, timeout: float) -> AsyncSMTPConnection:
+        conn = AsyncSMTPConnection(self.config['smtp_server'], self.config['smtp_port'],
+                                   timeout=timeout, ssl_context=self.ssl_context)
+        try:
+            await conn.connect(self.config.get('user', ''), self.config.get('password', ''))
+        except BaseException:
+            conn.close()
+            raise
+        self.stats["created"] += 1
+        logger.info("Async SMTP connected: %s (pipelining=%s)", mask_email(self.config.get('user', '')),
+                    conn.pipelining)
+        return conn
+
+    async def _take_idle(self) -> Optional[AsyncSMTPConnection]:
+        while self._idle:
+            conn = self._idle.pop()
+            idle_for = time.monotonic() - conn.last_used
+            if idle_for > self.idle_timeout or conn.writer.is_closing():
+                self.stats["discarded"] += 1
+                conn.close()
+                continue
+            if idle_for > self.validate_after:
+                try:
+                    if await conn.noop() != 250:
+                        raise smtplib.SMTPServerDisconnected("NOOP failed")
+                except Exception:
+                    self.stats["discarded"] += 1
+                    conn.close()
+                    continue
+            self.stats["reused"] += 1
+            return conn
+        return None
+
+    @asynccontextmanager
+    async def connection(self, timeout: Optional[float] = None):
+        """async with pool.connection() as conn: ..."""
+
+        self._ensure_state()
+        timeout = timeout or self.timeout
+        await asyncio.wait_for(self._slots.acquire(), timeout)
+        conn = None
+        try:
+            conn = await self._take_idle() or await self._connect(timeout)
+            conn.timeout = timeout
+            yield conn
+        except (smtplib.SMTPResponseException, smtplib.SMTPRecipientsRefused):
+            raise  # Sunucu reddetti ama oturum sağlam (421 zaten broken işaretler)
+        except (smtplib.SMTPServerDisconnected, OSError, asyncio.TimeoutError, asyncio.CancelledError):
+            if conn is not None:
+                conn.broken = True
+            raise
+        finally:
+            if conn is not None:
+                if conn.broken:
+                    self.stats["discarded"] += 1
+                    conn.close()
+                else:
+                    conn.timeout = self.timeout
+                    conn.last_used = time.monotonic()
+                    self._idle.append(conn)
+            self._slots.release()
+
+    async def close_all(self):
+        idle, self._idle = self._idle, []
+        for conn in idle:
+            await conn.quit()
+
+    def get_stats(self) -> Dict:
+        return {**self.stats, "idle": len(self._idle), "max_size": self.max_size}
+
+
+class AsyncSMTPTransport(EmailTransport):
+    """BaseEmailService için asyncio SMTP transport'u
+
+    Her alıcının mesajı ayrı bağlantıdan eşzamanlı gönderilir; bağlantılar
+    worker'ın tek event loop'unda açık tutulur. Senkron çağıranlar
+    (send_notification / send_application_confirmation) send_messages ile
+    bekler, async kod send_messages_async'i doğrudan kullanır.
+    """
+
+    name = 'async_smtp'
+    requires_credentials = True
+
+    def __init__(self, config: Dict, loop: Optional[WorkerEventLoop] = None):
+        self.config = config
+        self.loop = loop or get_worker_loop()
+        self.pool = AsyncSMTPPool(config, max_size=int(config.get('pool_size', 4)),
+                                  timeout=float(config.get('timeout', 30)))
+
+    async def _deliver(self, mail_from: str, recipient: str, data: bytes, timeout: Optional[float]) -> Dict:
+        try:
+            async with self.pool.connection(timeout) as conn:
+                await conn.send_message(mail_from, [recipient], data, timeout)
+                self.pool.stats["messages"] += 1
+                if conn.pipelining:
+                    self.pool.stats["pipelined"] += 1
+            logger.info("Email sent successfully to: %s", mask_email(recipient), extra=HOT)
+            return {"recipient": recipient, "status": "success"}
+        except (smtplib.SMTPAuthenticationError, smtplib.SMTPConnectError, smtplib.SMTPNotSupportedError):
+            raise  # Hesap/bağlantı sorunu - tüm gönderim başarısız
+        except Exception as e:
+            logger.error("Failed to send email to %s: %s", mask_email(recipient), e)
+            return {"recipient": recipient, "status": "failed", "error": str(e) or type(e).__name__}
+
+    async def send_messages_async(self, mail_from: str, messages: List[Tuple[str, bytes]],
+                                  timeout: Optional[float] = None) -> List[Dict]:
+        """[(alıcı, mesaj byte'ları)] -> alıcı başına {"recipient", "status", "error"?}"""
+
+        return list(await asyncio.gather(*(self._deliver(mail_from, recipient, data, timeout)
+                                           for recipient, data in messages)))
+
+    def send_messages(self, mail_from: str, messages: List[Tuple[str, bytes]],
+                      timeout: Optional[float] = None) -> List[Dict]:
+        """Senkron giriş - worker loop'unda çalıştırıp sonucu bekler"""
+
+        wait = (timeout or self.pool.timeout) + 1.0
+        return self.loop.run(self.send_messages_async(mail_from, messages, timeout), wait)
+
+    async def _noop(self) -> int:
+        async with self.pool.connection() as conn:
+            return await conn.noop()
+
+    def health_check(self) -> Dict:
+        """Havuzdaki bağlantıya NOOP at - boşta bağlantı yoksa bir tane açılır"""
+
+        try:
+            code = self.loop.run(self._noop(), self.pool.timeout + 1.0)
+            return {"success": code == 250, "status_code": code}
+        except Exception as e:
+            return {"success": False, "error": str(e) or type(e).__name__}
+
+    def warm_up(self) -> int:
+        return 1 if self.health_check().get('success') else 0
+
+    def close(self):
+        if self.loop.loop is not None:
+            try:
+                self.loop.run(self.pool.close_all(), 10)
+            except Exception as e:
+                logger.warning("Async SMTP close error: %s", e)
+
+    def get_stats(self) -> Dict:
+        return self.pool.get_stats()
+
+
+_transports = {}
+_transports_lock = threading.Lock()
+
+
+def get_transport(config: Dict) -> AsyncSMTPTransport:
+    """Aynı hesap için tek transport - email servisleri paylaşır"""
+
+    key = (config.get('smtp_server'), config.get('smtp_port'), config.get('user'))
+    with _transports_lock:
+        transport = _transports.get(key)
+        if transport is None:
+            transport = AsyncSMTPTransport(config)
+            _transports[key] = transport
+        return transport
+
+
+def close_all_transports():
+    with _transports_lock:
+        transports = list(_transports.values())
+    for transport in transports:
+        transport.close()
+
+
+def _reset_after_fork():
+    global _transports, _transports_lock
+    _transports = {}
+    _transports_lock = threading.Lock()
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_reset_after_fork)
@@ -0,0 +1,103 @@
+import os
+import mmap
+import time
+import base64
+import logging
+import mimetypes
+import threading
+from typing import Dict, List
+
+logger = logging.getLogger(__name__)
+
+
+class CachedAttachment:
+    """Bir kez base64'lenmiş ek - encoded CRLF satırlı, MIME gövdesine doğrudan yazılır"""
+
+    __slots__ = ('path', 'filename', 'content_type', 'encoded', 'size', 'mtime_ns', 'checked_at')
+
+    def __init__(self, path: str, encoded: bytes, size: int, mtime_ns: int):
+        self.path = path
+        self.filename = os.path.basename(path)
+        self.content_type = mimetypes.guess_type(path)[0] or 'application/octet-stream'
+        self.encoded = encoded
+        self.size = size
+        self.mtime_ns = mtime_ns
+        self.checked_at = time.monotonic()
+
+
+class AttachmentCache:
+    """Dosya -> hazır base64 gövde önbelleği
+
+    Dosya mmap ile okunup bir kez encode edilir; mtime/boyut değişince
+    yeniden yüklenir. Mesaj başına iş sadece byte kopyalamadır
+    (BaseEmailService._message_bytes eki yer tutucunun yerine koyar).
+    """
+
+    def __init__(self, recheck_interval: float = 1.0):
+        self.recheck_interval = recheck_interval  # stat en fazla bu sıklıkta
+        self._entries = {}
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "loads": 0, "encoded_bytes": 0}
+
+    @staticmethod
+    def _encode(path: str, size: int) -> bytes:
+        if size == 0:
+            return b''
+        with open(path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            encoded = base64.encodebytes(mapped)  # 76 karakterlik satırlar (RFC 2045)
+        return encoded.replace(b'\n', b'\r\n').rstrip(b'\r\n')
+
+    def get(self, path: str) -> CachedAttachment:
+        """Önbellekteki ek - dosya yoksa OSError"""
+
+        now = time.monotonic()
+        entry = self._entries.get(path)
+        if entry is not None and now - entry.checked_at < self.recheck_interval:
+            self.stats["hits"] += 1
+            return entry
+
+        stat = os.stat(path)
+        if entry is not None and (entry.mtime_ns, entry.size) == (stat.st_mtime_ns, stat.st_size):
+            entry.checked_at = now
+            self.stats["hits"] += 1
+            return entry
+
+        with self._lock:
+            entry = self._entries.get(path)
+            if entry is None or (entry.mtime_ns, entry.size) != (stat.st_mtime_ns, stat.st_size):
+                entry = CachedAttachment(path, self._encode(path, stat.st_size), stat.st_size, stat.st_mtime_ns)
+                self._entries[path] = entry
+                self.stats["loads"] += 1
+                self.stats["encoded_bytes"] += len(entry.encoded)
+                logger.info("Attachment cached: %s (%d bytes)", entry.filename, stat.st_size)
+        return entry
+
+    def resolve(self, paths: List[str]) -> List[CachedAttachment]:
+        """Okunabilen ekler - eksik dosya maili engellemez, uyarı loglanır"""
+
+        attachments = []
+        for path in paths or []:
+            try:
+                attachments.append(self.get(path))
+            except OSError as e:
+                logger.warning("Attachment skipped %s: %s", path, e)
+        return attachments
+
+    def get_stats(self) -> Dict:
+        return {**self.stats, "files": len(self._entries),
+                "cached_bytes": sum(len(e.encoded) for e in list(self._entries.values()))}
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_attachment_cache() -> AttachmentCache:
+    """Süreç içi paylaşılan ek önbelleği"""
+
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = AttachmentCache()
+    return _cache
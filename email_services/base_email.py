@@ -1,25 +1,101 @@
+import html
+import uuid
 import smtplib
 import logging
+from email.mime.base import MIMEBase
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 from datetime import datetime
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Optional
 from abc import ABC, abstractmethod
+from .smtp_pool import SMTPConnectionPool, get_pool
+from .transports import EmailTransport, get_transport
+from .quota_ledger import QuotaExceeded, get_ledger, is_quota_error, sender_accounts
+from .digest import get_digest
+from .attachments import CachedAttachment, get_attachment_cache
+from .routing import get_routing_table
+from utils.logging_setup import HOT
+from utils.json_codec import dumps_str
+from utils.deadline import Deadline, DeadlineExceeded
 
 logger = logging.getLogger(__name__)
 
 class BaseEmailService(ABC):
     """Tüm email servisleri için temel sınıf"""
     
+    category = 'general'  # Alt sınıflar: education | legal | business
+    
     def __init__(self, email_config: Dict):
         self.config = email_config
         self.sent_emails = set()  # Duplicate prevention
+        self._account_configs = {}  # EMAIL_ACCOUNTS rotasyonu - hesap başına config
+        
+    def get_pool(self) -> SMTPConnectionPool:
+        """Bu hesabın paylaşılan SMTP bağlantı havuzu"""
+        return get_pool(self.config)
+    
+    def get_transport(self) -> EmailTransport:
+        """EMAIL_CONFIG['transport']'a göre paylaşılan transport (virgüllü liste = failover zinciri)"""
+        return get_transport(self.config)
+    
+    def _account_config(self, account: Dict) -> Dict:
+        """Rotasyondaki hesap için EMAIL_CONFIG kopyası (transport/havuz hesap başına ayrı)"""
+        
+        if account['user'] == self.config.get('user'):
+            return self.config
+        config = self._account_configs.get(account['user'])
+        if config is None:
+            config = {**self.config, 'user': account['user'], 'password': account['password']}
+            self._account_configs[account['user']] = config
+        return config
+    
+    def _build_message(self, recipient: str, subject: str, body: str, sender: Optional[str] = None) -> MIMEMultipart:
+        sender = sender or self.config['user']
+        msg = MIMEMultipart()
+        msg['From'] = f"{self.config.get('from_name', 'British Global')} <{sender}>"
+        if sender != self.config['user']:
+            msg['Reply-To'] = self.config['user']  # Cevaplar birincil hesaba
+        msg['To'] = recipient
+        msg['Subject'] = subject
+        msg.attach(MIMEText(body, 'html', 'utf-8'))
+        return msg
+    
+    @staticmethod
+    def _attachment_part(attachment: CachedAttachment, placeholder: str) -> MIMEBase:
+        maintype, _, subtype = attachment.content_type.partition('/')
+        part = MIMEBase(maintype, subtype)
+        part.set_payload(placeholder)
+        part['Content-Transfer-Encoding'] = 'base64'
+        filename = attachment.filename if attachment.filename.isascii() else ('utf-8', '', attachment.filename)
+        part.add_header('Content-Disposition', 'attachment', filename=filename)
+        return part
+    
+    def _message_bytes(self, recipient: str, subject: str, body: str, sender: Optional[str] = None,
+                       attachments: Optional[List[CachedAttachment]] = None) -> bytes:
+        """Transport'a gidecek mesaj - smtplib.send_message gibi compat32 + CRLF (emoji'li başlıklar encode edilir)
+        
+        Ekler yer tutucuyla serialize edilir, sonra önbellekteki hazır base64
+        gövde yerine konur - ek başına encode maliyeti mesaj başına ödenmez.
+        """
+        
+        msg = self._build_message(recipient, subject, body, sender)
+        placeholders = []
+        for attachment in attachments or []:
+            placeholder = f"attachment-{uuid.uuid4().hex}"
+            msg.attach(self._attachment_part(attachment, placeholder))
+            placeholders.append((placeholder.encode('ascii'), attachment.encoded))
+        
+        data = msg.as_bytes(policy=msg.policy.clone(linesep='\r\n'))
+        for placeholder, encoded in placeholders:
+            data = data.replace(placeholder, encoded, 1)
+        return data
         
     def test_smtp_connection(self) -> Dict:
         """SMTP bağlantısını test et"""
         
         try:
-            server = smtplib.SMTP(self.config['smtp_server'], self.config['smtp_port'])
+            server = smtplib.SMTP(self.config['smtp_server'], self.config['smtp_port'],
+                                  timeout=float(self.config.get('timeout', 30)))
             server.ehlo()
             server.starttls()
             server.ehlo()
@@ -45,52 +121,65 @@ class BaseEmailService(ABC):
                 "details": str(e)
             }
     
-    def send_email(self, recipients: List[str], subject: str, body: str, submission_id: str = "") -> Dict:
-        """Email gönder - Temel metod"""
+    def send_email(self, recipients: List[str], subject: str, body: str, submission_id: str = "",
+                   deadline: Optional[Deadline] = None, priority: str = 'normal',
+                   attachments: Optional[List[str]] = None) -> Dict:
+        """Email gönder - Temel metod
+        
+        deadline verilirse SMTP işlemleri kalan bütçeyle sınırlanır; bütçe
+        yetmiyorsa hiç bağlanmadan DeadlineExceeded yükselir. Kota defteri
+        açıksa gönderim en boş hesaptan yapılır; priority='low' mail hesaplar
+        limite yaklaşınca gönderilmez: {"success": False, "quota_exceeded": True,
+        "retry_after"} döner, tekrar denemek çağıranın işidir (pipeline 503
+        ile Tally'ye, digest bir sonraki flush'a bırakır).
+        attachments dosya yolu listesidir; ekler önbellekten hazır eklenir.
+        """
         
-        if not self.config.get('user') or not self.config.get('password'):
+        transport = self.get_transport()
+        if transport.requires_credentials and not (self.config.get('user') and self.config.get('password')):
             return {"success": False, "error": "Email configuration missing"}
         
         # Duplicate kontrolü
         email_key = f"{submission_id}_{hash(subject)}_{','.join(recipients)}"
         if email_key in self.sent_emails:
-            logger.info(f"Duplicate email prevented: {email_key}")
+            logger.info("Duplicate email prevented for submission %s", submission_id)
             return {"success": True, "message": "Email already sent (duplicate prevention)"}
         
+        # Bütçe yetmiyorsa gönderimi çağıran ertelesin
+        timeout = deadline.timeout(float(self.config.get('timeout', 30))) if deadline else None
+        
+        # Kota defteri - hesap seçimi ve sayım worker'lar arası paylaşılır
+        ledger = get_ledger(self.config)
+        accounts = sender_accounts(self.config) if ledger is not None else []
+        config, reservation = self.config, None
+        if accounts:
+            try:
+                reservation = ledger.reserve([a['user'] for a in accounts], len(recipients), len(recipients), priority)
+            except QuotaExceeded as e:
+                logger.warning("Email not sent for submission %s, quota exhausted: %s", submission_id, e)
+                return {"success": False, "quota_exceeded": True, "error": str(e), "retry_after": e.retry_after}
+            except Exception as e:
+                # Defter okunamıyorsa birincil hesapla sayımsız gönder
+                logger.warning("Quota ledger unavailable, sending from primary account: %s", e)
+            if reservation:
+                config = self._account_config(next(a for a in accounts if a['user'] == reservation['account']))
+                transport = get_transport(config)
+        
+        success_count = 0
         try:
-            # SMTP bağlantısı
-            server = smtplib.SMTP(self.config['smtp_server'], self.config['smtp_port'])
-            server.ehlo()
-            server.starttls()
-            server.ehlo()
-            server.login(self.config['user'], self.config['password'])
-            
-            logger.info(f"SMTP connected: {self.config['user']}")
-            
-            # Her alıcıya gönder
-            results = []
-            for recipient in recipients:
-                try:
-                    msg = MIMEMultipart()
-                    msg['From'] = f"{self.config.get('from_name', 'British Global')} <{self.config['user']}>"
-                    msg['To'] = recipient
-                    msg['Subject'] = subject
-                    msg.attach(MIMEText(body, 'html', 'utf-8'))
-                    
-                    server.send_message(msg)
-                    results.append({"recipient": recipient, "status": "success"})
-                    logger.info(f"Email sent successfully to: {recipient}")
-                    
-                except Exception as e:
-                    results.append({"recipient": recipient, "status": "failed", "error": str(e)})
-                    logger.error(f"Failed to send email to {recipient}: {str(e)}")
-            
-            server.quit()
-            
-            # Cache'e ekle
-            self.sent_emails.add(email_key)
+            parts = get_attachment_cache().resolve(attachments) if attachments else None
+            messages = [(recipient, self._message_bytes(recipient, subject, body, config['user'], parts))
+                        for recipient in recipients]
+            results = transport.send_messages(config['user'], messages, timeout)
             
             success_count = len([r for r in results if r["status"] == "success"])
+            quota_errors = [r['error'] for r in results if r["status"] != "success" and is_quota_error(r.get('error'))]
+            if reservation and quota_errors:
+                ledger.block(reservation['account'], reason=quota_errors[0])
+            
+            # Cache'e ekle - hiçbir alıcıya gitmediyse retry tekrar denesin
+            if success_count > 0:
+                self.sent_emails.add(email_key)
             
             return {
                 "success": success_count > 0,
@@ -100,43 +189,194 @@ class BaseEmailService(ABC):
             }
             
         except Exception as e:
-            logger.error(f"Email sending error: {str(e)}")
+            logger.error("Email sending error: %s", e)
+            if reservation and is_quota_error(str(e)):
+                ledger.block(reservation['account'], reason=str(e))
             return {"success": False, "error": str(e)}
+        
+        finally:
+            if reservation:
+                try:
+                    ledger.settle(reservation, success_count, success_count)
+                except Exception as e:
+                    logger.warning("Quota ledger settle failed: %s", e)
     
-    @abstractmethod
-    def get_recipients(self, contact_info: Dict) -> List[str]:
-        """Alt sınıflar tarafından implement edilmeli"""
-        pass
+    def get_recipients(self, contact_info: Dict, extracted_data: Optional[Dict] = None,
+                       priority: Optional[str] = None) -> List[str]:
+        """Kategori alıcıları - derlenmiş routing tablosundan (kategori, öncelik, alt hizmet)"""
+        
+        extracted_data = extracted_data or {}
+        if priority is None:
+            priority = 'urgent' if self.is_urgent(extracted_data) else 'normal'
+        return get_routing_table().recipients(self.category, priority, self.routing_services(extracted_data))
+    
+    def routing_services(self, extracted_data: Dict) -> List[str]:
+        """EMAIL_ROUTES hizmet kuralları için seçilen alt hizmetler - alt sınıflar override eder"""
+        return []
     
     @abstractmethod
     def create_email_content(self, contact_info: Dict, extracted_data: Dict, hubspot_result: Dict) -> tuple:
         """Alt sınıflar tarafından implement edilmeli - (subject, body) döner"""
         pass
     
-    def send_notification(self, contact_info: Dict, extracted_data: Dict, hubspot_result: Dict = None) -> Dict:
-        """Ana notification gönderme metodu"""
+    def confirmation_attachments(self) -> List[str]:
+        """Bu kategorinin onay mailine eklenecek broşür/kontrol listeleri (Config.CONFIRMATION_ATTACHMENTS)"""
+        
+        config_class = getattr(self, 'config_class', None)
+        attachments = getattr(config_class, 'CONFIRMATION_ATTACHMENTS', None) or {}
+        return attachments.get(self.category, [])
+    
+    def is_urgent(self, extracted_data: Dict) -> bool:
+        """Acil başvurular digest'e girmez, hemen gönderilir - alt sınıflar override eder"""
+        return False
+    
+    def digest_summary(self, extracted_data: Dict) -> str:
+        """Digest tablosundaki tek satırlık başvuru özeti - alt sınıflar override eder"""
+        return ''
+    
+    def digest_row(self, contact_info: Dict, extracted_data: Dict) -> Dict:
+        return {
+            "fullname": contact_info.get('fullname', ''),
+            "email": contact_info.get('email', ''),
+            "phone": contact_info.get('phone', ''),
+            "summary": self.digest_summary(extracted_data),
+            "submission_id": extracted_data.get('submission_id', ''),
+            "received_at": datetime.now().strftime('%d.%m %H:%M')
+        }
+    
+    def send_notification(self, contact_info: Dict, extracted_data: Dict, hubspot_result: Dict = None,
+                          deadline: Optional[Deadline] = None) -> Dict:
+        """Ana notification gönderme metodu
+        
+        Digest modu açık alıcılar için bildirim kuyruğa eklenir, özet maille
+        toplu gönderilir; acil başvurular her zaman hemen gider. Digest'e
+        giden sonuç "deferred" işaretlidir - adım digest gidince tamamlanır.
+        """
         
         try:
             # Recipients al
-            recipients = self.get_recipients(contact_info)
+            recipients = self.get_recipients(contact_info, extracted_data)
             if not recipients:
                 return {"success": False, "error": "No recipients found"}
             
+            submission_id = extracted_data.get('submission_id', '')
+            
+            # Digest'e giden alıcılar ayrılır
+            digested = []
+            digest = get_digest(self.config)
+            if digest is not None and not self.is_urgent(extracted_data):
+                digested = [r for r in recipients if digest.accepts(r, self.category)]
+                if digested:
+                    digest.add(digested, self.category, self.digest_row(contact_info, extracted_data), submission_id)
+                    recipients = [r for r in recipients if r not in digested]
+                    logger.info("Notification queued for digest - Recipients: %d", len(digested), extra=HOT)
+                    if not recipients:
+                        return {"success": True, "digested": len(digested), "deferred": True}
+            
             # Email içeriği oluştur
             subject, body = self.create_email_content(contact_info, extracted_data, hubspot_result or {})
             
             # Email gönder
-            submission_id = extracted_data.get('submission_id', '')
-            result = self.send_email(recipients, subject, body, submission_id)
+            result = self.send_email(recipients, subject, body, submission_id, deadline=deadline)
+            if digested:
+                result["digested"] = len(digested)
+                # Doğrudan gönderim başarısızsa adım başarısız kalır - retry'da digest tekrar eklenmez (UNIQUE)
+                if result.get('success'):
+                    result["deferred"] = True
             
-            logger.info(f"Notification sent - Recipients: {len(recipients)}, Success: {result.get('success')}")
+            logger.info("Notification sent - Recipients: %d, Success: %s", len(recipients), result.get('success'), extra=HOT)
             
             return result
             
+        except DeadlineExceeded:
+            raise
         except Exception as e:
-            logger.error(f"Notification error: {str(e)}")
+            logger.error("Notification error: %s", e)
             return {"success": False, "error": str(e)}
     
+    def create_digest_content(self, items: List[Dict]) -> tuple:
+        """Özet mail - başvuru başına tek satırlık tablo, (subject, body) döner"""
+        
+        category_tr = {'education': 'Eğitim', 'legal': 'Hukuk', 'business': 'Ticari'}.get(self.category, 'Genel')
+        subject = f"📋 {len(items)} Yeni {category_tr} Başvurusu - British Global Özet"
+        
+        rows = '\n'.join(f"""
+            <tr>
+                <td style="padding: 6px 8px; border-bottom: 1px solid #e2e8f0; white-space: nowrap;">{html.escape(item.get('received_at', ''))}</td>
+                <td style="padding: 6px 8px; border-bottom: 1px solid #e2e8f0; font-weight: 600;">{html.escape(item.get('fullname', ''))}</td>
+                <td style="padding: 6px 8px; border-bottom: 1px solid #e2e8f0;"><a href="mailto:{html.escape(item.get('email', ''))}">{html.escape(item.get('email', ''))}</a></td>
+                <td style="padding: 6px 8px; border-bottom: 1px solid #e2e8f0; white-space: nowrap;"><a href="tel:{html.escape(item.get('phone', ''))}">{html.escape(item.get('phone', ''))}</a></td>
+                <td style="padding: 6px 8px; border-bottom: 1px solid #e2e8f0;">{html.escape(item.get('summary', ''))}</td>
+            </tr>""" for item in items)
+        
+        body = f"""
+        <!DOCTYPE html>
+        <html>
+        <head><meta charset="utf-8"></head>
+        <body style="font-family: -apple-system, 'Segoe UI', Roboto, sans-serif; color: #1e293b; font-size: 14px;">
+            <h2 style="margin-bottom: 4px;">📋 {len(items)} yeni {category_tr} başvurusu</h2>
+            <p style="color: #64748b; margin-top: 0;">{html.escape(items[0].get('received_at', ''))} - {html.escape(items[-1].get('received_at', ''))}</p>
+            <table style="border-collapse: collapse; width: 100%;">
+                <tr style="background: #f1f5f9; text-align: left;">
+                    <th style="padding: 6px 8px;">Saat</th><th style="padding: 6px 8px;">Ad Soyad</th>
+                    <th style="padding: 6px 8px;">Email</th><th style="padding: 6px 8px;">Telefon</th>
+                    <th style="padding: 6px 8px;">Talep</th>
+                </tr>
+                {rows}
+            </table>
+            <p style="color: #ef4444; font-weight: 600; margin-top: 20px;">⏰ Bu müşterileri 24 saat içinde arayın!</p>
+        </body>
+        </html>
+        """
+        return subject, body
+    
+    def send_digest(self, recipient: str, items: List[Dict], digest_id: str = '') -> Dict:
+        """Biriken bildirimleri tek mail olarak gönder (düşük öncelik - kota dolarken ertelenir)"""
+        
+        subject, body = self.create_digest_content(items)
+        return self.send_email([recipient], subject, body, submission_id=f"digest-{digest_id}", priority='low')
+
+    def create_review_content(self, contact_info: Dict, extracted_data: Dict, reasons: List[str],
+                              source: str) -> tuple:
+        """İnceleme uyarısı - işlenmeyen gönderimin tüm verisi, (subject, body) döner"""
+
+        submission_id = extracted_data.get('submission_id', '')
+        subject = f"⚠️ İncelenmesi Gereken Başvuru ({source}: {', '.join(reasons)}) - {submission_id or 'ID yok'}"
+        rows = '\n'.join(f"""
+            <tr>
+                <td style="padding: 6px 8px; border-bottom: 1px solid #e2e8f0; font-weight: 600;">{html.escape(label)}</td>
+                <td style="padding: 6px 8px; border-bottom: 1px solid #e2e8f0;">{html.escape(str(value or ''))}</td>
+            </tr>""" for label, value in (
+                ('Gönderim', submission_id), ('Kategori', self.category), ('Ad Soyad', contact_info.get('fullname')),
+                ('Email', contact_info.get('email')), ('Telefon', contact_info.get('phone')),
+                ('Neden', ', '.join(reasons))
+            ))
+
+        body = f"""
+        <!DOCTYPE html>
+        <html>
+        <head><meta charset="utf-8"></head>
+        <body style="font-family: -apple-system, 'Segoe UI', Roboto, sans-serif; color: #1e293b; font-size: 14px;">
+            <h2 style="color: #b45309;">Başvuru otomatik işlenmedi ({html.escape(source)})</h2>
+            <p>HubSpot'a kaydedilmedi, onay maili gönderilmedi. Gerçek bir başvuruysa manuel girin.</p>
+            <table style="border-collapse: collapse;">
+                {rows}
+            </table>
+            <h3>Form verisi</h3>
+            <pre style="background: #f1f5f9; padding: 12px; white-space: pre-wrap;">{html.escape(dumps_str(extracted_data))}</pre>
+        </body>
+        </html>
+        """
+        return subject, body
+
+    def send_review_alert(self, contact_info: Dict, extracted_data: Dict, reasons: List[str], source: str,
+                          deadline: Optional[Deadline] = None) -> Dict:
+        """Karantina/şüpheli gönderimi yöneticiye mail olarak bırak - kalıcı kayıt admin kutusunda"""
+
+        subject, body = self.create_review_content(contact_info, extracted_data, reasons, source)
+        return self.send_email(get_routing_table().admins(), subject, body,
+                               submission_id=f"review-{extracted_data.get('submission_id', '')}", deadline=deadline)
+
     def create_base_template(self, contact_info: Dict, category: str, content_sections: List[str]) -> str:
         """Temel HTML template oluştur"""
         
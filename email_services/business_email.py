@@ -1,6 +1,7 @@
 import logging
-from typing import Dict, List
+from typing import Dict, List, Optional
 from .base_email import BaseEmailService
+from utils.deadline import Deadline
 from datetime import datetime
 
 logger = logging.getLogger(__name__)
@@ -8,6 +9,8 @@ logger = logging.getLogger(__name__)
 class BusinessEmailService(BaseEmailService):
     """Ticari danışmanlık email servisi"""
     
+    category = 'business'
+    
     def __init__(self, email_config: Dict):
         super().__init__(email_config)
         
@@ -19,18 +22,13 @@ class BusinessEmailService(BaseEmailService):
             logger.warning("Config import failed, using fallback")
             self.config_class = None
     
-    def get_recipients(self, contact_info: Dict) -> List[str]:
-        """Business kategorisi alıcıları - Sadece admin"""
-        recipients = []
-        
-        if self.config_class and self.config_class.ADMIN_EMAIL:
-            recipients.append(self.config_class.ADMIN_EMAIL)
-        
-        # Fallback
-        if not recipients:
-            recipients = ['info@britishglobal.com.tr']
-            
-        return recipients
+    def routing_services(self, extracted_data: Dict) -> List[str]:
+        business_type = extracted_data.get('business', {}).get('business_type')
+        return [business_type] if business_type else []
+    
+    def digest_summary(self, extracted_data: Dict) -> str:
+        business_data = extracted_data.get('business', {})
+        return ' - '.join(v for v in (business_data.get('company_name'), business_data.get('sector')) if v)
     
     def create_email_content(self, contact_info: Dict, extracted_data: Dict, hubspot_result: Dict) -> tuple:
         """Business özel email içeriği"""
@@ -238,7 +236,8 @@ class BusinessEmailService(BaseEmailService):
         
         return subject, body
     
-    def send_application_confirmation(self, contact_info: Dict, extracted_data: Dict) -> Dict:
+    def send_application_confirmation(self, contact_info: Dict, extracted_data: Dict,
+                                      deadline: Optional[Deadline] = None) -> Dict:
         """Business başvurusu onay maili"""
         
         business_data = extracted_data.get('business', {})
@@ -348,7 +347,9 @@ class BusinessEmailService(BaseEmailService):
         </html>
         """
         
-        return self.send_email([contact_info['email']], subject, body)
+        return self.send_email([contact_info['email']], subject, body,
+                               submission_id=extracted_data.get('submission_id', ''), deadline=deadline,
+                               attachments=self.confirmation_attachments())
     
     def send_meeting_reminder(self, contact_info: Dict, meeting_date: str) -> Dict:
         """Meeting hatırlatma maili"""
@@ -371,4 +372,4 @@ class BusinessEmailService(BaseEmailService):
         </div>
         """
         
-        return self.send_email([contact_info['email']], subject, body)
\ No newline at end of file
+        return self.send_email([contact_info['email']], subject, body, priority='low')
\ No newline at end of file
@@ -0,0 +1,262 @@
+import os
+import json
+import time
+import uuid
+import sqlite3
+import logging
+import threading
+from typing import Callable, Dict, List, Optional, Tuple
+
+from utils.logging_setup import HOT, mask_email
+
+logger = logging.getLogger(__name__)
+
+
+class NotificationDigest:
+    """Admin/partner bildirimlerini alıcı + kategori başına biriktiren SQLite kuyruğu
+
+    İlk kayıttan window saniye sonra (ya da max_items dolunca) grup tek
+    özet mail olarak gönderilir. Kayıtlar claim edilerek alınır; aynı
+    dosyayı paylaşan worker'lardan sadece biri gönderir, gönderim
+    başarısızsa ya da worker düşerse kayıtlar tekrar kuyruğa döner.
+    """
+
+    CLAIM_TIMEOUT = 300  # seconds - bu süredir tamamlanmamış claim sahipsiz sayılır
+
+    def __init__(self, path: str = ':memory:', categories: Optional[List[str]] = None,
+                 recipients: Optional[List[str]] = None, window: float = 300.0, max_items: int = 50):
+        self.path = path
+        self.categories = set(categories or [])
+        self.recipients = {r.lower() for r in recipients or []}  # boşsa tüm alıcılar
+        self.window = window
+        self.max_items = max_items
+        self.stats = {"queued": 0, "digests_sent": 0, "items_sent": 0, "send_failures": 0}
+        self._lock = threading.Lock()
+        self._conn = None
+        self._pid = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _connection(self) -> sqlite3.Connection:
+        # Fork sonrası parent'ın bağlantısı kullanılmaz
+        if self._conn is None or self._pid != os.getpid():
+            if self.path != ':memory:':
+                os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=5.0, check_same_thread=False, isolation_level=None)
+            if self.path != ':memory:':
+                conn.execute("PRAGMA journal_mode=WAL")
+                conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS digest_items (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    recipient TEXT NOT NULL,
+                    category TEXT NOT NULL,
+                    submission_id TEXT NOT NULL,
+                    item TEXT NOT NULL,
+                    queued_at REAL NOT NULL,
+                    claim_id TEXT,
+                    claimed_at REAL,
+                    UNIQUE (recipient, category, submission_id)
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS digest_items_group ON digest_items (recipient, category, queued_at)")
+            self._conn, self._pid = conn, os.getpid()
+        return self._conn
+
+    def accepts(self, recipient: str, category: str) -> bool:
+        """Bu alıcı/kategori için digest modu açık mı"""
+        return category in self.categories and (not self.recipients or recipient.lower() in self.recipients)
+
+    def add(self, recipients: List[str], category: str, item: Dict, submission_id: str = '') -> int:
+        """Bildirimi alıcılar için kuyruğa ekle - aynı gönderim tekrar gelirse yok sayılır"""
+
+        submission_id = submission_id or uuid.uuid4().hex
+        payload = json.dumps(item, ensure_ascii=False, default=str)
+        now = time.time()
+        with self._lock:
+            conn = self._connection()
+            added = 0
+            for recipient in recipients:
+                cursor = conn.execute(
+                    "INSERT OR IGNORE INTO digest_items (recipient, category, submission_id, item, queued_at) "
+                    "VALUES (?, ?, ?, ?, ?)", (recipient, category, submission_id, payload, now)
+                )
+                added += cursor.rowcount
+        self.stats["queued"] += added
+        return added
+
+    def _due_groups(self, conn: sqlite3.Connection, now: float, force: bool) -> List[Tuple[str, str]]:
+        rows = conn.execute(
+            "SELECT recipient, category, MIN(queued_at), COUNT(*) FROM digest_items "
+            "WHERE claim_id IS NULL OR claimed_at < ? GROUP BY recipient, category",
+            (now - self.CLAIM_TIMEOUT,)
+        ).fetchall()
+        return [(recipient, category) for recipient, category, oldest, count in rows
+                if force or count >= self.max_items or now - oldest >= self.window]
+
+    def claim(self, recipient: str, category: str) -> Tuple[Optional[str], List[Dict]]:
+        """Grubun en eski max_items kaydını al - (claim_id, [item])"""
+
+        claim_id = uuid.uuid4().hex
+        now = time.time()
+        with self._lock:
+            conn = self._connection()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                conn.execute(
+                    "UPDATE digest_items SET claim_id = ?, claimed_at = ? WHERE id IN ("
+                    "SELECT id FROM digest_items WHERE recipient = ? AND category = ? "
+                    "AND (claim_id IS NULL OR claimed_at < ?) ORDER BY queued_at LIMIT ?)",
+                    (claim_id, now, recipient, category, now - self.CLAIM_TIMEOUT, self.max_items)
+                )
+                rows = conn.execute("SELECT item FROM digest_items WHERE claim_id = ? ORDER BY queued_at",
+                                    (claim_id,)).fetchall()
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+        if not rows:
+            return None, []
+        return claim_id, [json.loads(row[0]) for row in rows]
+
+    def complete(self, claim_id: str) -> List[str]:
+        """Gönderilen kayıtları sil - tüm alıcılarına ulaşmış submission_id'ler döner"""
+
+        with self._lock:
+            conn = self._connection()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                submission_ids = [row[0] for row in conn.execute(
+                    "SELECT DISTINCT submission_id FROM digest_items WHERE claim_id = ?", (claim_id,)
+                ).fetchall()]
+                conn.execute("DELETE FROM digest_items WHERE claim_id = ?", (claim_id,))
+                delivered = [sid for sid in submission_ids if conn.execute(
+                    "SELECT 1 FROM digest_items WHERE submission_id = ? LIMIT 1", (sid,)
+                ).fetchone() is None]
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+        return delivered
+
+    def release(self, claim_id: str):
+        with self._lock:
+            self._connection().execute(
+                "UPDATE digest_items SET claim_id = NULL, claimed_at = NULL WHERE claim_id = ?", (claim_id,)
+            )
+
+    def flush(self, get_service: Callable[[str], object], force: bool = False,
+              on_delivered: Optional[Callable[[List[str]], None]] = None) -> int:
+        """Süresi dolan grupları özet olarak gönder - gönderilen digest sayısı döner
+
+        get_service(category) send_digest(recipient, items, digest_id) sağlayan email servisi döner.
+        on_delivered(submission_ids) tüm digest'leri giden gönderimlerle çağrılır (checkpoint için).
+        """
+
+        with self._lock:
+            groups = self._due_groups(self._connection(), time.time(), force)
+
+        sent = 0
+        for recipient, category in groups:
+            service = get_service(category)
+            if service is None:
+                continue
+            claim_id, items = self.claim(recipient, category)
+            if not claim_id:
+                continue  # Başka worker aldı
+            try:
+                result = service.send_digest(recipient, items, digest_id=claim_id)
+            except Exception as e:
+                result = {"success": False, "error": str(e)}
+
+            if result.get('success'):
+                delivered = self.complete(claim_id)
+                if delivered and on_delivered is not None:
+                    try:
+                        on_delivered(delivered)
+                    except Exception as e:
+                        logger.warning("Digest delivery callback failed: %s", e)
+                sent += 1
+                self.stats["digests_sent"] += 1
+                self.stats["items_sent"] += len(items)
+                logger.info("Digest sent to %s - %s, %d items", mask_email(recipient), category, len(items), extra=HOT)
+            else:
+                self.release(claim_id)
+                self.stats["send_failures"] += 1
+                logger.warning("Digest to %s failed, will retry: %s", mask_email(recipient),
+                               result.get('error', 'deferred'))
+        return sent
+
+    def start(self, get_service: Callable[[str], object], interval: float = 15.0,
+              on_delivered: Optional[Callable[[List[str]], None]] = None):
+        """Periyodik flush thread'i (worker başına)"""
+
+        if self._thread and self._thread.is_alive():
+            return
+
+        def loop():
+            while not self._stop.wait(interval):
+                try:
+                    self.flush(get_service, on_delivered=on_delivered)
+                except Exception as e:
+                    logger.warning("Digest flush error: %s", e)
+
+        self._stop.clear()
+        self._thread = threading.Thread(target=loop, name='notification-digest', daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0):
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout)
+            self._thread = None
+
+    @property
+    def running(self) -> bool:
+        return bool(self._thread and self._thread.is_alive())
+
+    def pending(self) -> int:
+        with self._lock:
+            return self._connection().execute("SELECT COUNT(*) FROM digest_items").fetchone()[0]
+
+    def get_stats(self) -> Dict:
+        return {**self.stats, "pending": self.pending(), "window_s": self.window,
+                "categories": sorted(self.categories)}
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None and self._pid == os.getpid():
+                self._conn.close()
+            self._conn = None
+
+
+_digests = {}
+_digests_lock = threading.Lock()
+
+
+def get_digest(config: Dict) -> Optional[NotificationDigest]:
+    """EMAIL_CONFIG'teki digest ayarları için paylaşılan kuyruk - kategori yoksa kapalı"""
+
+    if not config.get('digest_categories') or not config.get('digest_db'):
+        return None
+    path = config['digest_db']
+    with _digests_lock:
+        digest = _digests.get(path)
+        if digest is None:
+            digest = NotificationDigest(path, categories=config['digest_categories'],
+                                        recipients=config.get('digest_recipients'),
+                                        window=float(config.get('digest_window', 300)),
+                                        max_items=int(config.get('digest_max_items', 50)))
+            _digests[path] = digest
+        return digest
+
+
+def _reset_after_fork():
+    # Flush thread'i fork'ta kopyalanmaz - child kendi instance'ını kurar
+    global _digests, _digests_lock
+    _digests = {}
+    _digests_lock = threading.Lock()
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_reset_after_fork)
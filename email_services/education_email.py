@@ -1,6 +1,7 @@
 import logging
-from typing import Dict, List
+from typing import Dict, List, Optional
 from .base_email import BaseEmailService
+from utils.deadline import Deadline
 from datetime import datetime
 
 logger = logging.getLogger(__name__)
@@ -8,6 +9,8 @@ logger = logging.getLogger(__name__)
 class EducationEmailService(BaseEmailService):
     """Eğitim danışmanlığı email servisi"""
     
+    category = 'education'
+    
     def __init__(self, email_config: Dict):
         super().__init__(email_config)
         
@@ -19,21 +22,14 @@ class EducationEmailService(BaseEmailService):
             logger.warning("Config import failed, using fallback")
             self.config_class = None
     
-    def get_recipients(self, contact_info: Dict) -> List[str]:
-        """Eğitim kategorisi alıcıları"""
-        recipients = []
-        
-        if self.config_class:
-            if self.config_class.ADMIN_EMAIL:
-                recipients.append(self.config_class.ADMIN_EMAIL)
-            if self.config_class.EDUCATION_PARTNER_EMAIL:
-                recipients.append(self.config_class.EDUCATION_PARTNER_EMAIL)
-        
-        # Fallback
-        if not recipients:
-            recipients = ['info@britishglobal.com.tr']
-            
-        return recipients
+    def routing_services(self, extracted_data: Dict) -> List[str]:
+        return extracted_data.get('education', {}).get('programs', [])
+    
+    def is_urgent(self, extracted_data: Dict) -> bool:
+        return extracted_data.get('education', {}).get('priority_level') == 'urgent'
+    
+    def digest_summary(self, extracted_data: Dict) -> str:
+        return extracted_data.get('education', {}).get('programs_text', '')
     
     def create_email_content(self, contact_info: Dict, extracted_data: Dict, hubspot_result: Dict) -> tuple:
         """Eğitim özel email içeriği"""
@@ -49,7 +45,7 @@ class EducationEmailService(BaseEmailService):
         
         # Aciliyet kontrolü
         urgency_class = ""
-        if education_data.get('priority_level') == 'urgent':
+        if self.is_urgent(extracted_data):
             subject = f"⚡ ACİL - {subject}"
             urgency_class = "urgent"
         
@@ -183,7 +179,8 @@ class EducationEmailService(BaseEmailService):
         
         return subject, body
     
-    def send_application_confirmation(self, contact_info: Dict, extracted_data: Dict) -> Dict:
+    def send_application_confirmation(self, contact_info: Dict, extracted_data: Dict,
+                                      deadline: Optional[Deadline] = None) -> Dict:
         """Eğitim başvurusu onay maili"""
         
         education_data = extracted_data.get('education', {})
@@ -275,4 +272,6 @@ class EducationEmailService(BaseEmailService):
         </html>
         """
         
-        return self.send_email([contact_info['email']], subject, body)
\ No newline at end of file
+        return self.send_email([contact_info['email']], subject, body,
+                               submission_id=extracted_data.get('submission_id', ''), deadline=deadline,
+                               attachments=self.confirmation_attachments())
\ No newline at end of file
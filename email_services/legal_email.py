@@ -1,6 +1,8 @@
 import logging
-from typing import Dict, List
+from typing import Dict, List, Optional
 from .base_email import BaseEmailService
+from .routing import get_routing_table
+from utils.deadline import Deadline
 from datetime import datetime
 
 logger = logging.getLogger(__name__)
@@ -8,6 +10,9 @@ logger = logging.getLogger(__name__)
 class LegalEmailService(BaseEmailService):
     """Hukuk danışmanlığı email servisi"""
     
+    category = 'legal'
+    URGENT_SERVICES = ('vize_red', 'turistik_vize')  # Digest'e girmez, hemen gönderilir
+    
     def __init__(self, email_config: Dict):
         super().__init__(email_config)
         
@@ -19,21 +24,15 @@ class LegalEmailService(BaseEmailService):
             logger.warning("Config import failed, using fallback")
             self.config_class = None
     
-    def get_recipients(self, contact_info: Dict) -> List[str]:
-        """Hukuk kategorisi alıcıları"""
-        recipients = []
-        
-        if self.config_class:
-            if self.config_class.ADMIN_EMAIL:
-                recipients.append(self.config_class.ADMIN_EMAIL)
-            if self.config_class.LEGAL_PARTNER_EMAIL:
-                recipients.append(self.config_class.LEGAL_PARTNER_EMAIL)
-        
-        # Fallback
-        if not recipients:
-            recipients = ['info@britishglobal.com.tr']
-            
-        return recipients
+    def routing_services(self, extracted_data: Dict) -> List[str]:
+        return extracted_data.get('legal', {}).get('selected_services', [])
+    
+    def is_urgent(self, extracted_data: Dict) -> bool:
+        services = extracted_data.get('legal', {}).get('selected_services', [])
+        return any(service in self.URGENT_SERVICES for service in services)
+    
+    def digest_summary(self, extracted_data: Dict) -> str:
+        return extracted_data.get('legal', {}).get('services_text', '')
     
     def create_email_content(self, contact_info: Dict, extracted_data: Dict, hubspot_result: Dict) -> tuple:
         """Hukuk özel email içeriği"""
@@ -48,8 +47,7 @@ class LegalEmailService(BaseEmailService):
         subject = f"⚖️ Yeni Hukuk Başvurusu - {main_service} - {contact_info.get('fullname', 'İsimsiz')}"
         
         # Acil durumlar için özel subject
-        urgent_services = ['vize_red', 'turistik_vize']
-        if any(service in urgent_services for service in services):
+        if self.is_urgent(extracted_data):
             subject = f"🚨 ACİL HUKUK - {subject}"
         
         # Content sections
@@ -257,7 +255,8 @@ class LegalEmailService(BaseEmailService):
         
         return subject, body
     
-    def send_application_confirmation(self, contact_info: Dict, extracted_data: Dict) -> Dict:
+    def send_application_confirmation(self, contact_info: Dict, extracted_data: Dict,
+                                      deadline: Optional[Deadline] = None) -> Dict:
         """Hukuk başvurusu onay maili"""
         
         legal_data = extracted_data.get('legal', {})
@@ -362,7 +361,9 @@ class LegalEmailService(BaseEmailService):
         </html>
         """
         
-        return self.send_email([contact_info['email']], subject, body)
+        return self.send_email([contact_info['email']], subject, body,
+                               submission_id=extracted_data.get('submission_id', ''), deadline=deadline,
+                               attachments=self.confirmation_attachments())
     
     def send_urgent_alert(self, contact_info: Dict, legal_data: Dict) -> Dict:
         """Acil hukuk durumları için özel uyarı"""
@@ -392,13 +393,7 @@ class LegalEmailService(BaseEmailService):
         """
         
         # Sadece admin'e acil uyarı gönder
-        recipients = []
-        if self.config_class and self.config_class.ADMIN_EMAIL:
-            recipients.append(self.config_class.ADMIN_EMAIL)
-        else:
-            recipients = ['info@britishglobal.com.tr']
-            
-        return self.send_email(recipients, subject, body)
+        return self.send_email(get_routing_table().admins(), subject, body)
     
     def send_deadline_reminder(self, contact_info: Dict, service_type: str, days_remaining: int) -> Dict:
         """Vize başvuru deadline hatırlatması"""
@@ -421,14 +416,5 @@ class LegalEmailService(BaseEmailService):
         </div>
         """
         
-        recipients = []
-        if self.config_class:
-            if self.config_class.ADMIN_EMAIL:
-                recipients.append(self.config_class.ADMIN_EMAIL)
-            if self.config_class.LEGAL_PARTNER_EMAIL:
-                recipients.append(self.config_class.LEGAL_PARTNER_EMAIL)
-        
-        if not recipients:
-            recipients = ['info@britishglobal.com.tr']
-            
-        return self.send_email(recipients, subject, body)
\ No newline at end of file
+        recipients = get_routing_table().recipients(self.category, 'low', [service_type])
+        return self.send_email(recipients, subject, body, priority='low')
\ No newline at end of file
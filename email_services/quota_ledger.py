@@ -0,0 +1,231 @@
+import os
+import time
+import sqlite3
+import logging
+import threading
+from typing import Dict, List, Optional
+
+from utils.logging_setup import mask_email
+
+logger = logging.getLogger(__name__)
+
+# Google Workspace varsayılanları - hesap başına
+DEFAULT_LIMITS = {"minute_messages": 60, "day_messages": 2000, "day_recipients": 10000}
+
+WINDOWS = {"minute": 60, "day": 86400}
+
+
+class QuotaExceeded(Exception):
+    """Hiçbir gönderici hesabında bu öncelik için kota kalmadı"""
+
+    def __init__(self, message: str, retry_after: float):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+def sender_accounts(config: Dict) -> List[Dict]:
+    """EMAIL_USER + EMAIL_ACCOUNTS ('user:app-password' listesi) - birincil hesap başta"""
+
+    accounts = [{"user": config.get('user', ''), "password": config.get('password', '')}]
+    for entry in config.get('accounts') or []:
+        user, _, password = entry.partition(':')
+        user = user.strip()
+        if user and user not in (a["user"] for a in accounts):
+            accounts.append({"user": user, "password": password.strip()})
+    return [a for a in accounts if a["user"]]
+
+
+def is_quota_error(error: str) -> bool:
+    """Gmail'in gönderim limiti yanıtları (550 5.4.5, 'sending limit exceeded' vb.)"""
+
+    text = (error or '').lower()
+    return '5.4.5' in text or 'sending limit' in text or 'quota' in text
+
+
+class QuotaLedger:
+    """Hesap başına gönderilen mesaj/alıcı sayısını kayan pencerelerle tutan SQLite defteri
+
+    Aynı dosyayı paylaşan tüm worker'lar hesap seçimini tek transaction'da
+    yapar (BEGIN IMMEDIATE); böylece iki worker aynı son kotayı harcayamaz.
+    Dosya instance'a özel (/tmp) olduğundan instance'lar birbirini görmez:
+    hesap limitleri instances'a bölünür, her instance kendi payını harcar.
+    Düşük öncelikli mail (digest, hatırlatma) hesap limitin
+    low_priority_ratio'suna yaklaştığında ertelenir, kalan kota onay ve
+    bildirimlere kalır.
+    """
+
+    def __init__(self, path: str = ':memory:', limits: Optional[Dict[str, int]] = None,
+                 low_priority_ratio: float = 0.8, block_seconds: float = 3600.0, instances: int = 1):
+        self.path = path
+        self.instances = max(1, int(instances or 1))
+        self.account_limits = {**DEFAULT_LIMITS, **{k: int(v) for k, v in (limits or {}).items() if v}}
+        self.limits = {k: max(1, v // self.instances) for k, v in self.account_limits.items()}
+        self.low_priority_ratio = low_priority_ratio
+        self.block_seconds = block_seconds
+        self._lock = threading.Lock()
+        self._conn = None
+        self._pid = None
+        self._pruned_at = 0.0
+
+    def _connection(self) -> sqlite3.Connection:
+        # Fork sonrası parent'ın bağlantısı kullanılmaz
+        if self._conn is None or self._pid != os.getpid():
+            if self.path != ':memory:':
+                os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=5.0, check_same_thread=False, isolation_level=None)
+            if self.path != ':memory:':
+                conn.execute("PRAGMA journal_mode=WAL")
+                conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS email_sends (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    account TEXT NOT NULL,
+                    messages INTEGER NOT NULL,
+                    recipients INTEGER NOT NULL,
+                    sent_at REAL NOT NULL
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS email_sends_account ON email_sends (account, sent_at)")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS email_account_blocks (
+                    account TEXT PRIMARY KEY,
+                    blocked_until REAL NOT NULL,
+                    reason TEXT
+                )
+            """)
+            self._conn, self._pid = conn, os.getpid()
+        return self._conn
+
+    def _usage(self, conn: sqlite3.Connection, account: str, now: float) -> Dict:
+        usage = {}
+        for window, seconds in WINDOWS.items():
+            messages, recipients, oldest = conn.execute(
+                "SELECT COALESCE(SUM(messages), 0), COALESCE(SUM(recipients), 0), MIN(sent_at) "
+                "FROM email_sends WHERE account = ? AND sent_at >= ?", (account, now - seconds)
+            ).fetchone()
+            usage[f"{window}_messages"] = messages
+            usage[f"{window}_recipients"] = recipients
+            usage[f"{window}_frees_at"] = (oldest + seconds) if oldest is not None else now
+        row = conn.execute("SELECT blocked_until FROM email_account_blocks WHERE account = ? AND blocked_until > ?",
+                           (account, now)).fetchone()
+        usage["blocked_until"] = row[0] if row else None
+        return usage
+
+    def _headroom(self, usage: Dict, messages: int, recipients: int, ratio: float) -> Optional[float]:
+        """Gönderimden sonra en dolu limitin oranı - sığmıyorsa None"""
+
+        wanted = {"minute_messages": messages, "day_messages": messages, "day_recipients": recipients}
+        worst = 0.0
+        for key, limit in self.limits.items():
+            after = usage.get(key, 0) + wanted.get(key, 0)
+            if after > limit * ratio:
+                return None
+            worst = max(worst, after / limit)
+        return worst
+
+    def _retry_after(self, usage: Dict, now: float, messages: int, ratio: float) -> float:
+        if usage["blocked_until"]:
+            return usage["blocked_until"] - now
+        if usage["minute_messages"] + messages > self.limits["minute_messages"] * ratio:
+            return max(1.0, usage["minute_frees_at"] - now)
+        return max(60.0, usage["day_frees_at"] - now)
+
+    def reserve(self, accounts: List[str], messages: int, recipients: int, priority: str = 'normal') -> Dict:
+        """En çok boş kotası olan hesabı seç ve gönderimi yaz - {"id", "account"}
+
+        Sığan hesap yoksa QuotaExceeded (retry_after: en erken açılacak pencere).
+        """
+
+        ratio = self.low_priority_ratio if priority == 'low' else 1.0
+        now = time.time()
+        with self._lock:
+            conn = self._connection()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                best, best_fill, retry_after = None, None, None
+                for account in accounts:
+                    usage = self._usage(conn, account, now)
+                    fill = None if usage["blocked_until"] else self._headroom(usage, messages, recipients, ratio)
+                    if fill is None:
+                        wait = self._retry_after(usage, now, messages, ratio)
+                        retry_after = wait if retry_after is None else min(retry_after, wait)
+                    elif best_fill is None or fill < best_fill:
+                        best, best_fill = account, fill
+
+                if best is None:
+                    conn.execute("COMMIT")
+                    raise QuotaExceeded(f"Sending quota exhausted for {priority} mail on {len(accounts)} account(s)",
+                                        retry_after=round(retry_after or 60.0, 1))
+
+                cursor = conn.execute("INSERT INTO email_sends (account, messages, recipients, sent_at) "
+                                      "VALUES (?, ?, ?, ?)", (best, messages, recipients, now))
+                if now - self._pruned_at > 60:
+                    conn.execute("DELETE FROM email_sends WHERE sent_at < ?", (now - WINDOWS["day"],))
+                    self._pruned_at = now
+                conn.execute("COMMIT")
+                return {"id": cursor.lastrowid, "account": best}
+            except QuotaExceeded:
+                raise
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+
+    def settle(self, reservation: Dict, messages: int, recipients: int):
+        """Gönderim sonrası gerçek sayıları yaz - hiç teslim edilmediyse kayıt silinir"""
+
+        with self._lock:
+            conn = self._connection()
+            if messages:
+                conn.execute("UPDATE email_sends SET messages = ?, recipients = ? WHERE id = ?",
+                             (messages, recipients, reservation["id"]))
+            else:
+                conn.execute("DELETE FROM email_sends WHERE id = ?", (reservation["id"],))
+
+    def block(self, account: str, seconds: Optional[float] = None, reason: str = ''):
+        """Sunucu limit hatası verdi - hesabı süre dolana kadar rotasyondan çıkar"""
+
+        until = time.time() + (seconds or self.block_seconds)
+        with self._lock:
+            self._connection().execute(
+                "INSERT OR REPLACE INTO email_account_blocks (account, blocked_until, reason) VALUES (?, ?, ?)",
+                (account, until, reason[:200])
+            )
+        logger.warning("Email account %s blocked for %.0fs: %s", mask_email(account), seconds or self.block_seconds,
+                       reason)
+
+    def get_stats(self, accounts: List[str]) -> Dict:
+        now = time.time()
+        with self._lock:
+            conn = self._connection()
+            usage = {mask_email(account): self._usage(conn, account, now) for account in accounts}
+        for stats in usage.values():
+            for window in WINDOWS:
+                stats.pop(f"{window}_frees_at")
+        return {"limits": self.limits, "account_limits": self.account_limits, "instances": self.instances,
+                "low_priority_ratio": self.low_priority_ratio, "accounts": usage}
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None and self._pid == os.getpid():
+                self._conn.close()
+            self._conn = None
+
+
+_ledgers = {}
+_ledgers_lock = threading.Lock()
+
+
+def get_ledger(config: Dict) -> Optional[QuotaLedger]:
+    """EMAIL_CONFIG['quota_db'] için paylaşılan defter - '' ise kota takibi kapalı"""
+
+    path = config.get('quota_db')
+    if not path:
+        return None
+    with _ledgers_lock:
+        ledger = _ledgers.get(path)
+        if ledger is None:
+            ledger = QuotaLedger(path, limits=config.get('quota_limits'),
+                                 low_priority_ratio=float(config.get('quota_low_priority_ratio', 0.8)),
+                                 instances=int(config.get('quota_instances', 1)))
+            _ledgers[path] = ledger
+        return ledger
@@ -0,0 +1,134 @@
+import logging
+import threading
+from typing import Dict, FrozenSet, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_FALLBACK = 'info@britishglobal.com.tr'
+
+CATEGORIES = ('education', 'legal', 'business')
+PRIORITIES = ('low', 'normal', 'urgent')
+ANY = '*'
+
+# Kategori partner adresinin Config alanı - business sadece admin'e gider
+PARTNER_FIELDS = {'education': 'EDUCATION_PARTNER_EMAIL', 'legal': 'LEGAL_PARTNER_EMAIL'}
+
+RouteKey = Tuple[str, str, str]
+
+
+def parse_routes(spec: str) -> List[Tuple[RouteKey, Tuple[str, ...]]]:
+    """EMAIL_ROUTES - 'kategori/öncelik/hizmet=adres,adres;...' ('*' joker, eksik parçalar '*')
+
+    Örn: 'legal/*/vize_red=vize@partner.com;*/urgent=ops@britishglobal.com.tr'
+    """
+
+    rules = []
+    for entry in (spec or '').split(';'):
+        key, _, addresses = entry.partition('=')
+        recipients = tuple(a.strip() for a in addresses.split(',') if a.strip())
+        if not key.strip() or not recipients:
+            continue
+        parts = [p.strip() or ANY for p in key.split('/')][:3]
+        parts += [ANY] * (3 - len(parts))
+        rules.append((tuple(parts), recipients))
+    return rules
+
+
+def _ordered(*groups: Iterable[str]) -> Tuple[str, ...]:
+    seen, result = set(), []
+    for group in groups:
+        for address in group:
+            if address and address.lower() not in seen:
+                seen.add(address.lower())
+                result.append(address)
+    return tuple(result)
+
+
+class RoutingTable:
+    """(kategori, öncelik, hizmet) -> alıcılar; derlendikten sonra değişmez
+
+    Kurallar derleme anında tüm anahtarlara açılır, lookup tek dict
+    erişimidir. Yeniden yükleme yeni tablo kurup referansı değiştirir;
+    gönderimdeki thread'ler eski ya da yeni tabloyu tam görür.
+    """
+
+    def __init__(self, admin: str = '', partners: Optional[Dict[str, str]] = None,
+                 rules: Optional[List[Tuple[RouteKey, Tuple[str, ...]]]] = None, fallback: str = DEFAULT_FALLBACK):
+        self.fallback = (fallback or DEFAULT_FALLBACK,)
+        self.admin = (admin,) if admin else self.fallback
+        rules = rules or []
+        partners = partners or {}
+
+        categories = set(CATEGORIES) | {k[0] for k, _ in rules if k[0] != ANY}
+        priorities = set(PRIORITIES) | {k[1] for k, _ in rules if k[1] != ANY}
+        routes = {}
+        for category in categories:
+            base = _ordered([admin], [partners.get(category, '')])
+            services = {k[2] for k, _ in rules if k[2] != ANY and k[0] in (category, ANY)}
+            for priority in priorities:
+                def matching(service):
+                    return [r for k, r in rules if k[0] in (category, ANY) and k[1] in (priority, ANY)
+                            and k[2] == service]
+                general = _ordered(base, *matching(ANY))
+                routes[(category, priority, ANY)] = general or self.fallback
+                for service in services:
+                    routes[(category, priority, service)] = _ordered(general, *matching(service)) or self.fallback
+        self._routes: Dict[RouteKey, Tuple[str, ...]] = routes
+        self._services: Dict[str, FrozenSet[str]] = {
+            category: frozenset(k[2] for k in routes if k[0] == category and k[2] != ANY) for category in categories
+        }
+
+    def recipients(self, category: str, priority: str = 'normal', services: Iterable[str] = ()) -> List[str]:
+        """Gönderim alıcıları - hiçbiri tanımlı değilse fallback adres"""
+
+        general = self._routes.get((category, priority, ANY)) or self._routes.get((category, 'normal', ANY))
+        if general is None:
+            return list(self.admin)
+        routed = self._services.get(category, ())
+        extra = [self._routes.get((category, priority, s), general) for s in services if s in routed]
+        return list(_ordered(general, *extra)) if extra else list(general)
+
+    def admins(self) -> List[str]:
+        """Sadece yöneticiye giden uyarılar için"""
+        return list(self.admin)
+    
+    def describe(self) -> Dict[str, List[str]]:
+        """/config için okunabilir tablo"""
+        return {'/'.join(key): list(recipients) for key, recipients in sorted(self._routes.items())}
+
+
+def build_routing_table(config_class) -> RoutingTable:
+    """Config'ten tablo derle - admin, kategori partnerleri, EMAIL_ROUTES kuralları"""
+
+    rules = parse_routes(getattr(config_class, 'EMAIL_ROUTES', ''))
+    return RoutingTable(
+        admin=getattr(config_class, 'ADMIN_EMAIL', ''),
+        partners={category: getattr(config_class, field, '') for category, field in PARTNER_FIELDS.items()},
+        rules=rules,
+        fallback=getattr(config_class, 'FALLBACK_EMAIL', DEFAULT_FALLBACK)
+    )
+
+
+_table = None
+_table_lock = threading.Lock()
+
+
+def reload_routing(config_class=None) -> RoutingTable:
+    """Tabloyu yeniden derle ve atomik olarak değiştir"""
+
+    global _table
+    if config_class is None:
+        try:
+            from config.settings import Config as config_class
+        except ImportError:
+            logger.warning("Config import failed, routing to fallback only")
+    table = build_routing_table(config_class) if config_class is not None else RoutingTable()
+    with _table_lock:
+        _table = table
+    logger.info("Email routing table compiled: %d routes", len(table._routes))
+    return table
+
+
+def get_routing_table() -> RoutingTable:
+    table = _table
+    return table if table is not None else reload_routing()
@@ -0,0 +1,207 @@
+import os
+import time
+import smtplib
+import logging
+import threading
+from contextlib import contextmanager
+from typing import Dict, Optional
+
+from utils.logging_setup import mask_email
+
+logger = logging.getLogger(__name__)
+
+
+class SMTPConnectionPool:
+    """Login olmuş SMTP bağlantılarını tekrar kullanan havuz"""
+
+    def __init__(self, config: Dict, max_size: int = 4, idle_timeout: float = 60.0,
+                 validate_after: float = 10.0, timeout: float = 30.0):
+        self.config = config
+        self.max_size = max_size
+        self.timeout = timeout                # Connect + soket okuma/yazma üst sınırı
+        self.idle_timeout = idle_timeout      # Gmail boşta kalan bağlantıları kapatır
+        self.validate_after = validate_after  # Bu süreden uzun bekleyen bağlantıya NOOP at
+
+        self._idle = []  # (connection, last_used)
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(max_size)
+        self.stats = {"created": 0, "reused": 0, "discarded": 0}
+
+    def _connect(self, timeout: Optional[float] = None) -> smtplib.SMTP:
+        server = smtplib.SMTP(self.config['smtp_server'], self.config['smtp_port'],
+                              timeout=timeout or self.timeout)
+        try:
+            server.ehlo()
+            server.starttls()
+            server.ehlo()
+            server.login(self.config['user'], self.config['password'])
+        except Exception:
+            self._close(server)
+            raise
+
+        with self._lock:
+            self.stats["created"] += 1
+        logger.info("SMTP connected: %s", mask_email(self.config['user']))
+        return server
+
+    @staticmethod
+    def _close(server: smtplib.SMTP):
+        try:
+            server.quit()
+        except Exception:
+            try:
+                server.close()
+            except Exception:
+                pass
+
+    def _take_idle(self) -> Optional[smtplib.SMTP]:
+        """Kullanılabilir boşta bağlantı al - eskimiş olanları kapat"""
+
+        while True:
+            with self._lock:
+                if not self._idle:
+                    return None
+                server, last_used = self._idle.pop()
+
+            idle_for = time.monotonic() - last_used
+            if idle_for > self.idle_timeout:
+                self._discard(server)
+                continue
+
+            if idle_for > self.validate_after:
+                try:
+                    if server.noop()[0] != 250:
+                        raise smtplib.SMTPServerDisconnected("NOOP failed")
+                except Exception:
+                    self._discard(server)
+                    continue
+
+            with self._lock:
+                self.stats["reused"] += 1
+            return server
+
+    def _discard(self, server: smtplib.SMTP):
+        with self._lock:
+            self.stats["discarded"] += 1
+        self._close(server)
+
+    @staticmethod
+    def _set_timeout(server: smtplib.SMTP, timeout: float):
+        server.timeout = timeout
+        if getattr(server, 'sock', None) is not None:
+            server.sock.settimeout(timeout)
+
+    def acquire(self, timeout: Optional[float] = None) -> smtplib.SMTP:
+        """Bağlantı al - timeout verilirse slot bekleme + soket işlemleri onunla sınırlı"""
+
+        if not self._slots.acquire(timeout=timeout):
+            raise TimeoutError(f"SMTP pool exhausted ({self.max_size} connections busy)")
+        try:
+            server = self._take_idle()
+            if server is None:
+                return self._connect(timeout)
+            if timeout:
+                self._set_timeout(server, timeout)
+            return server
+        except Exception:
+            self._slots.release()
+            raise
+
+    def release(self, server: smtplib.SMTP, discard: bool = False):
+        try:
+            # smtplib bağlantı koptuğunda sock'u None yapar
+            if discard or getattr(server, 'sock', None) is None:
+                self._discard(server)
+            else:
+                self._set_timeout(server, self.timeout)
+                with self._lock:
+                    self._idle.append((server, time.monotonic()))
+        finally:
+            self._slots.release()
+
+    @contextmanager
+    def connection(self, timeout: Optional[float] = None):
+        """with pool.connection() as server: ..."""
+
+        server = self.acquire(timeout)
+        failed = False
+        try:
+            yield server
+        except (smtplib.SMTPServerDisconnected, OSError):
+            failed = True
+            raise
+        finally:
+            self.release(server, discard=failed)
+
+    def warm_up(self, count: int = 1) -> int:
+        """Trafik gelmeden önce bağlantı aç - açılan bağlantı sayısı döner"""
+
+        opened = []
+        try:
+            for _ in range(min(count, self.max_size)):
+                opened.append(self.acquire())
+        except Exception as e:
+            logger.warning("SMTP warm-up failed: %s", e)
+        finally:
+            for server in opened:
+                self.release(server)
+        return len(opened)
+
+    def health_check(self) -> Dict:
+        """Havuzdaki bağlantıya NOOP at - boşta bağlantı yoksa bir tane açılır"""
+
+        try:
+            with self.connection() as server:
+                code = server.noop()[0]
+            return {"success": code == 250, "status_code": code}
+        except Exception as e:
+            return {"success": False, "error": str(e)}
+
+    def close_all(self):
+        """Boştaki tüm bağlantıları kapat"""
+
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for server, _ in idle:
+            self._close(server)
+
+    def get_stats(self) -> Dict:
+        with self._lock:
+            return {**self.stats, "idle": len(self._idle), "max_size": self.max_size}
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(config: Dict) -> SMTPConnectionPool:
+    """Aynı hesap için tek havuz - email servisleri paylaşır"""
+
+    key = (config.get('smtp_server'), config.get('smtp_port'), config.get('user'))
+    with _pools_lock:
+        pool = _pools.get(key)
+        if pool is None:
+            pool = SMTPConnectionPool(config, max_size=int(config.get('pool_size', 4)),
+                                      timeout=float(config.get('timeout', 30)))
+            _pools[key] = pool
+        return pool
+
+
+def close_all_pools():
+    """Tüm havuzları kapat (shutdown)"""
+
+    with _pools_lock:
+        pools = list(_pools.values())
+    for pool in pools:
+        pool.close_all()
+
+
+def _reset_after_fork():
+    """Child process parent'ın soketlerini kullanmasın - kapatmadan bırak"""
+    global _pools, _pools_lock
+    _pools = {}
+    _pools_lock = threading.Lock()
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_reset_after_fork)
@@ -0,0 +1,487 @@
+import os
+import time
+import uuid
+import base64
+import random
+import logging
+import threading
+import subprocess
+from abc import ABC, abstractmethod
+from typing import Dict, List, Optional, Tuple
+
+from .smtp_pool import get_pool
+from utils.deadline import Deadline, DeadlineExceeded
+from utils.logging_setup import HOT, mask_email
+
+logger = logging.getLogger(__name__)
+
+Messages = List[Tuple[str, bytes]]  # [(alıcı, RFC 5322 mesaj byte'ları)]
+
+
+class TransportUnavailable(Exception):
+    """Transport şu an mesaj kabul etmiyor - zincirdeki bir sonrakine geçilir
+
+    results, hata anına kadar işlenen alıcıların sonuçlarıdır; failover
+    teslim edilmiş alıcılara tekrar göndermez.
+    """
+
+    def __init__(self, message: str, results: Optional[List[Dict]] = None):
+        super().__init__(message)
+        self.results = results or []
+
+
+class EmailTransport(ABC):
+    """Email gönderim transport'u - BaseEmailService mesajları hazırlar, transport teslim eder
+
+    send_messages alıcı başına {"recipient", "status", "error"?} döner. Tek
+    alıcının reddi sonuçta "failed" olarak kalır; transport'un tamamen
+    kullanılamaması (bağlantı, login, binary yok) istisna olarak yükselir.
+    """
+
+    name = 'transport'
+    requires_credentials = False  # EMAIL_USER/EMAIL_PASSWORD olmadan çalışamaz
+
+    @abstractmethod
+    def send_messages(self, mail_from: str, messages: Messages, timeout: Optional[float] = None) -> List[Dict]:
+        pass
+
+    def health_check(self) -> Dict:
+        return {"success": True}
+
+    def warm_up(self) -> int:
+        return 0
+
+    def close(self):
+        pass
+
+    def get_stats(self) -> Dict:
+        return {}
+
+    def _delivered(self, recipient: str) -> Dict:
+        logger.info("Email sent successfully to: %s", mask_email(recipient), extra=HOT)
+        return {"recipient": recipient, "status": "success"}
+
+    def _failed(self, recipient: str, error) -> Dict:
+        logger.error("Failed to send email to %s via %s: %s", mask_email(recipient), self.name, error)
+        return {"recipient": recipient, "status": "failed", "error": str(error) or type(error).__name__}
+
+
+class SMTPTransport(EmailTransport):
+    """smtplib havuzu - alıcılar sırayla, komut başına bir round trip"""
+
+    name = 'smtp'
+    requires_credentials = True
+
+    def __init__(self, config: Dict, name: str = 'smtp'):
+        self.config = config
+        self.name = name
+
+    @property
+    def pool(self):
+        # Fork sonrası registry yeni havuz verir - referans tutulmaz
+        return get_pool(self.config)
+
+    def send_messages(self, mail_from: str, messages: Messages, timeout: Optional[float] = None) -> List[Dict]:
+        # SMTP bağlantısı - havuzdan (login'li bağlantılar tekrar kullanılır)
+        with self.pool.connection(timeout) as server:
+            results = []
+            for recipient, data in messages:
+                try:
+                    server.sendmail(mail_from, [recipient], data)
+                    results.append(self._delivered(recipient))
+                except Exception as e:
+                    results.append(self._failed(recipient, e))
+        return results
+
+    def health_check(self) -> Dict:
+        return self.pool.health_check()
+
+    def warm_up(self) -> int:
+        return self.pool.warm_up(1)
+
+    def get_stats(self) -> Dict:
+        return self.pool.get_stats()
+
+
+class SendmailTransport(EmailTransport):
+    """Lokal MTA'ya pipe - kuyruklama ve relay MTA'nın işi (sendmail -i -f)"""
+
+    name = 'sendmail'
+
+    def __init__(self, path: str = '/usr/sbin/sendmail', timeout: float = 30.0):
+        self.path = path
+        self.timeout = timeout
+        self.stats = {"messages": 0, "failures": 0}
+
+    def send_messages(self, mail_from: str, messages: Messages, timeout: Optional[float] = None) -> List[Dict]:
+        results = []
+        for recipient, data in messages:
+            try:
+                completed = subprocess.run([self.path, '-i', '-f', mail_from, '--', recipient], input=data,
+                                           capture_output=True, timeout=timeout or self.timeout)
+            except (OSError, subprocess.TimeoutExpired) as e:
+                # Binary yok / MTA cevap vermiyor - diğer alıcılar da gitmez
+                raise TransportUnavailable(f"sendmail failed: {e}", results) from e
+
+            if completed.returncode == 0:
+                self.stats["messages"] += 1
+                results.append(self._delivered(recipient))
+            else:
+                self.stats["failures"] += 1
+                stderr = completed.stderr.decode('utf-8', 'replace').strip()
+                results.append(self._failed(recipient, f"sendmail exit {completed.returncode}: {stderr}"))
+        return results
+
+    def health_check(self) -> Dict:
+        if os.access(self.path, os.X_OK):
+            return {"success": True}
+        return {"success": False, "error": f"{self.path} not executable"}
+
+    def get_stats(self) -> Dict:
+        return dict(self.stats)
+
+
+class HTTPAPITransport(EmailTransport):
+    """Raw MIME kabul eden HTTP email API'si
+
+    POST {url} - {"from", "to": [alıcı], "raw": base64 mesaj}, Bearer token.
+    2xx teslim, 429/5xx transport'u kullanılamaz sayar (failover), diğer
+    4xx sadece o alıcıyı başarısız yapar.
+    """
+
+    name = 'http'
+
+    def __init__(self, url: str, api_key: str = '', timeout: float = 30.0, pool_size: int = 4):
+        import requests
+        from requests.adapters import HTTPAdapter
+
+        self.url = url
+        self.timeout = timeout
+        self._network_errors = (requests.ConnectionError, requests.Timeout)
+        self.session = requests.Session()
+        self.session.mount(url, HTTPAdapter(pool_connections=1, pool_maxsize=pool_size))
+        if api_key:
+            self.session.headers['Authorization'] = f"Bearer {api_key}"
+        self.stats = {"messages": 0, "failures": 0}
+
+    def send_messages(self, mail_from: str, messages: Messages, timeout: Optional[float] = None) -> List[Dict]:
+        results = []
+        for recipient, data in messages:
+            try:
+                response = self.session.post(self.url, timeout=timeout or self.timeout, json={
+                    "from": mail_from,
+                    "to": [recipient],
+                    "raw": base64.b64encode(data).decode('ascii')
+                })
+            except self._network_errors as e:
+                raise TransportUnavailable(f"Email API unreachable: {e}", results) from e
+            if response.status_code == 429 or response.status_code >= 500:
+                # Önceki alıcılar teslim edildi - failover sadece kalanları dener
+                raise TransportUnavailable(f"Email API {response.status_code}: {response.text[:200]}", results)
+            if response.status_code < 300:
+                self.stats["messages"] += 1
+                results.append(self._delivered(recipient))
+            else:
+                self.stats["failures"] += 1
+                results.append(self._failed(recipient, f"Email API {response.status_code}: {response.text[:200]}"))
+        return results
+
+    def close(self):
+        self.session.close()
+
+    def get_stats(self) -> Dict:
+        return dict(self.stats)
+
+
+class FileTransport(EmailTransport):
+    """Mesajları diske yazar - staging/yük testi için sıfır gecikmeli sink
+
+    format='eml' dizine <zaman>.<pid>.<rastgele>.eml, format='maildir'
+    standart Maildir (tmp/new) yazar; ikisi de atomik rename kullanır.
+    """
+
+    name = 'file'
+
+    def __init__(self, path: str, file_format: str = 'eml'):
+        self.path = path
+        self.file_format = file_format
+        self._maildir = None
+        self.stats = {"messages": 0}
+        if file_format == 'maildir':
+            import mailbox
+            self._maildir = mailbox.Maildir(path, create=True)
+        else:
+            os.makedirs(path, exist_ok=True)
+
+    def _write_eml(self, data: bytes):
+        name = f"{time.time_ns()}.{os.getpid()}.{uuid.uuid4().hex[:8]}.eml"
+        tmp = os.path.join(self.path, f".{name}.tmp")
+        with open(tmp, 'wb') as f:
+            f.write(data)
+        os.replace(tmp, os.path.join(self.path, name))
+
+    def send_messages(self, mail_from: str, messages: Messages, timeout: Optional[float] = None) -> List[Dict]:
+        results = []
+        for recipient, data in messages:
+            try:
+                if self._maildir is not None:
+                    self._maildir.add(data)
+                else:
+                    self._write_eml(data)
+            except OSError as e:
+                raise TransportUnavailable(f"Mail sink not writable: {e}", results) from e
+            self.stats["messages"] += 1
+            results.append(self._delivered(recipient))
+        return results
+
+    def health_check(self) -> Dict:
+        if os.access(self.path, os.W_OK):
+            return {"success": True}
+        return {"success": False, "error": f"{self.path} not writable"}
+
+    def get_stats(self) -> Dict:
+        return {**self.stats, "path": self.path, "format": self.file_format}
+
+
+class TransportHealth:
+    """Transport başına kayan başarı oranı/gecikme ve ardışık hata sonrası bekleme"""
+
+    def __init__(self, failure_threshold: int = 3, cooldown: float = 30.0, alpha: float = 0.2):
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.alpha = alpha
+
+        self.success_rate = 1.0
+        self.latency = None  # saniye, EWMA
+        self.consecutive_failures = 0
+        self.open_until = 0.0  # monotonic - bu zamana kadar atlanır
+        self.counts = {"attempts": 0, "delivered": 0, "failed": 0, "errors": 0}
+        self.last_error = None
+
+    def record(self, delivered: int, total: int, latency: float):
+        self.counts["attempts"] += 1
+        self.counts["delivered"] += delivered
+        self.counts["failed"] += total - delivered
+        ratio = delivered / total if total else 1.0
+        self.success_rate += self.alpha * (ratio - self.success_rate)
+        self.latency = latency if self.latency is None else self.latency + self.alpha * (latency - self.latency)
+        if delivered:
+            self.consecutive_failures = 0
+            self.open_until = 0.0
+        else:
+            self._failure()
+
+    def record_error(self, error: Exception):
+        self.counts["attempts"] += 1
+        self.counts["errors"] += 1
+        self.last_error = str(error) or type(error).__name__
+        self.success_rate -= self.alpha * self.success_rate
+        self._failure()
+
+    def _failure(self):
+        self.consecutive_failures += 1
+        if self.consecutive_failures >= self.failure_threshold:
+            self.open_until = time.monotonic() + self.cooldown
+
+    def available(self, now: float) -> bool:
+        return now >= self.open_until
+
+    def weight(self) -> float:
+        # Başarı oranı yüksek ve hızlı olan daha sık seçilir; hiç ölçülmemişse nötr
+        return max(self.success_rate, 0.05) / max(self.latency if self.latency is not None else 0.1, 0.005)
+
+    def snapshot(self) -> Dict:
+        return {
+            **self.counts,
+            "success_rate": round(self.success_rate, 3),
+            "latency_ms": round(self.latency * 1000, 1) if self.latency is not None else None,
+            "consecutive_failures": self.consecutive_failures,
+            "cooling_down": not self.available(time.monotonic()),
+            "last_error": self.last_error
+        }
+
+
+class FailoverTransport(EmailTransport):
+    """Transport zinciri - ordered: sırayla, weighted: sağlık ağırlıklı rastgele sıra
+
+    Bir transport istisna verirse ya da bazı alıcılar başarısız olursa kalan
+    alıcılar sıradakiyle denenir. Ardışık hata veren transport cooldown
+    süresince atlanır (hepsi bekliyorsa yine de denenir).
+    """
+
+    name = 'failover'
+
+    def __init__(self, transports: List[EmailTransport], strategy: str = 'ordered',
+                 failure_threshold: int = 3, cooldown: float = 30.0, rng: Optional[random.Random] = None):
+        if strategy not in ('ordered', 'weighted'):
+            raise ValueError(f"Unknown failover strategy: {strategy}")
+        self.transports = list(transports)
+        self.strategy = strategy
+        self.health = [TransportHealth(failure_threshold, cooldown) for _ in self.transports]
+        self.requires_credentials = all(t.requires_credentials for t in self.transports)
+        self._random = rng or random.Random()
+        self._lock = threading.Lock()
+
+    def _plan(self) -> List[int]:
+        """Bu gönderim için deneme sırası (transport indeksleri)"""
+
+        now = time.monotonic()
+        with self._lock:
+            ready = [i for i, h in enumerate(self.health) if h.available(now)]
+            cooling = [i for i in range(len(self.transports)) if i not in ready]
+            if self.strategy == 'weighted':
+                weights = {i: self.health[i].weight() for i in ready}
+                order = []
+                while ready:
+                    pick = self._random.choices(ready, [weights[i] for i in ready])[0]
+                    ready.remove(pick)
+                    order.append(pick)
+                ready = order
+        return ready + cooling
+
+    def send_messages(self, mail_from: str, messages: Messages, timeout: Optional[float] = None) -> List[Dict]:
+        budget = Deadline(timeout) if timeout else None
+        pending = list(messages)
+        results = {}
+        last_error = None
+
+        for index in self._plan():
+            if not pending:
+                break
+            transport, health = self.transports[index], self.health[index]
+            try:
+                call_timeout = budget.timeout() if budget else None
+            except DeadlineExceeded as e:
+                last_error = last_error or e
+                break
+
+            started = time.perf_counter()
+            try:
+                batch = transport.send_messages(mail_from, pending, call_timeout)
+            except Exception as e:
+                with self._lock:
+                    health.record_error(e)
+                logger.warning("Email transport %s unavailable, failing over: %s", transport.name, e)
+                last_error = e
+                # Hatadan önce teslim edilenler kesinleşir, sıradaki transport kalanları dener
+                for result in getattr(e, 'results', None) or []:
+                    results[result["recipient"]] = {**result, "transport": transport.name}
+                pending = [(recipient, data) for recipient, data in pending
+                           if recipient not in results or results[recipient]["status"] != "success"]
+                continue
+
+            delivered = [r for r in batch if r["status"] == "success"]
+            with self._lock:
+                health.record(len(delivered), len(batch), time.perf_counter() - started)
+            for result in batch:
+                results[result["recipient"]] = {**result, "transport": transport.name}
+            pending = [(recipient, data) for recipient, data in pending
+                       if results[recipient]["status"] != "success"]
+
+        if not results and last_error is not None:
+            raise last_error
+        return [results.get(recipient) or {"recipient": recipient, "status": "failed", "error": str(last_error)}
+                for recipient, _ in messages]
+
+    def health_check(self) -> Dict:
+        """Zincirde teslim edebilecek en az bir transport varsa sağlıklı"""
+
+        checks = {}
+        for transport in self.transports:
+            try:
+                checks[transport.name] = transport.health_check()
+            except Exception as e:
+                checks[transport.name] = {"success": False, "error": str(e)}
+        healthy = [name for name, check in checks.items() if check.get('success')]
+        result = {"success": bool(healthy), "transports": checks}
+        if not healthy:
+            result["error"] = "No email transport available"
+        return result
+
+    def warm_up(self) -> int:
+        return self.transports[self._plan()[0]].warm_up()
+
+    def close(self):
+        for transport in self.transports:
+            transport.close()
+
+    def get_stats(self) -> Dict:
+        with self._lock:
+            health = [h.snapshot() for h in self.health]
+        return {
+            "strategy": self.strategy,
+            "transports": {t.name: {**h, **t.get_stats()} for t, h in zip(self.transports, health)}
+        }
+
+
+def _fallback_smtp_config(config: Dict) -> Dict:
+    """İkinci relay - belirtilmeyen alanlar birincil hesaptan gelir"""
+    return {**config, **{k: v for k, v in (config.get('fallback_smtp') or {}).items() if v}}
+
+
+def build_transport(name: str, config: Dict) -> EmailTransport:
+    """EMAIL_TRANSPORT içindeki tek isimden transport kur"""
+
+    timeout = float(config.get('timeout', 30))
+    if name == 'smtp':
+        return SMTPTransport(config)
+    if name == 'smtp_fallback':
+        return SMTPTransport(_fallback_smtp_config(config), name='smtp_fallback')
+    if name == 'async_smtp':
+        from .async_smtp import get_transport as get_async_transport
+        return get_async_transport(config)
+    if name == 'sendmail':
+        return SendmailTransport(config.get('sendmail_path', '/usr/sbin/sendmail'), timeout=timeout)
+    if name == 'http':
+        if not config.get('http_api_url'):
+            raise ValueError("http email transport needs EMAIL_API_URL")
+        return HTTPAPITransport(config['http_api_url'], config.get('http_api_key', ''), timeout=timeout,
+                                pool_size=int(config.get('pool_size', 4)))
+    if name == 'file':
+        return FileTransport(config.get('file_path', '/tmp/britishglobal-mail'), config.get('file_format', 'eml'))
+    raise ValueError(f"Unknown email transport: {name}")
+
+
+_transports = {}
+_transports_lock = threading.Lock()
+
+
+def get_transport(config: Dict) -> EmailTransport:
+    """EMAIL_CONFIG'e göre paylaşılan transport - virgüllü liste failover zinciri kurar"""
+
+    names = [n.strip() for n in str(config.get('transport') or 'smtp').split(',') if n.strip()]
+    key = (tuple(names), config.get('failover_strategy', 'ordered'),
+           config.get('smtp_server'), config.get('smtp_port'), config.get('user'))
+    with _transports_lock:
+        transport = _transports.get(key)
+        if transport is None:
+            if len(names) == 1:
+                transport = build_transport(names[0], config)
+            else:
+                transport = FailoverTransport([build_transport(n, config) for n in names],
+                                              strategy=config.get('failover_strategy', 'ordered'),
+                                              cooldown=float(config.get('failover_cooldown', 30)))
+            _transports[key] = transport
+        return transport
+
+
+def close_all_transports():
+    """Paylaşılan transport'ları kapat (shutdown) - SMTP havuzları close_all_pools ile kapanır"""
+
+    with _transports_lock:
+        transports = list(_transports.values())
+    for transport in transports:
+        try:
+            transport.close()
+        except Exception as e:
+            logger.warning("Email transport close error: %s", e)
+
+
+def _reset_after_fork():
+    global _transports, _transports_lock
+    _transports = {}
+    _transports_lock = threading.Lock()
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_reset_after_fork)
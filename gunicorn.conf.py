@@ -0,0 +1,62 @@
+# gunicorn.conf.py
+"""Gunicorn ayarları ve worker yaşam döngüsü hook'ları
+
+Master sadece hafif WSGI modülünü yükler (preload_app). Servisler ve
+bağlantı havuzları her worker'da fork'tan sonra bir kez kurulur,
+worker kapanırken düzgünce boşaltılır.
+"""
+import os
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '8080')}"
+workers = int(os.environ.get('GUNICORN_WORKERS', '2'))
+threads = int(os.environ.get('GUNICORN_THREADS', '4'))
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', '300'))
+graceful_timeout = int(os.environ.get('GUNICORN_GRACEFUL_TIMEOUT', '30'))
+preload_app = os.environ.get('GUNICORN_PRELOAD', 'true').lower() == 'true'
+accesslog = '-'
+
+
+def post_fork(server, worker):
+    """Worker'a özel servisleri ve havuzları fork'tan sonra kur"""
+
+    import main
+
+    # preload_app ile master'dan miras kalan referansları bırak
+    main.reset_after_fork()
+
+    try:
+        result = main.warm_up_services()
+        server.log.info("Worker %s services ready: %s", worker.pid, result)
+    except Exception as e:
+        # İlk istek initialize_services ile tekrar dener
+        server.log.warning("Worker %s warm-up failed: %s", worker.pid, e)
+
+    # /ready için arka plan bağımlılık kontrolü
+    main.start_readiness_checker()
+
+    # ADMISSION_OVERFLOW=spool ise bekleyen gönderimleri işle
+    main.start_spool_drainer()
+
+    # Contact mirror artımlı sync
+    main.start_contact_mirror_sync()
+
+    # EMAIL_DIGEST_CATEGORIES açıksa özet mailler
+    main.start_digest_flusher()
+
+    # Arka plana ertelenip tamamlanmamış gönderimleri tekrar işle
+    main.start_pending_resumer()
+
+
+def worker_exit(server, worker):
+    """Worker kapanışında havuzları boşalt"""
+
+    import main
+
+    try:
+        main.shutdown_services()
+    except Exception as e:
+        server.log.warning("Worker %s shutdown error: %s", worker.pid, e)
+
+    # Kuyruktaki log kayıtlarını ve bekleyen batch'leri gönder
+    from utils.logging_setup import shutdown_logging
+    shutdown_logging()
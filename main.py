@@ -1,18 +1,28 @@
-from flask import Flask, request, jsonify
-import json
+import time
+_IMPORT_STARTED = time.perf_counter()
+
+from flask import Flask, Response, request, jsonify
 import os
+import math
 import logging
+import threading
 from datetime import datetime
 
-# Import fix - try-catch ile güvenli import
+from utils.startup_report import startup_report
+from utils.logging_setup import HOT, configure_logging
+from utils.admission import AdmissionController
+from utils.spool import DirectorySpool, SpoolDrainer
+from utils.deadline import Deadline
+from utils.background_queue import BackgroundQueue
+from utils.webhook_journal import WebhookJournal
+from utils.signature import WebhookVerifier
+from utils import json_codec
+
+# Cold start: WSGI import yolu sadece Flask + Config yükler.
+# requests, smtplib, email.mime ve servis modülleri initialize_services'te yüklenir.
 try:
-    from email_services.education_email import EducationEmailService
-    from email_services.legal_email import LegalEmailService
-    from email_services.business_email import BusinessEmailService
-    from services.hubspot_service import HubSpotService
-    from utils.form_processor import FormProcessor
     from config.settings import Config
-    IMPORTS_SUCCESS = True
+    IMPORTS_SUCCESS = None  # Servis modülleri henüz yüklenmedi
 except ImportError as e:
     print(f"Import error: {e}")
     IMPORTS_SUCCESS = False
@@ -47,54 +57,439 @@ except ImportError as e:
 
 app = Flask(__name__)
 
-# Logging konfigürasyonu
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-)
+# get_json/jsonify - orjson varsa ham byte'lardan decode, byte gövdeye encode
+json_codec.install(app)
+
+# Logging konfigürasyonu - JSON, kuyruk + listener thread (istek thread'i I/O beklemez)
+configure_logging()
 logger = logging.getLogger(__name__)
 
-# Servisler - Lazy loading ile
+# Servisler - worker başına bir kez kurulur (gunicorn.conf.py post_fork)
 hubspot_service = None
 form_processor = None
 email_services = {}
+submission_pipeline = None
+_services_lock = threading.Lock()
+
+# Deadline'a sığmayan adımlar response'tan sonra burada çalışır
+background_queue = BackgroundQueue(max_size=getattr(Config, 'BACKGROUND_QUEUE_SIZE', 100))
 
 def initialize_services():
-    """Servisleri lazy loading ile başlat"""
-    global hubspot_service, form_processor, email_services
+    """Servisleri başlat - ağır import'lar burada yapılır, thread-safe ve idempotent"""
     
-    if hubspot_service is None:
+    # Hızlı yol: kurulmuşsa lock alma
+    if hubspot_service is not None or IMPORTS_SUCCESS is False:
+        return
+    
+    with _services_lock:
+        _initialize_services_locked()
+
+def _initialize_services_locked():
+    global hubspot_service, form_processor, email_services, submission_pipeline, IMPORTS_SUCCESS
+    
+    if hubspot_service is None and IMPORTS_SUCCESS is not False:
+        try:
+            with startup_report.phase('service_imports'):
+                hubspot_module = startup_report.timed_import('services.hubspot_service')
+                processor_module = startup_report.timed_import('utils.form_processor')
+                education_module = startup_report.timed_import('email_services.education_email')
+                legal_module = startup_report.timed_import('email_services.legal_email')
+                business_module = startup_report.timed_import('email_services.business_email')
+                routing_module = startup_report.timed_import('email_services.routing')
+                pipeline_module = startup_report.timed_import('services.submission_pipeline')
+                checkpoint_module = startup_report.timed_import('utils.checkpoint_store')
+                gate_module = startup_report.timed_import('utils.validation_gate')
+                spam_module = startup_report.timed_import('utils.spam_filter')
+                mirror_module = startup_report.timed_import('services.contact_mirror')
+                schema_module = startup_report.timed_import('services.property_schema')
+            IMPORTS_SUCCESS = True
+        except ImportError as e:
+            logger.error("Import error: %s", e)
+            IMPORTS_SUCCESS = False
+            logger.warning("Services could not be initialized due to import errors")
+            return
+        
         try:
-            if IMPORTS_SUCCESS:
-                hubspot_service = HubSpotService(Config.HUBSPOT_API_KEY)
-                form_processor = FormProcessor()
+            with startup_report.phase('service_construction'):
+                new_form_processor = processor_module.FormProcessor()
                 
-                # Email servisleri
-                email_services = {
-                    'education': EducationEmailService(Config.EMAIL_CONFIG),
-                    'legal': LegalEmailService(Config.EMAIL_CONFIG),
-                    'business': BusinessEmailService(Config.EMAIL_CONFIG)
+                # Email servisleri - routing tablosu gönderimden önce derlenir
+                routing_module.reload_routing(Config)
+                new_email_services = {
+                    'education': education_module.EducationEmailService(Config.EMAIL_CONFIG),
+                    'legal': legal_module.LegalEmailService(Config.EMAIL_CONFIG),
+                    'business': business_module.BusinessEmailService(Config.EMAIL_CONFIG)
                 }
-                logger.info("Services initialized successfully")
-            else:
-                logger.warning("Services could not be initialized due to import errors")
+                
+                mirror_path = getattr(Config, 'CONTACT_MIRROR_DB', '')
+                new_contact_mirror = mirror_module.ContactMirror(
+                    mirror_path, lru_size=getattr(Config, 'CONTACT_MIRROR_LRU_SIZE', 2048)
+                ) if mirror_path else None
+                
+                new_property_schema = schema_module.PropertySchema(
+                    getattr(Config, 'HUBSPOT_SCHEMA_CACHE', '') or None,
+                    ttl=getattr(Config, 'HUBSPOT_SCHEMA_TTL', 86400)
+                )
+                
+                new_hubspot_service = hubspot_module.HubSpotService(
+                    Config.HUBSPOT_API_KEY, Config.HUBSPOT_API_BASE, contact_mirror=new_contact_mirror,
+                    property_schema=new_property_schema
+                )
+                
+                # hubspot_service en son atanır - hızlı yol onu "hazır" işareti olarak kullanır
+                form_processor = new_form_processor
+                email_services = new_email_services
+                submission_pipeline = pipeline_module.SubmissionPipeline(
+                    new_hubspot_service, new_form_processor, new_email_services,
+                    background_queue=background_queue,
+                    background_timeout=getattr(Config, 'BACKGROUND_TASK_TIMEOUT', 120),
+                    checkpoints=checkpoint_module.CheckpointStore(
+                        getattr(Config, 'CHECKPOINT_DB', ':memory:'),
+                        retention_days=getattr(Config, 'CHECKPOINT_RETENTION_DAYS', 7)
+                    ),
+                    validation_gate=gate_module.ValidationGate(
+                        max_body_bytes=getattr(Config, 'VALIDATION_MAX_BODY_BYTES', 65536),
+                        max_fields=getattr(Config, 'VALIDATION_MAX_FIELDS', 200),
+                        max_value_length=getattr(Config, 'VALIDATION_MAX_VALUE_LENGTH', 10000),
+                        quarantine_reasons=getattr(Config, 'VALIDATION_QUARANTINE', gate_module.QUARANTINE_REASONS)
+                    ) if getattr(Config, 'VALIDATION_GATE', True) else None,
+                    spam_filter=_build_spam_filter(spam_module) if getattr(Config, 'SPAM_FILTER', True) else None
+                )
+                hubspot_service = new_hubspot_service
+            logger.info("Services initialized successfully (pid %s)", os.getpid())
         except Exception as e:
-            logger.error(f"Service initialization error: {str(e)}")
+            logger.error("Service initialization error: %s", e)
+
+def _build_spam_filter(spam_module):
+    domains = spam_module.DISPOSABLE_DOMAINS
+    if getattr(Config, 'SPAM_DISPOSABLE_DOMAINS_FILE', ''):
+        domains = domains | spam_module.load_domains(Config.SPAM_DISPOSABLE_DOMAINS_FILE)
+    return spam_module.SpamFilter(
+        honeypot_fields=getattr(Config, 'SPAM_HONEYPOT_FIELDS', []),
+        disposable_domains=domains,
+        email_limit=getattr(Config, 'SPAM_EMAIL_LIMIT', 5),
+        email_window=getattr(Config, 'SPAM_EMAIL_WINDOW', 3600),
+        ip_limit=getattr(Config, 'SPAM_IP_LIMIT', 120),
+        ip_window=getattr(Config, 'SPAM_IP_WINDOW', 60),
+        duplicate_threshold=getattr(Config, 'SPAM_DUPLICATE_THRESHOLD', 0.8),
+        duplicate_senders=getattr(Config, 'SPAM_DUPLICATE_SENDERS', 5),
+        min_notes_words=getattr(Config, 'SPAM_MIN_NOTES_WORDS', 20)
+    )
+
+def warm_up_services() -> dict:
+    """Servisleri kur ve bağlantı havuzlarını trafik gelmeden önce aç"""
+    
+    initialize_services()
+    result = {"services_initialized": hubspot_service is not None}
+    
+    if hubspot_service is not None:
+        with startup_report.phase('hubspot_pool_warm_up'):
+            result["hubspot"] = hubspot_service.warm_up()
+    
+    if email_services:
+        transport = next(iter(email_services.values())).get_transport()
+        if not transport.requires_credentials or (Config.EMAIL_CONFIG.get('user') and Config.EMAIL_CONFIG.get('password')):
+            with startup_report.phase('smtp_pool_warm_up'):
+                result["smtp_connections"] = transport.warm_up()
+    
+    return result
+
+# Readiness - arka planda kontrol edilir, /ready önbellekten döner
+readiness_checker = None
+_readiness_lock = threading.Lock()
+
+def _check_hubspot() -> dict:
+    if hubspot_service is None:
+        return {"success": False, "error": "Services not initialized"}
+    return hubspot_service.health_check()
+
+def _check_smtp() -> dict:
+    if not email_services:
+        return {"success": False, "error": "Services not initialized"}
+    return next(iter(email_services.values())).get_transport().health_check()
+
+def start_readiness_checker():
+    """Worker başına tek arka plan kontrolcüsü başlat"""
+    global readiness_checker
+    
+    with _readiness_lock:
+        if readiness_checker is None:
+            from services.health_checker import DependencyHealthChecker
+            readiness_checker = DependencyHealthChecker(
+                {"hubspot": _check_hubspot, "smtp": _check_smtp},
+                interval=getattr(Config, 'READINESS_CHECK_INTERVAL', 30),
+                before_check=initialize_services
+            )
+        readiness_checker.start()
+    return readiness_checker
+
+def start_contact_mirror_sync():
+    """Mirror'ı lastmodifieddate ile periyodik güncelle (worker başına)"""
+    
+    initialize_services()
+    service = hubspot_service
+    if service is not None and service.contact_mirror is not None and Config.HUBSPOT_API_KEY:
+        service.contact_mirror.start_background_sync(
+            service, interval=getattr(Config, 'CONTACT_MIRROR_SYNC_INTERVAL', 300)
+        )
+
+def start_digest_flusher():
+    """Digest modu açıksa biriken bildirimleri periyodik gönder (worker başına)"""
+    
+    initialize_services()
+    from email_services.digest import get_digest
+    digest = get_digest(Config.EMAIL_CONFIG)
+    if digest is not None:
+        digest.start(_digest_service, interval=min(15.0, digest.window / 4), on_delivered=_digest_delivered)
+    return digest
+
+def start_pending_resumer():
+    """Arka plana ertelenip tamamlanmamış gönderimleri periyodik tekrar işle (worker başına)"""
+    
+    initialize_services()
+    pipeline = submission_pipeline
+    if pipeline is not None:
+        pipeline.start_resumer(interval=getattr(Config, 'PENDING_RESUME_INTERVAL', 30),
+                               max_attempts=getattr(Config, 'PENDING_MAX_ATTEMPTS', 8))
+    return pipeline
+
+def _digest_service(category):
+    # Servis sözlüğü reset/initialize ile değişebilir - her flush'ta güncelini al
+    return email_services.get(category)
+
+def _digest_delivered(submission_ids):
+    """Digest'i giden gönderimlerin admin_notified adımını tamamla"""
+    pipeline = submission_pipeline
+    if pipeline is not None:
+        pipeline.digest_delivered(submission_ids)
+
+def reset_after_fork():
+    """Fork öncesi master'da oluşmuş servis/bağlantı referanslarını bırak (kapatmadan)"""
+    global hubspot_service, form_processor, email_services, submission_pipeline, _services_lock
+    global readiness_checker, _readiness_lock, admission, spool, spool_drainer, _spool_lock, background_queue
+    global journal, _journal_lock, webhook_verifier
+    
+    _services_lock = threading.Lock()
+    _readiness_lock = threading.Lock()
+    _spool_lock = threading.Lock()
+    readiness_checker = None  # Thread'ler fork'ta kopyalanmaz
+    spool_drainer = None
+    spool = None
+    journal = None  # Her worker kendi segment dosyalarına yazar
+    _journal_lock = threading.Lock()
+    admission = _build_admission_controller()
+    webhook_verifier = WebhookVerifier(getattr(Config, 'TALLY_SIGNING_SECRETS', []))
+    background_queue = BackgroundQueue(max_size=getattr(Config, 'BACKGROUND_QUEUE_SIZE', 100))
+    hubspot_service = None
+    form_processor = None
+    email_services = {}
+    submission_pipeline = None
+
+def shutdown_services():
+    """Worker kapanışı - havuzları düzgünce boşalt"""
+    global hubspot_service
+    
+    if readiness_checker is not None:
+        readiness_checker.stop()
+    
+    if spool_drainer is not None:
+        spool_drainer.stop()
+    
+    if submission_pipeline is not None:
+        submission_pipeline.stop_resumer()
+    
+    if IMPORTS_SUCCESS:
+        from email_services.digest import get_digest
+        digest = get_digest(Config.EMAIL_CONFIG)
+        if digest is not None:
+            # Bekleyen özetler /tmp ile birlikte kaybolmasın - pencereyi beklemeden gönder
+            try:
+                digest.flush(_digest_service, force=True, on_delivered=_digest_delivered)
+            except Exception as e:
+                logger.warning("Digest flush on shutdown failed: %s", e)
+            digest.stop()
+    
+    # Ertelenmiş işlere graceful_timeout içinde bitme şansı ver
+    background_queue.stop(timeout=10)
+    
+    if journal is not None:
+        journal.close()
+    
+    with _services_lock:
+        service, hubspot_service = hubspot_service, None
+        
+        if service is not None:
+            if service.contact_mirror is not None:
+                service.contact_mirror.stop()
+            try:
+                service.close()
+            except Exception as e:
+                logger.warning("HubSpot session close error: %s", e)
+        
+        if IMPORTS_SUCCESS:
+            try:
+                from email_services.smtp_pool import close_all_pools
+                close_all_pools()
+            except Exception as e:
+                logger.warning("SMTP pool close error: %s", e)
+            try:
+                from email_services.transports import close_all_transports
+                from utils.event_loop import get_worker_loop
+                close_all_transports()
+                get_worker_loop().stop()
+            except Exception as e:
+                logger.warning("Email transport close error: %s", e)
+    
+    logger.info("Services shut down (pid %s)", os.getpid())
+
+def _build_admission_controller():
+    return AdmissionController(
+        max_inflight=getattr(Config, 'ADMISSION_MAX_INFLIGHT', 3),
+        max_waiting=getattr(Config, 'ADMISSION_MAX_WAITING', 4),
+        wait_timeout=getattr(Config, 'ADMISSION_WAIT_TIMEOUT', 0.5)
+    )
+
+# Admission control - worker başına (fork sonrası yeniden kurulur)
+admission = _build_admission_controller()
+
+# Webhook imza doğrulaması - JSON parse ve servis kurulumundan önce
+webhook_verifier = WebhookVerifier(getattr(Config, 'TALLY_SIGNING_SECRETS', []))
+if not webhook_verifier.enabled:
+    logger.warning("TALLY_SIGNING_SECRETS not set - webhook signatures are not verified")
+spool = None
+spool_drainer = None
+_spool_lock = threading.Lock()
+
+def _spool_enabled() -> bool:
+    return getattr(Config, 'ADMISSION_OVERFLOW', 'reject') == 'spool'
+
+def _process_spooled(raw_body: bytes) -> bool:
+    """Spool'dan gelen gönderimi işle - False ise tekrar denenir"""
+    
+    initialize_services()
+    if submission_pipeline is None:
+        return False
+    
+    data = json_codec.loads(raw_body)
+    admission.acquire()
+    try:
+        _, status = submission_pipeline.process(data, deadline=Deadline(getattr(Config, 'WEBHOOK_TIMEOUT', 30)),
+                                                raw_size=len(raw_body))
+    finally:
+        admission.release()
+    return status < 500
+
+def start_spool_drainer():
+    """Spool modu açıksa worker başına tek drainer başlat"""
+    global spool, spool_drainer
+    
+    if not _spool_enabled():
+        return None
+    
+    with _spool_lock:
+        if spool is None:
+            spool = DirectorySpool(Config.SPOOL_DIR, max_depth=Config.SPOOL_MAX_DEPTH)
+        if spool_drainer is None:
+            spool_drainer = SpoolDrainer(spool, _process_spooled,
+                                         retry_delay=getattr(Config, 'SPOOL_RETRY_DELAY', 5.0),
+                                         max_retry_delay=getattr(Config, 'SPOOL_MAX_RETRY_DELAY', 300.0),
+                                         max_attempts=getattr(Config, 'SPOOL_MAX_ATTEMPTS', 8))
+        spool_drainer.start()
+    return spool_drainer
+
+journal = None
+_journal_lock = threading.Lock()
 
-# Global state management
-processed_submissions = set()
+def get_journal():
+    """Ham webhook günlüğü - JOURNAL_DIR boşsa kapalı"""
+    global journal
+    
+    directory = getattr(Config, 'JOURNAL_DIR', '')
+    if journal is None and directory:
+        with _journal_lock:
+            if journal is None:
+                new_journal = WebhookJournal(
+                    directory,
+                    max_segment_bytes=Config.JOURNAL_SEGMENT_MAX_MB * 1024 * 1024,
+                    max_segment_age=Config.JOURNAL_SEGMENT_MAX_AGE,
+                    retention_days=Config.JOURNAL_RETENTION_DAYS,
+                    max_total_bytes=getattr(Config, 'JOURNAL_MAX_TOTAL_MB', 256) * 1024 * 1024
+                )
+                new_journal.prune()
+                journal = new_journal
+    return journal
+
+def _journal_webhook(raw_body: bytes, data):
+    """Kabul edilen body'yi olduğu gibi günlüğe yaz - hata webhook'u etkilemez"""
+    
+    try:
+        target = get_journal()
+        if target is not None:
+            submission_id = data.get('data', {}).get('responseId', '') if isinstance(data, dict) else ''
+            target.append(raw_body, submission_id)
+    except Exception as e:
+        logger.warning("Webhook journal write failed: %s", e)
+
+def queue_depth() -> int:
+    """Autoscaling sinyali: çalışan + slot bekleyen + spool'da bekleyen"""
+    
+    depth = admission.inflight + admission.waiting
+    if spool is not None:
+        depth += spool.depth()
+    return depth
+
+def _overflow_response(raw_body: bytes):
+    """Limit dolu: spool'a yaz (202) ya da hızlıca retry edilebilir 503 dön"""
+    
+    if _spool_enabled():
+        drainer = start_spool_drainer()
+        if spool.put(raw_body):
+            admission.record_spooled()
+            drainer.notify()
+            return jsonify({
+                "success": True,
+                "message": "Webhook accepted for deferred processing",
+                "queued": True,
+                "timestamp": datetime.now().isoformat()
+            }), 202, {"X-Queue-Depth": str(queue_depth())}
+    
+    logger.warning("Admission limit reached, shedding load (depth %d)", queue_depth())
+    return jsonify({
+        "success": False,
+        "error": "Server busy, retry later",
+        "retryable": True,
+        "timestamp": datetime.now().isoformat()
+    }), 503, {"Retry-After": "5", "X-Queue-Depth": str(queue_depth())}
+
+def _client_ip() -> str:
+    """İstemci IP'si - XFF'nin son hop'unu Cloud Run front end'i ekler, öncekiler istemcinin elinde"""
+    forwarded = request.headers.get('X-Forwarded-For', '')
+    return forwarded.rsplit(',', 1)[-1].strip() or request.remote_addr or ''
 
 @app.route("/tally", methods=["POST"])
 def tally_webhook():
     """Ana Tally webhook endpoint"""
     
+    # Gönderim başına toplam süre bütçesi - tüm ağ çağrıları buradan timeout alır
+    deadline = Deadline(getattr(Config, 'WEBHOOK_TIMEOUT', 30))
+    
+    # İmza ham byte'lar üzerinde - imzasız istek parse edilmez, servis kurulmaz
+    if webhook_verifier.enabled and not webhook_verifier.verify(
+        request.get_data(cache=True), request.headers.get(webhook_verifier.header)
+    ):
+        logger.warning("Webhook signature rejected from %s", _client_ip())
+        return jsonify({
+            "success": False,
+            "error": "Invalid or missing signature"
+        }), 401
+    
     try:
         # Servisleri başlat
         initialize_services()
         
         # Input validation
         if not request.is_json:
-            logger.warning(f"Invalid content type: {request.content_type}")
+            logger.warning("Invalid content type: %s", request.content_type)
             return jsonify({
                 "success": False,
                 "error": "Content-Type must be application/json"
@@ -108,12 +503,13 @@ def tally_webhook():
                 "error": "Empty JSON data"
             }), 400
         
-        logger.info("=" * 60)
-        logger.info(f"NEW TALLY WEBHOOK - {datetime.now()}")
-        logger.info(f"Received data keys: {list(data.keys()) if isinstance(data, dict) else 'Not a dict'}")
+        logger.info("New Tally webhook - keys: %s", list(data) if isinstance(data, dict) else 'Not a dict', extra=HOT)
+        
+        # Backfill/replay için ham body (yeniden serialize edilmeden)
+        _journal_webhook(request.get_data(cache=True), data)
         
         # Basit response eğer servisler çalışmıyorsa
-        if not IMPORTS_SUCCESS or not form_processor:
+        if not IMPORTS_SUCCESS or submission_pipeline is None:
             logger.warning("Services not available, returning basic response")
             return jsonify({
                 "success": True,
@@ -121,121 +517,26 @@ def tally_webhook():
                 "timestamp": datetime.now().isoformat()
             }), 200
         
-        # Form verilerini işle
-        extracted_data = form_processor.extract_form_data(data)
-        if not extracted_data:
-            logger.error("Could not extract form data")
-            return jsonify({
-                "success": False,
-                "error": "Could not extract form data"
-            }), 400
-        
-        # Kategori belirle
-        category = form_processor.determine_category(extracted_data)
-        logger.info(f"Category determined: {category}")
-        
-        # İletişim bilgileri
-        contact_info = form_processor.get_contact_info(extracted_data)
-        logger.info(f"Contact: {contact_info['firstname']} {contact_info['lastname']} - {contact_info['email']}")
-        
-        # Email kontrolü
-        if not contact_info.get('email'):
-            logger.error("No email found in submission")
-            return jsonify({
-                "success": False,
-                "error": "Email address required"
-            }), 400
-        
-        # Duplicate kontrolü
-        submission_id = extracted_data.get('submission_id', '')
-        if submission_id and submission_id in processed_submissions:
-            logger.info(f"Duplicate submission ignored: {submission_id}")
-            return jsonify({
-                "success": True,
-                "message": "Duplicate submission ignored",
-                "submission_id": submission_id
-            }), 200
-        
-        # İşlem sonuçları
-        results = {
-            "submission_id": submission_id,
-            "category": category,
-            "contact": contact_info,
-            "hubspot": {"success": False},
-            "email": {"success": False}
-        }
-        
-        # HubSpot'a kaydet
-        if hubspot_service:
-            try:
-                logger.info("Processing HubSpot integration...")
-                hubspot_result = hubspot_service.save_contact(
-                    contact_info, category, extracted_data
-                )
-                results['hubspot'] = hubspot_result
-                logger.info(f"HubSpot: {hubspot_result.get('success', False)}")
-                
-            except Exception as hubspot_error:
-                logger.error(f"HubSpot error: {str(hubspot_error)}")
-                results['hubspot'] = {"success": False, "error": str(hubspot_error)}
-        
-        # Email gönder (kategori bazlı)
-        if email_services:
-            try:
-                logger.info(f"Processing {category} email notifications...")
-                email_service = email_services.get(category)
-                
-                if email_service:
-                    email_result = email_service.send_notification(
-                        contact_info, extracted_data, results['hubspot']
-                    )
-                    results['email'] = email_result
-                    logger.info(f"Email: {email_result.get('success', False)}")
-                    
-                    # Otomatik onay maili gönder (kategori bazlı)
-                    try:
-                        confirmation_result = email_service.send_application_confirmation(
-                            contact_info, extracted_data
-                        )
-                        results['confirmation_email'] = confirmation_result
-                        logger.info(f"Confirmation email: {confirmation_result.get('success', False)}")
-                    except Exception as conf_error:
-                        logger.error(f"Confirmation email error: {str(conf_error)}")
-                        results['confirmation_email'] = {"success": False, "error": str(conf_error)}
-                    
-                else:
-                    logger.warning(f"No email service found for category: {category}")
-                    results['email'] = {"success": False, "error": "No email service for category"}
-                    
-            except Exception as email_error:
-                logger.error(f"Email error: {str(email_error)}")
-                results['email'] = {"success": False, "error": str(email_error)}
-        
-        # Başarılı işlem olarak kaydet
-        if submission_id:
-            processed_submissions.add(submission_id)
+        # Admission control - limit doluysa thread'i bloklamadan cevap ver
+        if not admission.try_acquire():
+            return _overflow_response(request.get_data(cache=True))
         
-        logger.info("Webhook processing completed successfully")
-        logger.info("=" * 60)
+        try:
+            body, status = submission_pipeline.process(
+                data, deadline=deadline, raw_size=request.content_length,
+                client_ip=_client_ip(),
+                signed=webhook_verifier.enabled
+            )
+        finally:
+            admission.release()
         
-        # Tally için standart response
-        return jsonify({
-            "success": True,
-            "message": "Webhook processed successfully",
-            "submission_id": submission_id,
-            "category": category,
-            "results": {
-                "hubspot": results['hubspot'].get('success', False),
-                "email": results['email'].get('success', False),
-                "confirmation": results.get('confirmation_email', {}).get('success', False)
-            },
-            "timestamp": datetime.now().isoformat()
-        }), 200
+        headers = {"X-Queue-Depth": str(queue_depth())}
+        if body.get('retry_after'):
+            headers["Retry-After"] = str(int(math.ceil(body['retry_after'])))
+        return jsonify(body), status, headers
         
     except Exception as e:
-        logger.error(f"CRITICAL WEBHOOK ERROR: {str(e)}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("CRITICAL WEBHOOK ERROR: %s", e)
         
         # Tally için 200 dön (retry prevention)
         return jsonify({
@@ -250,7 +551,7 @@ def health_check():
     
     # Servis durumları
     services_status = {
-        "imports": "✅ Success" if IMPORTS_SUCCESS else "❌ Failed",
+        "imports": "⏳ Deferred" if IMPORTS_SUCCESS is None else ("✅ Success" if IMPORTS_SUCCESS else "❌ Failed"),
         "hubspot": "✅ Ready" if Config.HUBSPOT_API_KEY else "❌ Not configured",
         "email": "✅ Ready" if Config.EMAIL_CONFIG.get('user') else "❌ Not configured",
         "education_partner": "✅ Ready" if Config.EDUCATION_PARTNER_EMAIL else "❌ Not configured",
@@ -266,9 +567,12 @@ def health_check():
         "endpoints": {
             "/tally": "Main Tally webhook (POST)",
             "/config": "Configuration check (GET)",
-            "/debug": "Debug webhook data (POST)"
+            "/debug": "Debug webhook data (POST)",
+            "/startup": "Startup probe / warm-up (GET)",
+            "/ready": "Cached dependency readiness (GET)",
+            "/metrics": "Admission and queue depth metrics (GET)"
         },
-        "processed_submissions": len(processed_submissions),
+        "processed_submissions": submission_pipeline.checkpoints.completed_count() if submission_pipeline else 0,
         "timestamp": datetime.now().isoformat()
     })
 
@@ -288,11 +592,17 @@ def config_check():
         "business_meeting_link": "✅ Configured" if Config.BUSINESS_MEETING_LINK else "⚠️ Optional"
     }
     
+    routes = None
+    if email_services:
+        from email_services.routing import get_routing_table
+        routes = get_routing_table().describe()
+    
     return jsonify({
         "imports_successful": IMPORTS_SUCCESS,
         "configuration_status": config_status,
         "missing_required": missing_configs,
-        "ready_for_production": len(missing_configs) == 0 and IMPORTS_SUCCESS,
+        "email_routes": routes,
+        "ready_for_production": len(missing_configs) == 0 and IMPORTS_SUCCESS is not False,
         "environment_variables": {
             "total_configured": len([k for k, v in config_status.items() if "✅" in v]),
             "required_missing": len(missing_configs),
@@ -324,9 +634,9 @@ def debug_webhook():
         }
         
         # Form processing (eğer mümkünse)
+        initialize_services()
         if IMPORTS_SUCCESS and form_processor:
             try:
-                initialize_services()
                 extracted = form_processor.extract_form_data(data)
                 category = form_processor.determine_category(extracted)
                 contact = form_processor.get_contact_info(extracted)
@@ -347,13 +657,96 @@ def debug_webhook():
         return jsonify(debug_info)
         
     except Exception as e:
-        logger.error(f"Debug error: {str(e)}")
+        logger.error("Debug error: %s", e)
         return jsonify({
             "status": "DEBUG_ERROR",
             "error": str(e),
             "timestamp": datetime.now().isoformat()
         }), 500
 
+@app.route("/ready", methods=["GET"])
+def readiness_probe():
+    """Readiness probe - dış servise gitmez, arka plan kontrolünün önbelleğini döner"""
+    
+    checker = readiness_checker if readiness_checker is not None and readiness_checker.running \
+        else start_readiness_checker()
+    status, body = checker.response()
+    return Response(body, status=status, mimetype='application/json')
+
+def _email_quota_stats():
+    if not email_services:
+        return None
+    from email_services.quota_ledger import get_ledger, sender_accounts
+    ledger = get_ledger(Config.EMAIL_CONFIG)
+    return ledger.get_stats([a['user'] for a in sender_accounts(Config.EMAIL_CONFIG)]) if ledger is not None else None
+
+def _email_digest_stats():
+    if not email_services:
+        return None
+    from email_services.digest import get_digest
+    digest = get_digest(Config.EMAIL_CONFIG)
+    return digest.get_stats() if digest is not None else None
+
+def _email_attachment_stats():
+    if not email_services:
+        return None
+    from email_services.attachments import get_attachment_cache
+    return get_attachment_cache().get_stats()
+
+def _validation_stats():
+    if submission_pipeline is None or submission_pipeline.validation_gate is None:
+        return None
+    return submission_pipeline.validation_gate.get_stats()
+
+def _spam_filter_stats():
+    if submission_pipeline is None or submission_pipeline.spam_filter is None:
+        return None
+    return submission_pipeline.spam_filter.get_stats()
+
+@app.route("/metrics", methods=["GET"])
+def metrics():
+    """Admission/kuyruk metrikleri - queue_depth autoscaling sinyali olarak kullanılabilir"""
+    
+    return jsonify({
+        "queue_depth": queue_depth(),
+        "admission": admission.snapshot(),
+        "overflow_policy": getattr(Config, 'ADMISSION_OVERFLOW', 'reject'),
+        "spool_depth": spool.depth() if spool is not None else 0,
+        "spool_dead_letters": spool.dead_letter_count() if spool is not None else 0,
+        "spool_drainer": spool_drainer.stats if spool_drainer is not None else None,
+        "background_queue": background_queue.snapshot(),
+        "pending_submissions": submission_pipeline.checkpoints.pending_counts()
+            if submission_pipeline is not None else None,
+        "held_for_review": submission_pipeline.checkpoints.review_count() if submission_pipeline is not None else None,
+        "journal": journal.get_stats() if journal is not None else None,
+        "contact_mirror": hubspot_service.contact_mirror.get_stats()
+            if hubspot_service is not None and hubspot_service.contact_mirror is not None else None,
+        "property_schema": hubspot_service.property_schema.get_stats() if hubspot_service is not None else None,
+        "email_transport": next(iter(email_services.values())).get_transport().get_stats() if email_services else None,
+        "email_quota": _email_quota_stats(),
+        "email_digest": _email_digest_stats(),
+        "email_attachments": _email_attachment_stats(),
+        "validation": _validation_stats(),
+        "spam_filter": _spam_filter_stats(),
+        "webhook_signatures": webhook_verifier.get_stats(),
+        "pid": os.getpid(),
+        "timestamp": datetime.now().isoformat()
+    })
+
+@app.route("/startup", methods=["GET"])
+def startup_probe():
+    """Cloud Run startup probe - servisleri kurar, havuzları açar, import maliyetini raporlar"""
+    
+    warm_up = warm_up_services()
+    ready = IMPORTS_SUCCESS is True and warm_up["services_initialized"]
+    
+    return jsonify({
+        "status": "STARTED" if ready else "NOT_READY",
+        "warm_up": warm_up,
+        "startup": startup_report.to_dict(),
+        "timestamp": datetime.now().isoformat()
+    }), 200 if ready else 503
+
 # Error handlers
 @app.errorhandler(404)
 def not_found(e):
@@ -363,7 +756,10 @@ def not_found(e):
             "/": "Health check (GET)",
             "/tally": "Main webhook (POST)",
             "/config": "Configuration check (GET)",
-            "/debug": "Debug webhook data (POST)"
+            "/debug": "Debug webhook data (POST)",
+            "/startup": "Startup probe / warm-up (GET)",
+            "/ready": "Cached dependency readiness (GET)",
+            "/metrics": "Admission and queue depth metrics (GET)"
         }
     }), 404
 
@@ -376,25 +772,27 @@ def method_not_allowed(e):
 
 @app.errorhandler(500)
 def internal_error(e):
-    logger.error(f"Internal server error: {str(e)}")
+    logger.error("Internal server error: %s", e)
     return jsonify({
         "error": "Internal server error",
         "message": "Something went wrong on the server",
         "timestamp": datetime.now().isoformat()
     }), 500
 
+startup_report.record('wsgi_import', (time.perf_counter() - _IMPORT_STARTED) * 1000)
+
 if __name__ == "__main__":
     # Environment check
     try:
         missing_configs = Config.validate_config()
         if missing_configs:
-            logger.warning(f"Missing configurations: {missing_configs}")
+            logger.warning("Missing configurations: %s", missing_configs)
         else:
             logger.info("All required configurations are present")
     except Exception as e:
-        logger.error(f"Config validation error: {str(e)}")
+        logger.error("Config validation error: %s", e)
     
-    logger.info(f"British Global Webhook System starting... (Imports: {'✅' if IMPORTS_SUCCESS else '❌'})")
+    logger.info("British Global Webhook System starting... (Imports: %s)", '❌' if IMPORTS_SUCCESS is False else '✅')
     
     # Port configuration
     port = int(os.environ.get('PORT', 8080))
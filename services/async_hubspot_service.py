@@ -0,0 +1,258 @@
+import asyncio
+import logging
+from typing import Dict, Optional
+
+from utils.logging_setup import HOT
+from utils.deadline import Deadline, DeadlineExceeded
+from utils.async_http import AsyncHTTPPool, AsyncResponse
+from utils.event_loop import WorkerEventLoop, get_worker_loop
+from services.hubspot_service import HubSpotService
+
+logger = logging.getLogger(__name__)
+
+CONTACTS_PATH = '/crm/v3/objects/contacts'
+NOTES_PATH = '/crm/v3/objects/notes'
+PROPERTIES_PATH = '/crm/v3/properties/contacts'
+
+
+class AsyncHubSpotService(HubSpotService):
+    """HubSpotService'in asyncio karşılığı - save_contact sözleşmesi aynı, sadece await edilir
+
+    Property/note içeriği, şema dönüşümü ve contact mirror mantığı
+    HubSpotService'ten gelir; contact/note yazımları tek event loop üzerindeki
+    sınırlı keep-alive havuzundan gider. Böylece bir worker, thread başına
+    bir çağrı yerine yüzlerce CRM çağrısını aynı anda bekletebilir.
+    Şema yenileme ve mirror sync gibi arka plan işleri senkron yoldan devam eder;
+    SQLite ve disk cache erişimi loop'u bloklamamak için to_thread ile yapılır.
+    """
+
+    def __init__(self, api_key: str, api_base: str = "https://api.hubapi.com", max_connections: int = 100,
+                 contact_mirror=None, property_schema=None):
+        super().__init__(api_key, api_base, pool_size=1, contact_mirror=contact_mirror,
+                         property_schema=property_schema)
+        self.http = AsyncHTTPPool(self.api_base, max_connections=max_connections, headers=self.headers)
+        self._schema_load = None
+
+    async def _request(self, method: str, path: str, deadline: Optional[Deadline] = None,
+                       **kwargs) -> AsyncResponse:
+        # Timeout bütçeden hesaplanır - yetmiyorsa DeadlineExceeded istek atılmadan yükselir
+        return await self.http.request(method, path, timeout=self._timeout(deadline), **kwargs)
+
+    async def aclose(self):
+        """Async havuzu ve senkron session'ı kapat"""
+        await self.http.close()
+        self.close()
+
+    async def load_property_schema(self) -> bool:
+        """Şema yoksa/bayatsa loop'u bloklamadan çek (disk cache önce denenir)
+
+        Aynı anda bekleyen tüm çağrılar tek isteği paylaşır.
+        """
+
+        if self._schema_load is None or self._schema_load.done():
+            if not await asyncio.to_thread(self.property_schema.needs_fetch):
+                return self.property_schema.loaded
+            self._schema_load = asyncio.ensure_future(self._fetch_property_schema())
+        return await asyncio.shield(self._schema_load)
+
+    async def _fetch_property_schema(self) -> bool:
+        schema = self.property_schema
+        try:
+            response = await self.http.request('GET', PROPERTIES_PATH, timeout=10)
+            if response.status_code == 200:
+                result = {"success": True, "results": response.json().get('results', [])}
+            else:
+                result = {"success": False, "error": response.text, "status_code": response.status_code}
+        except Exception as e:
+            result = {"success": False, "error": str(e)}
+        return await asyncio.to_thread(schema.refresh, lambda: result) or schema.loaded
+
+    async def save_contact(self, contact_info: Dict, category: str, extracted_data: Dict,
+                           deadline: Optional[Deadline] = None) -> Dict:
+        """Contact'ı HubSpot'a kaydet - dönüş ve DeadlineExceeded davranışı HubSpotService ile aynı"""
+
+        if not self.api_key:
+            return {"success": False, "error": "HubSpot API key not configured"}
+
+        try:
+            contact_result = await self.upsert_contact(contact_info, category, extracted_data, deadline)
+            if not contact_result.get('success'):
+                return contact_result
+
+            contact_id = contact_result.get('contact_id')
+            try:
+                note_result = await self.create_contact_note(contact_id, category, extracted_data, deadline)
+            except DeadlineExceeded as e:
+                logger.warning("Note deferred for contact %s: %s", contact_id, e)
+                note_result = {"success": False, "deferred": True, "error": "Deadline exceeded"}
+
+            return {
+                "success": True,
+                "contact_id": contact_id,
+                "contact_result": contact_result,
+                "note_result": note_result
+            }
+
+        except DeadlineExceeded:
+            raise
+        except Exception as e:
+            logger.error("HubSpot save error: %s", e)
+            return {"success": False, "error": str(e)}
+
+    async def upsert_contact(self, contact_info: Dict, category: str, extracted_data: Dict,
+                             deadline: Optional[Deadline] = None) -> Dict:
+        if not self.api_key:
+            return {"success": False, "error": "HubSpot API key not configured"}
+
+        if not self.property_schema.loaded:
+            await self.load_property_schema()
+        properties = await asyncio.to_thread(
+            self._apply_property_schema, self._build_contact_properties(contact_info, category, extracted_data), deadline
+        )
+        if not properties.get('email'):
+            return {"success": False, "error": "Email rejected by property schema"}
+        return await self._create_or_update_contact(properties, deadline)
+
+    async def _create_or_update_contact(self, properties: Dict, deadline: Optional[Deadline] = None) -> Dict:
+        email = properties.get('email')
+
+        plan = await asyncio.to_thread(self._plan_mirrored_update, email, properties)
+        if plan and 'result' in plan:
+            return plan['result']
+        if plan:
+            result = await self._patch_contact(plan['contact_id'], plan['changed'], deadline,
+                                               email=email, digests=plan['digests'])
+            if result.get('success') or result.get('status_code') != 404:
+                return result
+            logger.info("Mirrored contact %s not found, falling back to create", plan['contact_id'])
+            await asyncio.to_thread(self.contact_mirror.forget, email)
+
+        try:
+            response = await self._request('POST', CONTACTS_PATH, deadline, json_body={"properties": properties})
+
+            if response.status_code in (200, 201):
+                result = response.json()
+                contact_id = result.get('id')
+                logger.info("Contact created/updated successfully - ID: %s", contact_id, extra=HOT)
+                await asyncio.to_thread(self._remember_contact, email, contact_id,
+                                        self._property_digests(properties), result)
+                return {
+                    "success": True,
+                    "contact_id": contact_id,
+                    "action": "created",
+                    "properties_count": len(properties)
+                }
+
+            if response.status_code == 409:
+                logger.info("Contact exists, attempting update...", extra=HOT)
+                return await self._update_existing_contact(properties, deadline)
+
+            logger.error("HubSpot contact error: %s - %s", response.status_code, response.text)
+            return {"success": False, "error": response.text, "status_code": response.status_code}
+
+        except DeadlineExceeded:
+            raise
+        except Exception as e:
+            logger.error("Contact creation error: %s", e)
+            return {"success": False, "error": str(e)}
+
+    async def _update_existing_contact(self, properties: Dict, deadline: Optional[Deadline] = None) -> Dict:
+        try:
+            response = await self._request('POST', CONTACTS_PATH + '/search', deadline,
+                                           json_body=self._email_search_payload(properties.get('email')))
+            if response.status_code != 200:
+                return {"success": False, "error": "Search failed"}
+
+            contacts = response.json().get('results', [])
+            if not contacts:
+                return {"success": False, "error": "Contact not found for update"}
+            return await self._patch_contact(contacts[0]['id'], properties, deadline)
+
+        except DeadlineExceeded:
+            raise
+        except Exception as e:
+            logger.error("Contact update error: %s", e)
+            return {"success": False, "error": str(e)}
+
+    async def _patch_contact(self, contact_id: str, properties: Dict, deadline: Optional[Deadline] = None,
+                             email: Optional[str] = None, digests: Optional[Dict] = None) -> Dict:
+        try:
+            response = await self._request('PATCH', f"{CONTACTS_PATH}/{contact_id}", deadline,
+                                           json_body={"properties": properties})
+
+            if response.status_code == 200:
+                logger.info("Contact updated successfully - ID: %s", contact_id, extra=HOT)
+                await asyncio.to_thread(self._remember_contact, email or properties.get('email'), contact_id,
+                                        digests or self._property_digests(properties), response.json())
+                return {
+                    "success": True,
+                    "contact_id": contact_id,
+                    "action": "updated",
+                    "properties_count": len(properties)
+                }
+            return {"success": False, "error": "Failed to update contact", "status_code": response.status_code}
+
+        except DeadlineExceeded:
+            raise
+        except Exception as e:
+            logger.error("Contact update error: %s", e)
+            return {"success": False, "error": str(e)}
+
+    async def create_contact_note(self, contact_id: str, category: str, extracted_data: Dict,
+                                  deadline: Optional[Deadline] = None) -> Dict:
+        try:
+            digest = self._note_digest(category, extracted_data)
+            duplicate = await asyncio.to_thread(self._find_duplicate_note, contact_id, digest)
+            if duplicate:
+                return duplicate
+
+            response = await self._request('POST', NOTES_PATH, deadline,
+                                           json_body=self._note_payload(contact_id, category, extracted_data))
+
+            if response.status_code in (200, 201):
+                note_id = response.json().get('id')
+                logger.info("Note created successfully - ID: %s", note_id, extra=HOT)
+                if self.contact_mirror:
+                    await asyncio.to_thread(self.contact_mirror.remember_note, contact_id, digest, note_id)
+                return {"success": True, "note_id": note_id}
+
+            logger.error("Note creation error: %s", response.status_code)
+            return {"success": False, "error": response.text}
+
+        except DeadlineExceeded:
+            raise
+        except Exception as e:
+            logger.error("Note creation error: %s", e)
+            return {"success": False, "error": str(e)}
+
+
+class LoopBoundHubSpotService:
+    """AsyncHubSpotService'i senkron çağıranlara (pipeline, replay thread'leri) açar
+
+    Çağrılar worker event loop'unda çalışır; tüm thread'ler aynı sınırlı
+    keep-alive havuzunu paylaşır. Dönüş ve DeadlineExceeded davranışı
+    HubSpotService ile aynıdır.
+    """
+
+    def __init__(self, service: AsyncHubSpotService, loop: Optional[WorkerEventLoop] = None):
+        self.service = service
+        self.loop = loop or get_worker_loop()
+
+    def __getattr__(self, name):
+        # contact_mirror, property_schema, get_stats... doğrudan servisten
+        return getattr(self.service, name)
+
+    def save_contact(self, contact_info: Dict, category: str, extracted_data: Dict,
+                     deadline: Optional[Deadline] = None) -> Dict:
+        return self.loop.run(self.service.save_contact(contact_info, category, extracted_data, deadline))
+
+    def upsert_contact(self, contact_info: Dict, category: str, extracted_data: Dict,
+                       deadline: Optional[Deadline] = None) -> Dict:
+        return self.loop.run(self.service.upsert_contact(contact_info, category, extracted_data, deadline))
+
+    def create_contact_note(self, contact_id: str, category: str, extracted_data: Dict,
+                            deadline: Optional[Deadline] = None) -> Dict:
+        return self.loop.run(self.service.create_contact_note(contact_id, category, extracted_data, deadline))
+
+    def close(self):
+        self.loop.run(self.service.aclose())
@@ -0,0 +1,324 @@
+import os
+import json
+import time
+import sqlite3
+import logging
+import threading
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+# HubSpot search API tek sorguda en fazla 10.000 sonuca sayfalama yapar
+SEARCH_RESULT_LIMIT = 10000
+
+
+def normalize_email(email: str) -> str:
+    return (email or '').strip().lower()
+
+
+def to_epoch_ms(value) -> Optional[int]:
+    """HubSpot tarih alanı (ISO ya da epoch ms) -> epoch ms"""
+
+    if value in (None, ''):
+        return None
+    try:
+        return int(float(value))
+    except (TypeError, ValueError):
+        pass
+    try:
+        parsed = datetime.fromisoformat(str(value).replace('Z', '+00:00'))
+        if parsed.tzinfo is None:
+            parsed = parsed.replace(tzinfo=timezone.utc)
+        return int(parsed.timestamp() * 1000)
+    except ValueError:
+        return None
+
+
+class ContactMirror:
+    """Normalize email -> HubSpot contact ID eşlemesinin yerel kopyası
+
+    Dönen lead'lerde search çağrısı yapmadan doğrudan ID'ye PATCH atılır.
+    Kaynaklar: kendi yazdığımız contact'lar + lastmodifieddate ile artımlı
+    sync. Önünde süreç içi LRU var; SQLite dosyası worker'lar arasında paylaşılır.
+
+    Son yazılan property'lerin özetleri (property_digests) ve contact'a eklenen
+    note'ların içerik özetleri de burada tutulur - değişmeyen alan/note gönderilmez.
+
+    Arka plan sync'i instance başına tek worker'da çalışır (sync_state'teki
+    lease); ilk sync geçmişin tamamını değil, mirror'daki en yeni değişiklikten
+    (boşsa şu andan) sonrasını çeker.
+    """
+
+    def __init__(self, path: str = ':memory:', lru_size: int = 2048):
+        self.path = path
+        self.lru_size = lru_size
+        self._lru = OrderedDict()
+        self._lock = threading.Lock()
+        self._conn = None
+        self._pid = None
+        self.stats = {"lru_hits": 0, "db_hits": 0, "misses": 0, "synced": 0, "sync_errors": 0,
+                      "skipped_writes": 0, "suppressed_fields": 0, "deduped_notes": 0}
+
+        self._sync_thread = None
+        self._sync_stop = threading.Event()
+
+    def _connection(self) -> sqlite3.Connection:
+        # Fork sonrası parent'ın bağlantısı kullanılmaz
+        if self._conn is None or self._pid != os.getpid():
+            if self.path != ':memory:':
+                os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=5.0, check_same_thread=False, isolation_level=None)
+            if self.path != ':memory:':
+                conn.execute("PRAGMA journal_mode=WAL")
+                conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS contacts (
+                    email TEXT PRIMARY KEY,
+                    contact_id TEXT NOT NULL,
+                    property_digests TEXT,
+                    lastmodified INTEGER,
+                    updated_at REAL NOT NULL
+                )
+            """)
+            columns = {row[1] for row in conn.execute("PRAGMA table_info(contacts)")}
+            if 'property_digests' not in columns:
+                conn.execute("ALTER TABLE contacts ADD COLUMN property_digests TEXT")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS contact_notes (
+                    contact_id TEXT NOT NULL,
+                    digest TEXT NOT NULL,
+                    note_id TEXT,
+                    created_at REAL NOT NULL,
+                    PRIMARY KEY (contact_id, digest)
+                )
+            """)
+            conn.execute("CREATE TABLE IF NOT EXISTS sync_state (key TEXT PRIMARY KEY, value TEXT)")
+            self._conn, self._pid = conn, os.getpid()
+            self._lru.clear()
+        return self._conn
+
+    def _cache(self, email: str, entry: Optional[Dict]):
+        self._lru[email] = entry
+        self._lru.move_to_end(email)
+        while len(self._lru) > self.lru_size:
+            self._lru.popitem(last=False)
+
+    def lookup(self, email: str) -> Optional[Dict]:
+        """{'contact_id', 'property_digests', 'lastmodified'} ya da None"""
+
+        email = normalize_email(email)
+        if not email:
+            return None
+
+        with self._lock:
+            if email in self._lru:
+                entry = self._lru[email]
+                self._lru.move_to_end(email)
+                if entry is not None:
+                    self.stats["lru_hits"] += 1
+                    return dict(entry)
+
+            row = self._connection().execute(
+                "SELECT contact_id, property_digests, lastmodified FROM contacts WHERE email = ?", (email,)
+            ).fetchone()
+            if row is None:
+                self.stats["misses"] += 1
+                return None
+
+            entry = {"contact_id": row[0], "property_digests": json.loads(row[1]) if row[1] else {},
+                     "lastmodified": row[2]}
+            self._cache(email, entry)
+            self.stats["db_hits"] += 1
+            return dict(entry)
+
+    def remember(self, email: str, contact_id: str, property_digests: Optional[Dict] = None,
+                 lastmodified: Optional[int] = None):
+        """Kendi yazdığımız contact'ı kaydet (property_digests = HubSpot'taki son hal)"""
+
+        email = normalize_email(email)
+        if not email or not contact_id:
+            return
+
+        with self._lock:
+            self._connection().execute("""
+                INSERT INTO contacts (email, contact_id, property_digests, lastmodified, updated_at)
+                VALUES (?, ?, ?, ?, ?)
+                ON CONFLICT(email) DO UPDATE SET
+                    contact_id = excluded.contact_id,
+                    property_digests = COALESCE(excluded.property_digests, contacts.property_digests),
+                    lastmodified = COALESCE(excluded.lastmodified, contacts.lastmodified),
+                    updated_at = excluded.updated_at
+            """, (email, str(contact_id), json.dumps(property_digests, sort_keys=True) if property_digests else None,
+                  lastmodified, time.time()))
+            self._lru.pop(email, None)
+
+    def record_remote_change(self, email: str, contact_id: str, lastmodified: Optional[int]):
+        """Sync'te görülen contact - bizim son yazımımızdan yeniyse property özetleri geçersiz"""
+
+        email = normalize_email(email)
+        if not email or not contact_id:
+            return
+
+        with self._lock:
+            self._connection().execute("""
+                INSERT INTO contacts (email, contact_id, property_digests, lastmodified, updated_at)
+                VALUES (?, ?, NULL, ?, ?)
+                ON CONFLICT(email) DO UPDATE SET
+                    contact_id = excluded.contact_id,
+                    property_digests = CASE
+                        WHEN contacts.lastmodified IS NOT NULL AND excluded.lastmodified <= contacts.lastmodified
+                        THEN contacts.property_digests ELSE NULL END,
+                    lastmodified = MAX(COALESCE(contacts.lastmodified, 0), COALESCE(excluded.lastmodified, 0)),
+                    updated_at = excluded.updated_at
+            """, (email, str(contact_id), lastmodified, time.time()))
+            self._lru.pop(email, None)
+
+    def forget(self, email: str):
+        """ID artık geçersiz (silinmiş/merge edilmiş contact) - bir sonraki yazım search'e düşer"""
+
+        email = normalize_email(email)
+        with self._lock:
+            self._connection().execute("DELETE FROM contacts WHERE email = ?", (email,))
+            self._lru.pop(email, None)
+
+    def find_note(self, contact_id: str, digest: str) -> Optional[str]:
+        """Aynı içerikli note bu contact'a daha önce eklendiyse note ID'si"""
+
+        with self._lock:
+            row = self._connection().execute(
+                "SELECT note_id FROM contact_notes WHERE contact_id = ? AND digest = ?", (str(contact_id), digest)
+            ).fetchone()
+        return (row[0] or '') if row else None
+
+    def remember_note(self, contact_id: str, digest: str, note_id: str):
+        with self._lock:
+            self._connection().execute(
+                "INSERT OR REPLACE INTO contact_notes (contact_id, digest, note_id, created_at) VALUES (?, ?, ?, ?)",
+                (str(contact_id), digest, str(note_id or ''), time.time())
+            )
+
+    def record(self, stat: str, count: int = 1):
+        with self._lock:
+            self.stats[stat] += count
+
+    def _get_state(self, key: str) -> Optional[str]:
+        row = self._connection().execute("SELECT value FROM sync_state WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def _set_state(self, key: str, value: str):
+        self._connection().execute(
+            "INSERT OR REPLACE INTO sync_state (key, value) VALUES (?, ?)", (key, value)
+        )
+
+    def _initial_cursor(self) -> int:
+        """Cursor yoksa: mirror'daki en yeni lastmodified, mirror boşsa şu an"""
+
+        row = self._connection().execute("SELECT MAX(lastmodified) FROM contacts").fetchone()
+        return int(row[0]) if row and row[0] else int(time.time() * 1000)
+
+    def acquire_sync_lease(self, ttl: float) -> bool:
+        """Instance'taki worker'lardan sadece biri sync yapar - lease'i al ya da yenile"""
+
+        owner, now = str(os.getpid()), time.time()
+        with self._lock:
+            conn = self._connection()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                holder, _, expires = (self._get_state('sync_lease') or '').partition(':')
+                acquired = not holder or holder == owner or float(expires or 0) < now
+                if acquired:
+                    self._set_state('sync_lease', f"{owner}:{now + ttl}")
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+        return acquired
+
+    def release_sync_lease(self):
+        with self._lock:
+            self._connection().execute(
+                "DELETE FROM sync_state WHERE key = 'sync_lease' AND value LIKE ?", (f"{os.getpid()}:%",)
+            )
+
+    def sync(self, hubspot_service, page_size: int = 100, max_pages: Optional[int] = None) -> Dict:
+        """Son sync'ten beri değişen contact'ları çek (lastmodifieddate > cursor)"""
+
+        with self._lock:
+            state = self._get_state('lastmodified_cursor')
+            if state is None:
+                state = str(self._initial_cursor())
+                self._set_state('lastmodified_cursor', state)
+            cursor = int(state)
+
+        pages = synced = 0
+        after = None
+        query_cursor = cursor
+
+        while max_pages is None or pages < max_pages:
+            result = hubspot_service.search_modified_contacts(query_cursor, after=after, limit=page_size)
+            if not result.get('success'):
+                with self._lock:
+                    self.stats["sync_errors"] += 1
+                logger.warning("Contact mirror sync failed: %s", result.get('error'))
+                break
+
+            pages += 1
+            for contact in result['results']:
+                properties = contact.get('properties') or {}
+                modified = to_epoch_ms(properties.get('lastmodifieddate') or contact.get('updatedAt'))
+                self.record_remote_change(properties.get('email'), contact.get('id'), modified)
+                if modified:
+                    cursor = max(cursor, modified)
+                synced += 1
+
+            # İlerlemeyi her sayfada kaydet - yarıda kalan sync kaldığı yerden devam eder
+            with self._lock:
+                self._set_state('lastmodified_cursor', str(cursor))
+                self.stats["synced"] += len(result['results'])
+
+            after = result.get('after')
+            if not after:
+                break
+            if int(after) >= SEARCH_RESULT_LIMIT:
+                # Sayfalama sınırı - yeni cursor ile sorguyu baştan başlat
+                query_cursor, after = cursor, None
+
+        return {"pages": pages, "synced": synced, "cursor": cursor}
+
+    def start_background_sync(self, hubspot_service, interval: float = 300):
+        """Periyodik artımlı sync thread'i - her worker başlatır, lease'i tutan sync yapar"""
+
+        if interval <= 0 or (self._sync_thread and self._sync_thread.is_alive()):
+            return
+
+        def loop():
+            while not self._sync_stop.is_set():
+                try:
+                    # Lease iki tur geçerli - sahibi ölürse başka worker devralır
+                    if self.acquire_sync_lease(interval * 2):
+                        self.sync(hubspot_service)
+                except Exception as e:
+                    logger.warning("Contact mirror sync error: %s", e)
+                self._sync_stop.wait(interval)
+
+        self._sync_stop.clear()
+        self._sync_thread = threading.Thread(target=loop, name='contact-mirror-sync', daemon=True)
+        self._sync_thread.start()
+
+    def stop(self):
+        self._sync_stop.set()
+        if self._sync_thread:
+            self._sync_thread.join(5.0)
+            self._sync_thread = None
+            try:
+                self.release_sync_lease()
+            except sqlite3.Error as e:
+                logger.warning("Contact mirror lease release failed: %s", e)
+
+    def get_stats(self) -> Dict:
+        with self._lock:
+            count = self._connection().execute("SELECT COUNT(*) FROM contacts").fetchone()[0]
+            return {**self.stats, "contacts": count, "lru_size": len(self._lru),
+                    "cursor": self._get_state('lastmodified_cursor')}
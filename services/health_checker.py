@@ -0,0 +1,105 @@
+import time
+import logging
+import threading
+from datetime import datetime
+from typing import Callable, Dict, Optional
+
+from utils import json_codec
+
+logger = logging.getLogger(__name__)
+
+
+class DependencyHealthChecker:
+    """Bağımlılıkları arka planda periyodik kontrol eder, sonucu önbellekte tutar
+
+    /ready isteği hiçbir zaman dış servise gitmez - son ölçüm önceden
+    serialize edilmiş haliyle döner.
+    """
+
+    def __init__(self, probes: Dict[str, Callable[[], Dict]], interval: float = 30.0,
+                 probe_timeout_factor: float = 3.0, before_check: Optional[Callable[[], None]] = None):
+        self.probes = probes
+        self.interval = interval
+        self.stale_after = interval * probe_timeout_factor
+        self.before_check = before_check
+
+        self._stop = threading.Event()
+        self._thread = None
+        self._results = {}
+        self._last_run = None  # monotonic
+        self._cached = (503, self._render(False, {"status": "STARTING"}))
+
+    @staticmethod
+    def _render(ready: bool, body: Dict) -> bytes:
+        body = {"ready": ready, **body}
+        return json_codec.dumps(body)
+
+    def _probe(self, name: str, probe: Callable[[], Dict]) -> Dict:
+        started = time.perf_counter()
+        try:
+            result = probe() or {}
+            healthy = bool(result.get('success'))
+            error = None if healthy else result.get('error') or f"status {result.get('status_code')}"
+        except Exception as e:
+            healthy, error = False, str(e)
+
+        return {
+            "healthy": healthy,
+            "latency_ms": round((time.perf_counter() - started) * 1000, 2),
+            "checked_at": datetime.now().isoformat(),
+            "error": error
+        }
+
+    def run_once(self):
+        """Tüm probe'ları çalıştır ve cevabı yeniden oluştur"""
+
+        if self.before_check:
+            try:
+                self.before_check()
+            except Exception as e:
+                logger.warning("Readiness pre-check failed: %s", e)
+
+        results = {name: self._probe(name, probe) for name, probe in self.probes.items()}
+        ready = all(r['healthy'] for r in results.values())
+
+        self._results = results
+        self._last_run = time.monotonic()
+        self._cached = (200 if ready else 503, self._render(ready, {
+            "status": "READY" if ready else "DEGRADED",
+            "dependencies": results,
+            "interval_s": self.interval
+        }))
+
+        if not ready:
+            failing = [name for name, r in results.items() if not r['healthy']]
+            logger.warning("Readiness degraded: %s", failing)
+
+    def _loop(self):
+        while not self._stop.is_set():
+            self.run_once()
+            self._stop.wait(self.interval)
+
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._loop, name='readiness-checker', daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0):
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout)
+            self._thread = None
+
+    @property
+    def running(self) -> bool:
+        return bool(self._thread and self._thread.is_alive())
+
+    def response(self) -> tuple:
+        """(status_code, body_bytes) - son ölçüm bayatsa 503"""
+
+        status, body = self._cached
+        if self._last_run is not None and time.monotonic() - self._last_run > self.stale_after:
+            return 503, self._render(False, {"status": "STALE", "dependencies": self._results})
+        return status, body
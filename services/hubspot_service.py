@@ -1,20 +1,83 @@
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional
+import json
+import hashlib
 import requests
+from requests.adapters import HTTPAdapter
 import logging
 from datetime import datetime, timedelta
+from utils.logging_setup import HOT
+from utils.deadline import Deadline, DeadlineExceeded
+from utils import json_codec
+from services.contact_mirror import to_epoch_ms
+from services.property_schema import PropertySchema
 
 logger = logging.getLogger(__name__)
 
 class HubSpotService:
     """HubSpot CRM entegrasyonu"""
     
-    def __init__(self, api_key: str):
+    REQUEST_TIMEOUT = 30  # seconds - deadline verilmezse çağrı başına üst sınır
+    
+    def __init__(self, api_key: str, api_base: str = "https://api.hubapi.com", pool_size: int = 8,
+                 contact_mirror=None, property_schema=None):
         self.api_key = api_key
-        self.base_url = "https://api.hubapi.com/crm/v3/objects"
+        self.contact_mirror = contact_mirror  # email -> contact ID (search'ü atlamak için)
+        # Property tanımları - istekten önce yerel doğrulama (verilmezse sadece bellekte tutulur)
+        self.property_schema = property_schema if property_schema is not None else PropertySchema()
+        self.api_base = api_base.rstrip('/')
+        self.base_url = f"{self.api_base}/crm/v3/objects"
         self.headers = {
             "Authorization": f"Bearer {api_key}",
             "Content-Type": "application/json"
         }
+        
+        # Keep-alive connection pool - her çağrıda yeni TCP/TLS handshake yapılmasın
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+        self.session.headers.update(self.headers)
+    
+    def health_check(self, timeout: float = 5.0) -> Dict:
+        """Havuzdaki keep-alive bağlantı üzerinden hafif API çağrısı"""
+        
+        if not self.api_key:
+            return {"success": False, "error": "API key not configured"}
+        
+        try:
+            response = self.session.get(f"{self.base_url}/contacts", params={"limit": 1}, timeout=timeout)
+            return {"success": response.status_code == 200, "status_code": response.status_code}
+        except Exception as e:
+            return {"success": False, "error": str(e)}
+    
+    def warm_up(self) -> Dict:
+        """Trafik gelmeden önce havuzda bağlantı aç"""
+        
+        result = self.health_check(timeout=10)
+        if not result.get('success'):
+            logger.warning("HubSpot warm-up failed: %s", result)
+        if self.api_key:
+            result["property_schema"] = self.property_schema.ensure_loaded(self.fetch_contact_properties)
+        return result
+    
+    def fetch_contact_properties(self, timeout: float = 10) -> Dict:
+        """Contact property tanımları (tip, seçenekler, salt okunur bilgisi)"""
+        
+        try:
+            response = self.session.get(f"{self.api_base}/crm/v3/properties/contacts", timeout=timeout)
+            if response.status_code != 200:
+                return {"success": False, "error": response.text, "status_code": response.status_code}
+            return {"success": True, "results": json_codec.loads(response.content).get('results', [])}
+        except Exception as e:
+            return {"success": False, "error": str(e)}
+    
+    def _timeout(self, deadline: Optional[Deadline]) -> float:
+        """Çağrı timeout'u - deadline varsa kalan bütçeden (yetmiyorsa DeadlineExceeded)"""
+        return deadline.timeout(self.REQUEST_TIMEOUT) if deadline else self.REQUEST_TIMEOUT
+    
+    def close(self):
+        """Havuzdaki bağlantıları kapat"""
+        self.session.close()
     
     def test_connection(self) -> Dict:
         """HubSpot API bağlantısını test et"""
@@ -24,7 +87,7 @@ class HubSpotService:
         
         try:
             # Account info endpoint'i test et
-            url = "https://api.hubapi.com/oauth/v1/access-tokens/" + self.api_key
+            url = f"{self.api_base}/oauth/v1/access-tokens/" + self.api_key
             response = requests.get(url, timeout=10)
             
             if response.status_code == 200:
@@ -43,24 +106,30 @@ class HubSpotService:
         except Exception as e:
             return {"success": False, "error": str(e)}
     
-    def save_contact(self, contact_info: Dict, category: str, extracted_data: Dict) -> Dict:
-        """Contact'ı HubSpot'a kaydet"""
+    def save_contact(self, contact_info: Dict, category: str, extracted_data: Dict,
+                     deadline: Optional[Deadline] = None) -> Dict:
+        """Contact'ı HubSpot'a kaydet
+        
+        Contact kaydından önce bütçe biterse DeadlineExceeded yükselir (çağıran
+        işi ertelemeli); sadece note sığmazsa note_result'ta deferred=True döner.
+        """
         
         if not self.api_key:
             return {"success": False, "error": "HubSpot API key not configured"}
         
         try:
-            # Properties oluştur
-            properties = self._build_contact_properties(contact_info, category, extracted_data)
-            
             # Contact oluştur/güncelle
-            contact_result = self._create_or_update_contact(properties)
+            contact_result = self.upsert_contact(contact_info, category, extracted_data, deadline)
             
             if contact_result.get('success'):
                 contact_id = contact_result.get('contact_id')
                 
                 # Note ekle
-                note_result = self._create_contact_note(contact_id, category, extracted_data)
+                try:
+                    note_result = self.create_contact_note(contact_id, category, extracted_data, deadline)
+                except DeadlineExceeded as e:
+                    logger.warning("Note deferred for contact %s: %s", contact_id, e)
+                    note_result = {"success": False, "deferred": True, "error": "Deadline exceeded"}
                 
                 return {
                     "success": True,
@@ -71,10 +140,41 @@ class HubSpotService:
             else:
                 return contact_result
                 
+        except DeadlineExceeded:
+            raise
         except Exception as e:
-            logger.error(f"HubSpot save error: {str(e)}")
+            logger.error("HubSpot save error: %s", e)
             return {"success": False, "error": str(e)}
     
+    def upsert_contact(self, contact_info: Dict, category: str, extracted_data: Dict,
+                       deadline: Optional[Deadline] = None) -> Dict:
+        """Sadece contact'ı oluştur/güncelle - note ayrı adım (create_contact_note)"""
+        
+        if not self.api_key:
+            return {"success": False, "error": "HubSpot API key not configured"}
+        
+        properties = self._apply_property_schema(
+            self._build_contact_properties(contact_info, category, extracted_data), deadline
+        )
+        if not properties.get('email'):
+            return {"success": False, "error": "Email rejected by property schema"}
+        return self._create_or_update_contact(properties, deadline)
+    
+    def _apply_property_schema(self, properties: Dict, deadline: Optional[Deadline] = None) -> Dict:
+        """Tanıma göre tip dönüşümü - tanımsız/geçersiz alanlar HubSpot'a gitmeden atılır"""
+        
+        schema = self.property_schema
+        if schema.loaded:
+            schema.maybe_refresh(self.fetch_contact_properties)
+        else:
+            # Warm-up'ta yüklenemedi - bir kez senkron dene, olmazsa olduğu gibi gönder
+            schema.ensure_loaded(lambda: self.fetch_contact_properties(timeout=self._timeout(deadline)))
+        
+        coerced, dropped = schema.coerce(properties)
+        if dropped:
+            logger.info("Dropped %d properties not accepted by HubSpot schema: %s", len(dropped), dropped)
+        return coerced
+    
     def _build_contact_properties(self, contact_info: Dict, category: str, extracted_data: Dict) -> Dict:
         """Contact properties oluştur - HubSpot uyumlu"""
         
@@ -91,26 +191,18 @@ class HubSpotService:
         # Notes field - tüm kategoriler için
         notes = extracted_data.get('notes', '')
         if notes:
-            properties["notes_last_contacted"] = notes[:500]  # HubSpot field limit
+            properties["notes_last_contacted"] = notes[:500]
         
         # Kategori özel properties
         if category == 'education':
             education_data = extracted_data.get('education', {})
             
-            # GPA - mevcut property
+            # GPA / Budget - tip dönüşümü property şemasına göre (_apply_property_schema)
             if education_data.get('gpa'):
-                try:
-                    properties["gpa"] = float(education_data['gpa'])
-                except (ValueError, TypeError):
-                    properties["gpa"] = str(education_data['gpa'])
+                properties["gpa"] = education_data['gpa']
             
-            # Budget - mevcut property kullan
             if education_data.get('budget'):
-                try:
-                    budget_value = str(education_data['budget']).replace('£', '').replace(',', '').strip()
-                    properties["budget"] = float(budget_value)
-                except (ValueError, TypeError):
-                    properties["budget"] = str(education_data['budget'])
+                properties["budget"] = education_data['budget']
             
             # Education Level - mevcut property
             if education_data.get('programs'):
@@ -141,34 +233,47 @@ class HubSpotService:
             if business_data.get('sectors_text'):
                 properties["industry"] = business_data['sectors_text']
             
-            # Annual Revenue - eğer mevcut property varsa
+            # Annual Revenue - property tanımlı değilse şema tarafından atılır
             if business_data.get('annual_revenue'):
-                try:
-                    properties["annual_revenue"] = float(business_data['annual_revenue'])
-                except (ValueError, TypeError):
-                    pass  # Skip if not valid
+                properties["annual_revenue"] = business_data['annual_revenue']
         
         # Boş değerleri temizle
         properties = {k: v for k, v in properties.items() if v and str(v).strip()}
         
-        logger.info(f"Built {len(properties)} properties for {category} contact")
-        logger.debug(f"Properties: {list(properties.keys())}")
+        logger.info("Built %d properties for %s contact", len(properties), category, extra=HOT)
+        logger.debug("Properties: %s", list(properties))
         
         return properties
     
-    def _create_or_update_contact(self, properties: Dict) -> Dict:
+    def _create_or_update_contact(self, properties: Dict, deadline: Optional[Deadline] = None) -> Dict:
         """Contact oluştur veya güncelle"""
         
+        email = properties.get('email')
+        
+        # Mirror'da ID varsa search yapmadan doğrudan güncelle
+        plan = self._plan_mirrored_update(email, properties)
+        if plan and 'result' in plan:
+            return plan['result']
+        if plan:
+            result = self._patch_contact(plan['contact_id'], plan['changed'], deadline,
+                                         email=email, digests=plan['digests'])
+            if result.get('success') or result.get('status_code') != 404:
+                return result
+            # Contact silinmiş/merge edilmiş - mirror'dan çıkar, normal akışa dön
+            logger.info("Mirrored contact %s not found, falling back to create", plan['contact_id'])
+            self.contact_mirror.forget(email)
+        
         try:
             url = f"{self.base_url}/contacts"
             payload = {"properties": properties}
             
-            response = requests.post(url, headers=self.headers, json=payload, timeout=30)
+            response = self.session.post(url, data=json_codec.dumps(payload), timeout=self._timeout(deadline))
             
             if response.status_code in [200, 201]:
-                result = response.json()
+                result = json_codec.loads(response.content)
                 contact_id = result.get('id')
-                logger.info(f"Contact created/updated successfully - ID: {contact_id}")
+                logger.info("Contact created/updated successfully - ID: %s", contact_id, extra=HOT)
+                self._remember_contact(email, contact_id, self._property_digests(properties), result)
                 
                 return {
                     "success": True,
@@ -179,22 +284,24 @@ class HubSpotService:
                 
             elif response.status_code == 409:
                 # Contact zaten var - email ile ara ve güncelle
-                logger.info("Contact exists, attempting update...")
-                return self._update_existing_contact(properties)
+                logger.info("Contact exists, attempting update...", extra=HOT)
+                return self._update_existing_contact(properties, deadline)
                 
             else:
-                logger.error(f"HubSpot contact error: {response.status_code} - {response.text}")
+                logger.error("HubSpot contact error: %s - %s", response.status_code, response.text)
                 return {
                     "success": False,
                     "error": response.text,
                     "status_code": response.status_code
                 }
                 
+        except DeadlineExceeded:
+            raise
         except Exception as e:
-            logger.error(f"Contact creation error: {str(e)}")
+            logger.error("Contact creation error: %s", e)
             return {"success": False, "error": str(e)}
     
-    def _update_existing_contact(self, properties: Dict) -> Dict:
+    def _update_existing_contact(self, properties: Dict, deadline: Optional[Deadline] = None) -> Dict:
         """Mevcut contact'ı güncelle"""
         
         try:
@@ -202,93 +309,232 @@ class HubSpotService:
             email = properties.get('email')
             search_url = f"{self.base_url}/contacts/search"
             
-            search_payload = {
-                "filterGroups": [{
-                    "filters": [{
-                        "propertyName": "email",
-                        "operator": "EQ",
-                        "value": email
-                    }]
-                }]
-            }
+            search_payload = self._email_search_payload(email)
             
-            search_response = requests.post(search_url, headers=self.headers, json=search_payload, timeout=30)
+            search_response = self.session.post(search_url, data=json_codec.dumps(search_payload),
+                                                timeout=self._timeout(deadline))
             
             if search_response.status_code == 200:
-                search_result = search_response.json()
+                search_result = json_codec.loads(search_response.content)
                 contacts = search_result.get('results', [])
                 
                 if contacts:
                     contact_id = contacts[0]['id']
                     
                     # Contact'ı güncelle
-                    update_url = f"{self.base_url}/contacts/{contact_id}"
-                    update_payload = {"properties": properties}
-                    
-                    update_response = requests.patch(update_url, headers=self.headers, json=update_payload, timeout=30)
-                    
-                    if update_response.status_code == 200:
-                        logger.info(f"Contact updated successfully - ID: {contact_id}")
-                        return {
-                            "success": True,
-                            "contact_id": contact_id,
-                            "action": "updated"
-                        }
-                    else:
-                        return {"success": False, "error": "Failed to update contact"}
+                    return self._patch_contact(contact_id, properties, deadline)
                 else:
                     return {"success": False, "error": "Contact not found for update"}
             else:
                 return {"success": False, "error": "Search failed"}
                 
+        except DeadlineExceeded:
+            raise
         except Exception as e:
-            logger.error(f"Contact update error: {str(e)}")
+            logger.error("Contact update error: %s", e)
             return {"success": False, "error": str(e)}
     
-    def _create_contact_note(self, contact_id: str, category: str, extracted_data: Dict) -> Dict:
-        """Contact'a detaylı note ekle"""
+    @staticmethod
+    def _email_search_payload(email: str) -> Dict:
+        return {
+            "filterGroups": [{
+                "filters": [{
+                    "propertyName": "email",
+                    "operator": "EQ",
+                    "value": email
+                }]
+            }]
+        }
+    
+    def _plan_mirrored_update(self, email: str, properties: Dict) -> Optional[Dict]:
+        """Mirror'daki son hale göre güncelleme planı - contact mirror'da yoksa None
+        
+        {"result": ...} dönerse yazım gerekmez; aksi halde contact_id, changed
+        (gönderilecek alanlar) ve digests (yazım sonrası tüm alanların özeti).
+        """
+        
+        known = self.contact_mirror.lookup(email) if self.contact_mirror else None
+        if not known:
+            return None
+        
+        digests = self._property_digests(properties)
+        previous = known.get('property_digests') or {}
+        changed = {k: v for k, v in properties.items() if previous.get(k) != digests[k]}
+        
+        # Son yazdığımız halle aynı - PATCH'e gerek yok
+        if previous and not changed:
+            self.contact_mirror.record('skipped_writes')
+            logger.info("Contact %s unchanged, update skipped", known['contact_id'], extra=HOT)
+            return {"result": {"success": True, "contact_id": known['contact_id'], "action": "unchanged"}}
+        
+        if previous:
+            self.contact_mirror.record('suppressed_fields', len(properties) - len(changed))
+        return {"contact_id": known['contact_id'], "changed": changed, "digests": {**previous, **digests}}
+    
+    def _remember_contact(self, email: str, contact_id: str, digests: Dict, response_body: Dict):
+        if self.contact_mirror:
+            self.contact_mirror.remember(email, contact_id, digests, to_epoch_ms(response_body.get('updatedAt')))
+    
+    @staticmethod
+    def _property_digests(properties: Dict) -> Dict[str, str]:
+        """Property başına değer özeti - mirror'da son yazılan hal bununla karşılaştırılır"""
+        return {
+            name: hashlib.sha1(json.dumps(value, default=str).encode('utf-8')).hexdigest()[:16]
+            for name, value in properties.items()
+        }
+    
+    def _patch_contact(self, contact_id: str, properties: Dict, deadline: Optional[Deadline] = None,
+                       email: Optional[str] = None, digests: Optional[Dict] = None) -> Dict:
+        """Bilinen ID'ye PATCH - başarılıysa mirror güncellenir
+        
+        properties sadece değişen alanları içerebilir; digests contact'ın
+        tüm alanlarının güncel özetidir.
+        """
         
         try:
-            # Note içeriği oluştur
-            note_body = self._build_note_content(category, extracted_data)
+            update_url = f"{self.base_url}/contacts/{contact_id}"
+            update_payload = {"properties": properties}
             
-            url = f"{self.base_url}/notes"
-            payload = {
-                "properties": {
-                    "hs_note_body": note_body,
-                    "hs_timestamp": datetime.now().isoformat()
-                },
-                "associations": [{
-                    "to": {"id": str(contact_id)},
-                    "types": [{
-                        "associationCategory": "HUBSPOT_DEFINED",
-                        "associationTypeId": 202  # note_to_contact
-                    }]
+            update_response = self.session.patch(update_url, data=json_codec.dumps(update_payload),
+                                                 timeout=self._timeout(deadline))
+            
+            if update_response.status_code == 200:
+                logger.info("Contact updated successfully - ID: %s", contact_id, extra=HOT)
+                self._remember_contact(email or properties.get('email'), contact_id,
+                                       digests or self._property_digests(properties), json_codec.loads(update_response.content))
+                return {
+                    "success": True,
+                    "contact_id": contact_id,
+                    "action": "updated",
+                    "properties_count": len(properties)
+                }
+            else:
+                return {
+                    "success": False,
+                    "error": "Failed to update contact",
+                    "status_code": update_response.status_code
+                }
+                
+        except DeadlineExceeded:
+            raise
+        except Exception as e:
+            logger.error("Contact update error: %s", e)
+            return {"success": False, "error": str(e)}
+    
+    def search_modified_contacts(self, modified_after_ms: int, after: Optional[str] = None,
+                                 limit: int = 100, timeout: float = 30) -> Dict:
+        """lastmodifieddate > modified_after_ms olan contact'lar (artan sırada, sayfalı)"""
+        
+        payload = {
+            "filterGroups": [{
+                "filters": [{
+                    "propertyName": "lastmodifieddate",
+                    "operator": "GT",
+                    "value": str(modified_after_ms)
                 }]
+            }],
+            "sorts": [{"propertyName": "lastmodifieddate", "direction": "ASCENDING"}],
+            "properties": ["email", "lastmodifieddate"],
+            "limit": limit
+        }
+        if after:
+            payload["after"] = after
+        
+        try:
+            response = self.session.post(f"{self.base_url}/contacts/search", data=json_codec.dumps(payload), timeout=timeout)
+            if response.status_code != 200:
+                return {"success": False, "error": response.text, "status_code": response.status_code}
+            
+            result = json_codec.loads(response.content)
+            return {
+                "success": True,
+                "results": result.get('results', []),
+                "after": result.get('paging', {}).get('next', {}).get('after')
             }
+        except Exception as e:
+            return {"success": False, "error": str(e)}
+    
+    def create_contact_note(self, contact_id: str, category: str, extracted_data: Dict,
+                            deadline: Optional[Deadline] = None) -> Dict:
+        """Contact'a detaylı note ekle - aynı içerik daha önce eklendiyse atlanır"""
+        
+        try:
+            # Aynı başvuru tekrar gönderildiyse timeline'a ikinci note düşmesin
+            digest = self._note_digest(category, extracted_data)
+            duplicate = self._find_duplicate_note(contact_id, digest)
+            if duplicate:
+                return duplicate
+            
+            url = f"{self.base_url}/notes"
+            payload = self._note_payload(contact_id, category, extracted_data)
             
-            response = requests.post(url, headers=self.headers, json=payload, timeout=30)
+            response = self.session.post(url, data=json_codec.dumps(payload), timeout=self._timeout(deadline))
             
             if response.status_code in [200, 201]:
-                note_result = response.json()
+                note_result = json_codec.loads(response.content)
                 note_id = note_result.get('id')
-                logger.info(f"Note created successfully - ID: {note_id}")
+                logger.info("Note created successfully - ID: %s", note_id, extra=HOT)
+                if self.contact_mirror:
+                    self.contact_mirror.remember_note(contact_id, digest, note_id)
                 
                 return {"success": True, "note_id": note_id}
             else:
-                logger.error(f"Note creation error: {response.status_code}")
+                logger.error("Note creation error: %s", response.status_code)
                 return {"success": False, "error": response.text}
                 
+        except DeadlineExceeded:
+            raise
         except Exception as e:
-            logger.error(f"Note creation error: {str(e)}")
+            logger.error("Note creation error: %s", e)
             return {"success": False, "error": str(e)}
     
+    def _find_duplicate_note(self, contact_id: str, digest: str) -> Optional[Dict]:
+        """Aynı içerikli note bu contact'a daha önce eklendiyse hazır sonuç"""
+        
+        if not self.contact_mirror:
+            return None
+        existing_note = self.contact_mirror.find_note(contact_id, digest)
+        if existing_note is None:
+            return None
+        self.contact_mirror.record('deduped_notes')
+        logger.info("Duplicate note skipped for contact %s", contact_id, extra=HOT)
+        return {"success": True, "note_id": existing_note, "deduplicated": True}
+    
+    def _note_payload(self, contact_id: str, category: str, extracted_data: Dict) -> Dict:
+        return {
+            "properties": {
+                "hs_note_body": self._build_note_content(category, extracted_data),
+                "hs_timestamp": datetime.now().isoformat()
+            },
+            "associations": [{
+                "to": {"id": str(contact_id)},
+                "types": [{
+                    "associationCategory": "HUBSPOT_DEFINED",
+                    "associationTypeId": 202  # note_to_contact
+                }]
+            }]
+        }
+    
+    def _note_digest(self, category: str, extracted_data: Dict) -> str:
+        """Note içerik özeti - zaman damgaları ve submission ID dahil değil"""
+        details = f"{category}\n{self._build_note_details(category, extracted_data)}"
+        return hashlib.sha1(details.encode('utf-8')).hexdigest()
+    
     def _build_note_content(self, category: str, extracted_data: Dict) -> str:
         """Note içeriği oluştur"""
         
         note_body = f"🎯 BRITISH GLOBAL - {category.upper()}\n"
         note_body += f"📅 Başvuru: {datetime.now().strftime('%d/%m/%Y %H:%M')}\n"
         note_body += f"📋 Submission ID: {extracted_data.get('submission_id', 'N/A')}\n\n"
+        note_body += self._build_note_details(category, extracted_data)
+        note_body += f"\n🤖 Otomatik webhook kaydı - {datetime.now().strftime('%d/%m/%Y %H:%M')}"
+        
+        return note_body
+    
+    def _build_note_details(self, category: str, extracted_data: Dict) -> str:
+        """Note'un başvuru içeriği - zaman damgası ve submission ID hariç (dedupe özeti bundan)"""
+        
+        note_body = ""
         
         # Genel notlar - tüm kategoriler için
         general_notes = extracted_data.get('notes', '')
@@ -358,6 +604,5 @@ class HubSpotService:
         # Contact info ekle
         note_body += f"\n📧 Email: {extracted_data.get('email', '')}\n"
         note_body += f"📞 Telefon: {extracted_data.get('phone', '')}\n"
-        note_body += f"\n🤖 Otomatik webhook kaydı - {datetime.now().strftime('%d/%m/%Y %H:%M')}"
         
         return note_body
\ No newline at end of file
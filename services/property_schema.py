@@ -0,0 +1,298 @@
+import os
+import re
+import json
+import time
+import logging
+import threading
+from datetime import datetime, timezone
+from typing import Callable, Dict, List, Optional, Tuple
+
+from services.contact_mirror import to_epoch_ms
+
+logger = logging.getLogger(__name__)
+
+# HubSpot string property değerleri için üst sınır
+DEFAULT_MAX_LENGTH = 65536
+
+# Başarısız çekimden sonra tekrar denemeden önce beklenecek süre
+FETCH_RETRY_INTERVAL = 60
+
+# Number alanlarında kabul edilen süsler: para birimi, binlik ayracı, boşluk
+_NUMBER_NOISE = re.compile(r'[£$€₺,\s]')
+_MULTI_SEPARATOR = re.compile(r'\s*[;,]\s*')
+
+_TRUE_VALUES = {'true', 'yes', 'evet', '1', 'on'}
+_FALSE_VALUES = {'false', 'no', 'hayır', 'hayir', '0', 'off'}
+
+
+def compile_definitions(results: List[Dict]) -> Dict[str, Dict]:
+    """/crm/v3/properties/contacts sonucu -> {name: sade tanım} (diske bu hali yazılır)"""
+
+    definitions = {}
+    for item in results:
+        name = item.get('name')
+        if not name:
+            continue
+        metadata = item.get('modificationMetadata') or {}
+        # Gizli seçenekler formda seçilemez - gönderilmez
+        options = [option for option in item.get('options') or []
+                   if not option.get('hidden') and option.get('value') is not None]
+        definitions[name] = {
+            "type": item.get('type', 'string'),
+            "field_type": item.get('fieldType', 'text'),
+            "options": [option['value'] for option in options],
+            "labels": {str(option['label']).strip().lower(): option['value']
+                       for option in options if option.get('label')},
+            "read_only": bool(metadata.get('readOnlyValue') or item.get('calculated')),
+            "max_length": item.get('maxLength') or DEFAULT_MAX_LENGTH
+        }
+    return definitions
+
+
+class PropertySchema:
+    """HubSpot contact property tanımlarının disk cache'li kopyası
+
+    Tanımlar bir kez çekilip JSON dosyasına yazılır; worker'lar aynı dosyayı
+    okur, TTL dolunca tek bir arka plan thread'i yeniler (bu arada eski tanım
+    kullanılır). Gönderilecek property'ler istekten önce yerelde doğrulanıp
+    tipine çevrilir, tanımsız ya da salt okunur alanlar atılır. Tanım hiç
+    yüklenemediyse property'ler olduğu gibi geçer.
+    """
+
+    def __init__(self, cache_path: Optional[str] = None, ttl: float = 86400):
+        self.cache_path = cache_path
+        self.ttl = ttl
+        self.definitions = None
+        self.fetched_at = 0.0
+        self._lock = threading.Lock()
+        self._refreshing = False
+        self._failed_at = 0.0
+        self._warned = set()
+        self.stats = {"fetches": 0, "fetch_errors": 0, "coerced": 0, "dropped_unknown": 0,
+                      "dropped_read_only": 0, "dropped_invalid": 0, "truncated": 0}
+
+    # --- Yükleme ---
+
+    @property
+    def loaded(self) -> bool:
+        return self.definitions is not None
+
+    def is_stale(self) -> bool:
+        return not self.loaded or time.time() - self.fetched_at >= self.ttl
+
+    def _backing_off(self) -> bool:
+        return time.time() - self._failed_at < FETCH_RETRY_INTERVAL
+
+    def _load_from_disk(self) -> bool:
+        if not self.cache_path or not os.path.exists(self.cache_path):
+            return False
+        try:
+            with open(self.cache_path, encoding='utf-8') as f:
+                cached = json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning("Property schema cache unreadable (%s): %s", self.cache_path, e)
+            return False
+
+        fetched_at = float(cached.get('fetched_at', 0))
+        if fetched_at <= self.fetched_at:
+            return self.loaded
+        with self._lock:
+            self.definitions = cached.get('definitions') or {}
+            self.fetched_at = fetched_at
+        return True
+
+    def _save_to_disk(self):
+        if not self.cache_path:
+            return
+        directory = os.path.dirname(os.path.abspath(self.cache_path))
+        os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{self.cache_path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({"fetched_at": self.fetched_at, "definitions": self.definitions}, f, ensure_ascii=False)
+        os.replace(tmp_path, self.cache_path)  # Okuyan worker yarım dosya görmez
+
+    def refresh(self, fetch: Callable[[], Dict]) -> bool:
+        """HubSpot'tan tanımları çek ve cache'e yaz - hata olursa eldeki tanım kalır"""
+
+        try:
+            result = fetch()
+        except Exception as e:
+            result = {"success": False, "error": str(e)}
+
+        if not result.get('success'):
+            with self._lock:
+                self.stats["fetch_errors"] += 1
+                self._failed_at = time.time()
+            logger.warning("Property schema fetch failed: %s", result.get('error') or result.get('status_code'))
+            return False
+
+        definitions = compile_definitions(result.get('results') or [])
+        with self._lock:
+            self.definitions = definitions
+            self.fetched_at = time.time()
+            self.stats["fetches"] += 1
+        try:
+            self._save_to_disk()
+        except OSError as e:
+            logger.warning("Property schema cache write failed: %s", e)
+        logger.info("Property schema loaded: %d contact properties", len(definitions))
+        return True
+
+    def needs_fetch(self) -> bool:
+        """Disk cache'i de bayatsa/yoksa ve son hatadan beri yeterince beklendiyse True"""
+
+        self._load_from_disk()
+        return self.is_stale() and not self._backing_off()
+
+    def ensure_loaded(self, fetch: Callable[[], Dict]) -> bool:
+        """Önce disk cache'i, o da yoksa/bayatsa HubSpot'u dene (warm-up'ta senkron)"""
+
+        if self.needs_fetch():
+            return self.refresh(fetch) or self.loaded
+        return self.loaded
+
+    def maybe_refresh(self, fetch: Callable[[], Dict]):
+        """İstek yolunda çağrılır - TTL dolduysa yenilemeyi arka planda başlat"""
+
+        if not self.is_stale():
+            return
+        # Başka bir worker yenilemiş olabilir
+        if self._load_from_disk() and not self.is_stale():
+            return
+
+        with self._lock:
+            if self._refreshing or self._backing_off():
+                return
+            self._refreshing = True
+
+        def run():
+            try:
+                self.refresh(fetch)
+            finally:
+                with self._lock:
+                    self._refreshing = False
+
+        threading.Thread(target=run, name='property-schema-refresh', daemon=True).start()
+
+    # --- Doğrulama / dönüştürme ---
+
+    def _warn_once(self, key: str, message: str, *args):
+        if key not in self._warned:
+            self._warned.add(key)
+            logger.warning(message, *args)
+
+    @staticmethod
+    def _coerce_number(value):
+        if isinstance(value, bool):
+            raise ValueError("boolean is not a number")
+        if isinstance(value, (int, float)):
+            number = float(value)
+        else:
+            number = float(_NUMBER_NOISE.sub('', str(value)))
+        if number != number or number in (float('inf'), float('-inf')):
+            raise ValueError("not a finite number")
+        return int(number) if number.is_integer() else number
+
+    @staticmethod
+    def _match_option(definition: Dict, value) -> Optional[str]:
+        text = str(value).strip()
+        if text in definition['options']:
+            return text
+        lowered = text.lower()
+        for option in definition['options']:
+            if str(option).lower() == lowered:
+                return option
+        return definition['labels'].get(lowered)
+
+    def _coerce_value(self, definition: Dict, value):
+        """Tek değer - uymuyorsa ValueError"""
+
+        kind = definition['type']
+
+        if kind == 'number':
+            return self._coerce_number(value)
+
+        if kind == 'enumeration':
+            if definition['field_type'] == 'checkbox':
+                # Çoklu seçim: HubSpot ';' ile ayrılmış değer bekler
+                parts = value if isinstance(value, (list, tuple)) else _MULTI_SEPARATOR.split(str(value))
+                matched = [self._match_option(definition, part) for part in parts if str(part).strip()]
+                matched = [option for option in matched if option is not None]
+                if not matched:
+                    raise ValueError(f"no valid option in {value!r}")
+                return ';'.join(dict.fromkeys(matched))
+            option = self._match_option(definition, value)
+            if option is None:
+                raise ValueError(f"{value!r} is not an option")
+            return option
+
+        if kind == 'bool':
+            text = str(value).strip().lower()
+            if text in _TRUE_VALUES:
+                return 'true'
+            if text in _FALSE_VALUES:
+                return 'false'
+            raise ValueError(f"{value!r} is not a boolean")
+
+        if kind in ('date', 'datetime'):
+            epoch_ms = to_epoch_ms(value)
+            if epoch_ms is None:
+                raise ValueError(f"{value!r} is not a date")
+            if kind == 'date':
+                return datetime.fromtimestamp(epoch_ms / 1000, tz=timezone.utc).strftime('%Y-%m-%d')
+            return epoch_ms
+
+        # string, phone_number ve bilinmeyen tipler
+        return str(value)
+
+    def coerce(self, properties: Dict) -> Tuple[Dict, List[str]]:
+        """(gönderilecek property'ler, atılan alanlar) - tanım yoksa olduğu gibi döner"""
+
+        definitions = self.definitions
+        if definitions is None:
+            return dict(properties), []
+
+        coerced, dropped = {}, []
+        counts = {"coerced": 0, "dropped_unknown": 0, "dropped_read_only": 0, "dropped_invalid": 0, "truncated": 0}
+
+        for name, value in properties.items():
+            definition = definitions.get(name)
+            if definition is None:
+                self._warn_once(f"unknown:{name}", "Dropping unknown HubSpot property: %s", name)
+                counts["dropped_unknown"] += 1
+                dropped.append(name)
+                continue
+            if definition['read_only']:
+                self._warn_once(f"read_only:{name}", "Dropping read-only HubSpot property: %s", name)
+                counts["dropped_read_only"] += 1
+                dropped.append(name)
+                continue
+
+            try:
+                new_value = self._coerce_value(definition, value)
+            except (TypeError, ValueError) as e:
+                logger.warning("Dropping invalid value for %s: %s", name, e)
+                counts["dropped_invalid"] += 1
+                dropped.append(name)
+                continue
+
+            if isinstance(new_value, str) and len(new_value) > definition['max_length']:
+                new_value = new_value[:definition['max_length']]
+                counts["truncated"] += 1
+            if new_value != value:
+                counts["coerced"] += 1
+            coerced[name] = new_value
+
+        with self._lock:
+            for key, count in counts.items():
+                self.stats[key] += count
+        return coerced, dropped
+
+    def get_stats(self) -> Dict:
+        with self._lock:
+            return {
+                **self.stats,
+                "loaded": self.loaded,
+                "properties": len(self.definitions) if self.definitions is not None else 0,
+                "age_seconds": round(time.time() - self.fetched_at) if self.loaded else None
+            }
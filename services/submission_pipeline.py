@@ -0,0 +1,495 @@
+import uuid
+import logging
+import threading
+from datetime import datetime
+from typing import Callable, Dict, List, Optional, Tuple
+
+from utils.logging_setup import HOT, mask_email
+from utils.deadline import Deadline, DeadlineExceeded
+from utils.checkpoint_store import CheckpointStore
+from utils.validation_gate import ValidationGate
+from utils.spam_filter import SpamFilter
+
+logger = logging.getLogger(__name__)
+
+
+class SubmissionPipeline:
+    """Tally gönderimini işleyen adımlar: extract -> HubSpot -> bildirim -> onay maili
+
+    /tally, spool drainer ve toplu işleme araçları aynı pipeline'ı kullanır.
+    Her yan etki (contact, note, admin maili, onay maili) tamamlanınca
+    checkpoint'e yazılır; aynı gönderim tekrar gelirse sadece eksik adımlar
+    çalışır. Arka plana ertelenen adımlar için ham payload checkpoint
+    store'a da yazılır; kuyruk işi başarısız olursa ya da worker kapanırsa
+    resume_pending gönderimi kaldığı adımdan tekrar işler.
+    """
+
+    # Başarısız resume denemeleri arasındaki en uzun bekleme (saniye)
+    RESUME_BACKOFF_LIMIT = 3600
+
+    def __init__(self, hubspot_service, form_processor, email_services: Dict,
+                 background_queue=None, background_timeout: float = 120,
+                 checkpoints: Optional[CheckpointStore] = None, validation_gate: Optional[ValidationGate] = None,
+                 spam_filter: Optional[SpamFilter] = None):
+        self.hubspot_service = hubspot_service
+        self.form_processor = form_processor
+        self.email_services = email_services
+        self.background_queue = background_queue
+        self.background_timeout = background_timeout
+        self.checkpoints = checkpoints or CheckpointStore()
+        self.validation_gate = validation_gate
+        self.spam_filter = spam_filter
+        self._resumer_stop = threading.Event()
+        self._resumer_thread = None
+
+    def _defer(self, step: str, func: Callable, *args) -> Dict:
+        """Bütçeye sığmayan adımı arka plan kuyruğuna at (kendi deadline'ı ile)"""
+
+        if self.background_queue is None:
+            return {"success": False, "error": "Deadline exceeded"}
+
+        def run():
+            return func(*args, deadline=Deadline(self.background_timeout))
+
+        queued = self.background_queue.submit(step, run)
+        logger.warning("Deadline exceeded, %s %s", step, "deferred" if queued else "dropped")
+        # background: process() payload'ı resume için kalıcı olarak kaydeder
+        return {"success": False, "deferred": queued, "background": queued, "error": "Deadline exceeded"}
+
+    def _run_step(self, submission_id: str, step: str, done: Optional[Dict], func: Callable,
+                  *args, deadline: Optional[Deadline] = None) -> Dict:
+        """Adım daha önce tamamlandıysa atla, değilse çalıştır ve checkpoint'e yaz
+
+        done=None ise checkpoint'ler store'dan okunur (arka plan işleri için).
+        DeadlineExceeded çağırana bırakılır.
+        """
+
+        if done is None:
+            done = self.checkpoints.completed_steps(submission_id)
+        if step in done:
+            logger.info("Step %s already completed for %s, skipping", step, submission_id, extra=HOT)
+            return {"success": True, "resumed": True, **done[step]}
+
+        result = func(*args, deadline=deadline)
+        # deferred: digest'e alındı, checkpoint digest gönderilince yazılır
+        if result.get('success') and not result.get('deferred'):
+            # Sadece sonraki adımların ihtiyaç duyduğu ID'ler saklanır
+            self.checkpoints.mark(submission_id, step, {
+                key: result[key] for key in ('contact_id', 'note_id') if result.get(key)
+            })
+        return result
+
+    def _save_to_hubspot(self, submission_id: str, done: Optional[Dict], contact_info: Dict,
+                         category: str, extracted_data: Dict, deadline: Optional[Deadline] = None) -> Dict:
+        """contact_upserted -> note_created (note contact ID'sine bağlı)"""
+
+        contact_result = self._run_step(
+            submission_id, 'contact_upserted', done, self.hubspot_service.upsert_contact,
+            contact_info, category, extracted_data, deadline=deadline
+        )
+        if not contact_result.get('success'):
+            return contact_result
+
+        contact_id = contact_result['contact_id']
+        try:
+            note_result = self._run_step(
+                submission_id, 'note_created', done, self.hubspot_service.create_contact_note,
+                contact_id, category, extracted_data, deadline=deadline
+            )
+        except DeadlineExceeded:
+            # Contact kaydedildi ama note sığmadı - sadece note'u ertele
+            note_result = self._defer(
+                'note_created', self._run_step, submission_id, 'note_created', None,
+                self.hubspot_service.create_contact_note, contact_id, category, extracted_data
+            )
+
+        return {
+            "success": True,
+            "contact_id": contact_id,
+            "contact_result": contact_result,
+            "note_result": note_result
+        }
+
+    def digest_delivered(self, submission_ids: List[str]):
+        """Digest flush'ı bildirimi tüm alıcılara ulaştırdı - admin_notified artık tamam"""
+
+        for submission_id in submission_ids:
+            self.checkpoints.mark(submission_id, 'admin_notified')
+
+    @staticmethod
+    def _gate_response(verdict: Dict) -> Tuple[Dict, int]:
+        return {
+            "success": False,
+            "error": "Submission failed validation",
+            "reasons": verdict["reasons"]
+        }, 400
+
+    def _hold_for_review(self, submission_id: str, done: Dict, source: str, reasons: List[str], category: str,
+                         contact_info: Dict, extracted_data: Dict,
+                         deadline: Optional[Deadline] = None) -> Tuple[Dict, int]:
+        """Otomatik işlenmeyen gönderimi yöneticiye inceleme maili olarak bırak
+
+        Kalıcı kayıt admin kutusundaki maildir; mail gidene kadar 503 döner,
+        Tally tekrar dener ve gönderim kaybolmaz.
+        """
+
+        # ERROR seviyesi - log tabanlı alarm buna bağlı (review_sent olanlar buraya gelmez)
+        logger.error("Submission %s held for review (%s): %s", submission_id, source, ', '.join(reasons))
+        email_service = self.email_services.get(category) or next(iter(self.email_services.values()), None)
+        if email_service is None:
+            result = {"success": False, "error": "No email service for review alert"}
+        else:
+            try:
+                result = self._run_step(
+                    submission_id, 'review_sent', done, email_service.send_review_alert,
+                    contact_info, extracted_data, reasons, source, deadline=deadline
+                )
+            except DeadlineExceeded:
+                result = {"success": False, "error": "Deadline exceeded"}
+            except Exception as e:
+                logger.error("Review alert error: %s", e)
+                result = {"success": False, "error": str(e)}
+
+        if not result.get('success'):
+            response = {
+                "success": False,
+                "message": "Review alert could not be sent, retry",
+                "submission_id": submission_id,
+                "retryable": True
+            }
+            if result.get('retry_after'):
+                response["retry_after"] = result['retry_after']
+            return response, 503
+
+        return {
+            "success": True,
+            "message": "Submission held for review",
+            "quarantined": True,
+            "source": source,
+            "reasons": reasons,
+            "submission_id": submission_id
+        }, 200
+
+    def _hold_spam_suspect(self, submission_id: str, reason: str, data: Dict) -> Tuple[Dict, int]:
+        """Spam şüphelisini inceleme kaydına yaz - mail atılmaz
+
+        Şüpheli seli yönetici mailine ve gönderim kotasına dönüşmesin diye
+        kayıt sadece checkpoint store'a yazılır ve 200 döner (Tally tekrar
+        denemez); yönetici /metrics ve CHECKPOINT_DB üzerinden inceler.
+        """
+
+        held = self.checkpoints.hold_for_review(submission_id or f"unknown-{uuid.uuid4().hex}", 'spam', [reason], data)
+        if held:
+            logger.warning("Submission %s held for review (spam): %s", submission_id, reason)
+        return {
+            "success": True,
+            "message": "Submission held for review",
+            "held_for_review": True,
+            "source": 'spam',
+            "reasons": [reason],
+            "submission_id": submission_id
+        }, 200
+
+    def process(self, data: Dict, deadline: Optional[Deadline] = None,
+                raw_size: Optional[int] = None, client_ip: Optional[str] = None,
+                signed: bool = False, resumed: bool = False) -> Tuple[Dict, int]:
+        """(response_body, status_code) döner
+
+        deadline verilirse tüm ağ çağrıları kalan bütçeyle sınırlanır; sığmayan
+        adımlar background_queue'ya ertelenir. Başarısız adım kaldıysa 503
+        döner - retry sadece eksik adımları çalıştırır. validation_gate
+        varsa bozuk gönderimler, spam_filter varsa spam/bot gönderimleri
+        HubSpot'a gitmeden ayrılır; karantinadakiler inceleme mailine, spam
+        şüphelileri inceleme kaydına gider.
+        signed: webhook imzası doğrulandı.
+        resumed: ertelenmiş gönderim tekrar işleniyor (spam filtresi atlanır).
+        """
+
+        form_processor = self.form_processor
+        gate = self.validation_gate
+
+        if gate is not None:
+            verdict = gate.check_payload(data, raw_size)
+            if verdict["action"] != 'pass':
+                logger.warning("Payload rejected by validation gate: %s", ', '.join(verdict["reasons"]))
+                return self._gate_response(verdict)
+
+        # Form verilerini işle
+        extracted_data = form_processor.extract_form_data(data)
+        if not extracted_data:
+            logger.error("Could not extract form data")
+            return {
+                "success": False,
+                "error": "Could not extract form data"
+            }, 400
+
+        # Kategori belirle
+        category = form_processor.determine_category(extracted_data)
+        logger.info("Category determined: %s", category, extra=HOT)
+
+        # İletişim bilgileri
+        contact_info = form_processor.get_contact_info(extracted_data)
+        logger.info("Contact: %s", mask_email(contact_info['email']), extra=HOT)
+
+        # Ön kontrol - HubSpot/SMTP'ye gitmeden
+        verdict = None
+        if gate is not None:
+            verdict = gate.check(extracted_data, category, contact_info)
+            if verdict["action"] == 'reject':
+                return self._gate_response(verdict)
+            for field in verdict["strip"]:
+                # Opsiyonel alan - geçersiz değer HubSpot'a/maillere gitmez, note'ta girildiği gibi kalır
+                logger.warning("Invalid %s dropped for submission %s", field, extracted_data.get('submission_id', ''))
+                contact_info[field] = ''
+        elif not contact_info.get('email'):
+            logger.error("No email found in submission")
+            return {
+                "success": False,
+                "error": "Email address required"
+            }, 400
+
+        # Duplicate kontrolü - tüm adımlar tamamsa hiçbir yan etki tekrarlanmaz
+        submission_id = extracted_data.get('submission_id', '')
+        done = self.checkpoints.completed_steps(submission_id)
+        if submission_id and all(step in done for step in CheckpointStore.STEPS):
+            logger.info("Duplicate submission ignored: %s", submission_id)
+            return {
+                "success": True,
+                "message": "Duplicate submission ignored",
+                "submission_id": submission_id
+            }, 200
+
+        if 'review_sent' in done or (not done and self.checkpoints.is_held(submission_id)):
+            logger.info("Submission %s already held for review", submission_id)
+            return {
+                "success": True,
+                "message": "Submission held for review",
+                "quarantined": True,
+                "submission_id": submission_id
+            }, 200
+
+        if verdict is not None and verdict["action"] == 'quarantine':
+            return self._hold_for_review(submission_id, done, 'validation', verdict["reasons"], category,
+                                         contact_info, extracted_data, deadline)
+
+        # Spam filtresi - sadece ilk deneme; adım öncesi düşen tekrar teslimler submission_id ile bir kez sayılır
+        if self.spam_filter is not None and not done and not resumed:
+            verdict = self.spam_filter.check(data, extracted_data, contact_info, client_ip, signed)
+            if verdict["review"]:
+                return self._hold_spam_suspect(submission_id, verdict["reason"], data)
+            if verdict["filtered"]:
+                return {
+                    "success": True,
+                    "message": "Webhook received",
+                    "filtered": True,
+                    "submission_id": submission_id
+                }, 200
+
+        if done:
+            logger.info("Resuming submission %s - completed steps: %s", submission_id, list(done))
+
+        # İşlem sonuçları
+        results = {
+            "submission_id": submission_id,
+            "category": category,
+            "contact": contact_info,
+            "hubspot": {"success": False},
+            "email": {"success": False}
+        }
+        failed_steps = []
+
+        # HubSpot'a kaydet
+        if self.hubspot_service:
+            try:
+                logger.info("Processing HubSpot integration...", extra=HOT)
+                hubspot_result = self._save_to_hubspot(
+                    submission_id, done, contact_info, category, extracted_data, deadline
+                )
+                results['hubspot'] = hubspot_result
+                logger.info("HubSpot: %s", hubspot_result.get('success', False), extra=HOT)
+
+            except DeadlineExceeded:
+                results['hubspot'] = self._defer(
+                    'contact_upserted', self._save_to_hubspot, submission_id, None,
+                    contact_info, category, extracted_data
+                )
+            except Exception as hubspot_error:
+                logger.error("HubSpot error: %s", hubspot_error)
+                results['hubspot'] = {"success": False, "error": str(hubspot_error)}
+
+            note_result = results['hubspot'].get('note_result', {})
+            if not results['hubspot'].get('success') and not results['hubspot'].get('deferred'):
+                failed_steps.append('contact_upserted')
+            elif note_result and not note_result.get('success') and not note_result.get('deferred'):
+                failed_steps.append('note_created')
+
+        # Email gönder (kategori bazlı)
+        if self.email_services:
+            try:
+                logger.info("Processing %s email notifications...", category, extra=HOT)
+                email_service = self.email_services.get(category)
+
+                if email_service:
+                    try:
+                        email_result = self._run_step(
+                            submission_id, 'admin_notified', done, email_service.send_notification,
+                            contact_info, extracted_data, results['hubspot'], deadline=deadline
+                        )
+                    except DeadlineExceeded:
+                        email_result = self._defer(
+                            'admin_notified', self._run_step, submission_id, 'admin_notified', None,
+                            email_service.send_notification, contact_info, extracted_data, results['hubspot']
+                        )
+                    results['email'] = email_result
+                    logger.info("Email: %s", email_result.get('success', False), extra=HOT)
+                    if not email_result.get('success') and not email_result.get('deferred'):
+                        failed_steps.append('admin_notified')
+
+                    # Otomatik onay maili gönder (kategori bazlı)
+                    try:
+                        confirmation_result = self._run_step(
+                            submission_id, 'confirmation_sent', done, email_service.send_application_confirmation,
+                            contact_info, extracted_data, deadline=deadline
+                        )
+                        logger.info("Confirmation email: %s", confirmation_result.get('success', False), extra=HOT)
+                    except DeadlineExceeded:
+                        confirmation_result = self._defer(
+                            'confirmation_sent', self._run_step, submission_id, 'confirmation_sent', None,
+                            email_service.send_application_confirmation, contact_info, extracted_data
+                        )
+                    except Exception as conf_error:
+                        logger.error("Confirmation email error: %s", conf_error)
+                        confirmation_result = {"success": False, "error": str(conf_error)}
+                    results['confirmation_email'] = confirmation_result
+                    if not confirmation_result.get('success') and not confirmation_result.get('deferred'):
+                        failed_steps.append('confirmation_sent')
+
+                else:
+                    logger.warning("No email service found for category: %s", category)
+                    results['email'] = {"success": False, "error": "No email service for category"}
+
+            except Exception as email_error:
+                logger.error("Email error: %s", email_error)
+                results['email'] = {"success": False, "error": str(email_error)}
+                failed_steps.append('admin_notified')
+
+        deferred = [
+            step for step, result in (
+                ('hubspot', results['hubspot']),
+                ('hubspot_note', results['hubspot'].get('note_result', {})),
+                ('email', results['email']),
+                ('confirmation', results.get('confirmation_email', {}))
+            ) if result.get('deferred')
+        ]
+
+        # Kuyruk işi kaybolursa Tally tekrar denemez (200 döner) - payload'ı resume için sakla.
+        # Digest'e alınan bildirim (deferred, background değil) digest DB'sinde zaten kalıcı.
+        background = [
+            step for step, result in (
+                ('hubspot', results['hubspot']),
+                ('hubspot_note', results['hubspot'].get('note_result', {})),
+                ('email', results['email']),
+                ('confirmation', results.get('confirmation_email', {}))
+            ) if result.get('background')
+        ]
+        if background and submission_id:
+            self.checkpoints.defer(submission_id, data, self.background_timeout)
+
+        # İstek başına tek structured özet satırı (örneklenmez)
+        logger.info("Webhook processed", extra={
+            "submission_id": submission_id,
+            "category": category,
+            "hubspot_success": results['hubspot'].get('success', False),
+            "email_success": results['email'].get('success', False),
+            "confirmation_success": results.get('confirmation_email', {}).get('success', False),
+            "resumed_steps": list(done),
+            "failed_steps": failed_steps,
+            "deferred": deferred,
+            "elapsed_ms": round(deadline.elapsed() * 1000) if deadline else None
+        })
+
+        # Tally için standart response
+        response = {
+            "success": True,
+            "message": "Webhook processed successfully",
+            "submission_id": submission_id,
+            "category": category,
+            "results": {
+                "hubspot": results['hubspot'].get('success', False),
+                "email": results['email'].get('success', False),
+                "confirmation": results.get('confirmation_email', {}).get('success', False)
+            },
+            "deferred": deferred,
+            "pending": background,
+            "timestamp": datetime.now().isoformat()
+        }
+
+        # Eksik adım kaldı - Tally retry etsin, tekrar denemede sadece bu adımlar çalışır
+        if failed_steps and submission_id:
+            response.update({
+                "success": False,
+                "message": "Some steps failed, retry resumes at the first incomplete step",
+                "failed_steps": failed_steps,
+                "retryable": True
+            })
+            # Gönderim kotası doluysa en erken ne zaman açılacağı (Retry-After)
+            retry_after = [r['retry_after'] for r in (results['email'], results.get('confirmation_email', {}))
+                           if r.get('retry_after')]
+            if retry_after:
+                response["retry_after"] = max(retry_after)
+            return response, 503
+
+        return response, 200
+
+    # --- Ertelenmiş gönderimleri tamamlama ---
+
+    def resume_pending(self, limit: int = 10, max_attempts: int = 8) -> int:
+        """Zamanı gelen ertelenmiş gönderimleri tekrar işle - işlenen kayıt sayısı döner
+
+        Eksik adım kalmadıysa kayıt silinir; 503 ya da hata olursa üstel
+        backoff ile yeniden planlanır, max_attempts sonunda dead olarak kalır.
+        """
+
+        claimed = self.checkpoints.claim_due(lease=self.background_timeout * 2, limit=limit)
+        for submission_id, data, attempts in claimed:
+            try:
+                body, status = self.process(data, deadline=Deadline(self.background_timeout), resumed=True)
+            except Exception as e:
+                logger.error("Resuming submission %s failed: %s", submission_id, e)
+                body, status = {}, 500
+
+            if status < 500 and not body.get('pending'):
+                self.checkpoints.resolve(submission_id)
+                logger.info("Deferred submission %s completed (attempt %d)", submission_id, attempts)
+            elif attempts >= max_attempts:
+                self.checkpoints.give_up(submission_id)
+                logger.error("Deferred submission %s abandoned after %d attempts: %s", submission_id, attempts,
+                             ', '.join(body.get('failed_steps', body.get('pending', []))))
+            elif status >= 500:
+                self.checkpoints.reschedule(
+                    submission_id, min(self.background_timeout * 2 ** (attempts - 1), self.RESUME_BACKOFF_LIMIT)
+                )
+        return len(claimed)
+
+    def start_resumer(self, interval: float = 30.0, max_attempts: int = 8):
+        """Periyodik resume thread'i (worker başına) - kayıtlar SQLite'ta sahiplenilir"""
+
+        if self._resumer_thread and self._resumer_thread.is_alive():
+            return
+
+        def loop():
+            while not self._resumer_stop.wait(interval):
+                try:
+                    self.resume_pending(max_attempts=max_attempts)
+                except Exception as e:
+                    logger.warning("Pending submission resume error: %s", e)
+
+        self._resumer_stop.clear()
+        self._resumer_thread = threading.Thread(target=loop, name='pending-resumer', daemon=True)
+        self._resumer_thread.start()
+
+    def stop_resumer(self, timeout: float = 5.0):
+        self._resumer_stop.set()
+        if self._resumer_thread:
+            self._resumer_thread.join(timeout)
+            self._resumer_thread = None
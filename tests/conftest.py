@@ -0,0 +1,80 @@
+import pytest
+
+from email_services import transports
+from services.contact_mirror import ContactMirror
+from services.hubspot_service import HubSpotService
+from tools.hubspot_simulator import HubSpotSimulator
+from tools.payload_generator import TallyPayloadGenerator
+from utils.form_processor import FormProcessor
+
+
+@pytest.fixture
+def hubspot_simulator():
+    """Yerel HubSpot stand-in'i - rastgele portta, test sonunda kapanır"""
+
+    server = HubSpotSimulator(('127.0.0.1', 0))
+    server.start_in_thread()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def submissions():
+    """(contact_info, category, extracted_data) - FormProcessor'dan geçmiş sentetik başvurular"""
+
+    processor = FormProcessor()
+    result = []
+    for payload in TallyPayloadGenerator(seed=40).stream(20):
+        extracted = processor.extract_form_data(payload)
+        result.append((processor.get_contact_info(extracted), processor.determine_category(extracted), extracted))
+    return result
+
+
+@pytest.fixture
+def email_config(tmp_path, monkeypatch):
+    """Dosya transport'lu, kotası test başına ayrı EMAIL_CONFIG"""
+
+    # Transport'lar hesap başına paylaşılır - her test kendi dosya dizinine yazsın
+    monkeypatch.setattr(transports, '_transports', {})
+    return {
+        'user': 'info@britishglobal.com.tr',
+        'password': '',
+        'transport': 'file',
+        'file_path': str(tmp_path / 'mail'),
+        'file_format': 'eml',
+        'quota_db': str(tmp_path / 'quota.sqlite3'),
+        'quota_instances': 1,
+        'digest_categories': [],
+    }
+
+
+@pytest.fixture
+def mirror():
+    """Bellekte contact mirror"""
+
+    return ContactMirror()
+
+
+@pytest.fixture
+def mirrored_hubspot(hubspot_simulator, mirror):
+    """Simülatöre bağlı, mirror'lı HubSpot servisi"""
+
+    service = HubSpotService('test-key', hubspot_simulator.base_url, contact_mirror=mirror)
+    yield service
+    service.close()
+
+
+@pytest.fixture
+def patches(hubspot_simulator, monkeypatch):
+    """Simülatöre giden PATCH gövdeleri"""
+
+    sent = []
+    update_contact = hubspot_simulator.store.update_contact
+
+    def recording(contact_id, properties):
+        sent.append(dict(properties))
+        return update_contact(contact_id, properties)
+
+    monkeypatch.setattr(hubspot_simulator.store, 'update_contact', recording)
+    return sent
@@ -0,0 +1,97 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+from services.async_hubspot_service import AsyncHubSpotService, LoopBoundHubSpotService
+from services.contact_mirror import ContactMirror
+from services.hubspot_service import HubSpotService
+from services.submission_pipeline import SubmissionPipeline
+from tools.payload_generator import TallyPayloadGenerator
+from utils.event_loop import WorkerEventLoop
+from utils.form_processor import FormProcessor
+
+
+def _run(base_url, coro_factory, **kwargs):
+    async def main():
+        service = AsyncHubSpotService('test-key', base_url, **kwargs)
+        try:
+            return await coro_factory(service)
+        finally:
+            await service.aclose()
+    return asyncio.run(main())
+
+
+def test_save_contact_creates_contact_and_note(hubspot_simulator, submissions):
+    contact_info, category, extracted = submissions[0]
+
+    result = _run(hubspot_simulator.base_url, lambda s: s.save_contact(contact_info, category, extracted))
+
+    assert result["success"]
+    assert result["contact_result"]["action"] == "created"
+    assert result["note_result"]["success"]
+    assert hubspot_simulator.store.counts() == {"contacts": 1, "notes": 1}
+    stored = hubspot_simulator.store.contacts[result["contact_id"]]["properties"]
+    assert stored["email"] == contact_info["email"]
+
+
+def test_existing_contact_is_updated_after_conflict(hubspot_simulator, submissions):
+    contact_info, category, extracted = submissions[0]
+    HubSpotService('test-key', hubspot_simulator.base_url).upsert_contact(contact_info, category, extracted)
+
+    result = _run(hubspot_simulator.base_url, lambda s: s.upsert_contact(contact_info, category, extracted))
+
+    assert result["success"]
+    assert result["action"] == "updated"
+    assert hubspot_simulator.store.counts()["contacts"] == 1
+
+
+def test_concurrent_saves_share_bounded_pool(hubspot_simulator, submissions):
+    async def save_all(service):
+        results = await asyncio.gather(*(service.save_contact(*s) for s in submissions))
+        return results, service.http.get_stats()
+
+    results, stats = _run(hubspot_simulator.base_url, save_all, max_connections=4)
+
+    assert all(r["success"] for r in results)
+    assert stats["peak_in_flight"] <= 4
+    assert hubspot_simulator.store.counts()["notes"] == len(submissions)
+
+
+def test_mirror_skips_unchanged_contact(hubspot_simulator, submissions):
+    contact_info, category, extracted = submissions[0]
+    mirror = ContactMirror()
+
+    async def twice(service):
+        first = await service.upsert_contact(contact_info, category, extracted)
+        requests = hubspot_simulator.get_stats()["requests"]
+        second = await service.upsert_contact(contact_info, category, extracted)
+        return first, second, hubspot_simulator.get_stats()["requests"] - requests
+
+    first, second, extra_requests = _run(hubspot_simulator.base_url, twice, contact_mirror=mirror)
+
+    assert first["action"] == "created"
+    assert second == {"success": True, "contact_id": first["contact_id"], "action": "unchanged"}
+    assert extra_requests == 0
+
+
+def test_pipeline_threads_share_loop_bound_service(hubspot_simulator):
+    loop = WorkerEventLoop('test-loop')
+    service = LoopBoundHubSpotService(
+        AsyncHubSpotService('test-key', hubspot_simulator.base_url, max_connections=4, contact_mirror=ContactMirror()),
+        loop
+    )
+    pipeline = SubmissionPipeline(service, FormProcessor(), {})
+    payloads = list(TallyPayloadGenerator(seed=41).stream(8))
+    try:
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            results = list(executor.map(pipeline.process, payloads))
+        stats = service.http.get_stats()
+    finally:
+        service.close()
+        loop.stop()
+
+    assert [status for _, status in results] == [200] * 8
+    assert all(body["results"]["hubspot"] for body, _ in results)
+    assert stats["peak_in_flight"] <= 4
+    assert hubspot_simulator.store.counts() == {"contacts": 8, "notes": 8}
+    assert pipeline.checkpoints.completed_steps(results[0][0]["submission_id"]).keys() == {
+        'contact_upserted', 'note_created'}
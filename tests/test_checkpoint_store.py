@@ -0,0 +1,13 @@
+from utils.checkpoint_store import CheckpointStore
+
+
+def test_completed_count_ignores_marker_steps():
+    store = CheckpointStore()
+    for step in CheckpointStore.STEPS:
+        store.mark('complete', step)
+    for step in CheckpointStore.STEPS[:3]:
+        store.mark('partial', step)
+    store.mark('partial', 'review_sent')
+
+    assert store.completed_count() == 1
+    assert not store.is_complete('partial')
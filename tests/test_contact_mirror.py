@@ -0,0 +1,81 @@
+import time
+
+from services.contact_mirror import ContactMirror
+
+
+def test_remote_change_invalidates_diff(hubspot_simulator, mirrored_hubspot, mirror, patches, submissions):
+    contact_info, category, extracted = submissions[0]
+    created = mirrored_hubspot.upsert_contact(contact_info, category, extracted)
+    time.sleep(0.01)  # lastmodifieddate milisaniye çözünürlüklü
+    hubspot_simulator.store.update_contact(created["contact_id"], {"firstname": "Edited in CRM"})
+    patches.clear()
+
+    assert mirror.sync(mirrored_hubspot)["synced"] == 1
+    result = mirrored_hubspot.upsert_contact(contact_info, category, extracted)
+
+    assert result["action"] == "updated"
+    assert len(patches) == 1 and len(patches[0]) == created["properties_count"]
+    assert hubspot_simulator.store.contacts[created["contact_id"]]["properties"]["firstname"] == contact_info["firstname"]
+
+
+def test_deleted_contact_falls_back_to_create(hubspot_simulator, mirrored_hubspot, mirror, submissions):
+    contact_info, category, extracted = submissions[0]
+    created = mirrored_hubspot.upsert_contact(contact_info, category, extracted)
+    hubspot_simulator.store.reset()
+
+    result = mirrored_hubspot.upsert_contact({**contact_info, 'phone': '+90 532 000 00 00'}, category, extracted)
+
+    assert result["action"] == "created"
+    assert result["contact_id"] != created["contact_id"]
+    assert mirror.lookup(contact_info["email"])["contact_id"] == result["contact_id"]
+
+
+class RecordingSearch:
+    """search_modified_contacts çağrılarının cursor'larını kaydeden sahte servis"""
+
+    def __init__(self):
+        self.cursors = []
+
+    def search_modified_contacts(self, cursor, after=None, limit=100):
+        self.cursors.append(cursor)
+        return {"success": True, "results": [], "after": None}
+
+
+def test_first_sync_starts_at_newest_mirrored_change(mirror):
+    mirror.remember('old@example.com', '1', lastmodified=1_700_000_000_000)
+    mirror.remember('new@example.com', '2', lastmodified=1_700_000_500_000)
+    search = RecordingSearch()
+
+    mirror.sync(search)
+
+    assert search.cursors == [1_700_000_500_000]
+
+
+def test_first_sync_on_empty_mirror_skips_history(mirror):
+    search = RecordingSearch()
+    before = int(time.time() * 1000)
+
+    mirror.sync(search)
+    mirror.sync(search)
+
+    assert before <= search.cursors[0] <= int(time.time() * 1000)
+    assert search.cursors[1] == search.cursors[0]  # Cursor kalıcı
+
+
+def test_sync_lease_is_held_by_one_worker(tmp_path):
+    mirror = ContactMirror(str(tmp_path / 'mirror.sqlite3'))
+    with mirror._lock:
+        mirror._set_state('sync_lease', f"999999:{time.time() + 60}")
+
+    assert not mirror.acquire_sync_lease(60)
+    mirror.release_sync_lease()  # Başkasının lease'i bırakılmaz
+    assert not mirror.acquire_sync_lease(60)
+
+    with mirror._lock:
+        mirror._set_state('sync_lease', f"999999:{time.time() - 1}")
+    assert mirror.acquire_sync_lease(60)  # Süresi dolan lease devralınır
+    assert mirror.acquire_sync_lease(60)  # Sahibi yenileyebilir
+
+    mirror.release_sync_lease()
+    with mirror._lock:
+        assert mirror._get_state('sync_lease') is None
@@ -0,0 +1,165 @@
+import pytest
+
+from services.submission_pipeline import SubmissionPipeline
+from tools.payload_generator import TallyPayloadGenerator
+from utils.deadline import DeadlineExceeded
+from utils.form_processor import FormProcessor
+
+
+class LostQueue:
+    """Kabul edip hiç çalıştırmayan kuyruk - worker recycle'ı taklit eder"""
+
+    def __init__(self):
+        self.tasks = []
+
+    def submit(self, name, func, *args, **kwargs):
+        self.tasks.append(name)
+        return True
+
+
+class FlakyHubSpot:
+    """İlk fail_calls upsert'te bütçe aşımı, sonra başarılı"""
+
+    def __init__(self, fail_calls=1, error=None):
+        self.fail_calls = fail_calls
+        self.error = error
+        self.upserts = 0
+        self.notes = 0
+
+    def upsert_contact(self, contact_info, category, extracted_data, deadline=None):
+        self.upserts += 1
+        if self.upserts <= self.fail_calls:
+            raise DeadlineExceeded("budget")
+        if self.error:
+            return {"success": False, "error": self.error}
+        return {"success": True, "contact_id": "101"}
+
+    def create_contact_note(self, contact_id, category, extracted_data, deadline=None):
+        self.notes += 1
+        return {"success": True, "note_id": "n-1"}
+
+
+@pytest.fixture
+def payload():
+    return next(TallyPayloadGenerator(seed=33).stream(1))
+
+
+def _pipeline(hubspot, queue):
+    return SubmissionPipeline(hubspot, FormProcessor(), {}, background_queue=queue, background_timeout=30)
+
+
+def _make_due(pipeline, submission_id):
+    pipeline.checkpoints.reschedule(submission_id, 0)
+
+
+def test_deferred_hubspot_step_is_persisted_and_resumed(payload):
+    hubspot, queue = FlakyHubSpot(), LostQueue()
+    pipeline = _pipeline(hubspot, queue)
+
+    body, status = pipeline.process(payload)
+    assert status == 200
+    assert body["pending"] == ['hubspot']
+    assert queue.tasks == ['contact_upserted']
+    assert pipeline.checkpoints.pending_counts() == {"pending": 1, "dead": 0}
+
+    # Kuyruk işi kayboldu - resumer henüz zamanı gelmeyen kaydı almaz
+    assert pipeline.resume_pending() == 0
+    _make_due(pipeline, body["submission_id"])
+    assert pipeline.resume_pending() == 1
+
+    done = pipeline.checkpoints.completed_steps(body["submission_id"])
+    assert done["contact_upserted"] == {"contact_id": "101"}
+    assert "note_created" in done
+    assert pipeline.checkpoints.pending_counts() == {"pending": 0, "dead": 0}
+
+
+def test_failed_resume_backs_off_then_gives_up(payload):
+    hubspot = FlakyHubSpot(error="HubSpot down")
+    pipeline = _pipeline(hubspot, LostQueue())
+
+    body, status = pipeline.process(payload)
+    submission_id = body["submission_id"]
+
+    for _ in range(2):
+        _make_due(pipeline, submission_id)
+        assert pipeline.resume_pending(max_attempts=2) == 1
+
+    assert hubspot.upserts == 3
+    assert pipeline.checkpoints.pending_counts() == {"pending": 0, "dead": 1}
+    _make_due(pipeline, submission_id)
+    assert pipeline.resume_pending(max_attempts=2) == 0  # dead kayıt tekrar alınmaz
+
+
+def test_failed_resume_is_rescheduled_with_backoff(payload):
+    pipeline = _pipeline(FlakyHubSpot(error="HubSpot down"), LostQueue())
+
+    body, _ = pipeline.process(payload)
+    _make_due(pipeline, body["submission_id"])
+    pipeline.resume_pending()
+
+    assert pipeline.checkpoints.pending_counts() == {"pending": 1, "dead": 0}
+    assert pipeline.resume_pending() == 0  # backoff dolmadı
+
+
+def test_completed_submission_is_not_persisted(payload):
+    pipeline = _pipeline(FlakyHubSpot(fail_calls=0), LostQueue())
+
+    body, status = pipeline.process(payload)
+    assert status == 200
+    assert body["pending"] == []
+    assert pipeline.checkpoints.pending_counts() == {"pending": 0, "dead": 0}
+
+
+class FlakyEmail:
+    """İlk admin bildirimi bütçeye sığmaz; digest=True ise bildirim digest'e alınır"""
+
+    def __init__(self, digest=False):
+        self.digest = digest
+        self.notifications = 0
+        self.confirmations = 0
+
+    def send_notification(self, contact_info, extracted_data, hubspot_result, deadline=None):
+        self.notifications += 1
+        if self.digest:
+            return {"success": True, "deferred": True, "digested": 1}
+        if self.notifications == 1:
+            raise DeadlineExceeded("budget")
+        return {"success": True}
+
+    def send_application_confirmation(self, contact_info, extracted_data, deadline=None):
+        self.confirmations += 1
+        return {"success": True}
+
+
+def _email_pipeline(email, queue):
+    return SubmissionPipeline(None, FormProcessor(), {'education': email, 'legal': email, 'business': email},
+                              background_queue=queue, background_timeout=30)
+
+
+def test_deferred_email_step_is_persisted_and_resumed(payload):
+    email, queue = FlakyEmail(), LostQueue()
+    pipeline = _email_pipeline(email, queue)
+
+    body, status = pipeline.process(payload)
+    assert status == 200
+    assert body["pending"] == ['email']
+    assert queue.tasks == ['admin_notified']
+    assert email.confirmations == 1
+
+    _make_due(pipeline, body["submission_id"])
+    assert pipeline.resume_pending() == 1
+
+    done = pipeline.checkpoints.completed_steps(body["submission_id"])
+    assert {'admin_notified', 'confirmation_sent'} <= set(done)
+    assert email.confirmations == 1  # Tamamlanan adım tekrarlanmaz
+    assert pipeline.checkpoints.pending_counts() == {"pending": 0, "dead": 0}
+
+
+def test_digested_notification_is_not_persisted(payload):
+    pipeline = _email_pipeline(FlakyEmail(digest=True), LostQueue())
+
+    body, status = pipeline.process(payload)
+    assert status == 200
+    assert body["deferred"] == ['email']
+    assert body["pending"] == []
+    assert pipeline.checkpoints.pending_counts() == {"pending": 0, "dead": 0}
@@ -0,0 +1,56 @@
+import pytest
+
+from email_services.education_email import EducationEmailService
+from tools.payload_generator import TallyPayloadGenerator
+from utils.form_processor import FormProcessor
+
+DIRECT = 'info@britishglobal.com.tr'
+DIGESTED = 'ops@britishglobal.com.tr'
+
+
+@pytest.fixture
+def service(email_config, tmp_path, monkeypatch):
+    config = {**email_config, 'digest_categories': ['education'], 'digest_recipients': [DIGESTED],
+              'digest_db': str(tmp_path / 'digest.sqlite3')}
+    service = EducationEmailService(config)
+    monkeypatch.setattr(service, 'get_recipients', lambda contact_info, extracted_data: [DIRECT, DIGESTED])
+    monkeypatch.setattr(service, 'is_urgent', lambda extracted_data: False)
+    return service
+
+
+@pytest.fixture
+def submission():
+    processor = FormProcessor()
+    extracted = processor.extract_form_data(next(TallyPayloadGenerator(seed=44).stream(1)))
+    return processor.get_contact_info(extracted), extracted
+
+
+def test_mixed_notification_is_deferred_when_direct_part_succeeds(service, submission, monkeypatch):
+    sent = []
+    monkeypatch.setattr(service, 'send_email', lambda recipients, *args, **kwargs: sent.append(recipients)
+                        or {"success": True})
+
+    result = service.send_notification(*submission)
+
+    assert sent == [[DIRECT]]
+    assert result == {"success": True, "digested": 1, "deferred": True}
+
+
+def test_failed_direct_part_is_not_hidden_by_digest(service, submission, monkeypatch):
+    monkeypatch.setattr(service, 'send_email', lambda *args, **kwargs: {"success": False, "quota_exceeded": True,
+                                                                        "retry_after": 30})
+
+    result = service.send_notification(*submission)
+
+    assert not result["success"]
+    assert "deferred" not in result
+    assert result["digested"] == 1
+    assert result["retry_after"] == 30
+
+
+def test_digest_only_notification_is_deferred(service, submission, monkeypatch):
+    monkeypatch.setattr(service, 'get_recipients', lambda contact_info, extracted_data: [DIGESTED])
+
+    result = service.send_notification(*submission)
+
+    assert result == {"success": True, "digested": 1, "deferred": True}
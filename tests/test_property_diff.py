@@ -0,0 +1,38 @@
+def test_unchanged_contact_skips_write(hubspot_simulator, mirrored_hubspot, mirror, patches, submissions):
+    contact_info, category, extracted = submissions[0]
+    created = mirrored_hubspot.upsert_contact(contact_info, category, extracted)
+    requests = hubspot_simulator.get_stats()["requests"]
+
+    result = mirrored_hubspot.upsert_contact(contact_info, category, extracted)
+
+    assert result == {"success": True, "contact_id": created["contact_id"], "action": "unchanged"}
+    assert hubspot_simulator.get_stats()["requests"] == requests
+    assert patches == []
+    assert mirror.get_stats()["skipped_writes"] == 1
+
+
+def test_changed_contact_patches_only_diff(hubspot_simulator, mirrored_hubspot, mirror, patches, submissions):
+    contact_info, category, extracted = submissions[0]
+    created = mirrored_hubspot.upsert_contact(contact_info, category, extracted)
+
+    result = mirrored_hubspot.upsert_contact({**contact_info, 'phone': '+90 532 000 00 00'}, category, extracted)
+
+    assert result["success"] and result["action"] == "updated"
+    assert result["contact_id"] == created["contact_id"]
+    assert patches == [{"phone": "+90 532 000 00 00"}]
+    assert mirror.get_stats()["suppressed_fields"] == created["properties_count"] - 1
+    stored = hubspot_simulator.store.contacts[created["contact_id"]]["properties"]
+    assert stored["phone"] == "+90 532 000 00 00"
+
+
+def test_repeated_note_is_deduplicated(hubspot_simulator, mirrored_hubspot, mirror, submissions):
+    contact_info, category, extracted = submissions[0]
+    contact_id = mirrored_hubspot.upsert_contact(contact_info, category, extracted)["contact_id"]
+
+    first = mirrored_hubspot.create_contact_note(contact_id, category, extracted)
+    second = mirrored_hubspot.create_contact_note(contact_id, category, {**extracted, 'submission_id': 'redelivered'})
+
+    assert first["success"] and not first.get("deduplicated")
+    assert second == {"success": True, "note_id": first["note_id"], "deduplicated": True}
+    assert hubspot_simulator.store.counts()["notes"] == 1
+    assert mirror.get_stats()["deduped_notes"] == 1
@@ -0,0 +1,61 @@
+import pytest
+
+from email_services.education_email import EducationEmailService
+from email_services.quota_ledger import QuotaExceeded, QuotaLedger
+from services.submission_pipeline import SubmissionPipeline
+from tools.payload_generator import TallyPayloadGenerator
+from utils.form_processor import FormProcessor
+
+
+@pytest.fixture
+def pipeline(email_config):
+    config = {**email_config, 'quota_limits': {'minute_messages': 2}}
+    service = EducationEmailService(config)
+    return SubmissionPipeline(None, FormProcessor(), {'education': service, 'legal': service, 'business': service})
+
+
+def test_exhausted_quota_fails_step_with_retry_after(pipeline):
+    first, second = TallyPayloadGenerator(seed=43).stream(2)
+
+    body, status = pipeline.process(first)
+    assert status == 200
+
+    body, status = pipeline.process(second)
+    assert status == 503
+    assert body["retryable"]
+    assert body["failed_steps"] == ['admin_notified', 'confirmation_sent']
+    assert 0 < body["retry_after"] <= 60
+    assert body["deferred"] == []
+    assert pipeline.checkpoints.completed_steps(body["submission_id"]) == {}
+
+
+def test_send_email_reports_quota_instead_of_deferring(email_config):
+    service = EducationEmailService({**email_config, 'quota_limits': {'minute_messages': 1}})
+    assert service.send_email(['a@example.com'], 'first', 'body', submission_id='s1')["success"]
+
+    result = service.send_email(['b@example.com'], 'second', 'body', submission_id='s2')
+
+    assert result["success"] is False
+    assert result["quota_exceeded"] is True
+    assert result["retry_after"] > 0
+    assert "deferred" not in result
+
+
+def test_limits_are_split_across_instances():
+    ledger = QuotaLedger(limits={'minute_messages': 60}, instances=10)
+
+    for _ in range(6):
+        ledger.reserve(['info@britishglobal.com.tr'], 1, 1)
+    with pytest.raises(QuotaExceeded):
+        ledger.reserve(['info@britishglobal.com.tr'], 1, 1)
+    assert ledger.get_stats([])["account_limits"]["minute_messages"] == 60
+
+
+def test_low_priority_mail_stops_before_the_limit():
+    ledger = QuotaLedger(limits={'minute_messages': 10}, low_priority_ratio=0.5)
+
+    for _ in range(5):
+        ledger.reserve(['info@britishglobal.com.tr'], 1, 1, priority='low')
+    with pytest.raises(QuotaExceeded):
+        ledger.reserve(['info@britishglobal.com.tr'], 1, 1, priority='low')
+    assert ledger.reserve(['info@britishglobal.com.tr'], 1, 1)["account"] == 'info@britishglobal.com.tr'
@@ -0,0 +1,89 @@
+import copy
+
+import pytest
+
+import main
+from services.submission_pipeline import SubmissionPipeline
+from tools.payload_generator import TallyPayloadGenerator
+from utils.form_processor import FormProcessor
+from utils.spam_filter import SpamFilter
+
+
+class CountingEmail:
+    """Gönderilen her maili sayan email servisi"""
+
+    def __init__(self):
+        self.sent = []
+
+    def send_notification(self, contact_info, extracted_data, hubspot_result, deadline=None):
+        self.sent.append('notification')
+        return {"success": True}
+
+    def send_application_confirmation(self, contact_info, extracted_data, deadline=None):
+        self.sent.append('confirmation')
+        return {"success": True}
+
+    def send_review_alert(self, *args, **kwargs):
+        self.sent.append('review_alert')
+        return {"success": True}
+
+
+@pytest.fixture
+def email():
+    return CountingEmail()
+
+
+@pytest.fixture
+def pipeline(email):
+    return SubmissionPipeline(None, FormProcessor(), {'education': email, 'legal': email, 'business': email},
+                              spam_filter=SpamFilter(email_limit=1))
+
+
+def _redelivered_as(payload, submission_id):
+    """Aynı gönderenin yeni bir gönderimi"""
+
+    payload = copy.deepcopy(payload)
+    payload['data']['submissionId'] = payload['data']['responseId'] = submission_id
+    return payload
+
+
+def test_spam_suspects_are_recorded_without_mail(pipeline, email):
+    first = next(TallyPayloadGenerator(seed=48).stream(1))
+    assert pipeline.process(first)[1] == 200
+    email.sent.clear()
+
+    suspects = [_redelivered_as(first, f"suspect{n}") for n in range(20)]
+    responses = [pipeline.process(payload) for payload in suspects]
+
+    assert all(status == 200 for _, status in responses)
+    assert all(body["held_for_review"] and body["reasons"] == ['email_rate'] for body, _ in responses)
+    assert email.sent == []
+    assert pipeline.checkpoints.review_count() == 20
+    held = pipeline.checkpoints.held_for_review(limit=1)[0]
+    assert held["source"] == 'spam' and held["reasons"] == ['email_rate']
+
+
+def test_redelivered_suspect_is_not_checked_again(pipeline, email):
+    first = next(TallyPayloadGenerator(seed=48).stream(1))
+    pipeline.process(first)
+    suspect = _redelivered_as(first, 'suspect')
+    pipeline.process(suspect)
+    checked = pipeline.spam_filter.get_stats()["checked"]
+
+    body, status = pipeline.process(suspect)
+
+    assert status == 200 and body["quarantined"]
+    assert pipeline.spam_filter.get_stats()["checked"] == checked
+    assert pipeline.checkpoints.review_count() == 1
+    assert email.sent == ['notification', 'confirmation']
+
+
+@pytest.mark.parametrize("forwarded, remote_addr, expected", [
+    ('6.6.6.6, 203.0.113.7', '169.254.1.1', '203.0.113.7'),  # İstemcinin yazdığı ilk hop yok sayılır
+    ('203.0.113.7', '169.254.1.1', '203.0.113.7'),
+    (None, '198.51.100.2', '198.51.100.2'),
+])
+def test_client_ip_uses_last_forwarded_hop(forwarded, remote_addr, expected):
+    headers = {'X-Forwarded-For': forwarded} if forwarded else {}
+    with main.app.test_request_context('/tally', headers=headers, environ_base={'REMOTE_ADDR': remote_addr}):
+        assert main._client_ip() == expected
@@ -0,0 +1,81 @@
+import os
+import time
+
+import pytest
+
+from utils.spool import DirectorySpool, SpoolDrainer
+
+
+@pytest.fixture
+def spool(tmp_path):
+    return DirectorySpool(str(tmp_path / 'spool'))
+
+
+def _drain(drainer, until, timeout=5.0):
+    drainer.start()
+    try:
+        deadline = time.monotonic() + timeout
+        while not until():
+            assert time.monotonic() < deadline, drainer.stats
+            time.sleep(0.01)
+    finally:
+        drainer.stop()
+
+
+def test_drainer_processes_entries_in_arrival_order(spool):
+    handled = []
+    for body in (b'{"n": 1}', b'{"n": 2}', b'{"n": 3}'):
+        spool.put(body)
+
+    drainer = SpoolDrainer(spool, lambda body: handled.append(body) or True, idle_interval=0.01)
+    _drain(drainer, lambda: drainer.stats["processed"] == 3)
+
+    assert handled == [b'{"n": 1}', b'{"n": 2}', b'{"n": 3}']
+    assert spool.depth() == 0
+
+
+def test_failing_entry_backs_off_without_blocking_the_rest(spool):
+    handled = []
+    spool.put(b'bad')
+    spool.put(b'good')
+
+    drainer = SpoolDrainer(spool, lambda body: handled.append(body) or body == b'good',
+                           idle_interval=0.01, retry_delay=60)
+    _drain(drainer, lambda: drainer.stats["processed"] == 1)
+
+    assert handled == [b'bad', b'good']
+    name, = [e[:-len('.json')] for e in os.listdir(spool.directory) if e.endswith('.json')]
+    assert DirectorySpool.attempts(name) == 1
+    assert os.path.getmtime(os.path.join(spool.directory, name + '.json')) > time.time() + 50
+    assert spool.claim() is None  # Backoff dolmadan alınmaz
+
+
+def test_entry_is_dead_lettered_after_max_attempts(spool):
+    spool.put(b'bad')
+
+    drainer = SpoolDrainer(spool, lambda body: False, idle_interval=0.01, retry_delay=0, max_attempts=3)
+    _drain(drainer, lambda: drainer.stats["dead_lettered"] == 1)
+
+    assert drainer.stats["failed"] == 3
+    assert spool.depth() == 0
+    assert spool.dead_letter_count() == 1
+    dead, = os.listdir(spool.dead_letter_directory)
+    with open(os.path.join(spool.dead_letter_directory, dead), 'rb') as f:
+        assert f.read() == b'bad'
+
+
+def test_handler_exception_counts_as_attempt(spool):
+    spool.put(b'not json')
+
+    def handler(body):
+        raise ValueError("boom")
+
+    drainer = SpoolDrainer(spool, handler, idle_interval=0.01, retry_delay=0, max_attempts=2)
+    _drain(drainer, lambda: drainer.stats["dead_lettered"] == 1)
+
+    assert drainer.stats["failed"] == 2
+
+
+def test_backoff_is_exponential_and_capped(spool):
+    drainer = SpoolDrainer(spool, lambda body: True, retry_delay=5, max_retry_delay=30)
+    assert [drainer.backoff(n) for n in range(1, 6)] == [5, 10, 20, 30, 30]
@@ -0,0 +1,36 @@
+import os
+import time
+
+from utils.webhook_journal import DATA_SUFFIX, INDEX_SUFFIX, JournalReader, WebhookJournal
+
+
+def _disk_bytes(directory):
+    return sum(os.path.getsize(os.path.join(directory, name)) for name in os.listdir(directory))
+
+
+def test_rotation_caps_total_journal_size(tmp_path):
+    journal = WebhookJournal(str(tmp_path), max_segment_bytes=4096, max_total_bytes=16384)
+    for _ in range(200):
+        journal.append(os.urandom(1024))
+    journal.close()
+
+    assert journal.stats["pruned_segments"] > 0
+    assert _disk_bytes(str(tmp_path)) <= 16384 + 4096 + 1024
+    # En yeni kayıtlar okunabilir kalır
+    assert len(list(JournalReader(str(tmp_path)).iter_records())) >= 12
+
+
+def test_rotation_prunes_expired_segments(tmp_path):
+    old = tmp_path / 'journal-20200101-000000-1-0001'
+    for suffix in (DATA_SUFFIX, INDEX_SUFFIX):
+        path = str(old) + suffix
+        open(path, 'wb').close()
+        os.utime(path, (time.time() - 8 * 86400,) * 2)
+
+    journal = WebhookJournal(str(tmp_path), retention_days=7)
+    journal.append(b'{"eventId": "1"}')
+    journal.close()
+
+    assert not os.path.exists(str(old) + DATA_SUFFIX)
+    assert not os.path.exists(str(old) + INDEX_SUFFIX)
+    assert len(JournalReader(str(tmp_path)).segments()) == 1
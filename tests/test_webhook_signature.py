@@ -0,0 +1,91 @@
+import base64
+import hashlib
+import hmac
+import json
+
+import pytest
+
+import main
+from utils.signature import WebhookVerifier
+
+SECRET = 'tally-test-secret'
+
+
+def sign(raw_body: bytes, secret: str = SECRET) -> str:
+    return base64.b64encode(hmac.new(secret.encode(), raw_body, hashlib.sha256).digest()).decode()
+
+
+class RecordingPipeline:
+    """Sadece /tally'nin neyi pipeline'a geçirdiğini kaydeder"""
+
+    def __init__(self):
+        self.calls = []
+
+    def process(self, data, **kwargs):
+        self.calls.append((data, kwargs))
+        return {"success": True, "submission_id": "sig-test"}, 200
+
+
+@pytest.fixture
+def pipeline(monkeypatch):
+    pipeline = RecordingPipeline()
+    monkeypatch.setattr(main, 'webhook_verifier', WebhookVerifier(['new-secret', SECRET]))
+    monkeypatch.setattr(main, 'initialize_services', lambda: None)
+    monkeypatch.setattr(main, 'get_journal', lambda: None)
+    monkeypatch.setattr(main, 'submission_pipeline', pipeline)
+    monkeypatch.setattr(main, 'IMPORTS_SUCCESS', True)
+    return pipeline
+
+
+@pytest.fixture
+def client():
+    return main.app.test_client()
+
+
+RAW = json.dumps({"eventType": "FORM_RESPONSE", "data": {"responseId": "sig-test", "fields": []}}).encode()
+
+
+def post(client, body: bytes, signature=None):
+    headers = {"Content-Type": "application/json"}
+    if signature is not None:
+        headers["Tally-Signature"] = signature
+    return client.post('/tally', data=body, headers=headers)
+
+
+def test_missing_signature_is_rejected(client, pipeline):
+    response = post(client, RAW)
+
+    assert response.status_code == 401
+    assert pipeline.calls == []
+
+
+def test_wrong_secret_is_rejected(client, pipeline):
+    response = post(client, RAW, sign(RAW, 'old-secret'))
+
+    assert response.status_code == 401
+    assert pipeline.calls == []
+
+
+def test_signature_covers_raw_bytes(client, pipeline):
+    # Aynı JSON, farklı byte'lar - yeniden serialize edilmiş gövde geçmemeli
+    reformatted = json.dumps(json.loads(RAW), indent=2).encode()
+
+    response = post(client, reformatted, sign(RAW))
+
+    assert response.status_code == 401
+    assert pipeline.calls == []
+
+
+def test_valid_signature_reaches_pipeline_as_signed(client, pipeline):
+    response = post(client, RAW, sign(RAW))
+
+    assert response.status_code == 200
+    assert len(pipeline.calls) == 1
+    data, kwargs = pipeline.calls[0]
+    assert data["data"]["responseId"] == "sig-test"
+    assert kwargs["signed"] is True
+
+
+def test_any_active_secret_is_accepted_during_rotation(client, pipeline):
+    assert post(client, RAW, sign(RAW, 'new-secret')).status_code == 200
+    assert main.webhook_verifier.get_stats()["verified"] == 1
@@ -0,0 +1,2 @@
+# tools/__init__.py
+"""Local simulators, load testing and benchmark tools"""
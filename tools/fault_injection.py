@@ -0,0 +1,173 @@
+import math
+import random
+import threading
+import argparse
+from typing import Dict, Optional
+
+
+class FaultInjector:
+    """Simülatörler için gecikme ve hata enjeksiyonu (seed ile deterministik)"""
+
+    LATENCY_KINDS = ('fixed', 'uniform', 'exp', 'lognormal')
+
+    def __init__(self, seed: Optional[int] = None, latency: str = 'fixed:0',
+                 error_rates: Optional[Dict[int, float]] = None,
+                 drop_rate: float = 0.0, auth_failure_rate: float = 0.0):
+        self.seed = seed
+        self.latency_spec = latency
+        self.latency_kind, self.latency_params = self._parse_latency(latency)
+        self.error_rates = dict(error_rates or {})
+        self.drop_rate = drop_rate
+        self.auth_failure_rate = auth_failure_rate
+
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self.stats = {
+            "latency_samples": 0,
+            "latency_total_ms": 0.0,
+            "injected_errors": {},
+            "drops": 0,
+            "auth_failures": 0
+        }
+
+    @classmethod
+    def _parse_latency(cls, spec: str) -> tuple:
+        """'fixed:50', 'uniform:20:200', 'exp:80', 'lognormal:80:0.5' (ms)"""
+
+        parts = (spec or 'fixed:0').split(':')
+        kind = parts[0].strip().lower()
+        if kind not in cls.LATENCY_KINDS:
+            raise ValueError(f"Unknown latency distribution: {kind}")
+
+        params = [float(p) for p in parts[1:]]
+        expected = {'fixed': 1, 'uniform': 2, 'exp': 1, 'lognormal': 2}[kind]
+        if len(params) != expected:
+            raise ValueError(f"Latency '{kind}' expects {expected} parameter(s): {spec}")
+
+        return kind, params
+
+    @staticmethod
+    def parse_error_rates(spec: str) -> Dict[int, float]:
+        """'429=0.05,503=0.01' -> {429: 0.05, 503: 0.01}"""
+
+        rates = {}
+        for item in (spec or '').split(','):
+            item = item.strip()
+            if not item:
+                continue
+            code, rate = item.split('=', 1)
+            rates[int(code)] = float(rate)
+
+        if sum(rates.values()) > 1.0:
+            raise ValueError("Sum of error rates cannot exceed 1.0")
+
+        return rates
+
+    def latency_seconds(self) -> float:
+        """Dağılımdan bir gecikme örneği çek"""
+
+        with self._lock:
+            if self.latency_kind == 'fixed':
+                ms = self.latency_params[0]
+            elif self.latency_kind == 'uniform':
+                ms = self._rng.uniform(*self.latency_params)
+            elif self.latency_kind == 'exp':
+                mean = self.latency_params[0]
+                ms = self._rng.expovariate(1.0 / mean) if mean > 0 else 0.0
+            else:
+                # lognormal:median_ms:sigma
+                median, sigma = self.latency_params
+                ms = self._rng.lognormvariate(math.log(median), sigma) if median > 0 else 0.0
+
+            self.stats["latency_samples"] += 1
+            self.stats["latency_total_ms"] += ms
+
+        return max(ms, 0.0) / 1000.0
+
+    def pick_error(self) -> Optional[int]:
+        """Enjekte edilecek hata kodu (yoksa None)"""
+
+        if not self.error_rates:
+            return None
+
+        with self._lock:
+            roll = self._rng.random()
+            cumulative = 0.0
+            for code, rate in self.error_rates.items():
+                cumulative += rate
+                if roll < cumulative:
+                    injected = self.stats["injected_errors"]
+                    injected[code] = injected.get(code, 0) + 1
+                    return code
+
+        return None
+
+    def should_drop(self) -> bool:
+        """Bağlantı yanıt vermeden kapatılsın mı"""
+
+        if self.drop_rate <= 0:
+            return False
+
+        with self._lock:
+            if self._rng.random() < self.drop_rate:
+                self.stats["drops"] += 1
+                return True
+        return False
+
+    def should_fail_auth(self) -> bool:
+        """Geçerli kimlik bilgilerine rağmen auth hatası dönülsün mü"""
+
+        if self.auth_failure_rate <= 0:
+            return False
+
+        with self._lock:
+            if self._rng.random() < self.auth_failure_rate:
+                self.stats["auth_failures"] += 1
+                return True
+        return False
+
+    def reset(self):
+        """RNG ve sayaçları başa al"""
+
+        with self._lock:
+            self._rng = random.Random(self.seed)
+            self.stats = {
+                "latency_samples": 0,
+                "latency_total_ms": 0.0,
+                "injected_errors": {},
+                "drops": 0,
+                "auth_failures": 0
+            }
+
+    def get_stats(self) -> Dict:
+        """Sayaçların kopyası"""
+
+        with self._lock:
+            stats = dict(self.stats)
+            stats["injected_errors"] = {str(k): v for k, v in self.stats["injected_errors"].items()}
+        return stats
+
+    @staticmethod
+    def add_arguments(parser: argparse.ArgumentParser):
+        """Ortak CLI argümanları"""
+
+        parser.add_argument('--seed', type=int, default=None,
+                            help='RNG seed (deterministic runs)')
+        parser.add_argument('--latency', default='fixed:0',
+                            help="fixed:MS | uniform:MIN:MAX | exp:MEAN | lognormal:MEDIAN:SIGMA")
+        parser.add_argument('--errors', default='',
+                            help="Status code rates, e.g. 429=0.05,503=0.01")
+        parser.add_argument('--drop-rate', type=float, default=0.0,
+                            help='Probability of closing the connection without a reply')
+        parser.add_argument('--auth-failure-rate', type=float, default=0.0,
+                            help='Probability of rejecting valid credentials')
+
+    @classmethod
+    def from_args(cls, args: argparse.Namespace) -> 'FaultInjector':
+        return cls(
+            seed=args.seed,
+            latency=args.latency,
+            error_rates=cls.parse_error_rates(args.errors),
+            drop_rate=args.drop_rate,
+            auth_failure_rate=args.auth_failure_rate
+        )
@@ -0,0 +1,134 @@
+import sys
+import json
+import time
+import asyncio
+import logging
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+from tools.load_driver import percentile
+from tools.fault_injection import FaultInjector
+from tools.payload_generator import TallyPayloadGenerator
+
+
+def build_submissions(count: int, seed: Optional[int] = None) -> List[Tuple[Dict, str, Dict]]:
+    """(contact_info, category, extracted_data) - FormProcessor'dan geçmiş sentetik başvurular"""
+
+    from utils.form_processor import FormProcessor
+
+    processor = FormProcessor()
+    submissions = []
+    for payload in TallyPayloadGenerator(seed=seed).stream(count):
+        extracted = processor.extract_form_data(payload)
+        submissions.append((processor.get_contact_info(extracted), processor.determine_category(extracted), extracted))
+    return submissions
+
+
+def _summary(mode: str, results: List[Tuple[float, Dict]], elapsed: float, extra: Dict) -> Dict:
+    latencies = sorted(latency for latency, _ in results)
+    return {
+        "mode": mode,
+        "submissions": len(results),
+        "succeeded": sum(1 for _, result in results if result.get('success')),
+        "elapsed_seconds": round(elapsed, 2),
+        "throughput_per_second": round(len(results) / elapsed, 1) if elapsed else 0.0,
+        "latency_ms": {
+            "p50": round(percentile(latencies, 50) * 1000, 1),
+            "p95": round(percentile(latencies, 95) * 1000, 1),
+            "max": round(latencies[-1] * 1000, 1) if latencies else 0.0
+        },
+        **extra
+    }
+
+
+def run_async(base_url: str, submissions: List, concurrency: int, max_connections: int) -> Dict:
+    from services.async_hubspot_service import AsyncHubSpotService
+
+    async def main():
+        service = AsyncHubSpotService('benchmark', base_url, max_connections=max_connections)
+        gate = asyncio.Semaphore(concurrency)
+
+        async def one(submission):
+            async with gate:
+                started = time.perf_counter()
+                result = await service.save_contact(*submission)
+                return time.perf_counter() - started, result
+
+        started = time.perf_counter()
+        results = await asyncio.gather(*(one(s) for s in submissions))
+        elapsed = time.perf_counter() - started
+        stats = service.http.get_stats()
+        await service.aclose()
+        return results, elapsed, stats
+
+    results, elapsed, stats = asyncio.run(main())
+    return _summary("async", results, elapsed, {
+        "concurrency": concurrency,
+        "max_connections": max_connections,
+        "peak_in_flight": stats["peak_in_flight"],
+        "connections_opened": stats["connections_opened"],
+        "requests": stats["requests"]
+    })
+
+
+def run_threads(base_url: str, submissions: List, threads: int) -> Dict:
+    from services.hubspot_service import HubSpotService
+
+    service = HubSpotService('benchmark', base_url, pool_size=threads)
+
+    def one(submission):
+        started = time.perf_counter()
+        result = service.save_contact(*submission)
+        return time.perf_counter() - started, result
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        results = list(executor.map(one, submissions))
+    elapsed = time.perf_counter() - started
+    service.close()
+    return _summary("threads", results, elapsed, {"threads": threads})
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare AsyncHubSpotService with the threaded client')
+    parser.add_argument('--base-url', help='HubSpot (or simulator) base URL; default: in-process simulator')
+    parser.add_argument('--submissions', type=int, default=500)
+    parser.add_argument('--concurrency', type=int, default=300, help='Async: submissions in flight')
+    parser.add_argument('--max-connections', type=int, default=100, help='Async: keep-alive pool size')
+    parser.add_argument('--threads', type=int, default=16, help='Threaded baseline: worker threads')
+    parser.add_argument('--latency', default='fixed:50', help='In-process simulator latency (ms spec)')
+    parser.add_argument('--mode', choices=['both', 'async', 'threads'], default='both')
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+
+    simulator = None
+    base_url = args.base_url
+    if not base_url:
+        from tools.hubspot_simulator import HubSpotSimulator
+
+        simulator = HubSpotSimulator(('127.0.0.1', 0), FaultInjector(seed=args.seed, latency=args.latency))
+        simulator.start_in_thread()
+        base_url = simulator.base_url
+
+    submissions = build_submissions(args.submissions, args.seed)
+    reports = []
+    try:
+        if args.mode in ('both', 'threads'):
+            reports.append(run_threads(base_url, submissions, args.threads))
+            if simulator:
+                simulator.reset()
+        if args.mode in ('both', 'async'):
+            reports.append(run_async(base_url, submissions, args.concurrency, args.max_connections))
+    finally:
+        if simulator:
+            simulator.shutdown()
+            simulator.server_close()
+
+    sys.stdout.write(json.dumps(reports, indent=2) + '\n')
+
+
+if __name__ == '__main__':
+    main()
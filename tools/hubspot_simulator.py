@@ -0,0 +1,555 @@
+import re
+import json
+import time
+import logging
+import argparse
+import threading
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional
+
+from tools.fault_injection import FaultInjector
+
+logger = logging.getLogger(__name__)
+
+CONTACTS_PATH = '/crm/v3/objects/contacts'
+NOTES_PATH = '/crm/v3/objects/notes'
+PROPERTIES_PATH = '/crm/v3/properties/contacts'
+
+
+def _property(name: str, type_: str = 'string', field_type: str = 'text',
+              options: Optional[List[str]] = None, read_only: bool = False) -> Dict:
+    return {
+        "name": name,
+        "label": name.replace('_', ' ').title(),
+        "type": type_,
+        "fieldType": field_type,
+        "groupName": "contactinformation",
+        "options": [{"label": o.replace('_', ' ').title(), "value": o, "hidden": False} for o in options or []],
+        "calculated": False,
+        "modificationMetadata": {"readOnlyValue": read_only, "readOnlyDefinition": True, "archivable": False}
+    }
+
+
+# Uygulamanın yazdığı standart + portal'daki özel property'lerin tanımları
+CONTACT_PROPERTIES = [
+    _property('email'),
+    _property('firstname'),
+    _property('lastname'),
+    _property('phone', field_type='phonenumber'),
+    _property('company'),
+    _property('industry'),
+    _property('lifecyclestage', 'enumeration', 'radio', [
+        'subscriber', 'lead', 'marketingqualifiedlead', 'salesqualifiedlead',
+        'opportunity', 'customer', 'evangelist', 'other'
+    ]),
+    _property('hs_lead_status', 'enumeration', 'radio', [
+        'NEW', 'OPEN', 'IN_PROGRESS', 'OPEN_DEAL', 'UNQUALIFIED',
+        'ATTEMPTED_TO_CONTACT', 'CONNECTED', 'BAD_TIMING'
+    ]),
+    _property('notes_last_contacted', 'datetime', 'date', read_only=True),
+    _property('lastmodifieddate', 'datetime', 'date', read_only=True),
+    _property('createdate', 'datetime', 'date', read_only=True),
+    _property('hs_object_id', 'number', 'number', read_only=True),
+    _property('gpa', 'number', 'number'),
+    _property('budget', 'number', 'number'),
+    _property('education_level', 'string', 'textarea'),
+    _property('legal_service_type', 'string', 'textarea'),
+]
+
+
+def _now_iso() -> str:
+    return datetime.now(timezone.utc).isoformat(timespec='milliseconds').replace('+00:00', 'Z')
+
+
+def _to_epoch_ms(value) -> Optional[float]:
+    """ISO tarih ya da epoch ms değerini karşılaştırılabilir hale getir"""
+
+    if value is None or value == '':
+        return None
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        pass
+    try:
+        return datetime.fromisoformat(str(value).replace('Z', '+00:00')).timestamp() * 1000
+    except ValueError:
+        return None
+
+
+class HubSpotStore:
+    """Simülatörün bellek içi CRM verisi"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._next_id = 1000
+        self.contacts = {}      # id -> record
+        self.email_index = {}   # normalized email -> id
+        self.notes = {}         # id -> record
+        self.strict_properties = False  # True: CONTACT_PROPERTIES dışı/hatalı değerde 400
+
+    def _new_id(self) -> str:
+        self._next_id += 1
+        return str(self._next_id)
+
+    def _contact_view(self, record: Dict, properties: Optional[List[str]] = None) -> Dict:
+        props = record['properties']
+        if properties:
+            props = {k: props.get(k) for k in properties}
+        return {
+            "id": record['id'],
+            "properties": dict(props),
+            "createdAt": record['createdAt'],
+            "updatedAt": record['updatedAt'],
+            "archived": False
+        }
+
+    def validate_properties(self, properties: Dict) -> Optional[Dict]:
+        """HubSpot gibi tanımsız/salt okunur/tipe uymayan değerde 400 gövdesi döner"""
+
+        definitions = {p['name']: p for p in CONTACT_PROPERTIES}
+        problems = []
+        for name, value in properties.items():
+            definition = definitions.get(name)
+            if definition is None:
+                problems.append(f'Property "{name}" does not exist')
+            elif definition['modificationMetadata']['readOnlyValue']:
+                problems.append(f'"{name}" is a read only property; its value cannot be set.')
+            elif definition['type'] == 'number':
+                try:
+                    float(value)
+                except (TypeError, ValueError):
+                    problems.append(f'{value!r} was not a valid number for "{name}"')
+            elif definition['type'] == 'enumeration':
+                allowed = {o['value'] for o in definition['options']}
+                if any(v not in allowed for v in str(value).split(';')):
+                    problems.append(f'{value!r} was not one of the allowed options for "{name}"')
+
+        if not problems:
+            return None
+        return {
+            "status": "error",
+            "message": "Property values were not valid: " + "; ".join(problems),
+            "category": "VALIDATION_ERROR"
+        }
+
+    def create_contact(self, properties: Dict) -> tuple:
+        """(status, body) döner - email çakışmasında 409"""
+
+        error = self.validate_properties(properties) if self.strict_properties else None
+        if error:
+            return 400, error
+
+        email = str(properties.get('email', '')).strip().lower()
+        with self._lock:
+            if email and email in self.email_index:
+                existing = self.email_index[email]
+                return 409, {
+                    "status": "error",
+                    "message": f"Contact already exists. Existing ID: {existing}",
+                    "category": "CONFLICT"
+                }
+
+            contact_id = self._new_id()
+            now = _now_iso()
+            props = {k: (str(v) if v is not None else None) for k, v in properties.items()}
+            props.update({"hs_object_id": contact_id, "createdate": now, "lastmodifieddate": now})
+            record = {"id": contact_id, "properties": props, "createdAt": now, "updatedAt": now}
+            self.contacts[contact_id] = record
+            if email:
+                self.email_index[email] = contact_id
+
+            return 201, self._contact_view(record)
+
+    def update_contact(self, contact_id: str, properties: Dict) -> tuple:
+        error = self.validate_properties(properties) if self.strict_properties else None
+        if error:
+            return 400, error
+
+        with self._lock:
+            record = self.contacts.get(contact_id)
+            if not record:
+                return 404, {"status": "error", "message": "Object not found", "category": "OBJECT_NOT_FOUND"}
+
+            new_email = str(properties.get('email', '')).strip().lower()
+            if new_email and self.email_index.get(new_email, contact_id) != contact_id:
+                return 409, {"status": "error", "message": "Email already in use", "category": "CONFLICT"}
+
+            old_email = str(record['properties'].get('email') or '').strip().lower()
+            now = _now_iso()
+            record['properties'].update({k: (str(v) if v is not None else None) for k, v in properties.items()})
+            record['properties']['lastmodifieddate'] = now
+            record['updatedAt'] = now
+
+            if new_email and new_email != old_email:
+                self.email_index.pop(old_email, None)
+                self.email_index[new_email] = contact_id
+
+            return 200, self._contact_view(record)
+
+    def get_contact(self, contact_id: str, id_property: str = None,
+                    properties: Optional[List[str]] = None) -> tuple:
+        with self._lock:
+            if id_property == 'email':
+                contact_id = self.email_index.get(contact_id.strip().lower(), '')
+            record = self.contacts.get(contact_id)
+            if not record:
+                return 404, {"status": "error", "message": "Object not found", "category": "OBJECT_NOT_FOUND"}
+            return 200, self._contact_view(record, properties)
+
+    def list_contacts(self, limit: int, after: int) -> Dict:
+        with self._lock:
+            ordered = sorted(self.contacts.values(), key=lambda r: int(r['id']))
+            page = ordered[after:after + limit]
+            result = {"results": [self._contact_view(r) for r in page]}
+            if after + limit < len(ordered):
+                result["paging"] = {"next": {"after": str(after + limit)}}
+            return result
+
+    def search_contacts(self, body: Dict) -> Dict:
+        """filterGroups (OR) / filters (AND), sorts, limit, after"""
+
+        groups = body.get('filterGroups') or []
+        limit = min(int(body.get('limit', 10) or 10), 100)
+        after = int(body.get('after', 0) or 0)
+        properties = body.get('properties')
+
+        with self._lock:
+            matches = [r for r in self.contacts.values() if self._matches(r, groups)]
+
+            for sort in reversed(body.get('sorts') or []):
+                if isinstance(sort, str):
+                    name, descending = sort.lstrip('-'), sort.startswith('-')
+                else:
+                    name = sort.get('propertyName', '')
+                    descending = sort.get('direction', 'ASCENDING') == 'DESCENDING'
+                matches.sort(key=lambda r: _to_epoch_ms(r['properties'].get(name))
+                             if name.endswith('date') else str(r['properties'].get(name) or ''),
+                             reverse=descending)
+
+            page = matches[after:after + limit]
+            result = {"total": len(matches), "results": [self._contact_view(r, properties) for r in page]}
+            if after + limit < len(matches):
+                result["paging"] = {"next": {"after": str(after + limit)}}
+            return result
+
+    def _matches(self, record: Dict, groups: List[Dict]) -> bool:
+        if not groups:
+            return True
+        return any(all(self._filter_matches(record, f) for f in g.get('filters', [])) for g in groups)
+
+    @staticmethod
+    def _filter_matches(record: Dict, flt: Dict) -> bool:
+        name = flt.get('propertyName', '')
+        op = flt.get('operator', 'EQ')
+        actual = record['properties'].get(name)
+        expected = flt.get('value')
+
+        if op == 'HAS_PROPERTY':
+            return actual not in (None, '')
+        if op == 'NOT_HAS_PROPERTY':
+            return actual in (None, '')
+        if op in ('EQ', 'NEQ'):
+            equal = str(actual or '').lower() == str(expected or '').lower()
+            return equal if op == 'EQ' else not equal
+
+        left, right = _to_epoch_ms(actual), _to_epoch_ms(expected)
+        if left is None or right is None:
+            return False
+        return {
+            'GT': left > right, 'GTE': left >= right,
+            'LT': left < right, 'LTE': left <= right
+        }.get(op, False)
+
+    def create_note(self, body: Dict) -> tuple:
+        with self._lock:
+            note_id = self._new_id()
+            now = _now_iso()
+            record = {
+                "id": note_id,
+                "properties": dict(body.get('properties') or {}),
+                "associations": body.get('associations') or [],
+                "createdAt": now,
+                "updatedAt": now
+            }
+            self.notes[note_id] = record
+            return 201, {"id": note_id, "properties": record['properties'],
+                         "createdAt": now, "updatedAt": now, "archived": False}
+
+    def reset(self):
+        with self._lock:
+            self.contacts.clear()
+            self.email_index.clear()
+            self.notes.clear()
+
+    def counts(self) -> Dict:
+        with self._lock:
+            return {"contacts": len(self.contacts), "notes": len(self.notes)}
+
+
+class HubSpotSimulatorHandler(BaseHTTPRequestHandler):
+    """HubSpot CRM v3 endpoint'lerinin yerel taklidi"""
+
+    protocol_version = 'HTTP/1.1'  # Keep-alive - pooling ölçümleri için
+
+    _contact_id_re = re.compile(r'^/crm/v3/objects/contacts/([^/]+)$')
+    _batch_re = re.compile(r'^/crm/v3/objects/(contacts|notes)/batch/(create|update|read|upsert)$')
+
+    def log_message(self, format, *args):
+        logger.debug("%s - %s", self.address_string(), format % args)
+
+    # --- Yardımcılar ---
+
+    def _read_json(self) -> Dict:
+        length = int(self.headers.get('Content-Length') or 0)
+        raw = self.rfile.read(length) if length else b''
+        if not raw:
+            return {}
+        try:
+            return json.loads(raw)
+        except ValueError:
+            return {}
+
+    def _send_json(self, status: int, body: Dict, headers: Optional[Dict] = None):
+        payload = json.dumps(body).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json;charset=utf-8')
+        self.send_header('Content-Length', str(len(payload)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def _error(self, status: int):
+        category = {
+            401: "INVALID_AUTHENTICATION",
+            409: "CONFLICT",
+            429: "RATE_LIMITS"
+        }.get(status, "INTERNAL_ERROR" if status >= 500 else "VALIDATION_ERROR")
+
+        headers = {"Retry-After": "1"} if status == 429 else None
+        self._send_json(status, {
+            "status": "error",
+            "message": f"Simulated error {status}",
+            "category": category,
+            "correlationId": f"sim-{int(time.time() * 1000)}"
+        }, headers)
+
+    def _pre_dispatch(self) -> bool:
+        """Gecikme/drop/auth/hata enjeksiyonu - False ise istek sonlandı"""
+
+        server = self.server
+        server.count_request()
+
+        # Body'yi her durumda tüket (keep-alive bağlantı bozulmasın)
+        self._body = self._read_json() if self.command in ('POST', 'PATCH', 'PUT') else {}
+
+        if self.path.startswith('/__sim/'):
+            return True
+
+        injector = server.injector
+        delay = injector.latency_seconds()
+        if delay:
+            time.sleep(delay)
+
+        if injector.should_drop():
+            self.close_connection = True
+            return False
+
+        if not self.path.startswith('/oauth/'):
+            token = (self.headers.get('Authorization') or '').replace('Bearer ', '', 1)
+            if (server.api_key and token != server.api_key) or injector.should_fail_auth():
+                self._error(401)
+                return False
+
+        code = injector.pick_error()
+        if code:
+            self._error(code)
+            return False
+
+        return True
+
+    # --- HTTP metodları ---
+
+    def do_GET(self):
+        if not self._pre_dispatch():
+            return
+
+        store = self.server.store
+        path, _, query = self.path.partition('?')
+        params = dict(p.split('=', 1) for p in query.split('&') if '=' in p)
+
+        if path == '/__sim/stats':
+            return self._send_json(200, self.server.get_stats())
+
+        if path.startswith('/oauth/v1/access-tokens/'):
+            token = path.rsplit('/', 1)[-1]
+            if self.server.api_key and token != self.server.api_key:
+                return self._error(401)
+            return self._send_json(200, {"token": token, "hub_id": 1, "expires_in": 1800})
+
+        if path == PROPERTIES_PATH:
+            return self._send_json(200, {"results": CONTACT_PROPERTIES})
+
+        if path == CONTACTS_PATH:
+            limit = min(int(params.get('limit', 10)), 100)
+            return self._send_json(200, store.list_contacts(limit, int(params.get('after', 0))))
+
+        match = self._contact_id_re.match(path)
+        if match:
+            properties = params.get('properties', '').split(',') if params.get('properties') else None
+            status, body = store.get_contact(match.group(1), params.get('idProperty'), properties)
+            return self._send_json(status, body)
+
+        self._send_json(404, {"status": "error", "message": f"Unknown path {path}"})
+
+    def do_POST(self):
+        if not self._pre_dispatch():
+            return
+
+        store = self.server.store
+        body = self._body
+        path = self.path.partition('?')[0]
+
+        if path == '/__sim/reset':
+            self.server.reset()
+            return self._send_json(200, {"reset": True})
+
+        if path == CONTACTS_PATH:
+            status, result = store.create_contact(body.get('properties') or {})
+            return self._send_json(status, result)
+
+        if path == CONTACTS_PATH + '/search':
+            return self._send_json(200, store.search_contacts(body))
+
+        if path == NOTES_PATH:
+            status, result = store.create_note(body)
+            return self._send_json(status, result)
+
+        match = self._batch_re.match(path)
+        if match:
+            return self._send_json(200, self._handle_batch(match.group(1), match.group(2), body))
+
+        self._send_json(404, {"status": "error", "message": f"Unknown path {path}"})
+
+    def do_PATCH(self):
+        if not self._pre_dispatch():
+            return
+
+        match = self._contact_id_re.match(self.path.partition('?')[0])
+        if not match:
+            return self._send_json(404, {"status": "error", "message": "Unknown path"})
+
+        status, result = self.server.store.update_contact(match.group(1), self._body.get('properties') or {})
+        self._send_json(status, result)
+
+    def _handle_batch(self, object_type: str, action: str, body: Dict) -> Dict:
+        """Batch endpoint'leri - hatalar 'errors' listesinde döner"""
+
+        store = self.server.store
+        started = _now_iso()
+        results, errors = [], []
+
+        for item in body.get('inputs') or []:
+            if object_type == 'notes':
+                status, result = store.create_note(item)
+            elif action == 'create':
+                status, result = store.create_contact(item.get('properties') or {})
+            elif action == 'update':
+                status, result = store.update_contact(str(item.get('id')), item.get('properties') or {})
+            elif action == 'read':
+                status, result = store.get_contact(str(item.get('id')), body.get('idProperty'),
+                                                   body.get('properties'))
+            else:
+                # upsert: idProperty=email
+                props = dict(item.get('properties') or {})
+                props.setdefault('email', item.get('id'))
+                status, result = store.create_contact(props)
+                if status == 409:
+                    existing = store.email_index.get(str(props['email']).strip().lower())
+                    status, result = store.update_contact(existing, props)
+
+            if status < 300:
+                results.append(result)
+            else:
+                errors.append({"status": "error", "category": result.get('category'),
+                               "message": result.get('message'), "context": {"id": [str(item.get('id', ''))]}})
+
+        response = {"status": "COMPLETE", "results": results, "startedAt": started, "completedAt": _now_iso()}
+        if errors:
+            response["errors"] = errors
+            response["numErrors"] = len(errors)
+        return response
+
+
+class HubSpotSimulator(ThreadingHTTPServer):
+    """Fault injection destekli HubSpot HTTP simülatörü"""
+
+    daemon_threads = True
+    request_queue_size = 256  # Yüzlerce eşzamanlı bağlantı açan async benchmark için
+
+    def __init__(self, address: tuple, injector: Optional[FaultInjector] = None, api_key: str = '',
+                 strict_properties: bool = False):
+        super().__init__(address, HubSpotSimulatorHandler)
+        self.injector = injector or FaultInjector()
+        self.api_key = api_key
+        self.store = HubSpotStore()
+        self.store.strict_properties = strict_properties
+        self._requests = 0
+        self._counter_lock = threading.Lock()
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def count_request(self):
+        with self._counter_lock:
+            self._requests += 1
+
+    def get_stats(self) -> Dict:
+        with self._counter_lock:
+            requests_total = self._requests
+        return {"requests": requests_total, **self.store.counts(), "faults": self.injector.get_stats()}
+
+    def reset(self):
+        self.store.reset()
+        self.injector.reset()
+        with self._counter_lock:
+            self._requests = 0
+
+    def start_in_thread(self) -> threading.Thread:
+        """Benchmark/test harness'ları için arka planda çalıştır"""
+
+        thread = threading.Thread(target=self.serve_forever, name='hubspot-simulator', daemon=True)
+        thread.start()
+        return thread
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Local HubSpot CRM simulator')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8090)
+    parser.add_argument('--api-key', default='', help='Required bearer token (empty accepts any)')
+    parser.add_argument('--strict-properties', action='store_true',
+                        help='Reject unknown, read-only or mistyped contact properties with 400 like HubSpot')
+    FaultInjector.add_arguments(parser)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+
+    server = HubSpotSimulator((args.host, args.port), FaultInjector.from_args(args), args.api_key,
+                              strict_properties=args.strict_properties)
+    logger.info("HubSpot simulator listening on %s (latency=%s, errors=%s)", server.base_url, args.latency, args.errors or 'none')
+    logger.info("Point the app at it with HUBSPOT_API_BASE=%s", server.base_url)
+
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,90 @@
+import sys
+import json
+import time
+import argparse
+from typing import Callable, Dict, List
+
+from tools.payload_generator import TallyPayloadGenerator
+from utils import json_codec
+
+
+def _per_call_us(func: Callable, iterations: int) -> float:
+    started = time.perf_counter()
+    for _ in range(iterations):
+        func()
+    return round((time.perf_counter() - started) / iterations * 1e6, 2)
+
+
+def _payloads(count: int, notes_kb: int, seed: int) -> List[bytes]:
+    """Gerçekçi Tally payload'ları - notes_kb > 0 ise notlar o boyuta şişirilir"""
+
+    generator = TallyPayloadGenerator(seed=seed)
+    payloads = []
+    for payload in generator.stream(count):
+        if notes_kb:
+            payload['data']['fields'].append({
+                'key': 'question_notes', 'label': 'Notlarınız', 'type': 'TEXTAREA',
+                'value': ('İngiltere başvurusu hakkında bilgi almak istiyorum. ' * (notes_kb * 20))[:notes_kb * 1024]
+            })
+        payloads.append(json.dumps(payload, ensure_ascii=False).encode('utf-8'))
+    return payloads
+
+
+def _flask_roundtrip(app, raw: bytes) -> Callable:
+    from flask import jsonify, request
+
+    def run():
+        with app.test_request_context('/tally', method='POST', data=raw, content_type='application/json'):
+            data = request.get_json(force=True)
+            jsonify({"success": True, "submission_id": data['data'].get('responseId'), "fields": len(data['data']['fields'])})
+    return run
+
+
+def run_size(label: str, payloads: List[bytes], iterations: int) -> Dict:
+    from flask import Flask
+
+    decoded = [json.loads(raw) for raw in payloads]
+    stdlib_app = Flask('stdlib')
+    codec_app = Flask('codec')
+    json_codec.install(codec_app)
+
+    def each(func):
+        def run():
+            for item in items:
+                func(item)
+        return run
+
+    report = {"size": label, "payload_bytes": round(sum(map(len, payloads)) / len(payloads)), "backends": {}}
+    for backend, decode, encode, app in (
+        ('json', json.loads, lambda v: json.dumps(v, ensure_ascii=False).encode('utf-8'), stdlib_app),
+        (f'codec:{json_codec.BACKEND}', json_codec.loads, json_codec.dumps, codec_app),
+    ):
+        items = payloads
+        decode_us = _per_call_us(each(decode), iterations) / len(payloads)
+        items = decoded
+        encode_us = _per_call_us(each(encode), iterations) / len(payloads)
+        flask_us = _per_call_us(_flask_roundtrip(app, payloads[0]), iterations)
+        report["backends"][backend] = {"decode_us": round(decode_us, 2), "encode_us": round(encode_us, 2),
+                                       "flask_roundtrip_us": flask_us}
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare stdlib json and the json_codec layer on Tally payloads')
+    parser.add_argument('--payloads', type=int, default=50, help='Distinct payloads per size')
+    parser.add_argument('--iterations', type=int, default=200)
+    parser.add_argument('--notes-kb', default='0,4,32', help='Comma separated notes sizes (0 = as generated)')
+    parser.add_argument('--seed', type=int, default=7)
+    args = parser.parse_args()
+
+    reports = []
+    for size in args.notes_kb.split(','):
+        kb = int(size)
+        reports.append(run_size('typical' if kb == 0 else f'notes_{kb}kb',
+                                _payloads(args.payloads, kb, args.seed), args.iterations))
+
+    sys.stdout.write(json.dumps(reports, indent=2) + '\n')
+
+
+if __name__ == '__main__':
+    main()
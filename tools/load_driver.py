@@ -0,0 +1,265 @@
+import json
+import math
+import time
+import queue
+import random
+import argparse
+import threading
+import http.client
+from urllib.parse import urlsplit
+from typing import Dict, Iterable, List, Optional
+
+from tools.payload_generator import TallyPayloadGenerator
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    """Nearest-rank percentile (liste sıralı olmalı)"""
+
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(pct / 100.0 * len(sorted_values)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+class LoadReport:
+    """Yük testi sonuçları - latency'ler saniye cinsinden tutulur"""
+
+    PERCENTILES = (50, 90, 95, 99, 99.9)
+
+    def __init__(self, target_rps: float, duration: float):
+        self.target_rps = target_rps
+        self.duration = duration
+        self.samples = []   # (intended, started, finished, status, app_success, error)
+        self.elapsed = 0.0
+
+    def add(self, intended: float, started: float, finished: float, status: int,
+            app_success: Optional[bool], error: Optional[str]):
+        self.samples.append((intended, started, finished, status, app_success, error))
+
+    def _latency_summary(self, values: List[float]) -> Dict:
+        values = sorted(values)
+        summary = {f"p{p:g}": round(percentile(values, p) * 1000, 2) for p in self.PERCENTILES}
+        summary["max"] = round(values[-1] * 1000, 2) if values else 0.0
+        summary["mean"] = round(sum(values) / len(values) * 1000, 2) if values else 0.0
+        return summary
+
+    def to_dict(self) -> Dict:
+        total = len(self.samples)
+        statuses = {}
+        transport_errors = {}
+        app_failures = 0
+
+        for _, _, _, status, app_success, error in self.samples:
+            if error:
+                transport_errors[error] = transport_errors.get(error, 0) + 1
+            else:
+                statuses[str(status)] = statuses.get(str(status), 0) + 1
+                if app_success is False:
+                    app_failures += 1
+
+        failed = sum(transport_errors.values()) + sum(c for s, c in statuses.items() if not s.startswith('2'))
+        late = sum(1 for intended, started, *_ in self.samples if started - intended > 0.010)
+
+        return {
+            "requests": total,
+            "target_rps": self.target_rps,
+            "achieved_rps": round(total / self.elapsed, 2) if self.elapsed else 0.0,
+            "elapsed_s": round(self.elapsed, 2),
+            "status_codes": statuses,
+            "transport_errors": transport_errors,
+            "error_rate": round(failed / total, 4) if total else 0.0,
+            "app_failure_rate": round(app_failures / total, 4) if total else 0.0,
+            "late_dispatch": late,
+            # Coordinated omission düzeltilmiş: planlanan gönderim anından itibaren
+            "latency_ms_corrected": self._latency_summary([f - i for i, _, f, *_ in self.samples]),
+            # Klasik ölçüm: isteğin gerçekten başladığı andan itibaren
+            "latency_ms_service": self._latency_summary([f - s for _, s, f, *_ in self.samples])
+        }
+
+    def format_text(self) -> str:
+        data = self.to_dict()
+        lines = [
+            f"Requests: {data['requests']}  target {data['target_rps']} rps  achieved {data['achieved_rps']} rps  "
+            f"elapsed {data['elapsed_s']}s",
+            f"Status codes: {data['status_codes']}  transport errors: {data['transport_errors'] or 'none'}",
+            f"Error rate: {data['error_rate']:.2%}  app failures (success=false): {data['app_failure_rate']:.2%}  "
+            f"late dispatches: {data['late_dispatch']}",
+            "Latency (ms)      " + "  ".join(f"{k:>8}" for k in data['latency_ms_corrected']),
+            "  corrected       " + "  ".join(f"{v:>8}" for v in data['latency_ms_corrected'].values()),
+            "  service         " + "  ".join(f"{v:>8}" for v in data['latency_ms_service'].values())
+        ]
+        return '\n'.join(lines)
+
+
+class OpenLoopLoadDriver:
+    """Sabit hedef RPS ile /tally'ye açık döngü yük üreten sürücü
+
+    Gönderim zamanları yanıtları beklemeden planlanır; latency planlanan
+    andan ölçüldüğü için sunucu yavaşladığında bekleme süresi de sonuca
+    yansır (coordinated omission düzeltmesi).
+    """
+
+    def __init__(self, url: str, rps: float, duration: float, workers: int = 64,
+                 arrival: str = 'uniform', seed: Optional[int] = None, timeout: float = 330.0,
+                 headers: Optional[Dict[str, str]] = None):
+        if rps <= 0 or duration <= 0:
+            raise ValueError("rps and duration must be positive")
+
+        self.url = urlsplit(url)
+        self.rps = rps
+        self.duration = duration
+        self.workers = workers
+        self.arrival = arrival
+        self.timeout = timeout
+        self.headers = {"Content-Type": "application/json", **(headers or {})}
+        self._rng = random.Random(seed)
+        self._local = threading.local()
+
+    def _schedule(self) -> List[float]:
+        """Planlanan gönderim offset'leri (saniye)"""
+
+        offsets = []
+        t = 0.0
+        while True:
+            if self.arrival == 'poisson':
+                t += self._rng.expovariate(self.rps)
+            else:
+                t = len(offsets) / self.rps
+            if t >= self.duration:
+                return offsets
+            offsets.append(t)
+
+    def _connection(self) -> http.client.HTTPConnection:
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            cls = http.client.HTTPSConnection if self.url.scheme == 'https' else http.client.HTTPConnection
+            conn = cls(self.url.hostname, self.url.port, timeout=self.timeout)
+            self._local.conn = conn
+        return conn
+
+    def _send(self, body: bytes) -> tuple:
+        """(status, app_success, error) döner - bağlantı hatasında yeniden bağlanır"""
+
+        path = self.url.path or '/'
+        if self.url.query:
+            path += '?' + self.url.query
+
+        try:
+            conn = self._connection()
+            conn.request('POST', path, body=body, headers=self.headers)
+            response = conn.getresponse()
+            raw = response.read()
+            app_success = None
+            try:
+                parsed = json.loads(raw)
+                if isinstance(parsed, dict) and 'success' in parsed:
+                    app_success = bool(parsed['success'])
+            except ValueError:
+                pass
+            return response.status, app_success, None
+
+        except Exception as e:
+            conn = getattr(self._local, 'conn', None)
+            if conn is not None:
+                conn.close()
+            self._local.conn = None
+            return 0, None, type(e).__name__
+
+    def run(self, payloads: Iterable[Dict]) -> LoadReport:
+        offsets = self._schedule()
+        source = iter(payloads)
+        # Payload'lar önceden encode edilir - dispatch yolunda CPU harcanmasın
+        bodies = []
+        for _ in offsets:
+            try:
+                bodies.append(json.dumps(next(source), ensure_ascii=False).encode('utf-8'))
+            except StopIteration:
+                break
+
+        report = LoadReport(self.rps, self.duration)
+        jobs = queue.Queue()
+        lock = threading.Lock()
+
+        def worker():
+            while True:
+                job = jobs.get()
+                if job is None:
+                    return
+                intended, body = job
+                started = time.perf_counter()
+                status, app_success, error = self._send(body)
+                finished = time.perf_counter()
+                with lock:
+                    report.add(intended, started, finished, status, app_success, error)
+
+        threads = [threading.Thread(target=worker, daemon=True) for _ in range(self.workers)]
+        for thread in threads:
+            thread.start()
+
+        start = time.perf_counter()
+        for offset, body in zip(offsets, bodies):
+            intended = start + offset
+            delay = intended - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            jobs.put((intended, body))
+
+        for _ in threads:
+            jobs.put(None)
+        for thread in threads:
+            thread.join()
+
+        report.elapsed = time.perf_counter() - start
+        return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Open-loop load driver for the /tally webhook')
+    parser.add_argument('--url', default='http://127.0.0.1:8080/tally')
+    parser.add_argument('--rps', type=float, default=10.0)
+    parser.add_argument('--duration', type=float, default=30.0, help='Seconds')
+    parser.add_argument('--workers', type=int, default=64, help='Max concurrent in-flight requests')
+    parser.add_argument('--arrival', choices=['uniform', 'poisson'], default='uniform')
+    parser.add_argument('--payloads', help='JSONL file of payloads (default: synthetic generator)')
+    parser.add_argument('--seed', type=int, default=None)
+    parser.add_argument('--mix', default='education=0.45,legal=0.35,business=0.20')
+    parser.add_argument('--duplicate-rate', type=float, default=0.0)
+    parser.add_argument('--returning-rate', type=float, default=0.0)
+    parser.add_argument('--retry-storm-rate', type=float, default=0.0)
+    parser.add_argument('--retry-storm-size', type=int, default=5)
+    parser.add_argument('--header', action='append', default=[], help='Extra header as Name:Value')
+    parser.add_argument('--json-out', help='Write the full report as JSON')
+    args = parser.parse_args()
+
+    if args.payloads:
+        def file_payloads():
+            while True:
+                with open(args.payloads, encoding='utf-8') as f:
+                    for line in f:
+                        if line.strip():
+                            yield json.loads(line)
+        payloads = file_payloads()
+    else:
+        generator = TallyPayloadGenerator(
+            seed=args.seed,
+            category_mix=TallyPayloadGenerator.parse_mix(args.mix),
+            duplicate_rate=args.duplicate_rate,
+            returning_rate=args.returning_rate,
+            retry_storm_rate=args.retry_storm_rate,
+            retry_storm_size=args.retry_storm_size
+        )
+        payloads = generator.stream(int(args.rps * args.duration) + 1)
+
+    headers = dict(h.split(':', 1) for h in args.header)
+    driver = OpenLoopLoadDriver(args.url, args.rps, args.duration, args.workers,
+                                args.arrival, args.seed, headers={k.strip(): v.strip() for k, v in headers.items()})
+    report = driver.run(payloads)
+
+    print(report.format_text())
+    if args.json_out:
+        with open(args.json_out, 'w', encoding='utf-8') as f:
+            json.dump(report.to_dict(), f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
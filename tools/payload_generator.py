@@ -0,0 +1,230 @@
+import json
+import uuid
+import zlib
+import random
+import argparse
+from datetime import datetime, timezone
+from typing import Dict, Iterator, List, Optional
+
+from utils.form_processor import FormProcessor
+
+FIRST_NAMES = ['Ayşe', 'Mehmet', 'Elif', 'Can', 'Zeynep', 'Emre', 'Selin', 'Burak', 'Deniz', 'Ozan',
+               'Ece', 'Mert', 'İrem', 'Kerem', 'Şule', 'Oğuz', 'Gökhan', 'Yasemin', 'Barış', 'Nazlı']
+LAST_NAMES = ['Yılmaz', 'Kaya', 'Demir', 'Şahin', 'Çelik', 'Yıldız', 'Öztürk', 'Aydın', 'Arslan', 'Doğan',
+              'Kılıç', 'Aslan', 'Çetin', 'Koç', 'Kurt', 'Özdemir', 'Polat', 'Erdoğan', 'Güneş', 'Tekin']
+EMAIL_DOMAINS = ['gmail.com', 'hotmail.com', 'outlook.com', 'yahoo.com', 'icloud.com', 'yandex.com']
+COMPANY_SUFFIXES = ['Ltd. Şti.', 'A.Ş.', 'Tekstil', 'Gıda', 'Ticaret', 'Dış Ticaret']
+NOTE_SNIPPETS = [
+    'En kısa sürede dönüş yapabilir misiniz?',
+    'Eylül dönemi için başvurmak istiyorum.',
+    'Daha önce vize başvurum reddedildi, destek almak istiyorum.',
+    'Ürünlerimizi İngiltere pazarına açmak istiyoruz.',
+    'Bütçe konusunda esneğiz, burs imkanlarını da öğrenmek isterim.',
+    'Hafta içi 18:00 sonrası aranmayı tercih ederim.',
+    ''
+]
+
+
+class TallyPayloadGenerator:
+    """FormProcessor field mapping'lerinden gerçekçi Tally webhook payload'ları üret"""
+
+    DEFAULT_MIX = {'education': 0.45, 'legal': 0.35, 'business': 0.20}
+
+    def __init__(self, seed: Optional[int] = None, category_mix: Optional[Dict[str, float]] = None,
+                 duplicate_rate: float = 0.0, returning_rate: float = 0.0,
+                 retry_storm_rate: float = 0.0, retry_storm_size: int = 5,
+                 form_id: str = 'wMdEo1'):
+        self.rng = random.Random(seed)
+        self.mappings = FormProcessor().field_mappings
+        self.category_mix = self._normalize_mix(category_mix or self.DEFAULT_MIX)
+        self.duplicate_rate = duplicate_rate
+        self.returning_rate = returning_rate
+        self.retry_storm_rate = retry_storm_rate
+        self.retry_storm_size = retry_storm_size
+        self.form_id = form_id
+
+        self._recent = []     # Duplicate/retry için son payload'lar
+        self._contacts = []   # Geri dönen lead'ler için iletişim bilgileri
+
+    @staticmethod
+    def _normalize_mix(mix: Dict[str, float]) -> Dict[str, float]:
+        unknown = set(mix) - {'education', 'legal', 'business'}
+        if unknown:
+            raise ValueError(f"Unknown categories in mix: {sorted(unknown)}")
+        total = sum(mix.values())
+        if total <= 0:
+            raise ValueError("Category mix must have a positive weight")
+        return {k: v / total for k, v in mix.items()}
+
+    @staticmethod
+    def parse_mix(spec: str) -> Dict[str, float]:
+        """'education=0.5,legal=0.3,business=0.2'"""
+        return {k.strip(): float(v) for k, v in (item.split('=', 1) for item in spec.split(',') if item.strip())}
+
+    # --- Alan üreticileri ---
+
+    def _field(self, label: str, value, field_type: str = 'INPUT_TEXT') -> Dict:
+        return {
+            "key": f"question_{zlib.crc32(label.encode('utf-8')) % 10 ** 6:06d}",
+            "label": label,
+            "type": field_type,
+            "value": value
+        }
+
+    def _checkboxes(self, options: Dict[str, str], selected: List[str]) -> List[Dict]:
+        return [self._field(label, key in selected, 'CHECKBOXES') for key, label in options.items()]
+
+    def _pick_category(self) -> str:
+        roll = self.rng.random()
+        cumulative = 0.0
+        for category, weight in self.category_mix.items():
+            cumulative += weight
+            if roll < cumulative:
+                return category
+        return list(self.category_mix)[-1]
+
+    def _new_contact(self) -> Dict:
+        first = self.rng.choice(FIRST_NAMES)
+        last = self.rng.choice(LAST_NAMES)
+        ascii_name = f"{first}.{last}".translate(str.maketrans('çğıöşüÇĞİÖŞÜ', 'cgiosuCGIOSU')).lower()
+        return {
+            "name": f"{first} {last}",
+            "email": f"{ascii_name}{self.rng.randint(1, 9999)}@{self.rng.choice(EMAIL_DOMAINS)}",
+            "phone": f"+90 5{self.rng.randint(30, 59)} {self.rng.randint(100, 999)} {self.rng.randint(10, 99)} {self.rng.randint(10, 99)}"
+        }
+
+    def _category_fields(self, category: str) -> List[Dict]:
+        rng = self.rng
+        mappings = self.mappings
+        fields = [
+            self._field(mappings['business_fields'][0], category == 'business', 'CHECKBOXES'),
+            self._field(mappings['education_fields'][0], category == 'education', 'CHECKBOXES'),
+            self._field(mappings['legal_fields'][0], category == 'legal', 'CHECKBOXES')
+        ]
+
+        if category == 'education':
+            levels = list(mappings['education_levels'])
+            selected = rng.sample(levels, rng.randint(1, 2))
+            fields += self._checkboxes(mappings['education_levels'], selected)
+            fields.append(self._field('Not Ortalamanız', f"{rng.uniform(2.0, 4.0):.2f}"))
+            fields.append(self._field('Eğitim ve Konaklama için Düşündüğünüz Bütçe Nedir? (£)',
+                                      f"{rng.choice([15, 20, 25, 30, 40, 50]) * 1000:,}", 'INPUT_NUMBER'))
+
+        elif category == 'legal':
+            services = list(mappings['legal_services'])
+            selected = rng.sample(services, rng.randint(1, 2))
+            fields += self._checkboxes(mappings['legal_services'], selected)
+
+        else:
+            sectors = list(mappings['business_sectors'])
+            selected = rng.sample(sectors, rng.randint(1, 4))
+            fields += self._checkboxes(mappings['business_sectors'], selected)
+            fields.append(self._field('Şirketinizin Adı',
+                                      f"{rng.choice(LAST_NAMES)} {rng.choice(COMPANY_SUFFIXES)}"))
+
+        return fields
+
+    def _build_payload(self, category: str, contact: Dict) -> Dict:
+        created = datetime.now(timezone.utc).isoformat(timespec='milliseconds').replace('+00:00', 'Z')
+        response_id = uuid.UUID(int=self.rng.getrandbits(128)).hex[:8]
+
+        fields = [
+            self._field(self.mappings['name_fields'][0], contact['name']),
+            self._field(self.mappings['email_fields'][0], contact['email'], 'INPUT_EMAIL'),
+            self._field(self.mappings['phone_fields'][0], contact['phone'], 'INPUT_PHONE_NUMBER')
+        ]
+        fields += self._category_fields(category)
+
+        note = self.rng.choice(NOTE_SNIPPETS)
+        if note:
+            fields.append(self._field(self.mappings['notes_fields'][0], note, 'TEXTAREA'))
+
+        return {
+            "eventId": str(uuid.UUID(int=self.rng.getrandbits(128))),
+            "eventType": "FORM_RESPONSE",
+            "createdAt": created,
+            "data": {
+                "responseId": response_id,
+                "submissionId": response_id,
+                "respondentId": uuid.UUID(int=self.rng.getrandbits(128)).hex[:6],
+                "formId": self.form_id,
+                "formName": "British Global Danışmanlık Başvurusu",
+                "createdAt": created,
+                "fields": fields
+            }
+        }
+
+    # --- Public API ---
+
+    def generate(self) -> Dict:
+        """Yeni (ya da duplicate/geri dönen) tek payload"""
+
+        if self._recent and self.rng.random() < self.duplicate_rate:
+            return self.rng.choice(self._recent)
+
+        if self._contacts and self.rng.random() < self.returning_rate:
+            contact = self.rng.choice(self._contacts)
+        else:
+            contact = self._new_contact()
+            self._contacts.append(contact)
+            if len(self._contacts) > 1000:
+                self._contacts.pop(0)
+
+        payload = self._build_payload(self._pick_category(), contact)
+        self._recent.append(payload)
+        if len(self._recent) > 200:
+            self._recent.pop(0)
+
+        return payload
+
+    def stream(self, count: int) -> Iterator[Dict]:
+        """count kadar gönderim - retry storm'lar aynı payload'ı art arda tekrarlar"""
+
+        emitted = 0
+        while emitted < count:
+            payload = self.generate()
+            repeats = 1
+            if self.rng.random() < self.retry_storm_rate:
+                repeats = self.rng.randint(2, max(2, self.retry_storm_size))
+
+            for _ in range(min(repeats, count - emitted)):
+                yield payload
+                emitted += 1
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Generate synthetic Tally webhook payloads (JSONL)')
+    parser.add_argument('--count', type=int, default=100)
+    parser.add_argument('--seed', type=int, default=None)
+    parser.add_argument('--mix', default='education=0.45,legal=0.35,business=0.20')
+    parser.add_argument('--duplicate-rate', type=float, default=0.0)
+    parser.add_argument('--returning-rate', type=float, default=0.0)
+    parser.add_argument('--retry-storm-rate', type=float, default=0.0)
+    parser.add_argument('--retry-storm-size', type=int, default=5)
+    parser.add_argument('--output', default='-', help='Output file (default stdout)')
+    args = parser.parse_args()
+
+    generator = TallyPayloadGenerator(
+        seed=args.seed,
+        category_mix=TallyPayloadGenerator.parse_mix(args.mix),
+        duplicate_rate=args.duplicate_rate,
+        returning_rate=args.returning_rate,
+        retry_storm_rate=args.retry_storm_rate,
+        retry_storm_size=args.retry_storm_size
+    )
+
+    out = open(args.output, 'w', encoding='utf-8') if args.output != '-' else None
+    try:
+        for payload in generator.stream(args.count):
+            line = json.dumps(payload, ensure_ascii=False)
+            if out:
+                out.write(line + '\n')
+            else:
+                print(line)
+    finally:
+        if out:
+            out.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,316 @@
+import os
+import sys
+import json
+import time
+import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Dict, Iterable, Iterator, Optional, Tuple
+
+from tools.load_driver import percentile
+from utils import json_codec
+
+
+class TokenBucket:
+    """Tüm worker'lar için ortak hız limiti (saniyede rate, burst kadar birikir)"""
+
+    def __init__(self, rate: float, burst: Optional[float] = None):
+        self.rate = rate
+        self.capacity = burst or max(1.0, rate)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        if self.rate <= 0:
+            return
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+class ReplayCheckpoint:
+    """Kaldığı yeri tutan dosya - paralel bitişlerde low-water mark saklanır
+
+    position: bu sıra numarasından önceki tüm kayıtlar işlendi. Yarıda
+    kesilen koşu --resume ile position'dan devam eder; arada işlenmiş olanlar
+    pipeline checkpoint'leri sayesinde yan etki tekrarlamaz.
+    """
+
+    def __init__(self, path: Optional[str], source: str, save_every: int = 50):
+        self.path = path
+        self.source = source
+        self.save_every = save_every
+        self.position = 0
+        self._finished = set()
+        self._lock = threading.Lock()
+        self._since_save = 0
+
+    def load(self) -> int:
+        if self.path and os.path.exists(self.path):
+            with open(self.path, encoding='utf-8') as f:
+                state = json.load(f)
+            if state.get('source') != self.source:
+                raise ValueError(f"Checkpoint {self.path} belongs to another source: {state.get('source')}")
+            self.position = int(state.get('position', 0))
+        return self.position
+
+    def done(self, sequence: int):
+        with self._lock:
+            self._finished.add(sequence)
+            while self.position in self._finished:
+                self._finished.remove(self.position)
+                self.position += 1
+            self._since_save += 1
+            if self._since_save >= self.save_every:
+                self._save_locked()
+
+    def save(self):
+        with self._lock:
+            self._save_locked()
+
+    def _save_locked(self):
+        self._since_save = 0
+        if not self.path:
+            return
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({"source": self.source, "position": self.position,
+                       "updated": datetime.now().isoformat()}, f)
+        os.replace(tmp_path, self.path)
+
+
+def iter_jsonl(path: str) -> Iterator[bytes]:
+    """JSONL export ('-' = stdin) - satırlar ham byte olarak"""
+
+    f = sys.stdin.buffer if path == '-' else open(path, 'rb')
+    try:
+        for line in f:
+            if line.strip():
+                yield line
+    finally:
+        if f is not sys.stdin.buffer:
+            f.close()
+
+
+def iter_journal(directory: str, since: Optional[str] = None, until: Optional[str] = None) -> Iterator[bytes]:
+    from utils.webhook_journal import JournalReader
+
+    reader = JournalReader(directory)
+    since_ts = datetime.fromisoformat(since).timestamp() if since else None
+    until_ts = datetime.fromisoformat(until).timestamp() if until else None
+    for record in reader.iter_records(since_ts, until_ts):
+        yield record.raw
+
+
+def build_pipeline(dry_run: bool = False, async_hubspot: bool = False, max_connections: int = 50):
+    """Servisleri Config'ten kur - canlı servisle aynı checkpoint DB'sini kullanır
+
+    async_hubspot: CRM çağrıları tek event loop'taki max_connections'lık
+    havuzdan gider; --workers thread'i bu havuzu paylaşır.
+    """
+
+    from config.settings import Config
+    from utils.form_processor import FormProcessor
+    from utils.checkpoint_store import CheckpointStore
+    from services.submission_pipeline import SubmissionPipeline
+
+    checkpoints = CheckpointStore(Config.CHECKPOINT_DB, retention_days=Config.CHECKPOINT_RETENTION_DAYS)
+    if dry_run:
+        return SubmissionPipeline(None, FormProcessor(), {}, checkpoints=checkpoints)
+
+    from services.hubspot_service import HubSpotService
+    from services.property_schema import PropertySchema
+    from email_services.education_email import EducationEmailService
+    from email_services.legal_email import LegalEmailService
+    from email_services.business_email import BusinessEmailService
+
+    email_services = {
+        'education': EducationEmailService(Config.EMAIL_CONFIG),
+        'legal': LegalEmailService(Config.EMAIL_CONFIG),
+        'business': BusinessEmailService(Config.EMAIL_CONFIG)
+    }
+    hubspot_service = None
+    if Config.HUBSPOT_API_KEY:
+        property_schema = PropertySchema(Config.HUBSPOT_SCHEMA_CACHE or None, ttl=Config.HUBSPOT_SCHEMA_TTL)
+        if async_hubspot:
+            from services.async_hubspot_service import AsyncHubSpotService, LoopBoundHubSpotService
+            hubspot_service = LoopBoundHubSpotService(AsyncHubSpotService(
+                Config.HUBSPOT_API_KEY, Config.HUBSPOT_API_BASE, max_connections=max_connections,
+                property_schema=property_schema
+            ))
+        else:
+            hubspot_service = HubSpotService(Config.HUBSPOT_API_KEY, Config.HUBSPOT_API_BASE,
+                                             property_schema=property_schema)
+    return SubmissionPipeline(hubspot_service, FormProcessor(), email_services, checkpoints=checkpoints)
+
+
+def plan_submission(pipeline, data: Dict) -> Tuple[Dict, int]:
+    """Dry-run: ağ çağrısı yapmadan ne yapılacağını raporla"""
+
+    from utils.checkpoint_store import CheckpointStore
+
+    extracted = pipeline.form_processor.extract_form_data(data)
+    if not extracted:
+        return {"success": False, "error": "Could not extract form data"}, 400
+
+    contact = pipeline.form_processor.get_contact_info(extracted)
+    if not contact.get('email'):
+        return {"success": False, "error": "Email address required"}, 400
+
+    submission_id = extracted.get('submission_id', '')
+    done = pipeline.checkpoints.completed_steps(submission_id)
+    pending = [step for step in CheckpointStore.STEPS if step not in done]
+    return {
+        "success": True,
+        "submission_id": submission_id,
+        "category": pipeline.form_processor.determine_category(extracted),
+        "pending_steps": pending
+    }, 200
+
+
+class ReplayRunner:
+    """Kayıtları paralel worker'larla pipeline'dan geçirir"""
+
+    def __init__(self, pipeline, workers: int = 4, rate: float = 5.0, timeout: float = 60.0,
+                 dry_run: bool = False, checkpoint: Optional[ReplayCheckpoint] = None, verbose: bool = False):
+        self.pipeline = pipeline
+        self.workers = workers
+        self.bucket = TokenBucket(rate)
+        self.timeout = timeout
+        self.dry_run = dry_run
+        self.checkpoint = checkpoint
+        self.verbose = verbose
+
+        self._lock = threading.Lock()
+        self.status_counts = {}
+        self.step_counts = {}
+        self.latencies = []
+        self.errors = 0
+        self.skipped = 0
+
+    def _process(self, sequence: int, raw: bytes):
+        from utils.deadline import Deadline
+
+        started = time.perf_counter()
+        try:
+            data = json_codec.loads(raw)
+            if self.dry_run:
+                body, status = plan_submission(self.pipeline, data)
+            else:
+                self.bucket.acquire()
+                started = time.perf_counter()
+                body, status = self.pipeline.process(data, deadline=Deadline(self.timeout))
+        except Exception as e:
+            body, status = {"success": False, "error": str(e)}, 0
+
+        elapsed = time.perf_counter() - started
+        with self._lock:
+            self.status_counts[status] = self.status_counts.get(status, 0) + 1
+            self.latencies.append(elapsed)
+            if status == 0:
+                self.errors += 1
+            for step in body.get('pending_steps', body.get('failed_steps', [])):
+                self.step_counts[step] = self.step_counts.get(step, 0) + 1
+
+        if self.verbose or status != 200:
+            print(json.dumps({"sequence": sequence, "status": status, **body}, ensure_ascii=False, default=str))
+
+        if self.checkpoint:
+            self.checkpoint.done(sequence)
+
+    def run(self, records: Iterable[bytes], start_at: int = 0, limit: Optional[int] = None) -> Dict:
+        in_flight = threading.BoundedSemaphore(self.workers * 2)  # Kaynağı belleğe almadan akıt
+        started = time.perf_counter()
+        submitted = 0
+
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='replay') as executor:
+            for sequence, raw in enumerate(records):
+                if sequence < start_at:
+                    self.skipped += 1
+                    continue
+                if limit is not None and submitted >= limit:
+                    break
+
+                in_flight.acquire()
+                future = executor.submit(self._process, sequence, raw)
+                future.add_done_callback(lambda _: in_flight.release())
+                submitted += 1
+
+        if self.checkpoint:
+            self.checkpoint.save()
+        return self.summary(submitted, time.perf_counter() - started)
+
+    def summary(self, submitted: int, elapsed: float) -> Dict:
+        latencies = sorted(self.latencies)
+        return {
+            "mode": "dry-run" if self.dry_run else "replay",
+            "submitted": submitted,
+            "skipped_before_checkpoint": self.skipped,
+            "status_counts": {str(k): v for k, v in sorted(self.status_counts.items())},
+            "errors": self.errors,
+            ("pending_steps" if self.dry_run else "failed_steps"): self.step_counts,
+            "elapsed_seconds": round(elapsed, 2),
+            "throughput_per_second": round(submitted / elapsed, 2) if elapsed else 0.0,
+            "latency_ms": {
+                "p50": round(percentile(latencies, 50) * 1000, 1),
+                "p95": round(percentile(latencies, 95) * 1000, 1),
+                "max": round(latencies[-1] * 1000, 1) if latencies else 0.0
+            },
+            "checkpoint_position": self.checkpoint.position if self.checkpoint else None
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Replay/backfill submissions through HubSpot and email')
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument('--jsonl', help="JSONL export of raw webhook bodies ('-' for stdin)")
+    source.add_argument('--journal', help='Webhook journal directory (JOURNAL_DIR)')
+    parser.add_argument('--since', help='Journal only: ISO timestamp (inclusive)')
+    parser.add_argument('--until', help='Journal only: ISO timestamp (exclusive)')
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--rate', type=float, default=5.0, help='Global submissions per second (0 = unlimited)')
+    parser.add_argument('--timeout', type=float, default=60.0, help='Per-submission deadline in seconds')
+    parser.add_argument('--limit', type=int, help='Process at most N submissions')
+    parser.add_argument('--checkpoint', help='Position file for resumable runs')
+    parser.add_argument('--resume', action='store_true', help='Start from the position in --checkpoint')
+    parser.add_argument('--dry-run', action='store_true', help='Parse and report pending steps, no side effects')
+    parser.add_argument('--verbose', action='store_true', help='Print every result, not only failures')
+    parser.add_argument('--async-hubspot', action='store_true',
+                        help='Send CRM calls through one asyncio connection pool shared by all workers')
+    parser.add_argument('--max-connections', type=int, default=50, help='--async-hubspot pool size')
+    args = parser.parse_args()
+
+    if args.jsonl:
+        source_name, records = f"jsonl:{os.path.abspath(args.jsonl) if args.jsonl != '-' else '-'}", iter_jsonl(args.jsonl)
+    else:
+        source_name = f"journal:{os.path.abspath(args.journal)}:{args.since or ''}:{args.until or ''}"
+        records = iter_journal(args.journal, args.since, args.until)
+
+    checkpoint = ReplayCheckpoint(args.checkpoint, source_name) if args.checkpoint else None
+    start_at = checkpoint.load() if checkpoint and args.resume else 0
+    if checkpoint and args.dry_run:
+        checkpoint.path = None  # Dry-run pozisyonu ilerletmez
+
+    pipeline = build_pipeline(args.dry_run, async_hubspot=args.async_hubspot, max_connections=args.max_connections)
+    runner = ReplayRunner(pipeline, workers=args.workers, rate=args.rate,
+                          timeout=args.timeout, dry_run=args.dry_run, checkpoint=checkpoint, verbose=args.verbose)
+    try:
+        summary = runner.run(records, start_at=start_at, limit=args.limit)
+    finally:
+        if pipeline.hubspot_service is not None:
+            pipeline.hubspot_service.close()
+
+    sys.stderr.write(json.dumps(summary, indent=2) + '\n')
+
+
+if __name__ == '__main__':
+    main()
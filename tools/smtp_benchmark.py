@@ -0,0 +1,136 @@
+import sys
+import json
+import time
+import asyncio
+import logging
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List
+
+from tools.load_driver import percentile
+from tools.fault_injection import FaultInjector
+
+
+def _summary(mode: str, latencies: List[float], succeeded: int, elapsed: float, extra: Dict) -> Dict:
+    latencies = sorted(latencies)
+    return {
+        "mode": mode,
+        "messages": len(latencies),
+        "succeeded": succeeded,
+        "elapsed_seconds": round(elapsed, 2),
+        "throughput_per_second": round(len(latencies) / elapsed, 1) if elapsed else 0.0,
+        "latency_ms": {
+            "p50": round(percentile(latencies, 50) * 1000, 1),
+            "p95": round(percentile(latencies, 95) * 1000, 1),
+            "max": round(latencies[-1] * 1000, 1) if latencies else 0.0
+        },
+        **extra
+    }
+
+
+def _service(config: Dict):
+    from email_services.education_email import EducationEmailService
+    return EducationEmailService(config)
+
+
+def run_threaded(mode: str, config: Dict, count: int, threads: int, body: str) -> Dict:
+    """send_email'i thread'lerden çağır - transport config'e göre smtplib ya da async_smtp"""
+
+    service = _service(config)
+
+    def one(i: int):
+        started = time.perf_counter()
+        result = service.send_email([f"lead{i}@example.com"], f"Benchmark {mode} #{i}", body, submission_id=f"bench-{i}")
+        return time.perf_counter() - started, result.get('success', False)
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        results = list(executor.map(one, range(count)))
+    elapsed = time.perf_counter() - started
+
+    stats = service.get_transport().get_stats()
+    return _summary(mode, [r[0] for r in results], sum(1 for r in results if r[1]), elapsed,
+                    {"threads": threads, "connections": stats})
+
+
+def run_async(config: Dict, count: int, body: str) -> Dict:
+    """Tek event loop'tan eşzamanlı teslim - thread yok"""
+
+    from email_services.async_smtp import AsyncSMTPTransport
+
+    service = _service(config)
+    transport = AsyncSMTPTransport(config)
+
+    async def one(i: int):
+        recipient = f"lead{i}@example.com"
+        data = service._message_bytes(recipient, f"Benchmark async #{i}", body)
+        started = time.perf_counter()
+        results = await transport.send_messages_async(config['user'], [(recipient, data)])
+        return time.perf_counter() - started, results[0]["status"] == "success"
+
+    async def main():
+        started = time.perf_counter()
+        results = await asyncio.gather(*(one(i) for i in range(count)))
+        elapsed = time.perf_counter() - started
+        await transport.pool.close_all()
+        return results, elapsed
+
+    results, elapsed = asyncio.run(main())
+    return _summary("async", [r[0] for r in results], sum(1 for r in results if r[1]), elapsed,
+                    {"connections": transport.get_stats()})
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare smtplib and asyncio (PIPELINING) email delivery')
+    parser.add_argument('--host', help='SMTP server; default: in-process simulator')
+    parser.add_argument('--port', type=int, default=587)
+    parser.add_argument('--user', default='bench@example.com')
+    parser.add_argument('--password', default='secret')
+    parser.add_argument('--messages', type=int, default=300)
+    parser.add_argument('--threads', type=int, default=8, help='Caller threads for the smtp/transport modes')
+    parser.add_argument('--pool-size', type=int, default=4, help='SMTP connections per account')
+    parser.add_argument('--latency', default='fixed:20', help='In-process simulator latency per reply (ms spec)')
+    parser.add_argument('--body-kb', type=int, default=8)
+    parser.add_argument('--modes', default='smtp,transport,async', help='Comma separated: smtp, transport, async')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+
+    simulator = None
+    host, port = args.host, args.port
+    if not host:
+        from tools.smtp_simulator import SMTPSimulator
+
+        simulator = SMTPSimulator(('127.0.0.1', 0), FaultInjector(latency=args.latency))
+        simulator.start_in_thread()
+        host, port = simulator.server_address[:2]
+
+    base_config = {
+        'smtp_server': host, 'smtp_port': port, 'user': args.user, 'password': args.password,
+        'from_name': 'Benchmark', 'timeout': 30.0, 'pool_size': args.pool_size, 'tls_verify': not simulator
+    }
+    body = '<p>' + 'x' * (args.body_kb * 1024) + '</p>'
+
+    reports = []
+    try:
+        for mode in args.modes.split(','):
+            # Her mod kendi havuzunu açsın (havuz anahtarı kullanıcı adı)
+            config = dict(base_config, user=f"{mode}-{args.user}",
+                          transport='async_smtp' if mode == 'transport' else 'smtp')
+            if mode == 'async':
+                reports.append(run_async(config, args.messages, body))
+            else:
+                reports.append(run_threaded(mode, config, args.messages, args.threads, body))
+            if simulator:
+                reports[-1]["server"] = {k: v for k, v in simulator.get_stats().items() if k != 'faults'}
+                simulator.reset()
+    finally:
+        if simulator:
+            simulator.shutdown()
+            simulator.server_close()
+
+    sys.stdout.write(json.dumps(reports, indent=2) + '\n')
+
+
+if __name__ == '__main__':
+    main()
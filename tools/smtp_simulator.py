@@ -0,0 +1,380 @@
+import os
+import ssl
+import time
+import base64
+import shutil
+import socket
+import logging
+import argparse
+import tempfile
+import threading
+import subprocess
+import socketserver
+from collections import deque
+from typing import Dict, Optional
+
+from tools.fault_injection import FaultInjector
+
+logger = logging.getLogger(__name__)
+
+
+def generate_self_signed_cert(directory: str) -> Optional[tuple]:
+    """openssl ile STARTTLS için geçici sertifika üret"""
+
+    openssl = shutil.which('openssl')
+    if not openssl:
+        return None
+
+    certfile = os.path.join(directory, 'smtp-sim.crt')
+    keyfile = os.path.join(directory, 'smtp-sim.key')
+    result = subprocess.run(
+        [openssl, 'req', '-x509', '-newkey', 'rsa:2048', '-nodes', '-days', '2',
+         '-subj', '/CN=localhost', '-keyout', keyfile, '-out', certfile],
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    if result.returncode != 0:
+        return None
+    return certfile, keyfile
+
+
+class SMTPSimulatorHandler(socketserver.BaseRequestHandler):
+    """Tek SMTP oturumu - EHLO, STARTTLS, AUTH, MAIL/RCPT/DATA, PIPELINING"""
+
+    def setup(self):
+        self.sock = self.request
+        self.sock.settimeout(self.server.session_timeout)
+        self._buffer = b''
+        self._outbox = []
+        self.tls_active = False
+        self.authenticated = False
+        self.helo = None
+        self._reset_transaction()
+
+    def _reset_transaction(self):
+        self.mail_from = None
+        self.rcpt_to = []
+
+    # --- I/O ---
+
+    def _read_line(self) -> Optional[bytes]:
+        while b'\r\n' not in self._buffer:
+            chunk = self.sock.recv(65536)
+            if not chunk:
+                return None
+            self._buffer += chunk
+        line, self._buffer = self._buffer.split(b'\r\n', 1)
+        return line
+
+    def _reply(self, code: int, *lines: str):
+        """Yanıtı kuyruğa ekle - pipelined komutlarda tek round trip'te gönderilir"""
+
+        lines = lines or ('OK',)
+        for i, text in enumerate(lines):
+            sep = ' ' if i == len(lines) - 1 else '-'
+            self._outbox.append(f"{code}{sep}{text}\r\n".encode('utf-8'))
+
+    def _flush(self, force: bool = False):
+        """Buffer'da bekleyen komut yoksa ağ gecikmesini uygula ve yanıtları yolla"""
+
+        if not self._outbox or (not force and b'\r\n' in self._buffer):
+            return
+
+        delay = self.server.injector.latency_seconds()
+        if delay:
+            time.sleep(delay)
+
+        self.sock.sendall(b''.join(self._outbox))
+        self._outbox = []
+
+    # --- Oturum ---
+
+    def handle(self):
+        server = self.server
+        server.count('connections')
+
+        try:
+            self._reply(220, f"{server.hostname} ESMTP simulator ready")
+            self._flush(force=True)
+
+            while True:
+                line = self._read_line()
+                if line is None:
+                    return
+
+                if server.injector.should_drop():
+                    server.count('drops')
+                    return
+
+                verb, _, arg = line.decode('utf-8', 'replace').partition(' ')
+                handler = getattr(self, f"smtp_{verb.upper()}", None)
+                if handler is None:
+                    self._reply(500, "5.5.2 Command not recognized")
+                elif handler(arg.strip()) is False:
+                    self._flush(force=True)
+                    return
+
+                self._flush()
+
+        except (ConnectionError, socket.timeout, ssl.SSLError, OSError):
+            return
+
+    def _extensions(self) -> list:
+        server = self.server
+        extensions = [server.hostname, 'PIPELINING', '8BITMIME', f"SIZE {server.max_message_size}", 'ENHANCEDSTATUSCODES']
+        if server.tls_context and not self.tls_active:
+            extensions.append('STARTTLS')
+        if self.tls_active or not server.require_tls:
+            extensions.append('AUTH PLAIN LOGIN')
+        return extensions
+
+    def smtp_EHLO(self, arg: str):
+        self.helo = arg
+        self._reset_transaction()
+        self._reply(250, *self._extensions())
+
+    def smtp_HELO(self, arg: str):
+        self.helo = arg
+        self._reply(250, self.server.hostname)
+
+    def smtp_NOOP(self, arg: str):
+        self._reply(250, "2.0.0 OK")
+
+    def smtp_RSET(self, arg: str):
+        self._reset_transaction()
+        self._reply(250, "2.0.0 OK")
+
+    def smtp_QUIT(self, arg: str):
+        self._reply(221, "2.0.0 Bye")
+        return False
+
+    def smtp_STARTTLS(self, arg: str):
+        if not self.server.tls_context or self.tls_active:
+            self._reply(454, "4.7.0 TLS not available")
+            return
+
+        self._reply(220, "2.0.0 Ready to start TLS")
+        self._flush(force=True)
+
+        self.sock = self.server.tls_context.wrap_socket(self.sock, server_side=True)
+        self._buffer = b''
+        self.tls_active = True
+        self.helo = None
+        self.server.count('tls_sessions')
+
+    def smtp_AUTH(self, arg: str):
+        server = self.server
+        if server.require_tls and not self.tls_active:
+            self._reply(530, "5.7.0 Must issue a STARTTLS command first")
+            return
+        if self.authenticated:
+            self._reply(503, "5.5.1 Already authenticated")
+            return
+
+        mechanism, _, initial = arg.partition(' ')
+        mechanism = mechanism.upper()
+
+        try:
+            if mechanism == 'PLAIN':
+                if not initial:
+                    self._reply(334, '')
+                    self._flush(force=True)
+                    initial = (self._read_line() or b'').decode()
+                _, user, password = base64.b64decode(initial).decode('utf-8').split('\0', 2)
+
+            elif mechanism == 'LOGIN':
+                if initial:
+                    user = base64.b64decode(initial).decode('utf-8')
+                else:
+                    self._reply(334, base64.b64encode(b'Username:').decode())
+                    self._flush(force=True)
+                    user = base64.b64decode(self._read_line() or b'').decode('utf-8')
+                self._reply(334, base64.b64encode(b'Password:').decode())
+                self._flush(force=True)
+                password = base64.b64decode(self._read_line() or b'').decode('utf-8')
+
+            else:
+                self._reply(504, "5.5.4 Unrecognized authentication type")
+                return
+
+        except (ValueError, UnicodeDecodeError):
+            self._reply(501, "5.5.2 Cannot decode response")
+            return
+
+        if server.check_credentials(user, password) and not server.injector.should_fail_auth():
+            self.authenticated = True
+            self._reply(235, "2.7.0 Accepted")
+        else:
+            server.count('auth_failures')
+            self._reply(535, "5.7.8 Username and Password not accepted")
+
+    def smtp_MAIL(self, arg: str):
+        if self.server.credentials and not self.authenticated:
+            self._reply(530, "5.7.0 Authentication Required")
+            return
+        if not arg.upper().startswith('FROM:'):
+            self._reply(501, "5.5.4 Syntax: MAIL FROM:<address>")
+            return
+
+        self._reset_transaction()
+        self.mail_from = arg[5:].strip().split(' ')[0].strip('<>')
+        self._reply(250, "2.1.0 OK")
+
+    def smtp_RCPT(self, arg: str):
+        if self.mail_from is None:
+            self._reply(503, "5.5.1 MAIL first")
+            return
+        if not arg.upper().startswith('TO:'):
+            self._reply(501, "5.5.4 Syntax: RCPT TO:<address>")
+            return
+
+        self.rcpt_to.append(arg[3:].strip().split(' ')[0].strip('<>'))
+        self._reply(250, "2.1.5 OK")
+
+    def smtp_DATA(self, arg: str):
+        if not self.rcpt_to:
+            self._reply(503, "5.5.1 RCPT first")
+            return
+
+        self._reply(354, "Go ahead")
+        self._flush(force=True)
+
+        lines = []
+        while True:
+            line = self._read_line()
+            if line is None:
+                return False
+            if line == b'.':
+                break
+            lines.append(line[1:] if line.startswith(b'..') else line)
+
+        server = self.server
+        code = server.injector.pick_error()
+        if code:
+            message = {
+                421: "4.7.0 Try again later, closing connection",
+                450: "4.2.1 Mailbox temporarily unavailable",
+                451: "4.3.0 Temporary server error",
+                452: "4.5.3 Too many recipients",
+                550: "5.7.1 Message rejected",
+                552: "5.2.3 Message size exceeds limit",
+                554: "5.7.0 Transaction failed"
+            }.get(code, "Simulated failure")
+            self._reply(code, message)
+            self._reset_transaction()
+            return False if code == 421 else None
+
+        server.record_message(self.mail_from, list(self.rcpt_to), b'\r\n'.join(lines))
+        self._reply(250, f"2.0.0 OK queued as sim{server.stats['messages']}")
+        self._reset_transaction()
+
+
+class SMTPSimulator(socketserver.ThreadingTCPServer):
+    """STARTTLS/AUTH destekli, fault injection'lı SMTP simülatörü"""
+
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, address: tuple, injector: Optional[FaultInjector] = None,
+                 credentials: Optional[Dict[str, str]] = None, tls: bool = True,
+                 certfile: str = None, keyfile: str = None, require_tls: bool = True,
+                 keep_messages: int = 1000):
+        super().__init__(address, SMTPSimulatorHandler)
+        self.injector = injector or FaultInjector()
+        self.credentials = dict(credentials or {})
+        self.hostname = 'smtp.simulator.local'
+        self.max_message_size = 35882577
+        self.session_timeout = 300
+        self.messages = deque(maxlen=keep_messages)
+        self.stats = {"connections": 0, "tls_sessions": 0, "messages": 0, "recipients": 0,
+                      "auth_failures": 0, "drops": 0}
+        self._lock = threading.Lock()
+        self._tmpdir = None
+
+        self.tls_context = None
+        if tls:
+            if not (certfile and keyfile):
+                self._tmpdir = tempfile.mkdtemp(prefix='smtp-sim-')
+                generated = generate_self_signed_cert(self._tmpdir)
+                if generated:
+                    certfile, keyfile = generated
+            if certfile and keyfile:
+                self.tls_context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+                self.tls_context.load_cert_chain(certfile, keyfile)
+            else:
+                logger.warning("openssl not found - STARTTLS disabled")
+
+        self.require_tls = require_tls and self.tls_context is not None
+
+    def check_credentials(self, user: str, password: str) -> bool:
+        if not self.credentials:
+            return True
+        return self.credentials.get(user) == password
+
+    def count(self, key: str, amount: int = 1):
+        with self._lock:
+            self.stats[key] = self.stats.get(key, 0) + amount
+
+    def record_message(self, mail_from: str, recipients: list, data: bytes):
+        with self._lock:
+            self.stats["messages"] += 1
+            self.stats["recipients"] += len(recipients)
+            self.messages.append({"from": mail_from, "to": recipients, "size": len(data), "data": data})
+
+    def get_stats(self) -> Dict:
+        with self._lock:
+            stats = dict(self.stats)
+        stats["faults"] = self.injector.get_stats()
+        return stats
+
+    def reset(self):
+        with self._lock:
+            for key in self.stats:
+                self.stats[key] = 0
+            self.messages.clear()
+        self.injector.reset()
+
+    def start_in_thread(self) -> threading.Thread:
+        """Benchmark/test harness'ları için arka planda çalıştır"""
+
+        thread = threading.Thread(target=self.serve_forever, name='smtp-simulator', daemon=True)
+        thread.start()
+        return thread
+
+    def server_close(self):
+        super().server_close()
+        if self._tmpdir:
+            shutil.rmtree(self._tmpdir, ignore_errors=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Local SMTP simulator with STARTTLS/AUTH')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8025)
+    parser.add_argument('--user', action='append', default=[],
+                        help='Accepted credentials as user:password (repeatable, empty accepts any)')
+    parser.add_argument('--no-tls', action='store_true', help='Do not advertise STARTTLS')
+    parser.add_argument('--certfile')
+    parser.add_argument('--keyfile')
+    FaultInjector.add_arguments(parser)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+
+    credentials = dict(u.split(':', 1) for u in args.user)
+    server = SMTPSimulator((args.host, args.port), FaultInjector.from_args(args), credentials,
+                           tls=not args.no_tls, certfile=args.certfile, keyfile=args.keyfile)
+
+    logger.info("SMTP simulator listening on %s:%s (STARTTLS=%s, latency=%s, errors=%s)", args.host, args.port,
+                'on' if server.tls_context else 'off', args.latency, args.errors or 'none')
+    logger.info("Point the app at it with SMTP_SERVER=%s SMTP_PORT=%s", args.host, args.port)
+
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == '__main__':
+    main()
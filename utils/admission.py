@@ -0,0 +1,77 @@
+import time
+import threading
+from typing import Dict, Optional
+
+
+class AdmissionController:
+    """Worker başına eşzamanlı pipeline sayısını sınırlar
+
+    Limit doluysa istek kısa bir süre slot bekler; yine açılmazsa çağıran
+    taraf hızlıca 503 (Retry-After) döner ya da gönderimi spool'a yazar.
+    """
+
+    def __init__(self, max_inflight: int = 3, max_waiting: int = 4, wait_timeout: float = 0.5):
+        self.max_inflight = max_inflight
+        self.max_waiting = max_waiting
+        self.wait_timeout = wait_timeout
+
+        self._cond = threading.Condition()
+        self.inflight = 0
+        self.waiting = 0
+        self.stats = {"admitted": 0, "rejected": 0, "spooled": 0, "wait_ms_total": 0.0}
+
+    def try_acquire(self, timeout: Optional[float] = None) -> bool:
+        """Slot al - alınamazsa False (çağıran reddeder ya da spool'a yazar)"""
+
+        timeout = self.wait_timeout if timeout is None else timeout
+        started = time.monotonic()
+
+        with self._cond:
+            if self.inflight >= self.max_inflight:
+                if self.waiting >= self.max_waiting or timeout <= 0:
+                    self.stats["rejected"] += 1
+                    return False
+
+                self.waiting += 1
+                try:
+                    deadline = started + timeout
+                    while self.inflight >= self.max_inflight:
+                        remaining = deadline - time.monotonic()
+                        if remaining <= 0:
+                            self.stats["rejected"] += 1
+                            return False
+                        self._cond.wait(remaining)
+                finally:
+                    self.waiting -= 1
+
+            self.inflight += 1
+            self.stats["admitted"] += 1
+            self.stats["wait_ms_total"] += (time.monotonic() - started) * 1000
+            return True
+
+    def acquire(self):
+        """Arka plan işleri için - slot açılana kadar bekler"""
+
+        with self._cond:
+            while self.inflight >= self.max_inflight:
+                self._cond.wait()
+            self.inflight += 1
+
+    def release(self):
+        with self._cond:
+            self.inflight -= 1
+            self._cond.notify()
+
+    def record_spooled(self):
+        with self._cond:
+            self.stats["spooled"] += 1
+
+    def snapshot(self) -> Dict:
+        with self._cond:
+            return {
+                "inflight": self.inflight,
+                "waiting": self.waiting,
+                "max_inflight": self.max_inflight,
+                "max_waiting": self.max_waiting,
+                **self.stats
+            }
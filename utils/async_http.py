@@ -0,0 +1,244 @@
+import os
+import ssl
+import time
+import asyncio
+import logging
+from collections import deque
+from typing import Dict, Optional
+from urllib.parse import urlencode, urlsplit
+
+from utils import json_codec
+
+logger = logging.getLogger(__name__)
+
+_NO_BODY_STATUSES = {204, 304}
+
+
+class AsyncResponse:
+    """requests.Response'un kullandığımız kısmı: status_code, headers, text, json()"""
+
+    __slots__ = ('status_code', 'headers', 'content')
+
+    def __init__(self, status_code: int, headers: Dict[str, str], content: bytes):
+        self.status_code = status_code
+        self.headers = headers
+        self.content = content
+
+    @property
+    def text(self) -> str:
+        return self.content.decode('utf-8', errors='replace')
+
+    def json(self):
+        return json_codec.loads(self.content) if self.content else {}
+
+
+class _StaleConnection(Exception):
+    """Keep-alive bağlantı sunucu tarafından kapatılmış - yanıt gelmeden koptu"""
+
+
+class _Connection:
+    __slots__ = ('reader', 'writer', 'last_used', 'reused')
+
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.reader = reader
+        self.writer = writer
+        self.last_used = time.monotonic()
+        self.reused = False
+
+    def usable(self, idle_timeout: float) -> bool:
+        return (not self.writer.is_closing() and not self.reader.at_eof()
+                and time.monotonic() - self.last_used < idle_timeout)
+
+    def close(self):
+        try:
+            self.writer.close()
+        except Exception:
+            pass
+
+
+class AsyncHTTPPool:
+    """Tek host'a asyncio üzerinde HTTP/1.1 keep-alive bağlantı havuzu
+
+    En fazla max_connections bağlantı açılır; fazlası serbest bağlantı
+    bekler. Eşzamanlı istekler havuzdaki bağlantılara dağıtılır (HTTP/1.1'de
+    bağlantı başına aynı anda tek istek). Havuz, ilk kullanıldığı event
+    loop'a bağlıdır; fork sonrası parent'ın bağlantıları kullanılmaz.
+    """
+
+    def __init__(self, base_url: str, max_connections: int = 100, headers: Optional[Dict] = None,
+                 idle_timeout: float = 30.0, connect_timeout: float = 10.0):
+        parts = urlsplit(base_url)
+        self.scheme = parts.scheme or 'http'
+        self.host = parts.hostname
+        self.port = parts.port or (443 if self.scheme == 'https' else 80)
+        self.base_path = parts.path.rstrip('/')
+        self.max_connections = max_connections
+        self.idle_timeout = idle_timeout
+        self.connect_timeout = connect_timeout
+        self.headers = dict(headers or {})
+
+        default_port = 443 if self.scheme == 'https' else 80
+        self._host_header = self.host if self.port == default_port else f"{self.host}:{self.port}"
+        self._ssl = ssl.create_default_context() if self.scheme == 'https' else None
+
+        self._idle = deque()
+        self._slots = None
+        self._pid = None
+        self.stats = {"requests": 0, "connections_opened": 0, "reused": 0, "stale_retries": 0,
+                      "errors": 0, "in_flight": 0, "peak_in_flight": 0}
+
+    def _ensure_state(self):
+        # Semaphore ilk kullanımda, çalışan loop içinde oluşturulur
+        if self._slots is None or self._pid != os.getpid():
+            self._idle.clear()
+            self._slots = asyncio.Semaphore(self.max_connections)
+            self._pid = os.getpid()
+
+    async def _open(self, timeout: float) -> _Connection:
+        reader, writer = await asyncio.wait_for(
+            asyncio.open_connection(self.host, self.port, ssl=self._ssl),
+            min(timeout, self.connect_timeout)
+        )
+        self.stats["connections_opened"] += 1
+        return _Connection(reader, writer)
+
+    def _take_idle(self) -> Optional[_Connection]:
+        while self._idle:
+            conn = self._idle.pop()  # En son kullanılan - hâlâ açık olma ihtimali yüksek
+            if conn.usable(self.idle_timeout):
+                conn.reused = True
+                self.stats["reused"] += 1
+                return conn
+            conn.close()
+        return None
+
+    def _encode_request(self, method: str, path: str, params: Optional[Dict], body: Optional[bytes],
+                        headers: Optional[Dict]) -> bytes:
+        target = self.base_path + path
+        if params:
+            target += '?' + urlencode(params)
+
+        lines = [f"{method} {target} HTTP/1.1", f"Host: {self._host_header}", "Connection: keep-alive"]
+        for name, value in {**self.headers, **(headers or {})}.items():
+            lines.append(f"{name}: {value}")
+        if body is not None or method in ('POST', 'PUT', 'PATCH'):
+            lines.append(f"Content-Length: {len(body or b'')}")
+        head = ('\r\n'.join(lines) + '\r\n\r\n').encode('latin-1')
+        return head + (body or b'')
+
+    @staticmethod
+    async def _read_response(conn: _Connection, status_line: bytes, method: str) -> tuple:
+        """(AsyncResponse, bağlantı tekrar kullanılabilir mi)"""
+
+        reader = conn.reader
+        parts = status_line.decode('latin-1').split(' ', 2)
+        if len(parts) < 2 or not parts[0].startswith('HTTP/'):
+            raise ConnectionError(f"Malformed status line: {status_line!r}")
+        version, status = parts[0], int(parts[1])
+
+        headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b'\r\n', b'\n', b''):
+                break
+            name, _, value = line.decode('latin-1').partition(':')
+            headers[name.strip().lower()] = value.strip()
+
+        keep_alive = headers.get('connection', '').lower() != 'close' and version != 'HTTP/1.0'
+
+        if method == 'HEAD' or status in _NO_BODY_STATUSES or 100 <= status < 200:
+            body = b''
+        elif 'chunked' in headers.get('transfer-encoding', '').lower():
+            chunks = []
+            while True:
+                size = int((await reader.readline()).split(b';', 1)[0].strip() or b'0', 16)
+                if size == 0:
+                    # Trailer satırları
+                    while (await reader.readline()) not in (b'\r\n', b'\n', b''):
+                        pass
+                    break
+                chunks.append(await reader.readexactly(size))
+                await reader.readexactly(2)
+            body = b''.join(chunks)
+        elif 'content-length' in headers:
+            body = await reader.readexactly(int(headers['content-length']))
+        else:
+            # Uzunluk yok - bağlantı kapanana kadar oku
+            body = await reader.read()
+            keep_alive = False
+
+        return AsyncResponse(status, headers, body), keep_alive
+
+    async def _exchange(self, conn: _Connection, request: bytes, method: str) -> tuple:
+        try:
+            conn.writer.write(request)
+            await conn.writer.drain()
+            status_line = await conn.reader.readline()
+        except (ConnectionResetError, BrokenPipeError):
+            status_line = b''
+
+        # Yanıttan tek byte gelmeden kapandı - sadece bu durumda tekrar denemek güvenli
+        if not status_line:
+            if conn.reused:
+                raise _StaleConnection()
+            raise ConnectionError("Connection closed before response")
+        return await self._read_response(conn, status_line, method)
+
+    async def request(self, method: str, path: str, params: Optional[Dict] = None, json_body=None,
+                      headers: Optional[Dict] = None, timeout: float = 30.0) -> AsyncResponse:
+        """Tek istek - timeout bağlantı beklemesi dahil toplam süre (aşılırsa TimeoutError)"""
+
+        self._ensure_state()
+        body = json_codec.dumps(json_body) if json_body is not None else None
+        if body is not None:
+            headers = {"Content-Type": "application/json", **(headers or {})}
+        request = self._encode_request(method, path, params, body, headers)
+        try:
+            return await asyncio.wait_for(self._send(method, request, timeout), timeout)
+        except asyncio.TimeoutError:
+            raise TimeoutError(f"{method} {path} timed out after {timeout:.1f}s") from None
+
+    async def _send(self, method: str, request: bytes, timeout: float) -> AsyncResponse:
+        async with self._slots:
+            self.stats["requests"] += 1
+            self.stats["in_flight"] += 1
+            self.stats["peak_in_flight"] = max(self.stats["peak_in_flight"], self.stats["in_flight"])
+            try:
+                conn = self._take_idle() or await self._open(timeout)
+                try:
+                    try:
+                        response, keep_alive = await self._exchange(conn, request, method)
+                    except _StaleConnection:
+                        # Sunucu boştaki bağlantıyı kapatmış - yeni bağlantıyla bir kez dene
+                        conn.close()
+                        self.stats["stale_retries"] += 1
+                        conn = await self._open(timeout)
+                        response, keep_alive = await self._exchange(conn, request, method)
+                except BaseException:
+                    conn.close()
+                    raise
+
+                if keep_alive:
+                    conn.last_used = time.monotonic()
+                    conn.reused = False
+                    self._idle.append(conn)
+                else:
+                    conn.close()
+                return response
+            except BaseException:
+                self.stats["errors"] += 1
+                raise
+            finally:
+                self.stats["in_flight"] -= 1
+
+    async def close(self):
+        while self._idle:
+            conn = self._idle.pop()
+            conn.close()
+            try:
+                await conn.writer.wait_closed()
+            except Exception:
+                pass
+
+    def get_stats(self) -> Dict:
+        return {**self.stats, "idle": len(self._idle), "max_connections": self.max_connections}
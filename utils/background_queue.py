@@ -0,0 +1,96 @@
+import queue
+import logging
+import threading
+from typing import Callable, Dict
+
+logger = logging.getLogger(__name__)
+
+
+class BackgroundQueue:
+    """İstek bütçesine sığmayan işleri response'tan sonra çalıştıran kuyruk
+
+    Worker belleğindedir - instance kapanınca kuyruktaki işler kaybolur.
+    """
+
+    def __init__(self, workers: int = 1, max_size: int = 100):
+        self.workers = workers
+        self._queue = queue.Queue(maxsize=max_size)
+        self._threads = []
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+        self.stats = {"queued": 0, "completed": 0, "failed": 0, "dropped": 0}
+
+    def _count(self, key: str):
+        with self._lock:
+            self.stats[key] += 1
+
+    def submit(self, name: str, func: Callable, *args, **kwargs) -> bool:
+        """İşi kuyruğa ekle - kuyruk doluysa False"""
+
+        self.start()
+        try:
+            self._queue.put_nowait((name, func, args, kwargs))
+        except queue.Full:
+            self._count("dropped")
+            logger.error("Background queue full, dropping task: %s", name)
+            return False
+
+        self._count("queued")
+        return True
+
+    def _worker(self):
+        while not self._stop.is_set():
+            try:
+                name, func, args, kwargs = self._queue.get(timeout=1.0)
+            except queue.Empty:
+                continue
+
+            try:
+                result = func(*args, **kwargs)
+                if isinstance(result, dict) and not result.get('success', True):
+                    self._count("failed")
+                    logger.warning("Background task %s failed: %s", name, result.get('error'))
+                else:
+                    self._count("completed")
+            except Exception as e:
+                self._count("failed")
+                logger.error("Background task %s error: %s", name, e)
+            finally:
+                self._queue.task_done()
+
+    def start(self):
+        with self._lock:
+            self._threads = [t for t in self._threads if t.is_alive()]
+            if self._threads:
+                return
+            self._stop.clear()
+            for i in range(self.workers):
+                thread = threading.Thread(target=self._worker, name=f'background-{i}', daemon=True)
+                thread.start()
+                self._threads.append(thread)
+
+    def stop(self, timeout: float = 10.0):
+        """Kuyruktaki işlere timeout kadar süre tanı, sonra thread'leri durdur"""
+
+        drained = threading.Event()
+
+        def wait_for_drain():
+            self._queue.join()
+            drained.set()
+
+        if self._threads:
+            threading.Thread(target=wait_for_drain, daemon=True).start()
+            drained.wait(timeout)
+
+        self._stop.set()
+        with self._lock:
+            threads, self._threads = self._threads, []
+        for thread in threads:
+            thread.join(1.0)
+
+    def depth(self) -> int:
+        return self._queue.qsize()
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            return {**self.stats, "depth": self._queue.qsize()}
@@ -0,0 +1,224 @@
+import os
+import json
+import time
+import sqlite3
+import logging
+import threading
+from typing import Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class CheckpointStore:
+    """Gönderim başına tamamlanan adımları tutan SQLite deposu
+
+    Retry geldiğinde pipeline ilk tamamlanmamış adımdan devam eder; böylece
+    HubSpot başarılı olup SMTP düştüyse tekrar denemede sadece mail gider.
+    Aynı instance'taki worker'lar dosyayı paylaşır (WAL modu).
+
+    pending_submissions: adımı arka plana ertelenmiş gönderimlerin ham
+    payload'ı. Webhook 200 döndüğü için Tally tekrar denemez; arka plan işi
+    düşse ya da worker kapansa bile kayıt burada kalır ve resume edilir.
+    due_at NULL ise deneme hakkı bitmiştir (dead).
+
+    submission_reviews: spam şüphesiyle bekletilen gönderimler - mail
+    atılmaz, yönetici kayıtları buradan inceler.
+    """
+
+    STEPS = ('contact_upserted', 'note_created', 'admin_notified', 'confirmation_sent')
+
+    def __init__(self, path: str = ':memory:', retention_days: float = 7):
+        self.path = path
+        self.retention_days = retention_days
+        self._lock = threading.Lock()
+        self._conn = None
+        self._pid = None
+
+    def _connection(self) -> sqlite3.Connection:
+        # Fork sonrası parent'ın bağlantısı kullanılmaz
+        if self._conn is None or self._pid != os.getpid():
+            if self.path != ':memory:':
+                os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=5.0, check_same_thread=False, isolation_level=None)
+            if self.path != ':memory:':
+                conn.execute("PRAGMA journal_mode=WAL")
+                conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS submission_steps (
+                    submission_id TEXT NOT NULL,
+                    step TEXT NOT NULL,
+                    result TEXT,
+                    completed_at REAL NOT NULL,
+                    PRIMARY KEY (submission_id, step)
+                )
+            """)
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS pending_submissions (
+                    submission_id TEXT PRIMARY KEY,
+                    payload TEXT NOT NULL,
+                    due_at REAL,
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    created_at REAL NOT NULL
+                )
+            """)
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS submission_reviews (
+                    submission_id TEXT PRIMARY KEY,
+                    source TEXT NOT NULL,
+                    reasons TEXT NOT NULL,
+                    payload TEXT NOT NULL,
+                    created_at REAL NOT NULL
+                )
+            """)
+            cutoff = time.time() - self.retention_days * 86400
+            conn.execute("DELETE FROM submission_steps WHERE completed_at < ?", (cutoff,))
+            conn.execute("DELETE FROM pending_submissions WHERE created_at < ?", (cutoff,))
+            conn.execute("DELETE FROM submission_reviews WHERE created_at < ?", (cutoff,))
+            self._conn, self._pid = conn, os.getpid()
+        return self._conn
+
+    def completed_steps(self, submission_id: str) -> Dict[str, Dict]:
+        """{step: kayıtlı sonuç} - hiç adım yoksa boş dict"""
+
+        if not submission_id:
+            return {}
+        with self._lock:
+            rows = self._connection().execute(
+                "SELECT step, result FROM submission_steps WHERE submission_id = ?", (submission_id,)
+            ).fetchall()
+        return {step: json.loads(result) if result else {} for step, result in rows}
+
+    def mark(self, submission_id: str, step: str, result: Optional[Dict] = None):
+        """Adımı tamamlandı olarak kaydet (idempotent)"""
+
+        if not submission_id:
+            return
+        with self._lock:
+            self._connection().execute(
+                "INSERT OR REPLACE INTO submission_steps (submission_id, step, result, completed_at) VALUES (?, ?, ?, ?)",
+                (submission_id, step, json.dumps(result or {}), time.time())
+            )
+
+    def is_complete(self, submission_id: str) -> bool:
+        completed = self.completed_steps(submission_id)
+        return all(step in completed for step in self.STEPS)
+
+    def completed_count(self) -> int:
+        """Tüm adımları tamamlanmış gönderim sayısı (review_sent gibi işaretler sayılmaz)"""
+
+        placeholders = ', '.join('?' * len(self.STEPS))
+        with self._lock:
+            return self._connection().execute(
+                "SELECT COUNT(*) FROM (SELECT submission_id FROM submission_steps "
+                f"WHERE step IN ({placeholders}) GROUP BY submission_id HAVING COUNT(*) >= ?)",
+                (*self.STEPS, len(self.STEPS))
+            ).fetchone()[0]
+
+    # --- Ertelenmiş gönderimler ---
+
+    def defer(self, submission_id: str, payload: Dict, delay: float):
+        """Gönderimi delay saniye sonra resume edilmek üzere kaydet (varsa sadece zamanı güncellenir)"""
+
+        if not submission_id:
+            return
+        with self._lock:
+            self._connection().execute(
+                "INSERT INTO pending_submissions (submission_id, payload, due_at, created_at) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT (submission_id) DO UPDATE SET due_at = excluded.due_at "
+                "WHERE pending_submissions.due_at IS NOT NULL",
+                (submission_id, json.dumps(payload, ensure_ascii=False, default=str), time.time() + delay, time.time())
+            )
+
+    def claim_due(self, lease: float, limit: int = 10) -> List[Tuple[str, Dict, int]]:
+        """Zamanı gelenleri lease süresince sahiplen - [(submission_id, payload, attempts)]
+
+        Sahiplenme due_at'i ileri çeker; işleyen worker ölürse kayıt lease
+        dolunca tekrar alınır.
+        """
+
+        now = time.time()
+        with self._lock:
+            conn = self._connection()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                rows = conn.execute(
+                    "SELECT submission_id, payload, attempts FROM pending_submissions "
+                    "WHERE due_at <= ? ORDER BY due_at LIMIT ?", (now, limit)
+                ).fetchall()
+                conn.executemany(
+                    "UPDATE pending_submissions SET due_at = ?, attempts = attempts + 1 WHERE submission_id = ?",
+                    [(now + lease, row[0]) for row in rows]
+                )
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+        return [(submission_id, json.loads(payload), attempts + 1) for submission_id, payload, attempts in rows]
+
+    def reschedule(self, submission_id: str, delay: float):
+        with self._lock:
+            self._connection().execute(
+                "UPDATE pending_submissions SET due_at = ? WHERE submission_id = ? AND due_at IS NOT NULL",
+                (time.time() + delay, submission_id)
+            )
+
+    def give_up(self, submission_id: str):
+        """Deneme hakkı bitti - kayıt inceleme için retention süresince dead olarak kalır"""
+        with self._lock:
+            self._connection().execute(
+                "UPDATE pending_submissions SET due_at = NULL WHERE submission_id = ?", (submission_id,)
+            )
+
+    def resolve(self, submission_id: str):
+        with self._lock:
+            self._connection().execute("DELETE FROM pending_submissions WHERE submission_id = ?", (submission_id,))
+
+    def pending_counts(self) -> Dict[str, int]:
+        with self._lock:
+            pending, dead = self._connection().execute(
+                "SELECT COUNT(due_at), COUNT(*) - COUNT(due_at) FROM pending_submissions"
+            ).fetchone()
+        return {"pending": pending, "dead": dead}
+
+    # --- İncelemeye alınan gönderimler ---
+
+    def hold_for_review(self, submission_id: str, source: str, reasons: List[str], payload: Dict) -> bool:
+        """Gönderimi inceleme kaydına yaz - ilk kez yazıldıysa True (tekrar teslimler yok sayılır)"""
+
+        with self._lock:
+            cursor = self._connection().execute(
+                "INSERT OR IGNORE INTO submission_reviews (submission_id, source, reasons, payload, created_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (submission_id, source, json.dumps(reasons), json.dumps(payload, ensure_ascii=False, default=str),
+                 time.time())
+            )
+        return cursor.rowcount > 0
+
+    def is_held(self, submission_id: str) -> bool:
+        if not submission_id:
+            return False
+        with self._lock:
+            return self._connection().execute(
+                "SELECT 1 FROM submission_reviews WHERE submission_id = ?", (submission_id,)
+            ).fetchone() is not None
+
+    def held_for_review(self, limit: int = 100) -> List[Dict]:
+        """En yeni inceleme kayıtları (payload hariç)"""
+
+        with self._lock:
+            rows = self._connection().execute(
+                "SELECT submission_id, source, reasons, created_at FROM submission_reviews "
+                "ORDER BY created_at DESC LIMIT ?", (limit,)
+            ).fetchall()
+        return [{"submission_id": submission_id, "source": source, "reasons": json.loads(reasons),
+                 "created_at": created_at} for submission_id, source, reasons, created_at in rows]
+
+    def review_count(self) -> int:
+        with self._lock:
+            return self._connection().execute("SELECT COUNT(*) FROM submission_reviews").fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None and self._pid == os.getpid():
+                self._conn.close()
+            self._conn = None
@@ -0,0 +1,43 @@
+import time
+from typing import Optional
+
+
+class DeadlineExceeded(Exception):
+    """Kalan süre bir sonraki ağ çağrısına yetmiyor"""
+
+
+class Deadline:
+    """Gönderim başına toplam süre bütçesi
+
+    tally_webhook'ta bir kez oluşturulur ve tüm servis çağrılarına geçirilir;
+    her ağ çağrısı timeout'unu sabit değer yerine kalan bütçeden alır.
+    """
+
+    MIN_CALL_TIMEOUT = 1.0  # Bundan az süre kaldıysa çağrı hiç başlatılmaz
+
+    def __init__(self, budget: float, clock=time.monotonic):
+        self.budget = budget
+        self._clock = clock
+        self.expires_at = clock() + budget
+
+    def remaining(self) -> float:
+        return max(0.0, self.expires_at - self._clock())
+
+    def elapsed(self) -> float:
+        return self.budget - (self.expires_at - self._clock())
+
+    @property
+    def expired(self) -> bool:
+        return self.remaining() <= 0
+
+    def timeout(self, cap: Optional[float] = None, minimum: Optional[float] = None) -> float:
+        """Bir çağrı için timeout - cap ile sınırlı, yetmiyorsa DeadlineExceeded"""
+
+        minimum = self.MIN_CALL_TIMEOUT if minimum is None else minimum
+        remaining = self.remaining()
+        if remaining < minimum:
+            raise DeadlineExceeded(f"{remaining:.2f}s left of {self.budget:.0f}s budget")
+        return min(remaining, cap) if cap else remaining
+
+    def __repr__(self) -> str:
+        return f"Deadline(remaining={self.remaining():.2f}s, budget={self.budget}s)"
@@ -0,0 +1,78 @@
+import os
+import asyncio
+import logging
+import threading
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+
+class WorkerEventLoop:
+    """Worker başına tek asyncio loop'u - arka plan thread'inde çalışır
+
+    Senkron kod (gthread istek thread'leri, replay worker'ları) coroutine'leri
+    submit/run ile bu loop'a verir; async HTTP havuzları tek loop'a bağlı
+    kaldığı için tüm CRM çağrıları aynı bağlantıları paylaşır.
+    """
+
+    def __init__(self, name: str = 'worker-event-loop'):
+        self.name = name
+        self.loop = None
+        self._thread = None
+        self._pid = None
+        self._lock = threading.Lock()
+
+    def start(self) -> asyncio.AbstractEventLoop:
+        with self._lock:
+            # Fork sonrası parent'ın loop thread'i bu süreçte yok
+            if self.loop is not None and self._pid == os.getpid() and self._thread.is_alive():
+                return self.loop
+
+            loop = asyncio.new_event_loop()
+            ready = threading.Event()
+
+            def run():
+                asyncio.set_event_loop(loop)
+                loop.call_soon(ready.set)
+                loop.run_forever()
+
+            self._thread = threading.Thread(target=run, name=self.name, daemon=True)
+            self._thread.start()
+            ready.wait()
+            self.loop, self._pid = loop, os.getpid()
+            return loop
+
+    def submit(self, coro) -> Future:
+        """Coroutine'i loop'a ver - concurrent.futures.Future döner"""
+        return asyncio.run_coroutine_threadsafe(coro, self.start())
+
+    def run(self, coro, timeout: Optional[float] = None):
+        """Senkron çağıran için: sonucu bekle (timeout'ta TimeoutError, coroutine iptal edilir)"""
+
+        future = self.submit(coro)
+        try:
+            return future.result(timeout)
+        except FutureTimeoutError:
+            # 3.10'da concurrent.futures.TimeoutError yerleşik TimeoutError değil
+            future.cancel()
+            raise TimeoutError(f"Event loop call timed out after {timeout:.1f}s") from None
+
+    def stop(self, timeout: float = 5.0):
+        with self._lock:
+            loop, thread = self.loop, self._thread
+            self.loop = self._thread = None
+            if loop is None or self._pid != os.getpid():
+                return
+            loop.call_soon_threadsafe(loop.stop)
+        thread.join(timeout)
+        if not thread.is_alive():
+            loop.close()
+
+
+_worker_loop = WorkerEventLoop()
+
+
+def get_worker_loop() -> WorkerEventLoop:
+    """Süreç içi paylaşılan loop (ilk kullanımda başlar)"""
+    return _worker_loop
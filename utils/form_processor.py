@@ -2,6 +2,9 @@ import logging
 from typing import Dict, Any, List
 from datetime import datetime
 
+from utils.logging_setup import HOT
+from utils.validation_gate import EMAIL_PATTERN
+
 logger = logging.getLogger(__name__)
 
 class FormProcessor:
@@ -191,7 +194,7 @@ class FormProcessor:
                 if value is not None and str(value).strip():
                     field_dict[label] = value
             
-            logger.info(f"Extracted {len(field_dict)} fields from {len(form_fields)} total fields")
+            logger.info("Extracted %d fields from %d total fields", len(field_dict), len(form_fields), extra=HOT)
             
             # Structured data oluştur
             extracted = self._map_fields_to_structure(field_dict, data_section)
@@ -199,7 +202,7 @@ class FormProcessor:
             return extracted
             
         except Exception as e:
-            logger.error(f"Error extracting form data: {str(e)}")
+            logger.error("Error extracting form data: %s", e)
             return {}
     
     def _get_field_value(self, field_dict: Dict, field_options: List[str]) -> str:
@@ -243,7 +246,7 @@ class FormProcessor:
             return 'general'
             
         except Exception as e:
-            logger.error(f"Error determining category: {str(e)}")
+            logger.error("Error determining category: %s", e)
             return 'general'
     
     def get_contact_info(self, extracted_data: Dict) -> Dict:
@@ -269,7 +272,7 @@ class FormProcessor:
             }
             
         except Exception as e:
-            logger.error(f"Error getting contact info: {str(e)}")
+            logger.error("Error getting contact info: %s", e)
             return {
                 'firstname': '', 'lastname': '', 'fullname': '',
                 'email': '', 'phone': '', 'valid': False
@@ -443,7 +446,7 @@ class FormProcessor:
         
         # Email kontrolü
         email = extracted_data.get('email', '')
-        if not email or '@' not in email:
+        if not email or not EMAIL_PATTERN.fullmatch(email):
             validation['is_valid'] = False
             validation['errors'].append('Invalid or missing email address')
         
@@ -0,0 +1,78 @@
+import json
+import logging
+from datetime import date, datetime, time
+from typing import Any, Callable, Optional, Union
+
+logger = logging.getLogger(__name__)
+
+# orjson opsiyonel - yoksa stdlib json (aynı çıktı tipleri: dumps -> bytes)
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+BACKEND = 'orjson' if orjson is not None else 'json'
+
+JSONDecodeError = json.JSONDecodeError  # orjson.JSONDecodeError bunun alt sınıfı
+
+
+def _default(value: Any) -> str:
+    # Tarih/saat iki backend'de de ISO-8601 (orjson'ın RFC 3339 çıktısı, Flask'ın HTTP-date'i değil)
+    if isinstance(value, (datetime, date, time)):
+        return value.isoformat()
+    # Bilinmeyen tipler (Decimal, set, özel nesneler) loglarda ve payload'larda str olarak yazılır
+    return str(value)
+
+
+def loads(data: Union[bytes, bytearray, memoryview, str]) -> Any:
+    """Ham byte'lardan doğrudan decode - str'ye çevirmeden"""
+
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+if orjson is not None:
+    _SORTED = orjson.OPT_SORT_KEYS
+    _INDENT = orjson.OPT_INDENT_2
+
+    def dumps(value: Any, default: Optional[Callable] = _default, sort_keys: bool = False,
+              indent: bool = False) -> bytes:
+        """UTF-8 JSON byte'ları (ensure_ascii yok)"""
+
+        option = (_SORTED if sort_keys else 0) | (_INDENT if indent else 0) | orjson.OPT_NON_STR_KEYS
+        return orjson.dumps(value, default=default, option=option)
+else:
+    def dumps(value: Any, default: Optional[Callable] = _default, sort_keys: bool = False,
+              indent: bool = False) -> bytes:
+        """UTF-8 JSON byte'ları (ensure_ascii yok)"""
+
+        return json.dumps(value, ensure_ascii=False, default=default, sort_keys=sort_keys,
+                          indent=2 if indent else None, separators=None if indent else (',', ':')).encode('utf-8')
+
+
+def dumps_str(value: Any, default: Optional[Callable] = _default, sort_keys: bool = False) -> str:
+    """Metin olarak gereken yerler için (log satırları, SQLite TEXT kolonları)"""
+    return dumps(value, default=default, sort_keys=sort_keys).decode('utf-8')
+
+
+def install(app):
+    """Flask'ın get_json/jsonify yolunu bu codec'e bağla"""
+
+    from flask.json.provider import DefaultJSONProvider
+
+    class CodecJSONProvider(DefaultJSONProvider):
+        def dumps(self, obj: Any, **kwargs) -> str:
+            return dumps_str(obj, sort_keys=kwargs.get('sort_keys', False))
+
+        def loads(self, s: Union[str, bytes], **kwargs) -> Any:
+            return loads(s)
+
+        def response(self, *args, **kwargs):
+            obj = self._prepare_response_obj(args, kwargs)
+            # str'ye çevirip tekrar encode etmeden doğrudan byte gövde
+            return self._app.response_class(dumps(obj, indent=self._app.debug) + b"\n", mimetype=self.mimetype)
+
+    app.json = CodecJSONProvider(app)
+    logger.info("JSON codec: %s", BACKEND)
+    return app.json
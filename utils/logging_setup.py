@@ -0,0 +1,299 @@
+import os
+import sys
+import json
+import queue
+import atexit
+import random
+import logging
+import threading
+import logging.handlers
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+
+# Sık tekrarlanan istek içi log satırları için: logger.info("...", extra=HOT)
+HOT = {"hot_path": True}
+
+_STANDARD_ATTRS = set(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'asctime'}
+
+
+def mask_email(email: str) -> str:
+    """Loglar için email maskele: ayse@gmail.com -> a***@gmail.com"""
+
+    if not email or '@' not in email:
+        return '***' if email else ''
+    local, _, domain = email.partition('@')
+    return f"{local[:1]}***@{domain}"
+
+
+class JsonFormatter(logging.Formatter):
+    """Cloud Logging'in stdout'tan okuduğu structured JSON formatı"""
+
+    def to_dict(self, record: logging.LogRecord) -> Dict:
+        entry = {
+            "severity": record.levelname,
+            "message": record.getMessage(),
+            "time": datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            "logger": record.name,
+            "pid": record.process,
+            "thread": record.threadName
+        }
+
+        # extra={...} ile gelen alanlar
+        for key, value in record.__dict__.items():
+            if key not in _STANDARD_ATTRS and key != 'hot_path':
+                entry[key] = value
+
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry["exception"] = record.exc_text
+
+        return entry
+
+    def format(self, record: logging.LogRecord) -> str:
+        return json.dumps(self.to_dict(record), ensure_ascii=False, default=str)
+
+
+class SamplingFilter(logging.Filter):
+    """Hot-path kayıtlarını seviye bazlı oranla örnekle (diğerleri hep geçer)"""
+
+    def __init__(self, rates: Dict[int, float]):
+        super().__init__()
+        self.rates = rates
+        self._random = random.random
+
+    @staticmethod
+    def parse_rates(spec: str) -> Dict[int, float]:
+        """'DEBUG=0,INFO=0.1' -> {10: 0.0, 20: 0.1}"""
+
+        rates = {}
+        for item in (spec or '').split(','):
+            if '=' in item:
+                level, rate = item.split('=', 1)
+                rates[logging.getLevelName(level.strip().upper())] = float(rate)
+        return rates
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if not getattr(record, 'hot_path', False):
+            return True
+        rate = self.rates.get(record.levelno, 1.0)
+        return rate >= 1.0 or (rate > 0 and self._random() < rate)
+
+
+class DeferredQueueHandler(logging.handlers.QueueHandler):
+    """Mesajı istek thread'inde formatlamadan kuyruğa at
+
+    Standart QueueHandler.prepare() format'ı çağıran thread'de yapar;
+    burada sadece exception traceback'i (frame'ler kaybolmadan) metne
+    çevrilir, %-formatlama listener thread'ine kalır.
+    """
+
+    dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            # İstek thread'i log I/O için asla beklemez
+            self.dropped += 1
+
+
+class FileBatchSink:
+    """Cloud Logging yerine yerel JSONL dosyası (test/staging)"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.batches = 0
+
+    def write_batch(self, entries: List[Dict]):
+        with open(self.path, 'a', encoding='utf-8') as f:
+            f.write(''.join(json.dumps(e, ensure_ascii=False, default=str) + '\n' for e in entries))
+        self.batches += 1
+
+    def close(self):
+        pass
+
+
+class CloudLoggingSink:
+    """google-cloud-logging ile toplu gönderim (tek API çağrısında N kayıt)"""
+
+    def __init__(self, log_name: str = 'britishglobal-webhook'):
+        from google.cloud import logging as cloud_logging  # Opsiyonel bağımlılık
+
+        self.client = cloud_logging.Client()
+        self.logger = self.client.logger(log_name)
+        self.batches = 0
+
+    def write_batch(self, entries: List[Dict]):
+        batch = self.logger.batch()
+        for entry in entries:
+            severity = entry.pop('severity', 'DEFAULT')
+            batch.log_struct(entry, severity=severity)
+        batch.commit()
+        self.batches += 1
+
+    def close(self):
+        self.client.close()
+
+
+class BatchingHandler(logging.Handler):
+    """Listener thread'inde kayıtları biriktirip sink'e toplu gönderir"""
+
+    def __init__(self, sink, batch_size: int = 100, flush_interval: float = 5.0):
+        super().__init__()
+        self.sink = sink
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.setFormatter(JsonFormatter())
+
+        self._buffer = []
+        self._buffer_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._timer = threading.Thread(target=self._flush_loop, name='log-batch-flusher', daemon=True)
+        self._timer.start()
+
+    def emit(self, record: logging.LogRecord):
+        try:
+            entry = self.formatter.to_dict(record)
+        except Exception:
+            self.handleError(record)
+            return
+
+        with self._buffer_lock:
+            self._buffer.append(entry)
+            full = len(self._buffer) >= self.batch_size
+        if full:
+            self.flush()
+
+    def flush(self):
+        with self._buffer_lock:
+            entries, self._buffer = self._buffer, []
+        if not entries:
+            return
+        try:
+            self.sink.write_batch(entries)
+        except Exception as e:
+            sys.stderr.write(f"Log batch shipping failed ({len(entries)} entries): {e}\n")
+
+    def _flush_loop(self):
+        while not self._stop.wait(self.flush_interval):
+            self.flush()
+
+    def close(self):
+        self._stop.set()
+        self.flush()
+        try:
+            self.sink.close()
+        except Exception:
+            pass
+        super().close()
+
+
+_listener = None
+_listener_lock = threading.Lock()
+
+
+def _build_sink(spec: str):
+    """LOG_SINK: '' | 'cloud' | 'cloud:<log_name>' | 'file:<path>'"""
+
+    if not spec:
+        return None
+    kind, _, target = spec.partition(':')
+    if kind == 'file':
+        return FileBatchSink(target or 'webhook-logs.jsonl')
+    if kind == 'cloud':
+        try:
+            return CloudLoggingSink(target or 'britishglobal-webhook')
+        except Exception as e:
+            sys.stderr.write(f"Cloud Logging sink unavailable, using stdout only: {e}\n")
+            return None
+    raise ValueError(f"Unknown LOG_SINK: {spec}")
+
+
+def configure_logging(level: Optional[str] = None, log_format: Optional[str] = None,
+                      sample_rates: Optional[str] = None, sink: Optional[str] = None,
+                      batch_size: Optional[int] = None, flush_interval: Optional[float] = None,
+                      queue_size: int = 10000) -> logging.handlers.QueueListener:
+    """Root logger'ı kuyruk + listener thread'i ile kur (idempotent)"""
+    global _listener
+
+    level = level or os.environ.get('LOG_LEVEL', 'INFO')
+    log_format = log_format or os.environ.get('LOG_FORMAT', 'json')
+    sample_rates = sample_rates if sample_rates is not None else os.environ.get('LOG_SAMPLE_RATES', '')
+    sink = sink if sink is not None else os.environ.get('LOG_SINK', '')
+    batch_size = batch_size or int(os.environ.get('LOG_BATCH_SIZE', '100'))
+    flush_interval = flush_interval or float(os.environ.get('LOG_FLUSH_INTERVAL', '5'))
+
+    with _listener_lock:
+        if _listener is not None:
+            return _listener
+
+        stream = logging.StreamHandler(sys.stdout)
+        if log_format == 'json':
+            stream.setFormatter(JsonFormatter())
+        else:
+            stream.setFormatter(logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s'))
+
+        handlers = [stream]
+        batch_sink = _build_sink(sink)
+        if batch_sink is not None:
+            handlers.append(BatchingHandler(batch_sink, batch_size, flush_interval))
+            if isinstance(batch_sink, CloudLoggingSink):
+                # Cloud Run stdout'u da topluyor - çift kayıt olmasın
+                stream.setLevel(logging.WARNING)
+
+        log_queue = queue.Queue(maxsize=queue_size)
+        queue_handler = DeferredQueueHandler(log_queue)
+        rates = SamplingFilter.parse_rates(sample_rates)
+        if rates:
+            # Örnekleme kuyruğa girmeden yapılır - atılan kayıt hiç maliyet üretmez
+            queue_handler.addFilter(SamplingFilter(rates))
+
+        root = logging.getLogger()
+        for handler in list(root.handlers):
+            root.removeHandler(handler)
+        root.addHandler(queue_handler)
+        root.setLevel(level)
+
+        _listener = logging.handlers.QueueListener(log_queue, *handlers, respect_handler_level=True)
+        _listener.start()
+        atexit.register(shutdown_logging)
+        return _listener
+
+
+def shutdown_logging():
+    """Kuyruğu boşalt, batch'leri gönder"""
+    global _listener
+
+    with _listener_lock:
+        listener, _listener = _listener, None
+    if listener is None:
+        return
+
+    listener.stop()
+    for handler in listener.handlers:
+        try:
+            handler.flush()
+            handler.close()
+        except Exception:
+            pass
+
+
+def _restart_after_fork():
+    """Listener thread'i fork'ta kopyalanmaz - child'da yeniden kur"""
+    global _listener, _listener_lock
+
+    _listener_lock = threading.Lock()
+    if _listener is not None:
+        _listener = None
+        configure_logging()
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_restart_after_fork)
@@ -0,0 +1,56 @@
+import hmac
+import base64
+import hashlib
+import logging
+import threading
+from typing import Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+SIGNATURE_HEADER = 'Tally-Signature'
+
+
+class WebhookVerifier:
+    """Tally-Signature doğrulaması - ham gövde üzerinde HMAC-SHA256 (base64)
+
+    Birden fazla secret aynı anda geçerlidir; rotasyonda yeni secret
+    listenin başına eklenir, Tally'de güncellendikten sonra eskisi
+    çıkarılır. Anahtar başına HMAC state'i bir kez kurulur, istek başına
+    sadece kopyalanır.
+    """
+
+    def __init__(self, secrets: List[str], header: str = SIGNATURE_HEADER):
+        self.header = header
+        self._macs = [hmac.new(secret.encode('utf-8'), digestmod=hashlib.sha256) for secret in secrets if secret]
+        self.stats = {"verified": 0, "missing": 0, "invalid": 0}
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self._macs)
+
+    def _count(self, key: str):
+        with self._lock:
+            self.stats[key] += 1
+
+    def verify(self, raw_body: bytes, signature: Optional[str]) -> bool:
+        """İmza geçerli secret'lardan biriyle eşleşiyor mu (sabit süreli karşılaştırma)"""
+
+        if not signature:
+            self._count("missing")
+            return False
+
+        provided = signature.strip().encode('ascii', 'replace')
+        matched = False
+        for mac in self._macs:
+            digest = mac.copy()
+            digest.update(raw_body)
+            # Kısa devre yok - eşleşen anahtarın sırası süreden anlaşılmaz
+            matched |= hmac.compare_digest(base64.b64encode(digest.digest()), provided)
+
+        self._count("verified" if matched else "invalid")
+        return matched
+
+    def get_stats(self) -> Dict:
+        with self._lock:
+            return {**self.stats, "active_keys": len(self._macs)}
@@ -0,0 +1,236 @@
+import re
+import time
+import hashlib
+import logging
+import threading
+from collections import OrderedDict, deque
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from utils.logging_setup import HOT, mask_email
+
+logger = logging.getLogger(__name__)
+
+# Sık görülen tek kullanımlık email servisleri - SPAM_DISPOSABLE_DOMAINS_FILE ile genişletilir
+DISPOSABLE_DOMAINS = frozenset((
+    'mailinator.com', 'guerrillamail.com', 'guerrillamail.net', 'sharklasers.com', '10minutemail.com',
+    'temp-mail.org', 'tempmail.com', 'throwawaymail.com', 'yopmail.com', 'getnada.com', 'trashmail.com',
+    'dispostable.com', 'maildrop.cc', 'fakeinbox.com', 'mintemail.com', 'mohmal.com', 'emailondeck.com',
+    'mytemp.email', 'tempail.com', 'burnermail.io',
+))
+
+# Gerçek başvuruya da denk gelebilen nedenler - düşürülmez, inceleme kaydına yazılır (mail atılmaz)
+REVIEW_REASONS = ('email_rate', 'duplicate_notes')
+
+_WORD = re.compile(r'\w+')
+_MERSENNE = (1 << 61) - 1
+
+
+def load_domains(path: str) -> frozenset:
+    """Satır başına bir domain ('#' yorum) - dosya yoksa boş"""
+
+    try:
+        with open(path, encoding='utf-8') as f:
+            return frozenset(line.strip().lower() for line in f if line.strip() and not line.startswith('#'))
+    except OSError as e:
+        logger.warning("Disposable domain list not loaded from %s: %s", path, e)
+        return frozenset()
+
+
+class SlidingWindowLimiter:
+    """Anahtar başına son window saniyedeki istek sayısı - en eski anahtarlar max_keys'te atılır
+
+    token verilirse (submission_id) pencerede zaten sayılmış token tekrar
+    sayılmaz - Tally'nin aynı gönderimi yeniden teslimi limite yazılmaz.
+    """
+
+    def __init__(self, limit: int, window: float, max_keys: int = 10000):
+        self.limit = limit
+        self.window = window
+        self.max_keys = max_keys
+        self._hits = OrderedDict()
+
+    def hit(self, key: str, now: float, token: str = '') -> bool:
+        """İsteği say - limit aşıldıysa False (reddedilen istek sayılmaz)"""
+
+        hits = self._hits.get(key)
+        if hits is None:
+            hits = self._hits[key] = deque()
+            if len(self._hits) > self.max_keys:
+                self._hits.popitem(last=False)
+        else:
+            self._hits.move_to_end(key)
+        while hits and hits[0][0] <= now - self.window:
+            hits.popleft()
+        if token and any(seen == token for _, seen in hits):
+            return True
+        if len(hits) >= self.limit:
+            return False
+        hits.append((now, token))
+        return True
+
+
+class MinHashIndex:
+    """Notlar için MinHash + LSH band index'i - en fazla max_entries imza tutar
+
+    Kelime 3-gram'larının imzası bands x rows permütasyonla çıkarılır;
+    aynı band'ı paylaşan adaylar imza benzerliğiyle (Jaccard tahmini)
+    karşılaştırılır. Lookup aday sayısıyla orantılıdır, tüm index taranmaz.
+    """
+
+    def __init__(self, bands: int = 8, rows: int = 4, max_entries: int = 5000, shingle_size: int = 3):
+        self.bands = bands
+        self.rows = rows
+        self.max_entries = max_entries
+        self.shingle_size = shingle_size
+        # Sabit tohumlu permütasyonlar - worker'lar arası aynı imza
+        seeds = hashlib.blake2b(b'britishglobal-minhash', digest_size=64).digest()
+        self._perms = []
+        for i in range(bands * rows):
+            digest = hashlib.blake2b(seeds + i.to_bytes(2, 'big'), digest_size=16).digest()
+            self._perms.append((int.from_bytes(digest[:8], 'big') % (_MERSENNE - 1) + 1,
+                                int.from_bytes(digest[8:], 'big') % _MERSENNE))
+        self._entries = OrderedDict()  # entry_id -> (signature, owner)
+        self._buckets = {}  # (band, band_hash) -> set(entry_id)
+        self._next_id = 0
+
+    def signature(self, text: str) -> Optional[Tuple[int, ...]]:
+        words = _WORD.findall(text.lower())
+        if len(words) < self.shingle_size:
+            return None
+        shingles = {int.from_bytes(hashlib.blake2b(' '.join(words[i:i + self.shingle_size]).encode(),
+                                                   digest_size=8).digest(), 'big')
+                    for i in range(len(words) - self.shingle_size + 1)}
+        return tuple(min((a * h + b) % _MERSENNE for h in shingles) for a, b in self._perms)
+
+    def _band_keys(self, signature: Tuple[int, ...]) -> List[Tuple[int, int]]:
+        rows = self.rows
+        return [(band, hash(signature[band * rows:(band + 1) * rows])) for band in range(self.bands)]
+
+    def similar_owners(self, signature: Tuple[int, ...], threshold: float) -> set:
+        """İmzası threshold'dan benzer kayıtların sahipleri"""
+
+        candidates = set()
+        for key in self._band_keys(signature):
+            candidates |= self._buckets.get(key, set())
+        owners = set()
+        size = len(signature)
+        for entry_id in candidates:
+            other, owner = self._entries[entry_id]
+            if sum(x == y for x, y in zip(signature, other)) / size >= threshold:
+                owners.add(owner)
+        return owners
+
+    def add(self, signature: Tuple[int, ...], owner: str):
+        entry_id = self._next_id
+        self._next_id += 1
+        self._entries[entry_id] = (signature, owner)
+        for key in self._band_keys(signature):
+            self._buckets.setdefault(key, set()).add(entry_id)
+        if len(self._entries) > self.max_entries:
+            old_id, (old_signature, _) = self._entries.popitem(last=False)
+            for key in self._band_keys(old_signature):
+                bucket = self._buckets.get(key)
+                if bucket is not None:
+                    bucket.discard(old_id)
+                    if not bucket:
+                        del self._buckets[key]
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class SpamFilter:
+    """Extraction sonrası, HubSpot ve email adımlarından önce çalışan spam/bot filtresi
+
+    Sırayla: honeypot alanı, tek kullanımlık domain, email ve IP başına
+    kayan pencere limiti, notes metninde farklı adreslerden gelen neredeyse
+    aynı mesajlar. Kesin nedenler (honeypot, domain, IP) {"filtered": True}
+    ile 200 döner; REVIEW_REASONS {"review": True} ile yöneticiye gider.
+    IP limiti imzası doğrulanmış isteklere uygulanmaz - onlar Tally'nin
+    kendi IP'lerinden gelir.
+    """
+
+    def __init__(self, honeypot_fields: Iterable[str] = (), disposable_domains: Iterable[str] = DISPOSABLE_DOMAINS,
+                 email_limit: int = 5, email_window: float = 3600.0, ip_limit: int = 120, ip_window: float = 60.0,
+                 duplicate_threshold: float = 0.8, duplicate_senders: int = 5, min_notes_words: int = 20,
+                 index_size: int = 5000, review_reasons: Iterable[str] = REVIEW_REASONS):
+        self.honeypot_fields = frozenset(honeypot_fields)
+        self.disposable_domains = frozenset(d.lower() for d in disposable_domains)
+        self.email_limiter = SlidingWindowLimiter(email_limit, email_window) if email_limit else None
+        self.ip_limiter = SlidingWindowLimiter(ip_limit, ip_window) if ip_limit else None
+        self.duplicate_threshold = duplicate_threshold
+        self.duplicate_senders = duplicate_senders  # aynı metni gönderen farklı adres sayısı
+        self.min_notes_words = min_notes_words
+        self.notes_index = MinHashIndex(max_entries=index_size) if duplicate_senders else None
+        self.review_reasons = frozenset(review_reasons)
+        self.stats = {"checked": 0, "filtered": 0, "review": 0, "reasons": {}}
+        self._lock = threading.Lock()
+
+    def _honeypot_filled(self, data: Dict) -> bool:
+        if not self.honeypot_fields:
+            return False
+        section = data.get('data') if isinstance(data, dict) else None
+        for field in (section or {}).get('fields') or []:
+            if isinstance(field, dict) and (field.get('label') in self.honeypot_fields
+                                            or field.get('key') in self.honeypot_fields):
+                value = field.get('value')
+                if value not in (None, '', [], False):
+                    return True
+        return False
+
+    def _disposable(self, email: str) -> bool:
+        domain = email.rpartition('@')[2].lower()
+        while domain:
+            if domain in self.disposable_domains:
+                return True
+            domain = domain.partition('.')[2]
+        return False
+
+    def _reason(self, data: Dict, extracted_data: Dict, email: str, client_ip: Optional[str], signed: bool,
+                now: float) -> str:
+        if self._honeypot_filled(data):
+            return 'honeypot'
+        if email and self._disposable(email):
+            return 'disposable_domain'
+        submission_id = extracted_data.get('submission_id', '')
+        if self.email_limiter and email and not self.email_limiter.hit(email.lower(), now, submission_id):
+            return 'email_rate'
+        if self.ip_limiter and client_ip and not signed and not self.ip_limiter.hit(client_ip, now):
+            return 'ip_rate'
+
+        notes = extracted_data.get('notes', '')
+        if self.notes_index is not None and notes and len(notes.split()) >= self.min_notes_words:
+            signature = self.notes_index.signature(notes)
+            if signature is not None:
+                owners = self.notes_index.similar_owners(signature, self.duplicate_threshold)
+                owners.discard(email.lower())
+                self.notes_index.add(signature, email.lower())
+                if len(owners) + 1 >= self.duplicate_senders:
+                    return 'duplicate_notes'
+        return ''
+
+    def check(self, data: Dict, extracted_data: Dict, contact_info: Dict, client_ip: Optional[str] = None,
+              signed: bool = False) -> Dict:
+        """{"filtered": bool, "review": bool, "reason"} - ikisi de HubSpot'a gitmemeli
+
+        signed: webhook imzası doğrulandı (IP limiti atlanır).
+        """
+
+        email = contact_info.get('email', '')
+        with self._lock:
+            reason = self._reason(data, extracted_data, email, client_ip, signed, time.time())
+            review = reason in self.review_reasons
+            self.stats["checked"] += 1
+            if reason:
+                self.stats["review" if review else "filtered"] += 1
+                self.stats["reasons"][reason] = self.stats["reasons"].get(reason, 0) + 1
+
+        if reason:
+            logger.info("Submission %s %s as spam (%s) - %s", extracted_data.get('submission_id', ''),
+                        "suspected" if review else "filtered", reason, mask_email(email), extra=HOT)
+        return {"filtered": bool(reason) and not review, "review": review, "reason": reason}
+
+    def get_stats(self) -> Dict:
+        with self._lock:
+            return {**self.stats, "reasons": dict(self.stats["reasons"]),
+                    "notes_indexed": len(self.notes_index) if self.notes_index is not None else 0}
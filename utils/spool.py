@@ -0,0 +1,228 @@
+import os
+import time
+import logging
+import threading
+from typing import Callable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class DirectorySpool:
+    """Ham webhook body'lerini dosya olarak bekleten kuyruk
+
+    Aynı instance'taki worker'lar dizini paylaşır; bir dosyayı işlemek için
+    önce atomik rename ile sahiplenilir (.claimed), böylece iki worker aynı
+    gönderimi işlemez. Cloud Run'da dizin instance belleğindedir - instance
+    kapanınca spool kaybolur, bu yüzden sadece yük altında degrade modudur.
+
+    Başarısız kayıt adına deneme sayısı eklenerek (~N) geri konur ve dosya
+    mtime'ı "şu zamandan önce alma" olarak ileri çekilir; claim zamanı
+    gelmemiş kayıtları atlar, böylece takılan kayıt arkasındakileri bekletmez.
+    """
+
+    READY_SUFFIX = '.json'
+    CLAIMED_SUFFIX = '.claimed'
+    ATTEMPT_SEPARATOR = '~'
+    DEAD_LETTER_DIR = 'dead'
+
+    def __init__(self, directory: str, max_depth: int = 1000, stale_claim_seconds: float = 600):
+        self.directory = directory
+        self.max_depth = max_depth
+        self.stale_claim_seconds = stale_claim_seconds
+        self._counter = 0
+        self._lock = threading.Lock()
+        self.dead_letter_directory = os.path.join(directory, self.DEAD_LETTER_DIR)
+        os.makedirs(directory, exist_ok=True)
+
+    @classmethod
+    def attempts(cls, name: str) -> int:
+        """Kaydın şimdiye kadar başarısız olduğu deneme sayısı"""
+        _, separator, count = name.rpartition(cls.ATTEMPT_SEPARATOR)
+        return int(count) if separator and count.isdigit() else 0
+
+    @classmethod
+    def _base_name(cls, name: str) -> str:
+        base, separator, count = name.rpartition(cls.ATTEMPT_SEPARATOR)
+        return base if separator and count.isdigit() else name
+
+    def _entries(self, suffix: str) -> List[str]:
+        try:
+            return sorted(e.name for e in os.scandir(self.directory) if e.name.endswith(suffix))
+        except FileNotFoundError:
+            return []
+
+    def depth(self) -> int:
+        """Bekleyen + işlenmekte olan kayıt sayısı"""
+        return len(self._entries(self.READY_SUFFIX)) + len(self._entries(self.CLAIMED_SUFFIX))
+
+    def put(self, raw_body: bytes) -> Optional[str]:
+        """Body'yi yaz - spool doluysa None"""
+
+        if self.depth() >= self.max_depth:
+            return None
+
+        with self._lock:
+            self._counter += 1
+            counter = self._counter
+
+        # İsim sıralaması = varış sırası
+        name = f"{time.time_ns():020d}-{os.getpid()}-{counter:06d}"
+        tmp_path = os.path.join(self.directory, name + '.tmp')
+        with open(tmp_path, 'wb') as f:
+            f.write(raw_body)
+        os.replace(tmp_path, os.path.join(self.directory, name + self.READY_SUFFIX))
+        return name
+
+    def claim(self) -> Optional[tuple]:
+        """Zamanı gelmiş en eski kaydı sahiplen - (name, body) ya da None"""
+
+        now = time.time()
+        for entry in self._entries(self.READY_SUFFIX):
+            name = entry[:-len(self.READY_SUFFIX)]
+            ready = os.path.join(self.directory, entry)
+            claimed = os.path.join(self.directory, name + self.CLAIMED_SUFFIX)
+            try:
+                if os.path.getmtime(ready) > now:
+                    continue  # Backoff süresi dolmadı
+                os.rename(ready, claimed)
+            except FileNotFoundError:
+                continue  # Başka worker aldı
+            os.utime(claimed)  # Sahiplenme zamanı - stale claim tespiti için
+            with open(claimed, 'rb') as f:
+                return name, f.read()
+        return None
+
+    def complete(self, name: str):
+        try:
+            os.remove(os.path.join(self.directory, name + self.CLAIMED_SUFFIX))
+        except FileNotFoundError:
+            pass
+
+    def release(self, name: str):
+        """İşlenemedi - kuyruğa geri koy"""
+        try:
+            os.rename(os.path.join(self.directory, name + self.CLAIMED_SUFFIX),
+                      os.path.join(self.directory, name + self.READY_SUFFIX))
+        except FileNotFoundError:
+            pass
+
+    def retry(self, name: str, delay: float) -> int:
+        """Başarısız deneme - sayacı artırıp delay saniye sonra alınmak üzere geri koy"""
+
+        attempts = self.attempts(name) + 1
+        ready = os.path.join(self.directory, f"{self._base_name(name)}{self.ATTEMPT_SEPARATOR}{attempts}{self.READY_SUFFIX}")
+        try:
+            os.rename(os.path.join(self.directory, name + self.CLAIMED_SUFFIX), ready)
+            not_before = time.time() + delay
+            os.utime(ready, (not_before, not_before))
+        except FileNotFoundError:
+            pass
+        return attempts
+
+    def dead_letter(self, name: str):
+        """Deneme hakkı bitti - kuyruktan çıkar, incelemek için dead/ altına taşı"""
+
+        os.makedirs(self.dead_letter_directory, exist_ok=True)
+        try:
+            os.rename(os.path.join(self.directory, name + self.CLAIMED_SUFFIX),
+                      os.path.join(self.dead_letter_directory, name + self.READY_SUFFIX))
+        except FileNotFoundError:
+            pass
+
+    def dead_letter_count(self) -> int:
+        try:
+            return sum(1 for e in os.scandir(self.dead_letter_directory) if e.name.endswith(self.READY_SUFFIX))
+        except FileNotFoundError:
+            return 0
+
+    def recover_stale_claims(self) -> int:
+        """Ölen worker'ların sahiplendiği eski kayıtları geri al"""
+
+        recovered = 0
+        now = time.time()
+        for entry in self._entries(self.CLAIMED_SUFFIX):
+            path = os.path.join(self.directory, entry)
+            try:
+                if now - os.path.getmtime(path) > self.stale_claim_seconds:
+                    self.release(entry[:-len(self.CLAIMED_SUFFIX)])
+                    recovered += 1
+            except FileNotFoundError:
+                continue
+        return recovered
+
+
+class SpoolDrainer:
+    """Spool'daki kayıtları arka planda işleyen thread"""
+
+    def __init__(self, spool: DirectorySpool, handler: Callable[[bytes], bool],
+                 idle_interval: float = 1.0, retry_delay: float = 5.0,
+                 max_retry_delay: float = 300.0, max_attempts: int = 8):
+        self.spool = spool
+        self.handler = handler
+        self.idle_interval = idle_interval
+        self.retry_delay = retry_delay
+        self.max_retry_delay = max_retry_delay
+        self.max_attempts = max_attempts
+        self._stop = threading.Event()
+        self._wake = threading.Event()
+        self._thread = None
+        self.stats = {"processed": 0, "failed": 0, "dead_lettered": 0}
+
+    def notify(self):
+        """Yeni kayıt yazıldı - beklemeden uyan"""
+        self._wake.set()
+
+    def backoff(self, attempts: int) -> float:
+        """attempts. başarısızlıktan sonra beklenecek süre (üstel, max_retry_delay ile sınırlı)"""
+        return min(self.retry_delay * 2 ** (attempts - 1), self.max_retry_delay)
+
+    def _fail(self, name: str):
+        self.stats["failed"] += 1
+        attempts = self.spool.attempts(name) + 1
+        if attempts >= self.max_attempts:
+            self.spool.dead_letter(name)
+            self.stats["dead_lettered"] += 1
+            logger.error("Spooled submission %s moved to dead letters after %d attempts", name, attempts)
+            return
+        self.spool.retry(name, self.backoff(attempts))
+
+    def _loop(self):
+        self.spool.recover_stale_claims()
+
+        while not self._stop.is_set():
+            item = self.spool.claim()
+            if item is None:
+                self._wake.wait(self.idle_interval)
+                self._wake.clear()
+                continue
+
+            name, body = item
+            try:
+                ok = self.handler(body)
+            except Exception as e:
+                logger.error("Spooled submission %s failed: %s", name, e)
+                ok = False
+
+            if ok:
+                self.spool.complete(name)
+                self.stats["processed"] += 1
+            else:
+                self._fail(name)
+
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._loop, name='spool-drainer', daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 10.0):
+        self._stop.set()
+        self._wake.set()
+        if self._thread:
+            self._thread.join(timeout)
+            self._thread = None
+
+    @property
+    def running(self) -> bool:
+        return bool(self._thread and self._thread.is_alive())
@@ -0,0 +1,136 @@
+import re
+import sys
+import time
+import argparse
+import importlib
+import threading
+import subprocess
+from contextlib import contextmanager
+from typing import Dict, List
+
+PROCESS_START = time.perf_counter()
+
+
+class StartupReport:
+    """Cold start süreleri - modül import'ları ve başlangıç fazları (ms)"""
+
+    def __init__(self):
+        self.imports = {}
+        self.phases = {}
+        self._lock = threading.Lock()
+
+    def timed_import(self, module_name: str):
+        """Modülü import et, süresini ve çektiği yeni modül sayısını kaydet"""
+
+        if module_name in sys.modules:
+            return sys.modules[module_name]
+
+        before = len(sys.modules)
+        started = time.perf_counter()
+        module = importlib.import_module(module_name)
+        elapsed_ms = (time.perf_counter() - started) * 1000
+
+        with self._lock:
+            self.imports[module_name] = {
+                "ms": round(elapsed_ms, 2),
+                "new_modules": len(sys.modules) - before
+            }
+        return module
+
+    @contextmanager
+    def phase(self, name: str):
+        """Başlangıç fazını ölç"""
+
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            with self._lock:
+                self.phases[name] = round((time.perf_counter() - started) * 1000, 2)
+
+    def record(self, name: str, ms: float):
+        with self._lock:
+            self.phases[name] = round(ms, 2)
+
+    def to_dict(self) -> Dict:
+        with self._lock:
+            return {
+                "since_process_start_ms": round((time.perf_counter() - PROCESS_START) * 1000, 2),
+                "phases": dict(self.phases),
+                "deferred_imports": dict(self.imports),
+                "loaded_modules": len(sys.modules)
+            }
+
+
+startup_report = StartupReport()
+
+
+_IMPORTTIME_RE = re.compile(r'^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)')
+
+
+def measure_import_times(code: str) -> List[Dict]:
+    """`python -X importtime` ile verilen kodun import maliyetini modül bazında ölç"""
+
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', code],
+        stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True
+    )
+
+    rows = []
+    for line in result.stderr.splitlines():
+        match = _IMPORTTIME_RE.match(line)
+        if match:
+            rows.append({
+                "module": match.group(4),
+                "self_us": int(match.group(1)),
+                "cumulative_us": int(match.group(2)),
+                "depth": len(match.group(3)) // 2
+            })
+
+    if result.returncode != 0 and not rows:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1] if result.stderr.strip() else "import failed")
+
+    return rows
+
+
+def summarize_by_package(rows: List[Dict]) -> Dict[str, int]:
+    """Self sürelerini top-level paket bazında topla (us)"""
+
+    totals = {}
+    for row in rows:
+        package = row['module'].split('.')[0]
+        totals[package] = totals.get(package, 0) + row['self_us']
+    return dict(sorted(totals.items(), key=lambda item: item[1], reverse=True))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Startup import cost report')
+    parser.add_argument('--code', default='import main',
+                        help="Code to profile (default: the WSGI import path)")
+    parser.add_argument('--with-services', action='store_true',
+                        help='Also run initialize_services() (deferred imports)')
+    parser.add_argument('--top', type=int, default=20)
+    args = parser.parse_args()
+
+    code = args.code
+    if args.with_services:
+        code += '; main.initialize_services()'
+
+    rows = measure_import_times(code)
+    top_level = [r for r in rows if r['depth'] == 0]
+    total_us = sum(r['cumulative_us'] for r in top_level)
+
+    print(f"Profiled: {code}")
+    print(f"Total import time: {total_us / 1000:.1f} ms across {len(rows)} modules\n")
+
+    print(f"{'cumulative ms':>14}  {'self ms':>8}  module")
+    for row in sorted(rows, key=lambda r: r['cumulative_us'], reverse=True)[:args.top]:
+        print(f"{row['cumulative_us'] / 1000:>14.1f}  {row['self_us'] / 1000:>8.1f}  {row['module']}")
+
+    print(f"\n{'self ms':>14}  package")
+    for package, us in list(summarize_by_package(rows).items())[:args.top]:
+        print(f"{us / 1000:>14.1f}  {package}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,137 @@
+import re
+import time
+import logging
+import threading
+from collections import deque
+from typing import Dict, Iterable, List, Optional
+
+from utils.logging_setup import mask_email
+
+logger = logging.getLogger(__name__)
+
+# Ucuz ön kontroller - RFC'nin tamamı değil, HubSpot/SMTP'nin kesin reddedeceği biçimler
+EMAIL_PATTERN = re.compile(r'[^\s@<>",;]+@[^\s@<>",;.]+(?:\.[^\s@<>",;.]+)+')
+PHONE_PATTERN = re.compile(r'\+?[0-9][0-9\s().\-/]{5,24}')
+
+# Kategori başına: her grup için en az bir alan dolu olmalı ('bölüm.alan')
+REQUIRED_FIELDS = {
+    'education': (('education.programs', 'education.gpa'),),
+    'legal': (('legal.selected_services', 'legal.topic'),),
+    'business': (('business.company_name', 'business.selected_sectors', 'business.sector'),),
+}
+
+REJECT_REASONS = ('payload_too_large', 'too_many_fields', 'value_too_long', 'missing_email', 'invalid_email')
+QUARANTINE_REASONS = ('missing_contact',)
+# Opsiyonel alan geçersizse gönderim durmaz - alan temizlenip devam edilir
+STRIP_FIELDS = {'invalid_phone': 'phone'}
+
+
+class ValidationGate:
+    """HubSpot/SMTP çağrısından önce çalışan derlenmiş kontrol kapısı
+
+    check_payload ham gövdeye (boyut, alan sayısı, değer uzunluğu),
+    check çıkarılmış veriye (email/telefon biçimi, kategori alanları)
+    bakar. Sonuç action'ı: pass | reject (400, Tally düzeltemez) |
+    quarantine (HubSpot/onay çağrısı yapılmaz, gönderim yöneticiye
+    inceleme maili olarak gider). Diğer nedenler sadece sayılır; geçersiz
+    opsiyonel alanlar (telefon) verdict["strip"] ile temizlenip geçer.
+    """
+
+    def __init__(self, max_body_bytes: int = 65536, max_fields: int = 200, max_value_length: int = 10000,
+                 quarantine_reasons: Iterable[str] = QUARANTINE_REASONS,
+                 required_fields: Optional[Dict] = None, recent_size: int = 100):
+        self.max_body_bytes = max_body_bytes
+        self.max_fields = max_fields
+        self.max_value_length = max_value_length
+        self.reject_reasons = frozenset(REJECT_REASONS)
+        self.quarantine_reasons = frozenset(quarantine_reasons) - self.reject_reasons
+        self.required_fields = {
+            category: tuple(tuple(tuple(path.split('.')) for path in group) for group in groups)
+            for category, groups in (REQUIRED_FIELDS if required_fields is None else required_fields).items()
+        }
+        self.quarantined = deque(maxlen=recent_size)  # son karantina kayıtları - /metrics
+        self.stats = {"checked": 0, "passed": 0, "rejected": 0, "quarantined": 0, "flagged": 0, "stripped": 0,
+                      "reasons": {}, "check_us_total": 0.0}
+        self._lock = threading.Lock()
+
+    def _verdict(self, reasons: List[str], started: float, submission_id: str = '', email: str = '') -> Dict:
+        if any(reason in self.reject_reasons for reason in reasons):
+            action = 'reject'
+        elif any(reason in self.quarantine_reasons for reason in reasons):
+            action = 'quarantine'
+        else:
+            action = 'pass'
+        strip = [STRIP_FIELDS[reason] for reason in reasons if reason in STRIP_FIELDS] if action == 'pass' else []
+
+        with self._lock:
+            stats = self.stats
+            stats["checked"] += 1
+            stats["stripped"] += len(strip)
+            stats["check_us_total"] += (time.perf_counter() - started) * 1e6
+            stats[{"pass": "passed", "reject": "rejected", "quarantine": "quarantined"}[action]] += 1
+            if reasons and action == 'pass':
+                stats["flagged"] += 1
+            for reason in reasons:
+                stats["reasons"][reason] = stats["reasons"].get(reason, 0) + 1
+            if action == 'quarantine':
+                self.quarantined.append({"submission_id": submission_id, "email": mask_email(email),
+                                         "reasons": reasons, "at": time.time()})
+        return {"action": action, "reasons": reasons, "strip": strip}
+
+    def check_payload(self, data, raw_size: Optional[int] = None) -> Dict:
+        """Extraction öncesi - boyut ve alan limitleri"""
+
+        started = time.perf_counter()
+        reasons = []
+        if raw_size is not None and raw_size > self.max_body_bytes:
+            reasons.append('payload_too_large')
+        else:
+            section = data.get('data') if isinstance(data, dict) else None
+            fields = section.get('fields') if isinstance(section, dict) else None
+            if isinstance(fields, list):
+                if len(fields) > self.max_fields:
+                    reasons.append('too_many_fields')
+                elif any(isinstance(field, dict) and isinstance(field.get('value'), str)
+                         and len(field['value']) > self.max_value_length for field in fields):
+                    reasons.append('value_too_long')
+        if not reasons:
+            return {"action": "pass", "reasons": reasons, "strip": []}  # asıl sayım check'te
+        return self._verdict(reasons, started)
+
+    def check(self, extracted_data: Dict, category: str, contact_info: Dict) -> Dict:
+        """Extraction sonrası - iletişim bilgisi ve kategori alanları"""
+
+        started = time.perf_counter()
+        reasons = []
+
+        email = contact_info.get('email', '')
+        if not email:
+            reasons.append('missing_email')
+        elif len(email) > 254 or not EMAIL_PATTERN.fullmatch(email):
+            reasons.append('invalid_email')
+
+        phone = contact_info.get('phone', '')
+        if phone and (not PHONE_PATTERN.fullmatch(phone) or not 7 <= sum(c.isdigit() for c in phone) <= 15):
+            reasons.append('invalid_phone')
+
+        if not contact_info.get('fullname') and not phone:
+            reasons.append('missing_contact')
+
+        for group in self.required_fields.get(category, ()):
+            if not any((extracted_data.get(section) or {}).get(field) for section, field in group):
+                reasons.append('missing_category_fields')
+                break
+
+        verdict = self._verdict(reasons, started, extracted_data.get('submission_id', ''), email)
+        if verdict["action"] != 'pass':
+            logger.warning("Submission %s %s by validation gate: %s", extracted_data.get('submission_id', ''),
+                           "rejected" if verdict["action"] == 'reject' else "quarantined", ', '.join(reasons))
+        return verdict
+
+    def get_stats(self) -> Dict:
+        with self._lock:
+            stats = {**self.stats, "reasons": dict(self.stats["reasons"])}
+            recent = list(self.quarantined)
+        stats["avg_check_us"] = round(stats.pop("check_us_total") / stats["checked"], 2) if stats["checked"] else 0.0
+        stats["recent_quarantined"] = recent[-10:]
+        return stats
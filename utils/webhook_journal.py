@@ -0,0 +1,311 @@
+import os
+import sys
+import mmap
+import time
+import zlib
+import struct
+import logging
+import argparse
+import threading
+from datetime import datetime
+from typing import Dict, Iterator, List, NamedTuple, Optional
+
+logger = logging.getLogger(__name__)
+
+# Index kaydı: timestamp, data offset, sıkıştırılmış uzunluk, ham uzunluk, submission ID crc32
+INDEX_RECORD = struct.Struct('<dQIII')
+
+DATA_SUFFIX = '.seg'
+INDEX_SUFFIX = '.idx'
+
+
+def submission_hash(submission_id: str) -> int:
+    return zlib.crc32(submission_id.encode('utf-8')) if submission_id else 0
+
+
+class JournalRecord(NamedTuple):
+    timestamp: float
+    submission_hash: int
+    raw: bytes
+    segment: str
+    offset: int
+
+
+class WebhookJournal:
+    """Kabul edilen webhook body'lerini ham byte olarak saklayan append-only günlük
+
+    Her kayıt ayrı zlib bloğu olarak segment dosyasına eklenir, sabit boyutlu
+    index kaydı (.idx) offset'i tutar. Segment'ler boyut/yaş sınırında döner;
+    dosya adında pid olduğu için worker'lar birbirinin dosyasına yazmaz.
+    Her dönüşte eski segment'ler budanır: retention süresini geçenler ve
+    toplam boyut max_total_bytes'ı aşıyorsa en eskiler (Cloud Run'da /tmp
+    bellekte durur).
+    """
+
+    def __init__(self, directory: str, max_segment_bytes: int = 64 * 1024 * 1024,
+                 max_segment_age: float = 3600, retention_days: float = 7, compress_level: int = 6,
+                 max_total_bytes: int = 0):
+        self.directory = directory
+        self.max_segment_bytes = max_segment_bytes
+        self.max_segment_age = max_segment_age
+        self.retention_days = retention_days
+        self.compress_level = compress_level
+        self.max_total_bytes = max_total_bytes  # 0 = sınırsız
+
+        self._lock = threading.Lock()
+        self._data = None
+        self._index = None
+        self._segment = None
+        self._segment_opened = 0.0
+        self._sequence = 0
+        self._pid = None
+        self.stats = {"records": 0, "raw_bytes": 0, "stored_bytes": 0, "segments": 0, "pruned_segments": 0}
+        os.makedirs(directory, exist_ok=True)
+
+    def _open_segment(self):
+        self._close_segment()
+        self._sequence += 1
+        self._pid = os.getpid()
+        self._segment = f"journal-{time.strftime('%Y%m%d-%H%M%S', time.gmtime())}-{self._pid}-{self._sequence:04d}"
+        base = os.path.join(self.directory, self._segment)
+        self._data = open(base + DATA_SUFFIX, 'ab')
+        self._index = open(base + INDEX_SUFFIX, 'ab')
+        self._segment_opened = time.monotonic()
+        self.stats["segments"] += 1
+        try:
+            self._prune_locked()
+        except OSError as e:
+            logger.warning("Journal prune failed: %s", e)
+
+    def _close_segment(self):
+        for f in (self._data, self._index):
+            if f is not None and self._pid == os.getpid():
+                try:
+                    f.close()
+                except Exception:
+                    pass
+        self._data = self._index = None
+
+    def _needs_rotation(self) -> bool:
+        return (
+            self._data is None
+            or self._pid != os.getpid()  # Fork sonrası kendi segment'ini aç
+            or self._data.tell() >= self.max_segment_bytes
+            or time.monotonic() - self._segment_opened >= self.max_segment_age
+        )
+
+    def append(self, raw_body: bytes, submission_id: str = '', timestamp: Optional[float] = None) -> int:
+        """Body'yi olduğu gibi (yeniden serialize etmeden) ekle - data offset'i döner"""
+
+        compressed = zlib.compress(raw_body, self.compress_level)
+        timestamp = timestamp or time.time()
+        sid_hash = submission_hash(submission_id)
+
+        with self._lock:
+            if self._needs_rotation():
+                self._open_segment()
+
+            offset = self._data.tell()
+            self._data.write(compressed)
+            self._data.flush()
+            # Index kaydı data yazıldıktan sonra - okuyucu yarım kayıt görmez
+            self._index.write(INDEX_RECORD.pack(timestamp, offset, len(compressed), len(raw_body), sid_hash))
+            self._index.flush()
+
+            self.stats["records"] += 1
+            self.stats["raw_bytes"] += len(raw_body)
+            self.stats["stored_bytes"] += len(compressed)
+        return offset
+
+    def _segment_files(self) -> Dict[str, List]:
+        """{segment: [son değişiklik, toplam byte]} - .seg ve .idx birlikte"""
+
+        segments = {}
+        for entry in os.scandir(self.directory):
+            if not entry.name.endswith((DATA_SUFFIX, INDEX_SUFFIX)):
+                continue
+            try:
+                stat = entry.stat()
+            except FileNotFoundError:
+                continue  # Başka worker sildi
+            info = segments.setdefault(os.path.splitext(entry.name)[0], [0.0, 0])
+            info[0] = max(info[0], stat.st_mtime)
+            info[1] += stat.st_size
+        return segments
+
+    def _remove_segment(self, segment: str):
+        for suffix in (DATA_SUFFIX, INDEX_SUFFIX):
+            try:
+                os.remove(os.path.join(self.directory, segment + suffix))
+            except FileNotFoundError:
+                pass
+        self.stats["pruned_segments"] += 1
+
+    def _prune_locked(self) -> int:
+        segments = self._segment_files()
+        segments.pop(self._segment, None)  # Yazılmakta olan segment silinmez
+        cutoff = time.time() - self.retention_days * 86400
+        removed = 0
+
+        for segment, (mtime, _) in list(segments.items()):
+            if mtime < cutoff:
+                self._remove_segment(segment)
+                del segments[segment]
+                removed += 1
+
+        if self.max_total_bytes:
+            total = sum(size for _, size in segments.values())
+            if self._data is not None and self._pid == os.getpid():
+                total += self._data.tell()
+            for segment, (_, size) in sorted(segments.items(), key=lambda item: item[1][0]):
+                if total <= self.max_total_bytes:
+                    break
+                self._remove_segment(segment)
+                total -= size
+                removed += 1
+            if removed:
+                logger.info("Journal pruned %d segments, %d bytes kept", removed, total)
+        return removed
+
+    def prune(self) -> int:
+        """Retention süresini geçmiş ve toplam boyut sınırını aşan en eski segment'leri sil"""
+
+        with self._lock:
+            return self._prune_locked()
+
+    def close(self):
+        with self._lock:
+            self._close_segment()
+
+    def get_stats(self) -> Dict:
+        with self._lock:
+            return {**self.stats, "segment": self._segment}
+
+
+class JournalReader:
+    """Segment'leri mmap ile okur - index taraması decompress gerektirmez"""
+
+    def __init__(self, directory: str):
+        self.directory = directory
+
+    def segments(self) -> List[str]:
+        """Index'i olan segment'ler, isim (= açılış zamanı) sırasıyla"""
+
+        try:
+            names = os.listdir(self.directory)
+        except FileNotFoundError:
+            return []
+        return sorted(n[:-len(INDEX_SUFFIX)] for n in names if n.endswith(INDEX_SUFFIX))
+
+    @staticmethod
+    def _map(path: str) -> Optional[mmap.mmap]:
+        with open(path, 'rb') as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                return None
+            return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def iter_index(self, segment: str) -> Iterator[tuple]:
+        """(timestamp, offset, stored_len, raw_len, sid_hash) - sadece tam kayıtlar"""
+
+        index_map = self._map(os.path.join(self.directory, segment + INDEX_SUFFIX))
+        if index_map is None:
+            return
+        try:
+            # Index küçük (kayıt başına 28 byte) - kopyalanır, yarım kalan son kayıt atlanır
+            entries = index_map[:len(index_map) - len(index_map) % INDEX_RECORD.size]
+        finally:
+            index_map.close()
+        yield from INDEX_RECORD.iter_unpack(entries)
+
+    def iter_records(self, since: Optional[float] = None, until: Optional[float] = None,
+                     submission_id: Optional[str] = None) -> Iterator[JournalRecord]:
+        """Zaman aralığı / submission ID filtresiyle ham body'leri sırayla döndür"""
+
+        wanted_hash = submission_hash(submission_id) if submission_id else None
+        needle = submission_id.encode('utf-8') if submission_id else None
+
+        for segment in self.segments():
+            data_path = os.path.join(self.directory, segment + DATA_SUFFIX)
+            if not os.path.exists(data_path):
+                continue
+            data_map = self._map(data_path)
+            if data_map is None:
+                continue
+            try:
+                for timestamp, offset, stored_len, raw_len, sid_hash in self.iter_index(segment):
+                    if since is not None and timestamp < since:
+                        continue
+                    if until is not None and timestamp >= until:
+                        continue
+                    if wanted_hash is not None and sid_hash != wanted_hash:
+                        continue
+                    if offset + stored_len > len(data_map):
+                        break  # Yazılmakta olan segment
+
+                    raw = zlib.decompress(data_map[offset:offset + stored_len], bufsize=raw_len or zlib.DEF_BUF_SIZE)
+                    if needle is not None and needle not in raw:
+                        continue  # crc32 çakışması
+                    yield JournalRecord(timestamp, sid_hash, raw, segment, offset)
+            finally:
+                data_map.close()
+
+    def find(self, submission_id: str) -> List[JournalRecord]:
+        return list(self.iter_records(submission_id=submission_id))
+
+    def summary(self) -> Dict:
+        """Segment sayısı, kayıt sayısı, zaman aralığı ve sıkıştırma oranı"""
+
+        records = raw_bytes = stored_bytes = 0
+        first = last = None
+        segments = self.segments()
+        for segment in segments:
+            for timestamp, _, stored_len, raw_len, _ in self.iter_index(segment):
+                records += 1
+                raw_bytes += raw_len
+                stored_bytes += stored_len
+                first = timestamp if first is None else min(first, timestamp)
+                last = timestamp if last is None else max(last, timestamp)
+
+        return {
+            "segments": len(segments),
+            "records": records,
+            "raw_bytes": raw_bytes,
+            "stored_bytes": stored_bytes,
+            "compression_ratio": round(raw_bytes / stored_bytes, 2) if stored_bytes else None,
+            "first": datetime.fromtimestamp(first).isoformat() if first else None,
+            "last": datetime.fromtimestamp(last).isoformat() if last else None
+        }
+
+
+def _parse_time(value: Optional[str]) -> Optional[float]:
+    return datetime.fromisoformat(value).timestamp() if value else None
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Read the raw webhook journal')
+    parser.add_argument('directory')
+    parser.add_argument('--since', help='ISO timestamp (inclusive)')
+    parser.add_argument('--until', help='ISO timestamp (exclusive)')
+    parser.add_argument('--submission-id')
+    parser.add_argument('--summary', action='store_true', help='Print journal statistics instead of records')
+    args = parser.parse_args()
+
+    reader = JournalReader(args.directory)
+    if args.summary:
+        for key, value in reader.summary().items():
+            print(f"{key:>18}: {value}")
+        return
+
+    # Ham body'ler satır satır (JSONL) - tools.replay'e pipe edilebilir
+    out = sys.stdout.buffer
+    started = time.perf_counter()
+    count = 0
+    for record in reader.iter_records(_parse_time(args.since), _parse_time(args.until), args.submission_id):
+        out.write(record.raw.replace(b'\n', b' ') + b'\n')
+        count += 1
+    out.flush()
+    sys.stderr.write(f"{count} records in {time.perf_counter() - started:.2f}s\n")
+
+
+if __name__ == '__main__':
+    main()